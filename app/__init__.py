@@ -23,6 +23,10 @@ def create_app():
         except (ValueError, TypeError):
             return iso_str
     app.jinja_env.filters['to_sast'] = _to_sast
+
+    # Fragment cache for large partials: {% call cache_fragment(key, version) %}
+    from app.services.fragment_cache import cache_fragment
+    app.jinja_env.globals['cache_fragment'] = cache_fragment
     
     # Configuration
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-change-in-prod')
@@ -37,8 +41,10 @@ def create_app():
     
     # Initialize database
     from app.services.db import init_db
+    from app.services.change_log import prune_if_due
     with app.app_context():
         init_db(app)
+        prune_if_due(app.config['DATABASE_PATH'])
     
     # Register blueprints
     from app.routes.projects import projects_bp
@@ -91,59 +97,8 @@ def create_app():
         
         # Inspectors get their own home page with assigned units only
         if role in ('inspector', 'office_admin'):
-            from app.services.db import query_db
-            tenant_id = session['tenant_id']
-            user_id = session['user_id']
-            
-            # Get inspections assigned to this inspector
-            inspections = query_db("""
-                SELECT i.id AS inspection_id, i.status AS inspection_status,
-                       i.inspection_date, i.started_at, i.submitted_at,
-                       u.id AS unit_id, u.unit_number, u.block, u.floor,
-                       ic.cycle_number, ic.id AS cycle_id,
-                       (SELECT COUNT(*) FROM inspection_item ii
-                        WHERE ii.inspection_id = i.id
-                        AND ii.status != 'skipped' AND NOT (ii.status = 'ok' AND ii.marked_at IS NULL AND COALESCE(ii.has_prior_defects, 0) = 0)) AS total_items,
-                       (SELECT COUNT(*) FROM inspection_item ii
-                        WHERE ii.inspection_id = i.id
-                        AND ii.status NOT IN ('skipped', 'pending') AND NOT (ii.status = 'ok' AND ii.marked_at IS NULL AND COALESCE(ii.has_prior_defects, 0) = 0)) AS completed_items,
-                       (SELECT COUNT(*) FROM inspection_defect idef
-                        WHERE idef.inspection_id = i.id) AS defect_count,
-                       (SELECT COUNT(*) FROM defect d2
-                        JOIN inspection_cycle ic2 ON d2.raised_cycle_id = ic2.id
-                        WHERE d2.unit_id = u.id AND d2.status = 'open'
-                        AND ic2.cycle_number < ic.cycle_number
-                        AND d2.tenant_id = i.tenant_id) AS prior_open_defects,
-                       (SELECT COUNT(*) FROM defect d3
-                        JOIN inspection_cycle ic3 ON d3.raised_cycle_id = ic3.id
-                        WHERE d3.unit_id = u.id
-                        AND ic3.cycle_number < ic.cycle_number
-                        AND d3.tenant_id = i.tenant_id) AS prior_defects_total
-                FROM inspection i
-                JOIN unit u ON i.unit_id = u.id
-                JOIN inspection_cycle ic ON i.cycle_id = ic.id
-                WHERE i.inspector_id = ? AND i.tenant_id = ?
-                AND i.status IN ('not_started', 'in_progress', 'paused')
-                ORDER BY
-                    CASE i.status WHEN 'in_progress' THEN 0 WHEN 'paused' THEN 1 ELSE 2 END,
-                    u.unit_number
-            """, [user_id, tenant_id])
-            
-            inspections = [dict(r) for r in inspections]
-
-            # v328: For C2+ inspections, override carried_ok cohort numbers with
-            # desnag-cohort totals (defects + latents + newly-visible items) so
-            # this card matches batch detail, live view, and the desnag screen.
-            # C1 rows keep carried_ok cohort (no desnag flow at C1).
-            from app.routes.inspection import _desnag_progress
-            for insp in inspections:
-                if (insp.get('cycle_number') or 0) > 1:
-                    p = _desnag_progress(insp['unit_id'], tenant_id, insp['cycle_number'])
-                    insp['total_items'] = p['total']
-                    insp['completed_items'] = p['addressed']
-                    insp['defect_count'] = p['still_open']
-                    insp['prior_open_defects'] = 0
-
+            from app.routes.inspection import _inspector_home_rows
+            inspections = _inspector_home_rows(session['tenant_id'], session['user_id'])
             return render_template('inspector_home.html', inspections=inspections)
         
         # Manager/admin go to Pipeline Dashboard
@@ -193,7 +148,65 @@ def create_app():
         """Clear session."""
         session.clear()
         return redirect(url_for('login'))
-    
+
+    from app.auth import require_admin
+
+    @app.route('/conditional-stats')
+    @require_admin
+    def conditional_stats():
+        """304 hit rates of the HTMX polling partials (this worker)."""
+        from flask import jsonify
+        from app.services.conditional import get_conditional_stats
+        return jsonify(get_conditional_stats())
+
+    @app.route('/fragment-stats')
+    @require_admin
+    def fragment_stats():
+        """Fragment cache hit rate, size and evictions (this worker)."""
+        from flask import jsonify
+        from app.services.fragment_cache import get_fragment_stats
+        return jsonify(get_fragment_stats())
+
+    @app.route('/live-row-stats')
+    @require_admin
+    def live_row_stats():
+        """Live monitor row cache reuse rate and size (this worker)."""
+        from flask import jsonify
+        from app.services.live_rows import get_live_row_stats
+        return jsonify(get_live_row_stats())
+
+    @app.route('/report-cache-stats')
+    @require_admin
+    def report_cache_stats():
+        """Report data cache hits (this worker) and entries on disk."""
+        from flask import jsonify
+        from app.services.report_cache import get_report_cache_stats
+        return jsonify(get_report_cache_stats())
+
+    @app.route('/batch-frame-stats')
+    @require_admin
+    def batch_frame_stats():
+        """Per-section build times of the batch report and site briefing (this worker)."""
+        from flask import jsonify
+        from app.services.batch_frame import get_batch_frame_stats
+        return jsonify(get_batch_frame_stats())
+
+    @app.route('/event-stats')
+    @require_admin
+    def event_stats():
+        """Open / refused SSE streams and version re-reads (this worker)."""
+        from flask import jsonify
+        from app.services.events import get_event_stats
+        return jsonify(get_event_stats())
+
+    @app.route('/latent-bullet-stats')
+    @require_admin
+    def latent_bullet_stats():
+        """Outstanding-items latent bullet cache hit rate and size (this worker)."""
+        from flask import jsonify
+        from app.services.outstanding_items import get_latent_bullet_stats
+        return jsonify(get_latent_bullet_stats())
+
     # Context processor for templates
     @app.context_processor
     def inject_user():
@@ -7,6 +7,18 @@ from flask import Blueprint, render_template, session, request, make_response
 from app.auth import require_manager, require_office_admin, require_team_lead, require_admin
 import math
 from app.services.db import query_db
+from app.services.stats_cache import cached_stat
+from app.services.defect_facts import count_cleared, count_open, count_raised, query_facts, trend_series
+from app.services.report_cache import cached_report
+from app.services.defect_cohorts import BATCH_LABEL_SQL, breakdown, breakdowns
+from app.services.zone_summary import zone_rows
+from app.services.inspection_metrics import duration_label, parse_ts, query_with_metrics
+from app.services.batch_frame import BatchFrame, by_count_desc, sql_order, timed
+from app.services.outstanding_items import (EXPORT_COLUMNS as OUTSTANDING_EXPORT_COLUMNS,
+                                           FLOOR_LABELS as OUTSTANDING_FLOOR_LABELS,
+                                           Totals as OutstandingTotals, export_rows as outstanding_export_rows,
+                                           iter_blocks as iter_outstanding_blocks,
+                                           iter_units as iter_outstanding_units)
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
 
@@ -26,12 +38,6 @@ AREA_COLOURS = {
 BATCH_COLOURS = ['#C8963E', '#3D6B8E', '#4A7C59', '#C44D3F', '#7B6B8D', '#5A8A7A', '#B07D4B']
 FLOOR_LABELS = {0: 'Ground', 1: '1st Floor', 2: '2nd Floor', 3: '3rd Floor'}
 
-# SQL fragment for batch label (used in GROUP BY queries)
-BATCH_LABEL_SQL = ("(ic.block || ' ' || CASE ic.floor "
-                   "WHEN 0 THEN 'Ground' WHEN 1 THEN '1st Floor' "
-                   "WHEN 2 THEN '2nd Floor' WHEN 3 THEN '3rd Floor' "
-                   "ELSE 'Floor ' || ic.floor END)")
-
 
 
 # ============================================================
@@ -40,12 +46,15 @@ BATCH_LABEL_SQL = ("(ic.block || ' ' || CASE ic.floor "
 
 ITEMS_PER_UNIT = 509
 def get_project_total_units(tenant_id):
-    """Live count of real 4-bed units (excludes TEST units). Single source of truth."""
-    row = query_db(
-        "SELECT COUNT(DISTINCT u.id) AS n FROM unit_real u "
-        "WHERE u.tenant_id = ? AND u.unit_number NOT LIKE 'TEST%'",
-        [tenant_id], one=True)
-    return row['n'] if row else 0
+    """Count of real 4-bed units (excludes TEST units). Single source of truth.
+    Cached in stat_cache; units are only added by import scripts, so the TTL suffices."""
+    def _count():
+        row = query_db(
+            "SELECT COUNT(DISTINCT u.id) AS n FROM unit_real u "
+            "WHERE u.tenant_id = ? AND u.unit_number NOT LIKE 'TEST%'",
+            [tenant_id], one=True)
+        return row['n'] if row else 0
+    return cached_stat(tenant_id, 'project_total_units', _count)
 CARD_COLOURS = ['#C8963E', '#3D6B8E', '#4A7C59', '#C44D3F', '#7B6B8D', '#5A8A7A', '#B07D4B']
 
 
@@ -65,83 +74,13 @@ def dashboard():
     """Analytics Dashboard - block+floor cards with project overview."""
     tenant_id = session.get('tenant_id', 'MONOGRAPH')
 
-    # 1. Unit counts per block+floor
-    unit_counts_raw = query_db("""
-        SELECT u.block, u.floor, COUNT(DISTINCT u.id) as total_units
-        FROM unit_real u
-        WHERE u.tenant_id = ? AND u.unit_number NOT LIKE 'TEST%'
-        GROUP BY u.block, u.floor
-        ORDER BY u.block, u.floor
-    """, [tenant_id])
-    unit_counts = [dict(r) for r in unit_counts_raw]
+    # 1-4. Zone cards: units, open defects, rounds, certified, inspected per block+floor
+    unit_counts = zone_rows(tenant_id)
 
     if not unit_counts:
         return render_template('analytics/dashboard_v2.html',
                                has_data=False, cards=[], project={})
 
-    # 2. Open defects per block+floor
-    defect_counts_raw = query_db("""
-        SELECT u.block, u.floor, COUNT(d.id) as open_defects
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        WHERE d.tenant_id = ? AND d.status = 'open'
-        AND d.raised_cycle_id NOT LIKE 'test-%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup'))
-        AND d.raised_cycle_number = 1
-        GROUP BY u.block, u.floor
-    """, [tenant_id])
-    defect_map = {}
-    for r in defect_counts_raw:
-        defect_map[(r['block'], r['floor'])] = r['open_defects']
-
-    # 3. Round breakdown per block+floor
-    rounds_raw = query_db("""
-        SELECT u.block, u.floor, i.cycle_number as round_number,
-            COUNT(DISTINCT i.unit_id) as units_inspected
-        FROM inspection i
-        JOIN unit_real u ON i.unit_id = u.id
-        WHERE i.tenant_id = ? AND i.cycle_id NOT LIKE 'test-%'
-        AND i.status IN ('reviewed','approved','certified','pending_followup')
-        GROUP BY u.block, u.floor, i.cycle_number
-        ORDER BY u.block, u.floor, i.cycle_number
-    """, [tenant_id])
-    rounds_map = {}
-    for r in rounds_raw:
-        key = (r['block'], r['floor'])
-        if key not in rounds_map:
-            rounds_map[key] = []
-        rounds_map[key].append({
-            'round_number': r['round_number'],
-            'units_inspected': r['units_inspected'],
-        })
-
-    # 4. Certified counts per block+floor
-    certified_raw = query_db("""
-        SELECT u.block, u.floor, COUNT(DISTINCT i.unit_id) as certified
-        FROM inspection i
-        JOIN unit_real u ON i.unit_id = u.id
-        WHERE i.tenant_id = ? AND i.status = 'certified'
-        AND i.cycle_id NOT LIKE 'test-%'
-        GROUP BY u.block, u.floor
-    """, [tenant_id])
-    certified_map = {}
-    for r in certified_raw:
-        certified_map[(r['block'], r['floor'])] = r['certified']
-
-    # 4b. Inspected units per block+floor
-    inspected_zone_raw = query_db("""
-        SELECT u.block, u.floor, COUNT(DISTINCT i.unit_id) as inspected
-        FROM inspection i
-        JOIN unit_real u ON i.unit_id = u.id
-        WHERE i.tenant_id = ? AND i.cycle_id NOT LIKE 'test-%'
-        AND i.status IN ('reviewed','approved','certified','pending_followup')
-        AND i.cycle_number = 1
-        GROUP BY u.block, u.floor
-    """, [tenant_id])
-    inspected_zone_map = {}
-    for r in inspected_zone_raw:
-        inspected_zone_map[(r['block'], r['floor'])] = r['inspected']
-
     # 5. Build cards
     cards = []
     total_units_project = 0
@@ -149,12 +88,11 @@ def dashboard():
     total_certified_project = 0
 
     for idx, uc in enumerate(unit_counts):
-        key = (uc['block'], uc['floor'])
         total_units = uc['total_units']
-        open_defects = defect_map.get(key, 0)
-        rounds = rounds_map.get(key, [])
-        certified = certified_map.get(key, 0)
-        inspected = inspected_zone_map.get(key, 0)
+        open_defects = uc['open_defects']
+        rounds = [{'round_number': n, 'units_inspected': units} for n, units in sorted(uc['rounds'].items())]
+        certified = uc['certified']
+        inspected = uc['inspected']
         max_round = max((r['round_number'] for r in rounds), default=0)
         avg_defects = round(open_defects / inspected, 1) if inspected > 0 else 0
         items_inspected = ITEMS_PER_UNIT * inspected
@@ -193,23 +131,16 @@ def dashboard():
         'certified': total_certified_project,
     }
 
-    # 7. Inspected-only metrics (honest numbers)
-    inspected_raw = query_db("""
-        SELECT COUNT(DISTINCT i.unit_id) as inspected
-        FROM inspection i
-        JOIN unit_real u ON u.id = i.unit_id
-        WHERE i.tenant_id = ? AND i.cycle_id NOT LIKE 'test-%'
-        AND i.status IN ('reviewed','approved','certified','pending_followup')
-        AND i.cycle_number = 1
-    """, [tenant_id], one=True)
-    units_inspected = inspected_raw['inspected'] if inspected_raw else 0
+    # 7. Inspected-only metrics (honest numbers); every unit sits in one zone
+    units_inspected = sum(uc['inspected'] for uc in unit_counts)
     items_inspected = ITEMS_PER_UNIT * units_inspected
+    project_total = get_project_total_units(tenant_id)
     project['units_inspected'] = units_inspected
-    project['pct_complete'] = round(units_inspected / get_project_total_units(tenant_id) * 100) if get_project_total_units(tenant_id) > 0 else 0
+    project['pct_complete'] = round(units_inspected / project_total * 100) if project_total > 0 else 0
     project['avg_defects_inspected'] = round(total_defects_project / units_inspected, 1) if units_inspected > 0 else 0
     project['defect_rate_inspected'] = round(total_defects_project / items_inspected * 100, 1) if items_inspected > 0 else 0
     project['items_inspected'] = items_inspected
-    project['project_total'] = get_project_total_units(tenant_id)
+    project['project_total'] = project_total
 
     # 7c. Completion forecast
     from datetime import date, timedelta
@@ -232,7 +163,7 @@ def dashboard():
         done = forecast_raw['done']
         elapsed = (last - first).days or 1
         rate = done / elapsed
-        remaining = get_project_total_units(tenant_id) - done
+        remaining = project_total - done
         days_left = round(remaining / rate) if rate > 0 else None
         est_date = last + timedelta(days=days_left) if days_left else None
         forecast = {
@@ -835,24 +766,16 @@ def batch_analytics(batch_id):
         'vs_project_ratio': round(batch_defect_rate / proj_defect_rate, 2) if proj_defect_rate > 0 else 0,
     }
 
-    # 6. Area breakdown scoped to batch cycles
-    area_data = []
+    # 6. Area, deep-dive, top-defect and trade breakdowns scoped to batch cycles (one query)
+    cohort = {'areas': [], 'area_comments': [], 'top': [], 'trades': []}
     if all_cycle_ids:
-        ph = ','.join('?' * len(all_cycle_ids))
-        area_query = (
-            "SELECT at2.area_name AS area, COUNT(d.id) AS defect_count "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "JOIN area_template at2 ON ct.area_id = at2.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-            "AND d.raised_cycle_id IN ({}) "
-            "GROUP BY at2.area_name ORDER BY defect_count DESC"
-        ).format(ph)
-        area_raw = query_db(area_query, [tenant_id, batch_id, tenant_id] + all_cycle_ids)
-        area_data = [dict(r) for r in area_raw]
+        cohort = breakdowns(tenant_id, {
+            'areas': breakdown('area'),
+            'area_comments': breakdown('area', 'comment'),
+            'top': breakdown('comment', limit=10),
+            'trades': breakdown('trade'),
+        }, filters={'batch': batch_id}, real_units=False)
+    area_data = [{'area': r['area'], 'defect_count': r['defects']} for r in cohort['areas']]
     area_max = area_data[0]['defect_count'] if area_data else 1
     area_counts_sorted = sorted([a['defect_count'] for a in area_data])
     if area_counts_sorted:
@@ -866,24 +789,8 @@ def batch_analytics(batch_id):
     dd_colours = ['#C8963E', '#3D6B8E']
     for idx, area_row in enumerate(area_data[:2]):
         area_name = area_row['area']
-        if all_cycle_ids:
-            ph = ','.join('?' * len(all_cycle_ids))
-            dd_query = (
-                "SELECT d.original_comment AS description, COUNT(*) AS count "
-                "FROM defect d "
-                "JOIN item_template it ON d.item_template_id = it.id "
-                "JOIN category_template ct ON it.category_id = ct.id "
-                "JOIN area_template at2 ON ct.area_id = at2.id "
-                "WHERE d.tenant_id = ? AND d.status = 'open' "
-                "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-                "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-                "AND d.raised_cycle_id IN ({}) "
-                "AND at2.area_name = ? "
-                "GROUP BY d.original_comment ORDER BY count DESC LIMIT 3"
-            ).format(ph)
-            dd_raw = [dict(r) for r in query_db(dd_query, [tenant_id, batch_id, tenant_id] + all_cycle_ids + [area_name])]
-        else:
-            dd_raw = []
+        dd_raw = [{'description': r['comment'], 'count': r['defects']}
+                  for r in cohort['area_comments'] if r['area'] == area_name][:3]
         max_dd = dd_raw[0]['count'] if dd_raw else 1
         for d in dd_raw:
             d['bar_pct'] = round(d['count'] / max_dd * 100)
@@ -900,20 +807,8 @@ def batch_analytics(batch_id):
             dd_callout += ' In {}, {} leads with {} occurrences.'.format(a2['area'].title(), d2['description'].lower(), d2['count'])
 
     # 7c. Top defect types scoped to batch
-    top_defects = []
+    top_defects = [{'description': r['comment'], 'cnt': r['defects']} for r in cohort['top']]
     td_median = 0
-    if all_cycle_ids:
-        ph = ','.join('?' * len(all_cycle_ids))
-        td_query = (
-            "SELECT original_comment AS description, COUNT(*) AS cnt "
-            "FROM defect "
-            "WHERE tenant_id = ? AND status = 'open' "
-            "AND unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = defect.unit_id AND i2.cycle_id = defect.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-            "AND raised_cycle_id IN ({}) "
-            "GROUP BY original_comment ORDER BY cnt DESC LIMIT 10"
-        ).format(ph)
-        top_defects = [dict(r) for r in query_db(td_query, [tenant_id, batch_id, tenant_id] + all_cycle_ids)]
     td_counts = sorted([d['cnt'] for d in top_defects])
     if td_counts:
         mid = len(td_counts) // 2
@@ -961,22 +856,8 @@ def batch_analytics(batch_id):
                 r['cat_breakdown'] = cat_map.get(r['original_comment'], [])
 
     # 7e. Category/trade breakdown scoped to batch
-    category_data = []
+    category_data = [{'category': r['trade'], 'count': r['defects']} for r in cohort['trades']]
     cat_median = 0
-    if all_cycle_ids:
-        ph = ','.join('?' * len(all_cycle_ids))
-        cat_query = (
-            "SELECT ct.category_name AS category, COUNT(d.id) AS count "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-            "AND d.raised_cycle_id IN ({}) "
-            "GROUP BY ct.category_name ORDER BY count DESC"
-        ).format(ph)
-        category_data = [dict(r) for r in query_db(cat_query, [tenant_id, batch_id, tenant_id] + all_cycle_ids)]
     cat_counts = sorted([c['count'] for c in category_data])
     if cat_counts:
         mid = len(cat_counts) // 2
@@ -1432,20 +1313,12 @@ def block_detail(block_slug):
             'slug': '{}/{}'.format(block_slug, z['floor']),
         })
 
-    # Block-wide area breakdown
-    area_data = [dict(r) for r in query_db("""
-        SELECT at2.area_name as area, COUNT(d.id) as defect_count
-        FROM defect d
-        JOIN item_template it ON d.item_template_id = it.id
-        JOIN category_template ct ON it.category_id = ct.id
-        JOIN area_template at2 ON ct.area_id = at2.id
-        JOIN unit_real u ON d.unit_id = u.id
-        WHERE d.status = 'open' AND d.tenant_id = ? AND u.block = ?
-        AND u.unit_number NOT LIKE 'TEST%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup'))
-        GROUP BY at2.area_name
-        ORDER BY defect_count DESC
-    """, [tenant_id, block])]
+    # Block-wide area breakdown and top defect types (one query over the block cohort)
+    cohort = breakdowns(tenant_id, {
+        'areas': breakdown('area'),
+        'top': breakdown('comment', limit=10),
+    }, filters={'block': block})
+    area_data = [{'area': r['area'], 'defect_count': r['defects']} for r in cohort['areas']]
 
     if area_data:
         max_area = area_data[0]['defect_count']
@@ -1454,18 +1327,7 @@ def block_detail(block_slug):
             a['bar_pct'] = round(a['defect_count'] / max_area * 100) if max_area > 0 else 0
             a['colour'] = AREA_COLOURS.get(a['area'], '#6B6B6B')
 
-    # Block-wide top defect types
-    top_defects = [dict(r) for r in query_db("""
-        SELECT d.original_comment as description, COUNT(*) as count
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        WHERE d.status = 'open' AND d.tenant_id = ? AND u.block = ?
-        AND u.unit_number NOT LIKE 'TEST%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup'))
-        GROUP BY d.original_comment
-        ORDER BY count DESC
-        LIMIT 10
-    """, [tenant_id, block])]
+    top_defects = [{'description': r['comment'], 'count': r['defects']} for r in cohort['top']]
 
     return render_template('analytics/block_detail.html',
                            block=block,
@@ -1497,84 +1359,47 @@ def explore():
     f_category = request.args.get('category')
     f_round = request.args.get('round', type=int)
 
-    # Build WHERE clauses and params
-    where_parts = ["d.tenant_id = ?", "d.status = 'open'", "u.unit_number NOT LIKE 'TEST%'", "EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup'))"]
-    params = [tenant_id]
-
-    if f_block:
-        where_parts.append("u.block = ?")
-        params.append(f_block)
-    if f_floor is not None:
-        where_parts.append("u.floor = ?")
-        params.append(f_floor)
-    if f_unit:
-        where_parts.append("u.unit_number = ?")
-        params.append(f_unit)
-    if f_area:
-        where_parts.append("at2.area_name = ?")
-        params.append(f_area)
-    if f_category:
-        where_parts.append("ct.category_name = ?")
-        params.append(f_category)
-    if f_round:
-        where_parts.append("d.raised_cycle_number = ?")
-        params.append(f_round)
-
-    where_sql = " AND ".join(where_parts)
-
-    # Base FROM clause (always the same full join chain)
-    from_sql = """
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        JOIN item_template it ON d.item_template_id = it.id
-        JOIN category_template ct ON it.category_id = ct.id
-        JOIN area_template at2 ON ct.area_id = at2.id
-    """
-
-    # Summary for current scope
-    summary = dict(query_db("""
-        SELECT COUNT(DISTINCT d.id) as total_defects,
-               COUNT(DISTINCT u.id) as total_units,
-               COUNT(DISTINCT u.block) as block_count
-        {} WHERE {}
-    """.format(from_sql, where_sql), params, one=True))
+    # ---- LOCATION / DEFECT LEVELS ----
+    # Show the next level of each hierarchy the user hasn't filtered to yet
+    if not f_block:
+        location_level, location_by = 'block', breakdown('block', measures=('defects', 'units'))
+    elif f_floor is None:
+        location_level, location_by = 'floor', breakdown('floor', measures=('defects', 'units'))
+    elif not f_unit:
+        location_level, location_by = 'unit', breakdown('unit')
+    else:
+        location_level, location_by = None, None
 
+    if not f_area:
+        defect_level, defect_by = 'area', breakdown('area', measures=('defects', 'units'))
+    elif not f_category:
+        defect_level, defect_by = 'category', breakdown('trade', measures=('defects', 'units'))
+    else:
+        defect_level, defect_by = 'item', breakdown('comment', measures=('defects', 'units'))
+
+    # Summary, location and defect breakdowns share one scope (full template chain)
+    groupings = {'summary': breakdown(measures=('defects', 'units', 'blocks')), 'defect': defect_by}
+    if location_by:
+        groupings['location'] = location_by
+    cohort = breakdowns(tenant_id, groupings, filters={
+        'block': f_block, 'floor': f_floor, 'unit': f_unit,
+        'area': f_area, 'trade': f_category, 'round': f_round or None,
+    }, require=('area',))
+
+    totals = cohort['summary'][0]
+    summary = {'total_defects': totals['defects'], 'total_units': totals['units'],
+               'block_count': totals['blocks']}
     avg_per_unit = round(summary['total_defects'] / summary['total_units'], 1) if summary['total_units'] > 0 else 0
     summary['avg_per_unit'] = avg_per_unit
 
-    # ---- LOCATION BREAKDOWN ----
-    # Show the next level of location hierarchy the user hasn't filtered to yet
     location_data = []
-    location_level = None
-
-    if not f_block:
-        # Show blocks
-        location_level = 'block'
-        location_data = [dict(r) for r in query_db("""
-            SELECT u.block as name, COUNT(DISTINCT d.id) as defects,
-                   COUNT(DISTINCT u.id) as units
-            {} WHERE {}
-            GROUP BY u.block ORDER BY defects DESC
-        """.format(from_sql, where_sql), params)]
-    elif f_floor is None:
-        # Show floors within block
-        location_level = 'floor'
-        location_data = [dict(r) for r in query_db("""
-            SELECT u.floor as name, COUNT(DISTINCT d.id) as defects,
-                   COUNT(DISTINCT u.id) as units
-            {} WHERE {}
-            GROUP BY u.floor ORDER BY defects DESC
-        """.format(from_sql, where_sql), params)]
-        for loc in location_data:
+    for r in cohort.get('location', []):
+        loc = {'name': r[location_by['by'][0]], 'defects': r['defects']}
+        if 'units' in r:
+            loc['units'] = r['units']
+        if location_level == 'floor':
             loc['display'] = FLOOR_LABELS.get(loc['name'], 'Floor {}'.format(loc['name']))
-    elif not f_unit:
-        # Show units within zone
-        location_level = 'unit'
-        location_data = [dict(r) for r in query_db("""
-            SELECT u.unit_number as name, COUNT(DISTINCT d.id) as defects
-            {} WHERE {}
-            GROUP BY u.unit_number ORDER BY defects DESC
-        """.format(from_sql, where_sql), params)]
+        location_data.append(loc)
 
     # Add percentages and bar widths to location data
     if location_data:
@@ -1586,37 +1411,8 @@ def explore():
                 loc['display'] = str(loc['name'])
 
     # ---- DEFECT BREAKDOWN ----
-    # Show the next level of defect hierarchy the user hasn't filtered to yet
-    defect_data = []
-    defect_level = None
-
-    if not f_area:
-        # Show areas
-        defect_level = 'area'
-        defect_data = [dict(r) for r in query_db("""
-            SELECT at2.area_name as name, COUNT(DISTINCT d.id) as defects,
-                   COUNT(DISTINCT u.id) as units
-            {} WHERE {}
-            GROUP BY at2.area_name ORDER BY defects DESC
-        """.format(from_sql, where_sql), params)]
-    elif not f_category:
-        # Show categories within area
-        defect_level = 'category'
-        defect_data = [dict(r) for r in query_db("""
-            SELECT ct.category_name as name, COUNT(DISTINCT d.id) as defects,
-                   COUNT(DISTINCT u.id) as units
-            {} WHERE {}
-            GROUP BY ct.category_name ORDER BY defects DESC
-        """.format(from_sql, where_sql), params)]
-    else:
-        # Show individual defect descriptions within category
-        defect_level = 'item'
-        defect_data = [dict(r) for r in query_db("""
-            SELECT d.original_comment as name, COUNT(DISTINCT d.id) as defects,
-                   COUNT(DISTINCT u.id) as units
-            {} WHERE {}
-            GROUP BY d.original_comment ORDER BY defects DESC
-        """.format(from_sql, where_sql), params)]
+    defect_data = [{'name': r[defect_by['by'][0]], 'defects': r['defects'], 'units': r['units']}
+                   for r in cohort['defect']]
 
     # Add colours and bar widths to defect data
     if defect_data:
@@ -3147,12 +2943,13 @@ def _build_unified_report_data():
     """, [tenant_id], one=True)
     units_inspected = units_inspected_raw['inspected'] if units_inspected_raw else 0
     items_inspected_total = ITEMS_PER_UNIT * units_inspected
+    project_total = get_project_total_units(tenant_id)
 
     project = {
         'total_units': total_units_project,
         'units_inspected': units_inspected,
-        'project_total': get_project_total_units(tenant_id),
-        'pct_complete': round(units_inspected / get_project_total_units(tenant_id) * 100) if get_project_total_units(tenant_id) > 0 else 0,
+        'project_total': project_total,
+        'pct_complete': round(units_inspected / project_total * 100) if project_total > 0 else 0,
         'open_defects': total_defects_project,
         'avg_defects': round(total_defects_project / units_inspected, 1) if units_inspected > 0 else 0,
         'defect_rate': round(total_defects_project / items_inspected_total * 100, 1) if items_inspected_total > 0 else 0,
@@ -3499,7 +3296,7 @@ def _build_unified_report_data():
         _done = _fc_raw['done']
         _elapsed = (_last - _first).days or 1
         _rate = _done / _elapsed
-        _remaining = get_project_total_units(tenant_id) - _done
+        _remaining = project_total - _done
         _days_left = round(_remaining / _rate) if _rate > 0 else None
         _est = _last + timedelta(days=_days_left) if _days_left else None
         forecast = {
@@ -3614,6 +3411,9 @@ def batch_report_pdf(batch_id):
 def _build_batch_report_data(batch_id):
     """Build data for batch inspection report.
     Returns dict with all template variables, or None if batch not found.
+
+    Sections are grouped in memory from one BatchFrame extract (roster +
+    defects); see app/services/batch_frame.py.
     """
     import base64, os
     from flask import current_app, session
@@ -3635,38 +3435,34 @@ def _build_batch_report_data(batch_id):
     batch = dict(batch_row)
 
     # 2. Project average benchmark
-    proj_avg_row = query_db("""
-        SELECT AVG(sub.defect_count) as project_avg
-        FROM (
-            SELECT i.unit_id, COUNT(d.id) as defect_count
-            FROM inspection i
-            JOIN unit_real u ON i.unit_id = u.id
-            LEFT JOIN defect d ON d.unit_id = i.unit_id
-                AND d.raised_cycle_id = i.cycle_id
-                AND d.status = 'open'
-                AND d.tenant_id = i.tenant_id
-            WHERE i.tenant_id = ?
-            AND i.status IN ('reviewed','approved','certified','pending_followup')
-            AND u.unit_number NOT LIKE 'TEST%'
-            AND i.cycle_id NOT LIKE 'test-%'
-            GROUP BY i.unit_id
-        ) sub
-    """, [tenant_id], one=True)
+    with timed('batch_report', 'project_avg'):
+        proj_avg_row = query_db("""
+            SELECT AVG(sub.defect_count) as project_avg
+            FROM (
+                SELECT i.unit_id, COUNT(d.id) as defect_count
+                FROM inspection i
+                JOIN unit_real u ON i.unit_id = u.id
+                LEFT JOIN defect d ON d.unit_id = i.unit_id
+                    AND d.raised_cycle_id = i.cycle_id
+                    AND d.status = 'open'
+                    AND d.tenant_id = i.tenant_id
+                WHERE i.tenant_id = ?
+                AND i.status IN ('reviewed','approved','certified','pending_followup')
+                AND u.unit_number NOT LIKE 'TEST%'
+                AND i.cycle_id NOT LIKE 'test-%'
+                GROUP BY i.unit_id
+            ) sub
+        """, [tenant_id], one=True)
     project_avg_raw = proj_avg_row['project_avg'] or 0 if proj_avg_row and proj_avg_row['project_avg'] else 0
     project_avg = round(project_avg_raw, 1)
     proj_defect_rate = round(project_avg_raw / ITEMS_PER_UNIT * 100, 1) if project_avg_raw > 0 else 0
 
-    # 3. Zones in this batch
-    zones_raw = [dict(r) for r in query_db("""
-        SELECT ic.block, ic.floor, ic.id as cycle_id, ic.cycle_number,
-               COUNT(DISTINCT bu.unit_id) as zone_units
-        FROM batch_unit bu
-        JOIN inspection_cycle ic ON bu.cycle_id = ic.id
-        WHERE bu.batch_id = ? AND bu.removed_at IS NULL AND bu.tenant_id = ?
-        GROUP BY ic.block, ic.floor, ic.id, ic.cycle_number
-        ORDER BY ic.block, ic.floor
-    """, [batch_id, tenant_id])]
-    all_cycle_ids = [z['cycle_id'] for z in zones_raw]
+    # 3. Zones in this batch (one extract of roster + defects for every section below)
+    with timed('batch_report', 'extract'):
+        frame = BatchFrame(tenant_id, batch_id)
+    roster, defects = frame.roster, frame.defects
+    zones_raw = frame.zones()
+    all_cycle_ids = [z[2] for z in zones_raw]
 
     if not all_cycle_ids:
         return None
@@ -3676,56 +3472,26 @@ def _build_batch_report_data(batch_id):
     batch_total_defects = 0
     batch_total_inspected = 0
 
-    for z in zones_raw:
-        cycle_id = z['cycle_id']
-        block = z['block']
-        floor = z['floor']
-        cycle_number = z['cycle_number']
-
-        unit_rows = [dict(r) for r in query_db("""
-            SELECT u.unit_number, u.id as unit_id,
-                   COUNT(d.id) as defect_count,
-                   i.status as insp_status
-            FROM batch_unit bu
-            JOIN unit_real u ON bu.unit_id = u.id
-            LEFT JOIN defect d ON d.unit_id = u.id
-                AND d.raised_cycle_id = ?
-                AND d.status = 'open'
-                AND d.tenant_id = u.tenant_id
-            LEFT JOIN inspection i ON i.unit_id = u.id AND i.cycle_id = ?
-            WHERE bu.batch_id = ? AND bu.removed_at IS NULL
-            AND bu.cycle_id = ? AND bu.tenant_id = ?
-            GROUP BY u.id, u.unit_number, i.status
-            ORDER BY u.unit_number
-        """, [cycle_id, cycle_id, batch_id, cycle_id, tenant_id])]
-
-        inspected_units = [u for u in unit_rows if u['insp_status'] in reviewed_statuses]
-        zone_inspected = len(inspected_units)
-        zone_defects = sum(u['defect_count'] for u in inspected_units)
-        zone_avg = round(zone_defects / zone_inspected, 1) if zone_inspected > 0 else 0
-
-        rectification = None
-        if cycle_number > 1 and inspected_units:
-            prev_cycle_row = query_db("""
-                SELECT id FROM inspection_cycle
-                WHERE block = ? AND floor = ? AND cycle_number = ? AND tenant_id = ?
-            """, [block, floor, cycle_number - 1, tenant_id], one=True)
-            if prev_cycle_row:
-                prev_cycle_id = prev_cycle_row['id']
-                unit_ids = [u['unit_id'] for u in inspected_units]
-                ph = ','.join('?' * len(unit_ids))
-                r1_row = query_db(
-                    'SELECT COUNT(*) as cnt FROM defect WHERE raised_cycle_id = ? AND unit_id IN (' + ph + ') AND tenant_id = ?',
-                    [prev_cycle_id] + unit_ids + [tenant_id], one=True)
-                cleared_row = query_db(
-                    'SELECT COUNT(*) as cnt FROM defect WHERE cleared_cycle_id = ? AND unit_id IN (' + ph + ') AND tenant_id = ?',
-                    [cycle_id] + unit_ids + [tenant_id], one=True)
-                new_row = query_db(
-                    'SELECT COUNT(*) as cnt FROM defect WHERE raised_cycle_id = ? AND unit_id IN (' + ph + ') AND tenant_id = ?',
-                    [cycle_id] + unit_ids + [tenant_id], one=True)
-                r1_count = r1_row['cnt'] if r1_row else 0
-                cleared_count = cleared_row['cnt'] if cleared_row else 0
-                new_count = new_row['cnt'] if new_row else 0
+    prev_cycles = {}
+    with timed('batch_report', 'zones'):
+        open_by_unit = frame.open_counts()
+        for block, floor, cycle_id, cycle_number, prev_cycle_id, zone_units in zones_raw:
+            members = roster.groups(roster.select(cycle_id=cycle_id, real_unit=1), 'unit_id', 'unit_number',
+                                    'insp_status')
+            unit_rows = [{'unit_number': unit_number, 'unit_id': unit_id,
+                          'defect_count': open_by_unit.get((unit_id, cycle_id), 0), 'insp_status': status}
+                         for unit_id, unit_number, status in members]
+            unit_rows.sort(key=lambda u: sql_order(u['unit_number']))
+
+            inspected_units = [u for u in unit_rows if u['insp_status'] in reviewed_statuses]
+            zone_inspected = len(inspected_units)
+            zone_defects = sum(u['defect_count'] for u in inspected_units)
+            zone_avg = round(zone_defects / zone_inspected, 1) if zone_inspected > 0 else 0
+
+            rectification = None
+            if cycle_number > 1 and inspected_units and prev_cycle_id:
+                r1_count, cleared_count, new_count = frame.rectification(
+                    {u['unit_id'] for u in inspected_units}, prev_cycle_id, cycle_id)
                 still_open = max(r1_count - cleared_count, 0)
                 clearance_pct = round(cleared_count / r1_count * 100) if r1_count > 0 else 0
                 rectification = {
@@ -3734,18 +3500,19 @@ def _build_batch_report_data(batch_id):
                     'clearance_pct': clearance_pct, 'zone_units': zone_inspected,
                 }
 
-        floor_label = FLOOR_LABELS.get(floor, 'Floor {}'.format(floor))
-        zones.append({
-            'block': block, 'floor': floor, 'floor_label': floor_label,
-            'label': '{} {}'.format(block, floor_label),
-            'cycle_id': cycle_id, 'cycle_number': cycle_number,
-            'total_units': z['zone_units'], 'inspected': zone_inspected,
-            'defects': zone_defects, 'avg': zone_avg,
-            'defect_rate': round(zone_defects / (ITEMS_PER_UNIT * zone_inspected) * 100, 1) if zone_inspected > 0 else 0,
-            'units': unit_rows, 'rectification': rectification,
-        })
-        batch_total_defects += zone_defects
-        batch_total_inspected += zone_inspected
+            floor_label = FLOOR_LABELS.get(floor, 'Floor {}'.format(floor))
+            zones.append({
+                'block': block, 'floor': floor, 'floor_label': floor_label,
+                'label': '{} {}'.format(block, floor_label),
+                'cycle_id': cycle_id, 'cycle_number': cycle_number,
+                'total_units': zone_units, 'inspected': zone_inspected,
+                'defects': zone_defects, 'avg': zone_avg,
+                'defect_rate': round(zone_defects / (ITEMS_PER_UNIT * zone_inspected) * 100, 1) if zone_inspected > 0 else 0,
+                'units': unit_rows, 'rectification': rectification,
+            })
+            prev_cycles[cycle_id] = prev_cycle_id
+            batch_total_defects += zone_defects
+            batch_total_inspected += zone_inspected
 
     # 5. Batch KPIs + quartile banding
     batch_avg = round(batch_total_defects / batch_total_inspected, 1) if batch_total_inspected > 0 else 0
@@ -3789,156 +3556,111 @@ def _build_batch_report_data(batch_id):
         'q1': q1, 'q3': q3,
     }
 
-    # 6. Worst units (top 5 from batch)
-    ph = ','.join('?' * len(all_cycle_ids))
-    worst_units = [dict(r) for r in query_db(
-        "SELECT u.unit_number, u.block, u.floor, COUNT(d.id) as defect_count, d.raised_cycle_number "
-        "FROM defect d JOIN unit_real u ON d.unit_id = u.id "
-        "WHERE d.tenant_id = ? AND d.status = 'open' "
-        "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-        "AND d.raised_cycle_id IN ({}) "
-        "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-        "AND i2.cycle_id = d.raised_cycle_id "
-        "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-        "GROUP BY u.id ORDER BY defect_count DESC".format(ph),
-        [tenant_id, batch_id, tenant_id] + all_cycle_ids)]
-    worst_sum = sum(u['defect_count'] for u in worst_units)
-    worst_pct = round(worst_sum / batch_total_defects * 100) if batch_total_defects > 0 else 0
-    worst_blocks = {}
-    for u in worst_units:
-        key = u['block'] + ' ' + FLOOR_LABELS.get(u['floor'], 'Floor ' + str(u['floor']))
-        worst_blocks[key] = worst_blocks.get(key, 0) + 1
-    worst_dominant = max(worst_blocks.items(), key=lambda x: x[1]) if worst_blocks else ('', 0)
-
-    # 7. Area breakdown
-    ph = ','.join('?' * len(all_cycle_ids))
-    area_raw = query_db(
-        "SELECT at2.area_name AS area, COUNT(d.id) AS defect_count "
-        "FROM defect d "
-        "JOIN item_template it ON d.item_template_id = it.id "
-        "JOIN category_template ct ON it.category_id = ct.id "
-        "JOIN area_template at2 ON ct.area_id = at2.id "
-        "WHERE d.tenant_id = ? AND d.status = 'open' "
-        "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-        "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-        "AND i2.cycle_id = d.raised_cycle_id "
-        "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-        "AND d.raised_cycle_id IN ({}) "
-        "GROUP BY at2.area_name ORDER BY defect_count DESC".format(ph),
-        [tenant_id, batch_id, tenant_id] + all_cycle_ids)
-    area_data = [dict(r) for r in area_raw]
-    area_max = area_data[0]['defect_count'] if area_data else 1
-    area_counts_sorted = sorted([a['defect_count'] for a in area_data])
-    if area_counts_sorted:
-        mid = len(area_counts_sorted) // 2
-        area_median = area_counts_sorted[mid] if len(area_counts_sorted) % 2 else (area_counts_sorted[mid - 1] + area_counts_sorted[mid]) / 2
-    else:
-        area_median = 0
-    for a in area_data:
-        a['pct'] = round(a['defect_count'] / batch_total_defects * 100, 1) if batch_total_defects > 0 else 0
+    def scope(cycle_ids):
+        """Open defects raised in cycle_ids by a reviewed inspection (the report's defect scope)."""
+        return defects.select(status='open', raised_cycle_id=cycle_ids, raised_status=reviewed_statuses)
+
+    def worst(rows, with_round=True):
+        real = defects.groups(defects.select(rows, real_unit=1), 'unit_id')
+        out = []
+        for members in real.values():
+            i = members[0]
+            u = {'unit_number': defects['unit_number'][i], 'block': defects['block'][i],
+                 'floor': defects['floor'][i], 'defect_count': len(members)}
+            if with_round:
+                u['raised_cycle_number'] = defects['raised_cycle_number'][members[-1]]
+            out.append(u)
+        return by_count_desc(out, lambda u: u['defect_count'])
+
+    def areas(rows, total):
+        data = [{'area': k, 'defect_count': n} for k, n in defects.count_by(defects.select(rows, has_area=1), 'area')]
+        for a in data:
+            a['pct'] = round(a['defect_count'] / total * 100, 1) if total > 0 else 0
+        return data
+
+    def trades(rows):
+        return [{'category': k, 'count': n} for k, n in defects.count_by(defects.select(rows, has_trade=1), 'trade')]
+
+    def median(counts):
+        counts = sorted(counts)
+        if not counts:
+            return 0
+        mid = len(counts) // 2
+        return counts[mid] if len(counts) % 2 else (counts[mid - 1] + counts[mid]) / 2
 
-    # 8. Area deep dive (top 2 areas)
     dd_colours = ['#C8963E', '#3D6B8E']
-    area_deep_dive = []
-    ph = ','.join('?' * len(all_cycle_ids))
-    for idx, area_row in enumerate(area_data[:2]):
-        area_name = area_row['area']
-        dd_raw = [dict(r) for r in query_db(
-            "SELECT d.original_comment AS description, COUNT(*) AS count "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "JOIN area_template at2 ON ct.area_id = at2.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "AND i2.cycle_id = d.raised_cycle_id "
-            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-            "AND d.raised_cycle_id IN ({}) AND at2.area_name = ? "
-            "GROUP BY d.original_comment ORDER BY count DESC LIMIT 3".format(ph),
-            [tenant_id, batch_id, tenant_id] + all_cycle_ids + [area_name])]
-        max_dd = dd_raw[0]['count'] if dd_raw else 1
-        for d in dd_raw:
-            d['bar_pct'] = round(d['count'] / max_dd * 100)
-        area_pct = round(area_row['defect_count'] / batch_total_defects * 100, 1) if batch_total_defects > 0 else 0
-        area_deep_dive.append({
-            'area': area_name, 'total': area_row['defect_count'],
-            'pct': area_pct, 'colour': dd_colours[idx], 'defects': dd_raw,
-        })
-    dd_callout = ''
-    if area_deep_dive and area_deep_dive[0]['defects']:
-        a1 = area_deep_dive[0]
-        d1 = a1['defects'][0]
-        dd_callout = 'The most frequent defect in {} is {} ({} occurrences).'.format(
-            a1['area'].title(), d1['description'].lower(), d1['count'])
-        if len(area_deep_dive) >= 2 and area_deep_dive[1]['defects']:
-            a2 = area_deep_dive[1]
-            d2 = a2['defects'][0]
-            dd_callout += ' In {}, {} leads with {} occurrences.'.format(
-                a2['area'].title(), d2['description'].lower(), d2['count'])
 
-    # 9. Recurring defects (2+ units within batch)
-    ph = ','.join('?' * len(all_cycle_ids))
-    recurring_raw = query_db(
-        "SELECT d.original_comment, COUNT(d.id) AS cnt, COUNT(DISTINCT d.unit_id) AS unit_count "
-        "FROM defect d JOIN unit_real u ON d.unit_id = u.id "
-        "WHERE d.tenant_id = ? AND d.status = 'open' "
-        "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-        "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-        "AND i2.cycle_id = d.raised_cycle_id "
-        "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-        "AND d.raised_cycle_id IN ({}) "
-        "GROUP BY d.original_comment HAVING unit_count >= 2 ORDER BY cnt DESC LIMIT 10".format(ph),
-        [tenant_id, batch_id, tenant_id] + all_cycle_ids)
-    recurring = [dict(r) for r in recurring_raw]
-    if recurring:
-        top_comments = [r['original_comment'] for r in recurring]
-        cat_ph = ','.join('?' * len(top_comments))
-        batch_ph = ','.join('?' * len(all_cycle_ids))
-        cat_raw = query_db(
-            "SELECT d.original_comment, ct.category_name, COUNT(d.id) AS cat_cnt "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND d.raised_cycle_id IN ({}) "
-            "AND d.original_comment IN ({}) "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "AND i2.cycle_id = d.raised_cycle_id "
-            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-            "GROUP BY d.original_comment, ct.category_name "
-            "ORDER BY d.original_comment, cat_cnt DESC".format(batch_ph, cat_ph),
-            [tenant_id, batch_id, tenant_id] + all_cycle_ids + top_comments)
-        from collections import defaultdict as _dd
-        cat_map = _dd(list)
-        for row in cat_raw:
-            cat_map[row['original_comment']].append({'cat': row['category_name'], 'cnt': row['cat_cnt']})
-        for r in recurring:
-            r['cat_breakdown'] = cat_map.get(r['original_comment'], [])
+    def deep_dive(rows, area_rows, total):
+        out = []
+        in_area = defects.select(rows, has_area=1)
+        for idx, area_row in enumerate(area_rows[:2]):
+            dd = [{'description': k, 'count': n} for k, n in defects.count_by(
+                defects.select(in_area, area=area_row['area']), 'original_comment', limit=3)]
+            max_dd = dd[0]['count'] if dd else 1
+            for d in dd:
+                d['bar_pct'] = round(d['count'] / max_dd * 100)
+            out.append({
+                'area': area_row['area'], 'total': area_row['defect_count'],
+                'pct': round(area_row['defect_count'] / total * 100, 1) if total > 0 else 0,
+                'colour': dd_colours[idx], 'defects': dd,
+            })
+        return out
+
+    def recurring_of(rows):
+        real = defects.select(rows, real_unit=1)
+        units = dict(defects.count_by(real, 'original_comment', distinct='unit_id'))
+        out = [{'original_comment': k, 'cnt': n, 'unit_count': units[k]}
+               for k, n in defects.count_by(real, 'original_comment') if units[k] >= 2][:10]
+        return out
+
+    with timed('batch_report', 'sections'):
+        batch_rows = scope(all_cycle_ids)
+
+        # 6. Worst units (top 5 from batch)
+        worst_units = worst(batch_rows)
+        worst_sum = sum(u['defect_count'] for u in worst_units)
+        worst_pct = round(worst_sum / batch_total_defects * 100) if batch_total_defects > 0 else 0
+        worst_blocks = {}
+        for u in worst_units:
+            key = u['block'] + ' ' + FLOOR_LABELS.get(u['floor'], 'Floor ' + str(u['floor']))
+            worst_blocks[key] = worst_blocks.get(key, 0) + 1
+        worst_dominant = max(worst_blocks.items(), key=lambda x: x[1]) if worst_blocks else ('', 0)
+
+        # 7. Area breakdown
+        area_data = areas(batch_rows, batch_total_defects)
+        area_max = area_data[0]['defect_count'] if area_data else 1
+        area_median = median(a['defect_count'] for a in area_data)
+
+        # 8. Area deep dive (top 2 areas)
+        area_deep_dive = deep_dive(batch_rows, area_data, batch_total_defects)
+        dd_callout = ''
+        if area_deep_dive and area_deep_dive[0]['defects']:
+            a1 = area_deep_dive[0]
+            d1 = a1['defects'][0]
+            dd_callout = 'The most frequent defect in {} is {} ({} occurrences).'.format(
+                a1['area'].title(), d1['description'].lower(), d1['count'])
+            if len(area_deep_dive) >= 2 and area_deep_dive[1]['defects']:
+                a2 = area_deep_dive[1]
+                d2 = a2['defects'][0]
+                dd_callout += ' In {}, {} leads with {} occurrences.'.format(
+                    a2['area'].title(), d2['description'].lower(), d2['count'])
 
-    # 10. Category (trade) breakdown
-    ph = ','.join('?' * len(all_cycle_ids))
-    category_data = [dict(r) for r in query_db(
-        "SELECT ct.category_name AS category, COUNT(d.id) AS count "
-        "FROM defect d "
-        "JOIN item_template it ON d.item_template_id = it.id "
-        "JOIN category_template ct ON it.category_id = ct.id "
-        "WHERE d.tenant_id = ? AND d.status = 'open' "
-        "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-        "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-        "AND i2.cycle_id = d.raised_cycle_id "
-        "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-        "AND d.raised_cycle_id IN ({}) "
-        "GROUP BY ct.category_name ORDER BY count DESC".format(ph),
-        [tenant_id, batch_id, tenant_id] + all_cycle_ids)]
-    cat_max = category_data[0]['count'] if category_data else 1
-    cat_counts = sorted([c['count'] for c in category_data])
-    if cat_counts:
-        mid = len(cat_counts) // 2
-        cat_median = cat_counts[mid] if len(cat_counts) % 2 else (cat_counts[mid - 1] + cat_counts[mid]) / 2
-    else:
-        cat_median = 0
+        # 9. Recurring defects (2+ units within batch)
+        recurring = recurring_of(batch_rows)
+        if recurring:
+            top_comments = {r['original_comment'] for r in recurring if r['original_comment'] is not None}
+            cat_rows = defects.select(batch_rows, has_trade=1, original_comment=top_comments)
+            cat_map = {}
+            for comment, members in defects.groups(cat_rows, 'original_comment').items():
+                cat_map[comment] = [{'cat': category, 'cnt': cnt}
+                                    for category, cnt in defects.count_by(members, 'trade')]
+            for r in recurring:
+                r['cat_breakdown'] = cat_map.get(r['original_comment'], [])
+
+        # 10. Category (trade) breakdown
+        category_data = trades(batch_rows)
+        cat_max = category_data[0]['count'] if category_data else 1
+        cat_median = median(c['count'] for c in category_data)
 
     # 11. Batch rectification aggregate
     batch_rectification = None
@@ -4016,194 +3738,83 @@ def _build_batch_report_data(batch_id):
     c1_cat_median = cat_median
     c1_worst_pct = worst_pct
 
-    if is_mixed:
-        c1_cids = [z['cycle_id'] for z in c1_zones]
-        c1ph = ','.join('?' * len(c1_cids))
-
-        c1_area_data = [dict(r) for r in query_db(
-            "SELECT at2.area_name AS area, COUNT(d.id) AS defect_count "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "JOIN area_template at2 ON ct.area_id = at2.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "AND i2.cycle_id = d.raised_cycle_id "
-            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-            "AND d.raised_cycle_id IN ({}) "
-            "GROUP BY at2.area_name ORDER BY defect_count DESC".format(c1ph),
-            [tenant_id, batch_id, tenant_id] + c1_cids)]
-        c1_area_max = c1_area_data[0]['defect_count'] if c1_area_data else 1
-        c1_ac = sorted([a['defect_count'] for a in c1_area_data])
-        if c1_ac:
-            mid = len(c1_ac) // 2
-            c1_area_median = c1_ac[mid] if len(c1_ac) % 2 else (c1_ac[mid-1] + c1_ac[mid]) / 2
-        else:
-            c1_area_median = 0
-        for a in c1_area_data:
-            a['pct'] = round(a['defect_count'] / c1_defects * 100, 1) if c1_defects > 0 else 0
-
-        c1_category_data = [dict(r) for r in query_db(
-            "SELECT ct.category_name AS category, COUNT(d.id) AS count "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "AND i2.cycle_id = d.raised_cycle_id "
-            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-            "AND d.raised_cycle_id IN ({}) "
-            "GROUP BY ct.category_name ORDER BY count DESC".format(c1ph),
-            [tenant_id, batch_id, tenant_id] + c1_cids)]
-        c1_cat_max = c1_category_data[0]['count'] if c1_category_data else 1
-        c1_cc = sorted([c['count'] for c in c1_category_data])
-        if c1_cc:
-            mid = len(c1_cc) // 2
-            c1_cat_median = c1_cc[mid] if len(c1_cc) % 2 else (c1_cc[mid-1] + c1_cc[mid]) / 2
-        else:
-            c1_cat_median = 0
-
-        c1_worst_units = [dict(r) for r in query_db(
-            "SELECT u.unit_number, u.block, u.floor, COUNT(d.id) as defect_count "
-            "FROM defect d JOIN unit_real u ON d.unit_id = u.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND d.raised_cycle_id IN ({}) "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "AND i2.cycle_id = d.raised_cycle_id "
-            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-            "GROUP BY u.id ORDER BY defect_count DESC".format(c1ph),
-            [tenant_id, batch_id, tenant_id] + c1_cids)]
-        c1_ws = sum(u['defect_count'] for u in c1_worst_units)
-        c1_worst_pct = round(c1_ws / c1_defects * 100) if c1_defects > 0 else 0
-
-        c1_area_deep_dive = []
-        for idx2, ar2 in enumerate(c1_area_data[:2]):
-            aname = ar2['area']
-            dd2 = [dict(r) for r in query_db(
-                "SELECT d.original_comment AS description, COUNT(*) AS count "
-                "FROM defect d "
-                "JOIN item_template it ON d.item_template_id = it.id "
-                "JOIN category_template ct ON it.category_id = ct.id "
-                "JOIN area_template at2 ON ct.area_id = at2.id "
-                "WHERE d.tenant_id = ? AND d.status = 'open' "
-                "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-                "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-                "AND i2.cycle_id = d.raised_cycle_id "
-                "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-                "AND d.raised_cycle_id IN ({}) AND at2.area_name = ? "
-                "GROUP BY d.original_comment ORDER BY count DESC LIMIT 3".format(c1ph),
-                [tenant_id, batch_id, tenant_id] + c1_cids + [aname])]
-            mx = dd2[0]['count'] if dd2 else 1
-            for d in dd2:
-                d['bar_pct'] = round(d['count'] / mx * 100)
-            apct = round(ar2['defect_count'] / c1_defects * 100, 1) if c1_defects > 0 else 0
-            c1_area_deep_dive.append({
-                'area': aname, 'total': ar2['defect_count'],
-                'pct': apct, 'colour': dd_colours[idx2], 'defects': dd2,
-            })
-        c1_dd_callout = ''
-        if c1_area_deep_dive and c1_area_deep_dive[0]['defects']:
-            a1c = c1_area_deep_dive[0]
-            d1c = a1c['defects'][0]
-            c1_dd_callout = 'The most frequent defect in {} is {} ({} occurrences).'.format(
-                a1c['area'].title(), d1c['description'].lower(), d1c['count'])
-
-        c1_recurring = [dict(r) for r in query_db(
-            "SELECT d.original_comment, COUNT(d.id) AS cnt, COUNT(DISTINCT d.unit_id) AS unit_count "
-            "FROM defect d JOIN unit_real u ON d.unit_id = u.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "AND i2.cycle_id = d.raised_cycle_id "
-            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
-            "AND d.raised_cycle_id IN ({}) "
-            "GROUP BY d.original_comment HAVING unit_count >= 2 ORDER BY cnt DESC LIMIT 10".format(c1ph),
-            [tenant_id, batch_id, tenant_id] + c1_cids)]
-
     # C2 unit rectification table
     c2_unit_table = []
     c2_total_r1 = 0
     c2_total_cleared = 0
     c2_total_new = 0
     c2_total_still_open = 0
-    for z in c2_zones:
-        cyc_id = z['cycle_id']
-        prev_row = query_db(
-            "SELECT id FROM inspection_cycle WHERE block=? AND floor=? AND cycle_number=? AND tenant_id=?",
-            [z['block'], z['floor'], z['cycle_number'] - 1, tenant_id], one=True)
-        if not prev_row:
-            continue
-        prev_id = prev_row['id']
-        for u in z['units']:
-            if u['insp_status'] not in reviewed_statuses:
-                continue
-            uid = u['unit_id']
-            r1r = query_db('SELECT COUNT(*) as cnt FROM defect WHERE raised_cycle_id=? AND unit_id=? AND tenant_id=?',
-                           [prev_id, uid, tenant_id], one=True)
-            clr = query_db('SELECT COUNT(*) as cnt FROM defect WHERE cleared_cycle_id=? AND unit_id=? AND tenant_id=?',
-                           [cyc_id, uid, tenant_id], one=True)
-            nwr = query_db('SELECT COUNT(*) as cnt FROM defect WHERE raised_cycle_id=? AND unit_id=? AND tenant_id=?',
-                           [cyc_id, uid, tenant_id], one=True)
-            r1c = r1r['cnt'] if r1r else 0
-            clc = clr['cnt'] if clr else 0
-            nwc = nwr['cnt'] if nwr else 0
-            so = max(r1c - clc, 0)
-            cpct = round(clc / r1c * 100) if r1c > 0 else 0
-            c2_unit_table.append({
-                'unit_number': u['unit_number'],
-                'zone': '{} {}'.format(z['block'], z['floor_label']),
-                'cycle_number': z['cycle_number'],
-                'r1_defects': r1c, 'cleared': clc,
-                'still_open': so, 'new': nwc, 'clearance_pct': cpct,
-            })
-            c2_total_r1 += r1c
-            c2_total_cleared += clc
-            c2_total_new += nwc
-            c2_total_still_open += so
-    c2_unit_table.sort(key=lambda x: (-x['cycle_number'], x['clearance_pct'], -x['still_open']))
-    c2_summary = {
-        'total_r1': c2_total_r1, 'total_cleared': c2_total_cleared,
-        'total_new': c2_total_new, 'total_still_open': c2_total_still_open,
-        'clearance_pct': round(c2_total_cleared / c2_total_r1 * 100) if c2_total_r1 > 0 else 0,
-        'units_inspected': len(c2_unit_table),
-    }
-
-    # C2 area/trade (remaining open defects for C2 units)
     c2_area_data = []
     c2_trade_data = []
     c2_area_max = 1
     c2_trade_max = 1
-    if c2_zones:
-        c2_uids = []
+
+    with timed('batch_report', 'c1_c2_split'):
+        if is_mixed:
+            c1_rows = scope([z['cycle_id'] for z in c1_zones])
+
+            c1_area_data = areas(c1_rows, c1_defects)
+            c1_area_max = c1_area_data[0]['defect_count'] if c1_area_data else 1
+            c1_area_median = median(a['defect_count'] for a in c1_area_data)
+
+            c1_category_data = trades(c1_rows)
+            c1_cat_max = c1_category_data[0]['count'] if c1_category_data else 1
+            c1_cat_median = median(c['count'] for c in c1_category_data)
+
+            c1_worst_units = worst(c1_rows, with_round=False)
+            c1_ws = sum(u['defect_count'] for u in c1_worst_units)
+            c1_worst_pct = round(c1_ws / c1_defects * 100) if c1_defects > 0 else 0
+
+            c1_area_deep_dive = deep_dive(c1_rows, c1_area_data, c1_defects)
+            c1_dd_callout = ''
+            if c1_area_deep_dive and c1_area_deep_dive[0]['defects']:
+                a1c = c1_area_deep_dive[0]
+                d1c = a1c['defects'][0]
+                c1_dd_callout = 'The most frequent defect in {} is {} ({} occurrences).'.format(
+                    a1c['area'].title(), d1c['description'].lower(), d1c['count'])
+
+            c1_recurring = recurring_of(c1_rows)
+
         for z in c2_zones:
+            prev_cycle_id = prev_cycles[z['cycle_id']]
+            if not prev_cycle_id:
+                continue
             for u in z['units']:
-                if u['insp_status'] in reviewed_statuses:
-                    c2_uids.append(u['unit_id'])
+                if u['insp_status'] not in reviewed_statuses:
+                    continue
+                r1c, clc, nwc = frame.rectification({u['unit_id']}, prev_cycle_id, z['cycle_id'])
+                so = max(r1c - clc, 0)
+                cpct = round(clc / r1c * 100) if r1c > 0 else 0
+                c2_unit_table.append({
+                    'unit_number': u['unit_number'],
+                    'zone': '{} {}'.format(z['block'], z['floor_label']),
+                    'cycle_number': z['cycle_number'],
+                    'r1_defects': r1c, 'cleared': clc,
+                    'still_open': so, 'new': nwc, 'clearance_pct': cpct,
+                })
+                c2_total_r1 += r1c
+                c2_total_cleared += clc
+                c2_total_new += nwc
+                c2_total_still_open += so
+
+        # C2 area/trade (remaining open defects for C2 units)
+        c2_uids = {u['unit_id'] for z in c2_zones for u in z['units'] if u['insp_status'] in reviewed_statuses}
         if c2_uids:
-            uph2 = ','.join('?' * len(c2_uids))
-            c2_area_data = [dict(r) for r in query_db(
-                "SELECT at2.area_name AS area, COUNT(d.id) AS defect_count "
-                "FROM defect d "
-                "JOIN item_template it ON d.item_template_id = it.id "
-                "JOIN category_template ct ON it.category_id = ct.id "
-                "JOIN area_template at2 ON ct.area_id = at2.id "
-                "WHERE d.tenant_id = ? AND d.status = 'open' AND d.unit_id IN ({}) "
-                "GROUP BY at2.area_name ORDER BY defect_count DESC".format(uph2),
-                [tenant_id] + c2_uids)]
+            c2_rows = defects.select(status='open', unit_id=c2_uids)
+            c2_area_data = [{'area': k, 'defect_count': n}
+                            for k, n in defects.count_by(defects.select(c2_rows, has_area=1), 'area')]
             c2_area_max = c2_area_data[0]['defect_count'] if c2_area_data else 1
-            c2_trade_data = [dict(r) for r in query_db(
-                "SELECT ct.category_name AS category, COUNT(d.id) AS count "
-                "FROM defect d "
-                "JOIN item_template it ON d.item_template_id = it.id "
-                "JOIN category_template ct ON it.category_id = ct.id "
-                "WHERE d.tenant_id = ? AND d.status = 'open' AND d.unit_id IN ({}) "
-                "GROUP BY ct.category_name ORDER BY count DESC".format(uph2),
-                [tenant_id] + c2_uids)]
+            c2_trade_data = trades(c2_rows)
             c2_trade_max = c2_trade_data[0]['count'] if c2_trade_data else 1
 
+    c2_unit_table.sort(key=lambda x: (-x['cycle_number'], x['clearance_pct'], -x['still_open']))
+    c2_summary = {
+        'total_r1': c2_total_r1, 'total_cleared': c2_total_cleared,
+        'total_new': c2_total_new, 'total_still_open': c2_total_still_open,
+        'clearance_pct': round(c2_total_cleared / c2_total_r1 * 100) if c2_total_r1 > 0 else 0,
+        'units_inspected': len(c2_unit_table),
+    }
+
     # --- Priority Actions (cover-page callout) ---
     # Only meaningful on mixed batches with remaining open defects.
     priority_actions = []
@@ -4297,6 +3908,9 @@ def _build_briefing_data(batch_id):
     Raubex site briefing: zones (C1 + C2), hot spots, by area, by trade,
     snag unit ranking, de-snag unit results, exclusion list.
 
+    Sections are grouped in memory from one BatchFrame extract (roster +
+    defects); see app/services/batch_frame.py.
+
     Returns dict with all template variables, or None if batch not found.
     """
     from flask import session
@@ -4319,140 +3933,118 @@ def _build_briefing_data(batch_id):
     batch = dict(batch_row)
 
     # ---- 2. Cycles in this batch, split by cycle_number ----
-    cycles = [dict(r) for r in query_db("""
-        SELECT ic.id as cycle_id, ic.block, ic.floor, ic.cycle_number,
-               COUNT(DISTINCT bu.unit_id) as zone_units
-        FROM batch_unit bu
-        JOIN inspection_cycle ic ON bu.cycle_id = ic.id
-        WHERE bu.batch_id = ? AND bu.removed_at IS NULL AND bu.tenant_id = ?
-        GROUP BY ic.id, ic.block, ic.floor, ic.cycle_number
-        ORDER BY ic.cycle_number, ic.block, ic.floor
-    """, [batch_id, tenant_id])]
+    with timed('briefing', 'extract'):
+        frame = BatchFrame(tenant_id, batch_id)
+    roster, defects = frame.roster, frame.defects
+    cycles = [{'cycle_id': cycle_id, 'block': block, 'floor': floor, 'cycle_number': number,
+               'zone_units': units, 'prev_cycle_id': prev}
+              for block, floor, cycle_id, number, prev, units in frame.zones()]
+    cycles.sort(key=lambda c: sql_order((c['cycle_number'], c['block'], c['floor'])))
     if not cycles:
         return None
 
     c1_cycle_ids = [c['cycle_id'] for c in cycles if c['cycle_number'] == 1]
     c2_cycle_ids = [c['cycle_id'] for c in cycles if c['cycle_number'] >= 2]
+    prev_cycles = {c['cycle_id']: c['prev_cycle_id'] for c in cycles}
+
+    # Inspected real units on the batch per cycle (roster rows with a submitted+ inspection).
+    def inspected(cycle_ids):
+        return roster.select(cycle_id=cycle_ids, real_unit=1, has_cycle=1, insp_status=reviewed_statuses)
 
     # ---- 3. C1 per-unit totals (defects raised in C1, status=open, reviewed) ----
     c1_units = []
     c1_total_defects = 0
-    if c1_cycle_ids:
-        ph = ','.join('?' * len(c1_cycle_ids))
-        c1_units_rows = query_db(
-            "SELECT u.id as unit_id, u.unit_number, u.block, u.floor, "
-            "i.cycle_id, ic.cycle_number, i.status AS inspection_status, "
-            "COUNT(d.id) as defect_count "
-            "FROM batch_unit bu "
-            "JOIN unit_real u ON bu.unit_id = u.id "
-            "JOIN inspection i ON i.unit_id = u.id AND i.cycle_id = bu.cycle_id "
-            "JOIN inspection_cycle ic ON i.cycle_id = ic.id "
-            "LEFT JOIN defect d ON d.unit_id = u.id AND d.raised_cycle_id = bu.cycle_id "
-            "  AND d.status = 'open' AND d.tenant_id = u.tenant_id "
-            "WHERE bu.batch_id = ? AND bu.removed_at IS NULL AND bu.tenant_id = ? "
-            "AND bu.cycle_id IN (" + ph + ") "
-            "AND i.status IN ('submitted','reviewed','approved','certified','pending_followup') "
-            "GROUP BY u.id, u.unit_number, u.block, u.floor, i.cycle_id, ic.cycle_number, i.status "
-            "ORDER BY defect_count DESC, u.unit_number",
-            [batch_id, tenant_id] + c1_cycle_ids)
-        c1_units = [dict(r) for r in c1_units_rows]
-        c1_total_defects = sum(u['defect_count'] for u in c1_units)
-
-    # ---- 4. C2 per-unit rectification (brought forward / cleared / open) ----
-    c2_units = []
-    c2_brought_forward = 0
-    c2_cleared = 0
-    c2_still_open = 0
-    c2_open_details = []
-    if c2_cycle_ids:
-        ph = ','.join('?' * len(c2_cycle_ids))
-        c2_rows = query_db(
-            "SELECT u.id as unit_id, u.unit_number, u.block, u.floor, "
-            "bu.cycle_id, ic.cycle_number, i.status AS inspection_status "
-            "FROM batch_unit bu "
-            "JOIN unit_real u ON bu.unit_id = u.id "
-            "JOIN inspection i ON i.unit_id = u.id AND i.cycle_id = bu.cycle_id "
-            "JOIN inspection_cycle ic ON i.cycle_id = ic.id "
-            "WHERE bu.batch_id = ? AND bu.removed_at IS NULL AND bu.tenant_id = ? "
-            "AND bu.cycle_id IN (" + ph + ") "
-            "AND i.status IN ('submitted','reviewed','approved','certified','pending_followup') "
-            "ORDER BY u.unit_number",
-            [batch_id, tenant_id] + c2_cycle_ids)
-        for r in c2_rows:
-            unit_id = r['unit_id']
-            c2_cycle_id = r['cycle_id']
-            # Find the previous cycle for this unit (same block/floor, cycle_number - 1)
-            prev_cycle = query_db("""
-                SELECT ic.id FROM inspection_cycle ic
-                WHERE ic.tenant_id = ?
-                AND ic.block = (SELECT block FROM inspection_cycle WHERE id = ?)
-                AND ic.floor = (SELECT floor FROM inspection_cycle WHERE id = ?)
-                AND ic.cycle_number = (SELECT cycle_number - 1 FROM inspection_cycle WHERE id = ?)
-            """, [tenant_id, c2_cycle_id, c2_cycle_id, c2_cycle_id], one=True)
-            if not prev_cycle:
-                continue
-            prev_cycle_id = prev_cycle['id']
-            bf_row = query_db(
-                "SELECT COUNT(*) as cnt FROM defect "
-                "WHERE unit_id = ? AND raised_cycle_id = ? AND tenant_id = ?",
-                [unit_id, prev_cycle_id, tenant_id], one=True)
-            cl_row = query_db(
-                "SELECT COUNT(*) as cnt FROM defect "
-                "WHERE unit_id = ? AND raised_cycle_id = ? AND cleared_cycle_id = ? "
-                "AND tenant_id = ?",
-                [unit_id, prev_cycle_id, c2_cycle_id, tenant_id], one=True)
-            bf = bf_row['cnt'] if bf_row else 0
-            cl = cl_row['cnt'] if cl_row else 0
-            op = max(bf - cl, 0)
-            c2_units.append({
-                'unit_id': unit_id,
-                'unit_number': r['unit_number'],
-                'block': r['block'],
-                'floor': r['floor'],
-                'brought_forward': bf,
-                'cleared': cl,
-                'still_open': op,
-                'clearance_pct': round(cl / bf * 100, 1) if bf > 0 else 0,
-                'inspection_status': r['inspection_status'],
-            })
-            c2_brought_forward += bf
-            c2_cleared += cl
-            c2_still_open += op
-            if op > 0:
-                detail_rows_raw = query_db(
-                    "SELECT at2.area_name AS area, ct.category_name AS trade, "
-                    "COUNT(d.id) AS count "
-                    "FROM defect d "
-                    "JOIN item_template it ON d.item_template_id = it.id "
-                    "JOIN category_template ct ON it.category_id = ct.id "
-                    "JOIN area_template at2 ON ct.area_id = at2.id "
-                    "WHERE d.unit_id = ? AND d.raised_cycle_id = ? "
-                    "AND (d.cleared_cycle_id IS NULL OR d.cleared_cycle_id != ?) "
-                    "AND d.tenant_id = ? "
-                    "GROUP BY at2.area_name, ct.category_name "
-                    "ORDER BY at2.area_order, ct.category_order",
-                    [unit_id, prev_cycle_id, c2_cycle_id, tenant_id])
-                detail_list = [dict(dr) for dr in detail_rows_raw]
-                for dr in detail_list:
-                    c2_open_details.append({
-                        'unit_number': r['unit_number'],
-                        'block': r['block'],
-                        'floor': r['floor'],
-                        'floor_label': FLOOR_LABELS_LOCAL.get(
-                            r['floor'], 'Floor {}'.format(r['floor'])),
-                        'area': dr['area'],
-                        'trade': dr['trade'],
-                        'count': dr['count'],
-                    })
-                # v277: top area x trade combos attached to this unit (sorted by count desc, cap 5)
-                sorted_combos = sorted(detail_list, key=lambda x: x['count'], reverse=True)
-                c2_units[-1]['top_combos'] = sorted_combos[:5]
-                c2_units[-1]['top_combos_overflow'] = max(0, len(sorted_combos) - 5)
+    with timed('briefing', 'units'):
+        if c1_cycle_ids:
+            open_by_unit = frame.open_counts(c1_cycle_ids)
+            for i in inspected(c1_cycle_ids):
+                c1_units.append({
+                    'unit_id': roster['unit_id'][i], 'unit_number': roster['unit_number'][i],
+                    'block': roster['block'][i], 'floor': roster['floor'][i],
+                    'cycle_id': roster['cycle_id'][i], 'cycle_number': roster['cycle_number'][i],
+                    'inspection_status': roster['insp_status'][i],
+                    'defect_count': open_by_unit.get((roster['unit_id'][i], roster['cycle_id'][i]), 0),
+                })
+            c1_units.sort(key=lambda u: sql_order((u['unit_id'], u['unit_number'], u['block'], u['floor'],
+                                                   u['cycle_id'], u['cycle_number'], u['inspection_status'])))
+            c1_units.sort(key=lambda u: sql_order(u['unit_number']))
+            c1_units.sort(key=lambda u: u['defect_count'], reverse=True)
+            c1_total_defects = sum(u['defect_count'] for u in c1_units)
+
+        # ---- 4. C2 per-unit rectification (brought forward / cleared / open) ----
+        c2_units = []
+        c2_brought_forward = 0
+        c2_cleared = 0
+        c2_still_open = 0
+        c2_open_details = []
+        if c2_cycle_ids:
+            c2_rows = inspected(c2_cycle_ids)
+            c2_rows.sort(key=lambda i: sql_order(roster['unit_number'][i]))
+            for i in c2_rows:
+                unit_id = roster['unit_id'][i]
+                c2_cycle_id = roster['cycle_id'][i]
+                prev_cycle_id = prev_cycles[c2_cycle_id]
+                if not prev_cycle_id:
+                    continue
+                brought = defects.select(unit_id=unit_id, raised_cycle_id=prev_cycle_id)
+                bf = len(brought)
+                cl = len(defects.select(brought, cleared_cycle_id=c2_cycle_id))
+                op = max(bf - cl, 0)
+                unit = {
+                    'unit_id': unit_id,
+                    'unit_number': roster['unit_number'][i],
+                    'block': roster['block'][i],
+                    'floor': roster['floor'][i],
+                    'brought_forward': bf,
+                    'cleared': cl,
+                    'still_open': op,
+                    'clearance_pct': round(cl / bf * 100, 1) if bf > 0 else 0,
+                    'inspection_status': roster['insp_status'][i],
+                }
+                c2_units.append(unit)
+                c2_brought_forward += bf
+                c2_cleared += cl
+                c2_still_open += op
+                if op > 0:
+                    remaining = defects.select(brought, has_area=1,
+                                               cleared_cycle_id=lambda c: c is None or c != c2_cycle_id)
+                    detail_list = []
+                    for (area, trade), members in defects.groups(remaining, 'area', 'trade').items():
+                        detail_list.append((members[0], {'area': area, 'trade': trade, 'count': len(members)}))
+                    detail_list.sort(key=lambda m: sql_order((defects['area_order'][m[0]],
+                                                              defects['category_order'][m[0]])))
+                    detail_list = [dr for _, dr in detail_list]
+                    for dr in detail_list:
+                        c2_open_details.append({
+                            'unit_number': unit['unit_number'],
+                            'block': unit['block'],
+                            'floor': unit['floor'],
+                            'floor_label': FLOOR_LABELS_LOCAL.get(
+                                unit['floor'], 'Floor {}'.format(unit['floor'])),
+                            'area': dr['area'],
+                            'trade': dr['trade'],
+                            'count': dr['count'],
+                        })
+                    # v277: top area x trade combos attached to this unit (sorted by count desc, cap 5)
+                    sorted_combos = sorted(detail_list, key=lambda x: x['count'], reverse=True)
+                    unit['top_combos'] = sorted_combos[:5]
+                    unit['top_combos_overflow'] = max(0, len(sorted_combos) - 5)
 
     # v277: Sort c2_units by clearance % asc (open units worst-first), cleared units last
     c2_units.sort(key=lambda u: (1 if u['still_open'] == 0 else 0, u['clearance_pct'], u['unit_number']))
 
     # ---- 5. Zone summary (all cycles, C1 and C2) ----
+    c1_by_cycle = {}
+    for u in c1_units:
+        z = c1_by_cycle.setdefault(u['cycle_id'], [0, 0])
+        z[0] += u['defect_count']
+        z[1] += 1
+    c2_by_zone = {}
+    for u in c2_units:
+        z = c2_by_zone.setdefault((u['block'], u['floor']), [0, 0, 0])
+        z[0] += u['brought_forward']
+        z[1] += u['cleared']
+        z[2] += u['still_open']
     zones = []
     for c in cycles:
         cycle_id = c['cycle_id']
@@ -4472,17 +4064,11 @@ def _build_briefing_data(batch_id):
             'is_c1': is_c1,
         }
         if is_c1:
-            zd = sum(u['defect_count'] for u in c1_units if u['cycle_id'] == cycle_id)
-            zu = sum(1 for u in c1_units if u['cycle_id'] == cycle_id)
+            zd, zu = c1_by_cycle.get(cycle_id, (0, 0))
             zone['defects_raised'] = zd
             zone['avg_per_unit'] = round(zd / zu, 1) if zu > 0 else 0
         else:
-            zbf = sum(u['brought_forward'] for u in c2_units if u['block'] == block and u['floor'] == floor)
-            zcl = sum(u['cleared'] for u in c2_units if u['block'] == block and u['floor'] == floor)
-            zop = sum(u['still_open'] for u in c2_units if u['block'] == block and u['floor'] == floor)
-            zone['brought_forward'] = zbf
-            zone['cleared'] = zcl
-            zone['still_open'] = zop
+            zone['brought_forward'], zone['cleared'], zone['still_open'] = c2_by_zone.get((block, floor), (0, 0, 0))
         zones.append(zone)
 
     # Sort zones: C1 by avg_per_unit desc (per-unit intensity); C2 by brought_forward desc (workload)
@@ -4495,151 +4081,74 @@ def _build_briefing_data(batch_id):
     c2_zones_by_open = sorted([z for z in zones if not z['is_c1']],
                               key=lambda z: (z['still_open'], z['brought_forward']), reverse=True)
 
+    # C1 scope: open defects raised in the batch's C1 cycles by a submitted+ inspection.
+    c1_rows = defects.select(status='open', raised_cycle_id=c1_cycle_ids, raised_status=reviewed_statuses)
+
     # ---- 6. By area (C1 only) ----
     area_data = []
     area_max = 1
-    if c1_cycle_ids and c1_total_defects > 0:
-        ph = ','.join('?' * len(c1_cycle_ids))
-        area_rows = query_db(
-            "SELECT at2.area_name AS area, COUNT(d.id) AS count "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "JOIN area_template at2 ON ct.area_id = at2.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit "
-            "   WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND d.raised_cycle_id IN (" + ph + ") "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "   AND i2.cycle_id = d.raised_cycle_id "
-            "   AND i2.status IN ('submitted','reviewed','approved','certified','pending_followup')) "
-            "GROUP BY at2.area_name ORDER BY count DESC",
-            [tenant_id, batch_id, tenant_id] + c1_cycle_ids)
-        area_data = [dict(r) for r in area_rows]
-        area_max = area_data[0]['count'] if area_data else 1
-        for a in area_data:
-            a['pct'] = round(a['count'] / c1_total_defects * 100, 1) if c1_total_defects > 0 else 0
-            a['bar_pct'] = round(a['count'] / area_max * 100) if area_max > 0 else 0
-
-    # ---- 7. By trade (C1 only) — trade = category_name ----
     trade_data = []
     trade_max = 1
-    if c1_cycle_ids and c1_total_defects > 0:
-        ph = ','.join('?' * len(c1_cycle_ids))
-        trade_rows = query_db(
-            "SELECT ct.category_name AS trade, COUNT(d.id) AS count "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit "
-            "   WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND d.raised_cycle_id IN (" + ph + ") "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "   AND i2.cycle_id = d.raised_cycle_id "
-            "   AND i2.status IN ('submitted','reviewed','approved','certified','pending_followup')) "
-            "GROUP BY ct.category_name ORDER BY count DESC",
-            [tenant_id, batch_id, tenant_id] + c1_cycle_ids)
-        trade_data = [dict(r) for r in trade_rows]
-        trade_max = trade_data[0]['count'] if trade_data else 1
-        for t in trade_data:
-            t['pct'] = round(t['count'] / c1_total_defects * 100, 1) if c1_total_defects > 0 else 0
-            t['bar_pct'] = round(t['count'] / trade_max * 100) if trade_max > 0 else 0
-
-        # v275: per-trade top defect comment + item-level breakdown
-        top_comment_rows = query_db(
-            "SELECT ct.category_name AS trade, d.original_comment AS comment, COUNT(*) AS cnt "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit "
-            "   WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND d.raised_cycle_id IN (" + ph + ") "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "   AND i2.cycle_id = d.raised_cycle_id "
-            "   AND i2.status IN ('submitted','reviewed','approved','certified','pending_followup')) "
-            "AND d.original_comment IS NOT NULL "
-            "AND LENGTH(TRIM(d.original_comment)) > 0 "
-            "GROUP BY ct.category_name, d.original_comment "
-            "ORDER BY ct.category_name, cnt DESC",
-            [tenant_id, batch_id, tenant_id] + c1_cycle_ids)
-        top_per_trade = {}
-        for r in top_comment_rows:
-            if r['trade'] not in top_per_trade:
-                top_per_trade[r['trade']] = {
-                    'comment': (r['comment'] or '').strip(),
-                    'cnt': r['cnt'],
-                }
-        item_sql_v275 = (
-            "SELECT it.item_description AS item, COUNT(*) AS cnt "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit "
-            "   WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND d.raised_cycle_id IN (" + ph + ") "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "   AND i2.cycle_id = d.raised_cycle_id "
-            "   AND i2.status IN ('submitted','reviewed','approved','certified','pending_followup')) "
-            "AND ct.category_name = ? AND d.original_comment = ? "
-            "GROUP BY it.item_description ORDER BY cnt DESC"
-        )
-        items_by_trade = {}
-        for _trade, _top in top_per_trade.items():
-            if not _top['comment']:
-                items_by_trade[_trade] = []
-                continue
-            _rs = query_db(item_sql_v275,
-                [tenant_id, batch_id, tenant_id] + c1_cycle_ids + [_trade, _top['comment']])
-            items_by_trade[_trade] = [(r['item'], r['cnt']) for r in _rs]
-
-        def _fmt_items_v275(items, cap=5):
-            if not items:
-                return ''
-            shown = items[:cap]
-            rem = len(items) - cap
-            s = ' · '.join(f"{itm} {cnt}" for itm, cnt in shown)
-            if rem > 0:
-                s += f' · …+{rem} more'
-            return s
-
-        for t in trade_data:
-            top = top_per_trade.get(t['trade'], {'comment': '', 'cnt': 0})
-            t['top_defect'] = top['comment']
-            t['top_defect_cnt'] = top['cnt']
-            t['top_defect_items'] = _fmt_items_v275(items_by_trade.get(t['trade'], []))
-
-    # ---- 8. Top area x trade combinations (C1 only, top 8) ----
     combo_data = []
     combo_max = 1
     combo_top_sum = 0
-    if c1_cycle_ids and c1_total_defects > 0:
-        ph = ','.join('?' * len(c1_cycle_ids))
-        combo_rows = query_db(
-            "SELECT at2.area_name AS area, ct.category_name AS trade, "
-            "COUNT(d.id) AS count "
-            "FROM defect d "
-            "JOIN item_template it ON d.item_template_id = it.id "
-            "JOIN category_template ct ON it.category_id = ct.id "
-            "JOIN area_template at2 ON ct.area_id = at2.id "
-            "WHERE d.tenant_id = ? AND d.status = 'open' "
-            "AND d.unit_id IN (SELECT unit_id FROM batch_unit "
-            "   WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
-            "AND d.raised_cycle_id IN (" + ph + ") "
-            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
-            "   AND i2.cycle_id = d.raised_cycle_id "
-            "   AND i2.status IN ('submitted','reviewed','approved','certified','pending_followup')) "
-            "GROUP BY at2.area_name, ct.category_name "
-            "ORDER BY count DESC LIMIT 8",
-            [tenant_id, batch_id, tenant_id] + c1_cycle_ids)
-        combo_data = [dict(r) for r in combo_rows]
-        combo_max = combo_data[0]['count'] if combo_data else 1
-        combo_top_sum = sum(c['count'] for c in combo_data)
-        for c in combo_data:
-            c['pct'] = round(c['count'] / c1_total_defects * 100, 1) if c1_total_defects > 0 else 0
-            c['bar_pct'] = round(c['count'] / combo_max * 100) if combo_max > 0 else 0
+    with timed('briefing', 'sections'):
+        if c1_cycle_ids and c1_total_defects > 0:
+            area_data = [{'area': k, 'count': n}
+                         for k, n in defects.count_by(defects.select(c1_rows, has_area=1), 'area')]
+            area_max = area_data[0]['count'] if area_data else 1
+            for a in area_data:
+                a['pct'] = round(a['count'] / c1_total_defects * 100, 1) if c1_total_defects > 0 else 0
+                a['bar_pct'] = round(a['count'] / area_max * 100) if area_max > 0 else 0
+
+        # ---- 7. By trade (C1 only) — trade = category_name ----
+        if c1_cycle_ids and c1_total_defects > 0:
+            trade_rows = defects.select(c1_rows, has_trade=1)
+            trade_data = [{'trade': k, 'count': n} for k, n in defects.count_by(trade_rows, 'trade')]
+            trade_max = trade_data[0]['count'] if trade_data else 1
+            for t in trade_data:
+                t['pct'] = round(t['count'] / c1_total_defects * 100, 1) if c1_total_defects > 0 else 0
+                t['bar_pct'] = round(t['count'] / trade_max * 100) if trade_max > 0 else 0
+
+            # v275: per-trade top defect comment + item-level breakdown
+            commented = defects.select(trade_rows, original_comment=lambda c: c is not None and c.strip(' '))
+            top_per_trade = {}
+            for trade, members in defects.groups(commented, 'trade').items():
+                (comment, cnt), = defects.count_by(members, 'original_comment', limit=1)
+                top_per_trade[trade] = {'comment': (comment or '').strip(), 'cnt': cnt}
+            items_by_trade = {}
+            for _trade, _top in top_per_trade.items():
+                if not _top['comment']:
+                    items_by_trade[_trade] = []
+                    continue
+                _rs = defects.select(trade_rows, trade=_trade, original_comment=_top['comment'])
+                items_by_trade[_trade] = defects.count_by(_rs, 'item')
+
+            def _fmt_items_v275(items, cap=5):
+                if not items:
+                    return ''
+                shown = items[:cap]
+                rem = len(items) - cap
+                s = ' · '.join(f"{itm} {cnt}" for itm, cnt in shown)
+                if rem > 0:
+                    s += f' · …+{rem} more'
+                return s
+
+            for t in trade_data:
+                top = top_per_trade.get(t['trade'], {'comment': '', 'cnt': 0})
+                t['top_defect'] = top['comment']
+                t['top_defect_cnt'] = top['cnt']
+                t['top_defect_items'] = _fmt_items_v275(items_by_trade.get(t['trade'], []))
+
+        # ---- 8. Top area x trade combinations (C1 only, top 8) ----
+        if c1_cycle_ids and c1_total_defects > 0:
+            combo_data = [{'area': area, 'trade': trade, 'count': n} for (area, trade), n in
+                          defects.count_by(defects.select(c1_rows, has_area=1), 'area', 'trade', limit=8)]
+            combo_max = combo_data[0]['count'] if combo_data else 1
+            combo_top_sum = sum(c['count'] for c in combo_data)
+            for c in combo_data:
+                c['pct'] = round(c['count'] / c1_total_defects * 100, 1) if c1_total_defects > 0 else 0
+                c['bar_pct'] = round(c['count'] / combo_max * 100) if combo_max > 0 else 0
 
     # ---- 9. Hot spots (derived) ----
     worst_zone = max(c1_zones, key=lambda z: z['defects_raised']) if c1_zones else None
@@ -4649,30 +4158,13 @@ def _build_briefing_data(batch_id):
 
     # ---- 10. C1 per-unit area split (for page 5 split bars) ----
     c1_unit_splits = []
-    if c1_units:
+    with timed('briefing', 'unit_splits'):
+        open_in_area = defects.groups(defects.select(status='open', has_area=1), 'unit_id', 'raised_cycle_id')
         for u in c1_units:
-            splits = [dict(r) for r in query_db(
-                "SELECT at2.area_name AS area, COUNT(d.id) AS count "
-                "FROM defect d "
-                "JOIN item_template it ON d.item_template_id = it.id "
-                "JOIN category_template ct ON it.category_id = ct.id "
-                "JOIN area_template at2 ON ct.area_id = at2.id "
-                "WHERE d.tenant_id = ? AND d.status = 'open' "
-                "AND d.unit_id = ? AND d.raised_cycle_id = ? "
-                "GROUP BY at2.area_name ORDER BY count DESC",
-                [tenant_id, u['unit_id'], u['cycle_id']])]
+            rows = open_in_area.get((u['unit_id'], u['cycle_id']), [])
+            splits = [{'area': k, 'count': n} for k, n in defects.count_by(rows, 'area')]
             # v276c: per-unit worst area x trade combo
-            worst_spot_row = query_db(
-                "SELECT at2.area_name AS area, ct.category_name AS trade, COUNT(d.id) AS count "
-                "FROM defect d "
-                "JOIN item_template it ON d.item_template_id = it.id "
-                "JOIN category_template ct ON it.category_id = ct.id "
-                "JOIN area_template at2 ON ct.area_id = at2.id "
-                "WHERE d.tenant_id = ? AND d.status = 'open' "
-                "AND d.unit_id = ? AND d.raised_cycle_id = ? "
-                "GROUP BY at2.area_name, ct.category_name "
-                "ORDER BY count DESC LIMIT 1",
-                [tenant_id, u['unit_id'], u['cycle_id']], one=True)
+            worst_spot = defects.count_by(rows, 'area', 'trade', limit=1)
             c1_unit_splits.append({
                 'unit_id': u['unit_id'],
                 'unit_number': u['unit_number'],
@@ -4681,7 +4173,8 @@ def _build_briefing_data(batch_id):
                 'floor_label': FLOOR_LABELS_LOCAL.get(u['floor'], 'Floor {}'.format(u['floor'])),
                 'total': u['defect_count'],
                 'splits': splits,
-                'worst_spot': dict(worst_spot_row) if worst_spot_row else None,
+                'worst_spot': ({'area': worst_spot[0][0][0], 'trade': worst_spot[0][0][1], 'count': worst_spot[0][1]}
+                               if worst_spot else None),
                 'inspection_status': u['inspection_status'],
             })
 
@@ -4932,31 +4425,25 @@ def _build_audit_data_dict():
     # Fetch ALL inspections (C1 + C2+) in one query, with resolved inspector display name.
     # Role gate: only inspector/team_lead roles OR orphan IDs (insp.id IS NULL).
     # This excludes admins/managers that might appear on inspection rows by accident.
-    rows = [dict(r) for r in query_db("""
+    # Duration and attributed defects (C1 raised / C2+ addressed) are stored on the
+    # inspection by app/services/inspection_metrics.py triggers - no defect join.
+    rows = [dict(r) for r in query_with_metrics("""
         SELECT i.inspector_id,
                COALESCE(insp.name, 'Unknown (' || i.inspector_id || ')') AS inspector_display,
-               i.inspection_date, i.started_at, i.submitted_at,
-               i.paused_at, i.total_paused_seconds,
+               i.inspection_date,
                i.status AS insp_status, i.id AS inspection_id, i.cycle_number,
                u.id AS unit_id, u.unit_number, u.block, u.floor,
-               COUNT(d.id) AS defect_count
+               {{duration}} AS duration_seconds,
+               COALESCE({{defects}}, 0) AS defect_count
         FROM inspection i
         JOIN unit_real u ON i.unit_id = u.id
         LEFT JOIN inspector insp ON insp.id = i.inspector_id
-        LEFT JOIN defect d ON d.unit_id = u.id
-            AND d.tenant_id = u.tenant_id
-            AND (
-                (i.cycle_number = 1 AND d.raised_cycle_id = i.cycle_id)
-                OR
-                (i.cycle_number > 1 AND d.addressed_cycle_number = i.cycle_number)
-            )
         WHERE i.tenant_id = ?
           AND i.status IN ('reviewed','approved','certified','pending_followup')
           AND i.inspector_id IS NOT NULL
           AND u.unit_number NOT LIKE 'TEST%%'
           AND (insp.role IN ('inspector','team_lead') OR insp.id IS NULL)
           {date_filter}
-        GROUP BY i.id
         ORDER BY inspector_display, i.inspection_date DESC, u.unit_number
     """.format(date_filter=date_filter), params)]
 
@@ -4970,44 +4457,6 @@ def _build_audit_data_dict():
         'certified': ('Certified', '#D1FAE5', '#065F46'),
     }
 
-    def calc_duration(started, submitted, total_paused_seconds=0, paused_at=None):
-        if not started:
-            return 'N/A'
-        effective_end = paused_at if paused_at else submitted
-        if not effective_end:
-            return 'N/A'
-        submitted = effective_end
-        try:
-            from datetime import datetime
-            for fmt in ('%Y-%m-%dT%H:%M:%S.%f%z', '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S'):
-                try:
-                    s = datetime.strptime(started.replace('+00:00', '').replace('Z', ''), fmt.replace('%z', ''))
-                    break
-                except ValueError:
-                    s = None
-            for fmt in ('%Y-%m-%dT%H:%M:%S.%f%z', '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S'):
-                try:
-                    e = datetime.strptime(submitted.replace('+00:00', '').replace('Z', ''), fmt.replace('%z', ''))
-                    break
-                except ValueError:
-                    e = None
-            if not s or not e:
-                return 'N/A'
-            diff = e - s
-            total_secs = diff.total_seconds() - (total_paused_seconds or 0)
-            if total_secs < 0:
-                total_secs = 0
-            total_mins = int(total_secs / 60)
-            if total_mins < 2:
-                return 'N/A'
-            if total_mins < 60:
-                return f'{total_mins}m'
-            hours = total_mins // 60
-            mins = total_mins % 60
-            return f'{hours}h {mins}m'
-        except Exception:
-            return 'N/A'
-
     from collections import OrderedDict, defaultdict
 
     groups = OrderedDict()
@@ -5022,7 +4471,7 @@ def _build_audit_data_dict():
             }
         zone = '{} {}'.format(r['block'], floor_labels.get(r['floor'], 'Floor ' + str(r['floor'])))
         status_info = status_map.get(r['insp_status'], ('Unknown', '#F3F4F6', '#6B7280'))
-        duration = calc_duration(r['started_at'], r['submitted_at'], r['total_paused_seconds'], r['paused_at'])
+        duration = duration_label(r['duration_seconds'])
         entry = {
             'unit_id': r['unit_id'],
             'unit_number': r['unit_number'],
@@ -5031,6 +4480,7 @@ def _build_audit_data_dict():
             'cycle': 'C{}'.format(r['cycle_number']),
             'cycle_number': r['cycle_number'],
             'duration': duration,
+            'duration_mins': r['duration_seconds'] // 60 if duration != 'N/A' else None,
             'defect_count': r['defect_count'],
             'status_label': status_info[0],
             'status_bg': status_info[1],
@@ -5044,21 +4494,10 @@ def _build_audit_data_dict():
     colours = ['#C8963E', '#3D6B8E', '#4A7C59', '#C44D3F', '#7B6B8D', '#5A8A7A', '#B07D4B']
 
     def avg_dur_label(units):
-        durs = [u['duration'] for u in units if u['duration'] != 'N/A']
+        durs = [u['duration_mins'] for u in units if u['duration_mins'] is not None]
         if not durs:
             return None
-        total_mins = 0
-        count = 0
-        for d in durs:
-            if 'h' in d:
-                parts = d.replace('h', '').replace('m', '').split()
-                total_mins += int(parts[0]) * 60 + (int(parts[1]) if len(parts) > 1 else 0)
-            elif 'm' in d:
-                total_mins += int(d.replace('m', ''))
-            count += 1
-        if not count:
-            return None
-        am = total_mins // count
+        am = sum(durs) // len(durs)
         return f'{am // 60}h {am % 60}m' if am >= 60 else f'{am}m'
 
     def date_range_label(units):
@@ -5104,14 +4543,12 @@ def _build_audit_data_dict():
     desnag_inspector_count = sum(1 for g in detail_groups if g['desnag']['unit_count'] > 0)
 
     # C1 zone-adjusted scoring
-    zone_cards = [dict(r) for r in query_db("""
+    zone_cards = [dict(r) for r in query_with_metrics("""
         SELECT u.block, u.floor,
             COUNT(DISTINCT u.id) as inspected,
-            ROUND(1.0 * COUNT(d.id) / COUNT(DISTINCT u.id), 1) as avg_defects
+            ROUND(1.0 * COALESCE(SUM({defects}), 0) / COUNT(DISTINCT u.id), 1) as avg_defects
         FROM inspection i
         JOIN unit_real u ON i.unit_id = u.id
-        LEFT JOIN defect d ON d.unit_id = u.id AND d.raised_cycle_id = i.cycle_id
-            AND d.tenant_id = u.tenant_id
         WHERE i.tenant_id = ? AND i.cycle_number = 1
             AND i.status IN ('reviewed','approved','certified','pending_followup')
             AND u.unit_number NOT LIKE 'TEST%'
@@ -5120,16 +4557,14 @@ def _build_audit_data_dict():
     """, [tenant_id])]
     zone_avgs = {(c['block'], c['floor']): c['avg_defects'] for c in zone_cards}
 
-    inspector_raw = [dict(r) for r in query_db("""
+    inspector_raw = [dict(r) for r in query_with_metrics("""
         SELECT i.inspector_id,
             COALESCE(insp.name, 'Unknown (' || i.inspector_id || ')') AS inspector_display,
             u.unit_number, u.block, u.floor,
-            COUNT(d.id) as defect_count
+            COALESCE(SUM({defects}), 0) as defect_count
         FROM inspection i
         JOIN unit_real u ON i.unit_id = u.id
         LEFT JOIN inspector insp ON insp.id = i.inspector_id
-        LEFT JOIN defect d ON d.unit_id = u.id AND d.raised_cycle_id = i.cycle_id
-            AND d.tenant_id = u.tenant_id
         WHERE i.tenant_id = ? AND i.cycle_number = 1
             AND i.status IN ('reviewed','approved','certified','pending_followup')
             AND i.inspector_id IS NOT NULL
@@ -5189,11 +4624,11 @@ def _build_audit_data_dict():
     # so batch scores are directly comparable to lifetime scores and
     # to each other. Only the Zone-Adjusted Ranking chart consumes this.
     # --------------------------------------------------------------
-    inspector_raw_with_batch = [dict(r) for r in query_db('''
+    inspector_raw_with_batch = [dict(r) for r in query_with_metrics('''
         SELECT i.inspector_id,
             COALESCE(insp.name, 'Unknown (' || i.inspector_id || ')') AS inspector_display,
             u.block, u.floor,
-            COUNT(d.id) as defect_count,
+            COALESCE(MAX({defects}), 0) as defect_count,
             ib.name AS batch_name,
             ib.status AS batch_status
         FROM inspection i
@@ -5203,9 +4638,6 @@ def _build_audit_data_dict():
             AND bu.tenant_id = i.tenant_id
         JOIN inspection_batch ib ON ib.id = bu.batch_id
         LEFT JOIN inspector insp ON insp.id = i.inspector_id
-        LEFT JOIN defect d ON d.unit_id = u.id
-            AND d.raised_cycle_id = i.cycle_id
-            AND d.tenant_id = u.tenant_id
         WHERE i.tenant_id = ? AND i.cycle_number = 1
             AND i.status IN ('reviewed','approved','certified','pending_followup')
             AND i.inspector_id IS NOT NULL
@@ -5504,6 +4936,41 @@ def login_status():
 # PIPELINE REPORT (Project Overview - unified remediation pipeline)
 # ============================================================
 
+def _snapshot_cycle(now_sast):
+    """(cycle-end Monday, snapshot moment SAST) of the most recently COMPLETED fortnight.
+
+    Cycles align with bi-weekly meeting cadence; each cycle ends Mon 23:59 SAST.
+    Rollover at Tue 00:00 SAST (the day after a cycle ends).
+    On the cycle-end Monday itself, still show the PREVIOUS cycle (not yet complete).
+    Anchor: Mon 13 April 2026 = end of first cycle (discussed at Wed 15 Apr meeting).
+    """
+    from datetime import datetime as _dt, timedelta as _td
+    _CYCLE_END_ANCHOR = _dt(2026, 4, 13)
+    _today_midnight = _dt(now_sast.year, now_sast.month, now_sast.day)
+    _days_since_anchor = (_today_midnight - _CYCLE_END_ANCHOR).days
+    if _days_since_anchor <= 0:
+        _cycle_index = 0
+    else:
+        _cycle_index = (_days_since_anchor - 1) // 14
+    snapshot_mon = _CYCLE_END_ANCHOR + _td(days=14 * _cycle_index)
+    # Snapshot moment = Tue 11:59 SAST (allows Tuesday morning reviews to land in today's brief)
+    return snapshot_mon, snapshot_mon + _td(days=1, hours=11, minutes=59)
+
+
+def _snapshot_cutoff_str():
+    """UTC snapshot_str of _build_pipeline_report_data(live=False), without building it."""
+    from datetime import datetime as _dt, timedelta as _td
+    _, snapshot_sast = _snapshot_cycle(_dt.utcnow() + _td(hours=2))
+    return (snapshot_sast - _td(hours=2)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _cached_pipeline_report_data():
+    """Snapshot-mode pipeline report data via the on-disk report cache."""
+    tenant_id = session.get('tenant_id', 'MONOGRAPH')
+    return cached_report('pipeline', tenant_id, _snapshot_cutoff_str(),
+                         lambda: _build_pipeline_report_data(live=False))
+
+
 def _build_pipeline_report_data(live=False):
     """Build data for the Pipeline Report / Dashboard.
     live=True: current state (dashboard).
@@ -5524,21 +4991,7 @@ def _build_pipeline_report_data(live=False):
         snapshot_label = 'Live'
         snapshot_date = _now_sast.strftime('%A %d %B %Y')
     else:
-        # Snapshot mode: show most recently COMPLETED fortnight cycle.
-        # Cycles align with bi-weekly meeting cadence; each cycle ends Mon 23:59 SAST.
-        # Rollover at Tue 00:00 SAST (the day after a cycle ends).
-        # On the cycle-end Monday itself, still show the PREVIOUS cycle (not yet complete).
-        # Anchor: Mon 13 April 2026 = end of first cycle (discussed at Wed 15 Apr meeting).
-        _CYCLE_END_ANCHOR = _dt(2026, 4, 13)
-        _today_midnight = _dt(_now_sast.year, _now_sast.month, _now_sast.day)
-        _days_since_anchor = (_today_midnight - _CYCLE_END_ANCHOR).days
-        if _days_since_anchor <= 0:
-            _cycle_index = 0
-        else:
-            _cycle_index = (_days_since_anchor - 1) // 14
-        snapshot_mon = _CYCLE_END_ANCHOR + _td(days=14 * _cycle_index)
-        # Snapshot moment = Tue 11:59 SAST (allows Tuesday morning reviews to land in today's brief)
-        snapshot_sast = snapshot_mon + _td(days=1, hours=11, minutes=59)
+        snapshot_mon, snapshot_sast = _snapshot_cycle(_now_sast)
         snapshot_utc = snapshot_sast - _td(hours=2)
         snapshot_str = snapshot_utc.strftime('%Y-%m-%d %H:%M:%S')
         prev_week_utc = snapshot_utc - _td(days=14)
@@ -5603,17 +5056,7 @@ def _build_pipeline_report_data(live=False):
     c2_plus_ids = set(r['unit_id'] for r in c2_rows)
 
     # Open defects per unit (as of snapshot)
-    open_rows = query_db("""
-        SELECT d.unit_id, COUNT(*) as cnt
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        WHERE d.tenant_id = ? AND d.created_at <= ?
-        AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-        AND d.raised_cycle_id NOT LIKE 'test-%%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)
-        GROUP BY d.unit_id
-    """, [tenant_id, snapshot_str, snapshot_str, snapshot_str])
-    unit_open = {r['unit_id']: r['cnt'] for r in open_rows}
+    unit_open = count_open(tenant_id, snapshot_str, snapshot_str, by='unit_id')
 
     # Headline metrics
     units_inspected = len(unit_max_completed)
@@ -5844,64 +5287,40 @@ def _build_pipeline_report_data(live=False):
             p = p - _td(days=14)
         steps.reverse()
 
-        for p in steps:
-            p_str = p.strftime('%Y-%m-%d %H:%M:%S')
-            # Trim: skip points where the gate has fewer than 10 units
-            gate_units = query_db(
-                "SELECT COUNT(DISTINCT i.unit_id) as c FROM inspection i JOIN unit_real u ON i.unit_id = u.id WHERE i.tenant_id = ? AND i.status IN ('reviewed','approved','certified','pending_followup') AND i.review_submitted_at <= ? AND i.cycle_id NOT LIKE 'test-%%'",
-                [tenant_id, snapshot_str], one=True)
-            if not gate_units or gate_units['c'] < 10:
-                continue
-            raised_row = query_db(
-                "SELECT COUNT(*) as c FROM defect d JOIN unit_real u ON d.unit_id = u.id WHERE d.tenant_id = ? AND d.created_at <= ? AND d.raised_cycle_id NOT LIKE 'test-%%' AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)",
-                [tenant_id, p_str, snapshot_str], one=True)
-            cleared_row = query_db(
-                "SELECT COUNT(*) as c FROM defect d JOIN unit_real u ON d.unit_id = u.id WHERE d.tenant_id = ? AND d.status = 'cleared' AND d.cleared_at <= ? AND d.raised_cycle_id NOT LIKE 'test-%%' AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)",
-                [tenant_id, p_str, snapshot_str], one=True)
-            trend_points.append({
-                'date': p.strftime('%d %b'),
-                'raised': raised_row['c'] if raised_row else 0,
-                'cleared': cleared_row['c'] if cleared_row else 0,
-            })
+        # Trim: no points when the gate has fewer than 10 units (the gate is
+        # pinned to the snapshot, so this holds for every step or none)
+        gate_units = query_db(
+            "SELECT COUNT(DISTINCT i.unit_id) as c FROM inspection i JOIN unit_real u ON i.unit_id = u.id WHERE i.tenant_id = ? AND i.status IN ('reviewed','approved','certified','pending_followup') AND i.review_submitted_at <= ? AND i.cycle_id NOT LIKE 'test-%%'",
+            [tenant_id, snapshot_str], one=True)
+        if gate_units and gate_units['c'] >= 10:
+            series = trend_series(tenant_id, snapshot_str,
+                                  [p.strftime('%Y-%m-%d %H:%M:%S') for p in steps])
+            for p, (raised, cleared) in zip(steps, series):
+                trend_points.append({
+                    'date': p.strftime('%d %b'),
+                    'raised': raised,
+                    'cleared': cleared,
+                })
 
     # In live mode, add today as final trend point
     if live and trend_points:
         today_str = _dt.now().strftime('%Y-%m-%d %H:%M:%S')
-        raised_today = query_db(
-            "SELECT COUNT(*) as c FROM defect d JOIN unit_real u ON d.unit_id = u.id WHERE d.tenant_id = ? AND d.created_at <= ? AND d.raised_cycle_id NOT LIKE 'test-%%' AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)",
-            [tenant_id, today_str, today_str], one=True)
-        cleared_today = query_db(
-            "SELECT COUNT(*) as c FROM defect d JOIN unit_real u ON d.unit_id = u.id WHERE d.tenant_id = ? AND d.status = 'cleared' AND d.cleared_at <= ? AND d.raised_cycle_id NOT LIKE 'test-%%' AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)",
-            [tenant_id, today_str, today_str], one=True)
+        raised, cleared = trend_series(tenant_id, today_str, [today_str])[0]
         trend_points.append({
             'date': _dt.now().strftime('%d %b'),
-            'raised': raised_today['c'] if raised_today else 0,
-            'cleared': cleared_today['c'] if cleared_today else 0,
+            'raised': raised,
+            'cleared': cleared,
         })
 
     # Weekly ledger (prev week -> snapshot)
     last_week_str = prev_week_str
     now_str = snapshot_str
     
-    bfwd_row = query_db(
-        "SELECT COUNT(*) as c FROM defect d JOIN unit_real u ON d.unit_id = u.id WHERE d.tenant_id = ? AND d.created_at <= ? AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?)) AND d.raised_cycle_id NOT LIKE 'test-%%' AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)",
-        [tenant_id, last_week_str, last_week_str, now_str], one=True)
-    cleared_week_row = query_db(
-        "SELECT COUNT(*) as c FROM defect d JOIN unit_real u ON d.unit_id = u.id WHERE d.tenant_id = ? AND d.status = 'cleared' AND d.cleared_at > ? AND d.cleared_at <= ? AND d.raised_cycle_id NOT LIKE 'test-%%' AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)",
-        [tenant_id, last_week_str, now_str, now_str], one=True)
-    new_week_row = query_db(
-        "SELECT COUNT(*) as c FROM defect d JOIN unit_real u ON d.unit_id = u.id WHERE d.tenant_id = ? AND d.created_at > ? AND d.created_at <= ? AND d.raised_cycle_id NOT LIKE 'test-%%' AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)",
-        [tenant_id, last_week_str, now_str, now_str], one=True)
-    
-    total_open_row = query_db(
-        "SELECT COUNT(*) as c FROM defect d JOIN unit_real u ON d.unit_id = u.id WHERE d.tenant_id = ? AND d.created_at <= ? AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?)) AND d.raised_cycle_id NOT LIKE 'test-%%' AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)",
-        [tenant_id, snapshot_str, snapshot_str, snapshot_str], one=True)
-    
     ledger = {
-        'bfwd': bfwd_row['c'] if bfwd_row else 0,
-        'cleared': cleared_week_row['c'] if cleared_week_row else 0,
-        'new': new_week_row['c'] if new_week_row else 0,
-        'open': total_open_row['c'] if total_open_row else 0,
+        'bfwd': count_open(tenant_id, now_str, last_week_str),
+        'cleared': count_cleared(tenant_id, now_str, now_str, since=last_week_str),
+        'new': count_raised(tenant_id, now_str, now_str, since=last_week_str),
+        'open': count_open(tenant_id, snapshot_str, snapshot_str),
     }
 
     # SVG chart coordinates (600w x 200h chart area)
@@ -5961,54 +5380,10 @@ def _build_pipeline_report_data(live=False):
     for r in zone_c2_rows:
         zone_c2[(r['block'], r['floor'])] = r['c2_units']
 
-    # Total raised defects per zone (all time up to snapshot, from completed inspections)
-    zone_raised_rows = query_db("""
-        SELECT u.block, u.floor, COUNT(*) as raised
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        WHERE d.tenant_id = ? AND d.created_at <= ?
-        AND d.raised_cycle_id NOT LIKE 'test-%%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id
-                    AND i2.status IN ('reviewed','approved','certified','pending_followup')
-                    AND i2.review_submitted_at <= ?)
-        GROUP BY u.block, u.floor
-    """, [tenant_id, snapshot_str, snapshot_str])
-    zone_raised = {}
-    for r in zone_raised_rows:
-        zone_raised[(r['block'], r['floor'])] = r['raised']
-
-    # Cleared defects per zone (as of snapshot)
-    zone_cleared_rows = query_db("""
-        SELECT u.block, u.floor, COUNT(*) as cleared
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        WHERE d.tenant_id = ? AND d.status = 'cleared' AND d.cleared_at <= ?
-        AND d.raised_cycle_id NOT LIKE 'test-%%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id
-                    AND i2.status IN ('reviewed','approved','certified','pending_followup')
-                    AND i2.review_submitted_at <= ?)
-        GROUP BY u.block, u.floor
-    """, [tenant_id, snapshot_str, snapshot_str])
-    zone_cleared = {}
-    for r in zone_cleared_rows:
-        zone_cleared[(r['block'], r['floor'])] = r['cleared']
-
-    # Open defects per zone (as of snapshot)
-    zone_open_rows = query_db("""
-        SELECT u.block, u.floor, COUNT(*) as cnt
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        WHERE d.tenant_id = ? AND d.created_at <= ?
-        AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-        AND d.raised_cycle_id NOT LIKE 'test-%%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id
-                    AND i2.status IN ('reviewed','approved','certified','pending_followup')
-                    AND i2.review_submitted_at <= ?)
-        GROUP BY u.block, u.floor
-    """, [tenant_id, snapshot_str, snapshot_str, snapshot_str])
-    zone_open = {}
-    for r in zone_open_rows:
-        zone_open[(r['block'], r['floor'])] = r['cnt']
+    # Raised / cleared / open defects per zone (as of snapshot, from completed inspections)
+    zone_raised = count_raised(tenant_id, snapshot_str, snapshot_str, by=('block', 'floor'))
+    zone_cleared = count_cleared(tenant_id, snapshot_str, snapshot_str, by=('block', 'floor'))
+    zone_open = count_open(tenant_id, snapshot_str, snapshot_str, by=('block', 'floor'))
 
     # Build enriched zone grid
     all_blocks = sorted(set(k[0] for k in zone_total_units))
@@ -6116,52 +5491,27 @@ def _build_pipeline_report_data(live=False):
     floor_labels = {0: 'Ground', 1: '1st Floor', 2: '2nd Floor'}
 
     # Area breakdown (by room)
-    area_rows = query_db("""
-        SELECT at2.area_name, COUNT(*) as cnt
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        JOIN item_template it ON d.item_template_id = it.id
-        JOIN category_template ct ON it.category_id = ct.id
-        JOIN area_template at2 ON ct.area_id = at2.id
-        WHERE d.tenant_id = ? AND d.created_at <= ?
-        AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-        AND d.raised_cycle_id NOT LIKE 'test-%%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)
-        GROUP BY at2.area_name
-        ORDER BY cnt DESC
-    """, [tenant_id, snapshot_str, snapshot_str, snapshot_str])
+    area_counts = count_open(tenant_id, snapshot_str, snapshot_str, by='area_name')
 
     total_open = ledger['open']
     areas = []
-    for r in area_rows:
-        pct = round(100 * r['cnt'] / total_open, 1) if total_open > 0 else 0
+    for area_name, cnt in sorted(area_counts.items(), key=lambda kv: -kv[1]):
+        pct = round(100 * cnt / total_open, 1) if total_open > 0 else 0
         areas.append({
-            'name': r['area_name'],
-            'count': r['cnt'],
+            'name': area_name,
+            'count': cnt,
             'pct': pct,
         })
 
     # Trade breakdown (by category)
-    trade_rows = query_db("""
-        SELECT ct.category_name, COUNT(*) as cnt
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        JOIN item_template it ON d.item_template_id = it.id
-        JOIN category_template ct ON it.category_id = ct.id
-        WHERE d.tenant_id = ? AND d.created_at <= ?
-        AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-        AND d.raised_cycle_id NOT LIKE 'test-%%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)
-        GROUP BY ct.category_name
-        ORDER BY cnt DESC
-    """, [tenant_id, snapshot_str, snapshot_str, snapshot_str])
+    trade_counts = count_open(tenant_id, snapshot_str, snapshot_str, by='trade')
 
     trades = []
-    for r in trade_rows:
-        pct = round(100 * r['cnt'] / total_open, 1) if total_open > 0 else 0
+    for trade, cnt in sorted(trade_counts.items(), key=lambda kv: -kv[1]):
+        pct = round(100 * cnt / total_open, 1) if total_open > 0 else 0
         trades.append({
-            'name': r['category_name'],
-            'count': r['cnt'],
+            'name': trade,
+            'count': cnt,
             'pct': pct,
         })
 
@@ -6170,18 +5520,14 @@ def _build_pipeline_report_data(live=False):
     dd_colours = ['#C8963E', '#3D6B8E']
     for idx, area_row in enumerate(areas[:2]):
         area_name = area_row['name']
-        area_defects = [dict(r) for r in query_db("""
+        area_defects = [dict(r) for r in query_facts("""
             SELECT d.original_comment AS description, COUNT(*) AS count
-            FROM defect d
-            JOIN unit_real u ON d.unit_id = u.id
-            JOIN item_template it ON d.item_template_id = it.id
-            JOIN category_template ct ON it.category_id = ct.id
-            JOIN area_template at2 ON ct.area_id = at2.id
-            WHERE d.tenant_id = ? AND d.created_at <= ?
-            AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-            AND d.raised_cycle_id NOT LIKE 'test-%%'
-            AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)
-            AND at2.area_name = ?
+            FROM {facts} f
+            JOIN defect d ON d.id = f.defect_id
+            WHERE f.tenant_id = ? AND f.created_at <= ?
+            AND (f.status = 'open' OR (f.status = 'cleared' AND f.cleared_at > ?))
+            AND f.visible_from <= ?
+            AND f.area_name = ?
             GROUP BY d.original_comment
             ORDER BY count DESC
             LIMIT 3
@@ -6210,16 +5556,15 @@ def _build_pipeline_report_data(live=False):
                 a2['area'].title(), d2['description'].lower(), d2['count'])
 
     # --- SYSTEMIC ISSUES (recurring defects across 3+ units) ---
-    recurring_raw = query_db("""
+    recurring_raw = query_facts("""
         SELECT d.original_comment,
             COUNT(d.id) AS cnt,
-            COUNT(DISTINCT d.unit_id) AS unit_count
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        WHERE d.tenant_id = ? AND d.created_at <= ?
-        AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-        AND d.raised_cycle_id NOT LIKE 'test-%%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)
+            COUNT(DISTINCT f.unit_id) AS unit_count
+        FROM {facts} f
+        JOIN defect d ON d.id = f.defect_id
+        WHERE f.tenant_id = ? AND f.created_at <= ?
+        AND (f.status = 'open' OR (f.status = 'cleared' AND f.cleared_at > ?))
+        AND f.visible_from <= ?
         GROUP BY d.original_comment
         HAVING unit_count >= 3
         ORDER BY cnt DESC
@@ -6230,18 +5575,16 @@ def _build_pipeline_report_data(live=False):
     if recurring:
         top_comments = [r['original_comment'] for r in recurring]
         placeholders = ','.join('?' * len(top_comments))
-        cat_raw = query_db("""
-            SELECT d.original_comment, ct.category_name, COUNT(d.id) AS cat_cnt
-            FROM defect d
-            JOIN unit_real u ON d.unit_id = u.id
-            JOIN item_template it ON d.item_template_id = it.id
-            JOIN category_template ct ON it.category_id = ct.id
-            WHERE d.tenant_id = ? AND d.created_at <= ?
-            AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-            AND d.raised_cycle_id NOT LIKE 'test-%%'
+        cat_raw = query_facts("""
+            SELECT d.original_comment, f.trade AS category_name, COUNT(d.id) AS cat_cnt
+            FROM {{facts}} f
+            JOIN defect d ON d.id = f.defect_id
+            WHERE f.tenant_id = ? AND f.created_at <= ?
+            AND (f.status = 'open' OR (f.status = 'cleared' AND f.cleared_at > ?))
+            AND f.trade IS NOT NULL
             AND d.original_comment IN ({})
-            AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)
-            GROUP BY d.original_comment, ct.category_name
+            AND f.visible_from <= ?
+            GROUP BY d.original_comment, f.trade
             ORDER BY d.original_comment, cat_cnt DESC
         """.format(placeholders), [tenant_id, snapshot_str, snapshot_str] + top_comments + [snapshot_str])
         from collections import defaultdict
@@ -6351,18 +5694,17 @@ def _build_pipeline_report_data(live=False):
 
     # All units with open defects + their C1 submission date + cycle info
     # v321: subqueries gated by review_submitted_at <= snapshot (matches EXISTS clause)
-    stuck_rows = query_db("""
+    stuck_rows = query_facts("""
         SELECT u.unit_number, u.block, u.floor,
-               COUNT(d.id) as open_count,
-               (SELECT MIN(i.submitted_at) FROM inspection i WHERE i.unit_id = u.id AND i.tenant_id = d.tenant_id AND i.status IN ('reviewed','approved','pending_followup') AND i.review_submitted_at <= ?) as first_c1_submitted,
-               (SELECT MAX(i.cycle_number) FROM inspection i WHERE i.unit_id = u.id AND i.tenant_id = d.tenant_id AND i.status IN ('reviewed','approved','pending_followup') AND i.review_submitted_at <= ?) as max_cycle,
-               SUM(CASE WHEN d.raised_cycle_number >= 2 THEN 1 ELSE 0 END) as new_c2
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        WHERE d.tenant_id = ? AND d.created_at <= ?
-        AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-        AND d.raised_cycle_id NOT LIKE 'test-%%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)
+               COUNT(f.defect_id) as open_count,
+               (SELECT MIN(i.submitted_at) FROM inspection i WHERE i.unit_id = u.id AND i.tenant_id = f.tenant_id AND i.status IN ('reviewed','approved','pending_followup') AND i.review_submitted_at <= ?) as first_c1_submitted,
+               (SELECT MAX(i.cycle_number) FROM inspection i WHERE i.unit_id = u.id AND i.tenant_id = f.tenant_id AND i.status IN ('reviewed','approved','pending_followup') AND i.review_submitted_at <= ?) as max_cycle,
+               SUM(CASE WHEN f.raised_cycle_number >= 2 THEN 1 ELSE 0 END) as new_c2
+        FROM {facts} f
+        JOIN unit u ON f.unit_id = u.id
+        WHERE f.tenant_id = ? AND f.created_at <= ?
+        AND (f.status = 'open' OR (f.status = 'cleared' AND f.cleared_at > ?))
+        AND f.visible_from <= ?
         GROUP BY u.id
         ORDER BY open_count DESC
     """, [snapshot_str, snapshot_str, tenant_id, snapshot_str, snapshot_str, snapshot_str])
@@ -6541,7 +5883,7 @@ def pipeline_report_view():
     """Pipeline Report - HTML preview."""
     import datetime, base64, os as _os
     from flask import current_app
-    data = _build_pipeline_report_data()
+    data = _cached_pipeline_report_data()
     data['is_pdf'] = False
     data['report_date'] = datetime.datetime.now().strftime('%d %B %Y')
     logo_path = _os.path.join(current_app.static_folder, 'monograph_logo.jpg')
@@ -6560,7 +5902,7 @@ def pipeline_report_pdf():
     from app.services.pdf_playwright import html_to_pdf
     import datetime, base64, os as _os
     from flask import current_app
-    data = _build_pipeline_report_data()
+    data = _cached_pipeline_report_data()
     data['is_pdf'] = True
     data['report_date'] = datetime.datetime.now().strftime('%d %B %Y')
     logo_path = _os.path.join(current_app.static_folder, 'monograph_logo.jpg')
@@ -6852,38 +6194,31 @@ def _build_brief_by_trade(tenant_id, snap_str, prev_cutoff_str):
     so per-trade totals sum to the s3 movement headline.
     """
     open_at_cutoff = """
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
+        FROM {facts} f
+        JOIN defect d ON d.id = f.defect_id
         JOIN item_template it ON d.item_template_id = it.id
         JOIN category_template ct ON it.category_id = ct.id
-        WHERE d.tenant_id = ?
-          AND d.created_at <= ?
-          AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-          AND d.raised_cycle_id NOT LIKE 'test-%%'
-          AND EXISTS (
-            SELECT 1 FROM inspection i2
-            WHERE i2.unit_id = d.unit_id
-              AND i2.cycle_id = d.raised_cycle_id
-              AND i2.status IN ('reviewed','approved','certified','pending_followup')
-              AND i2.review_submitted_at <= ?
-          )
+        WHERE f.tenant_id = ?
+          AND f.created_at <= ?
+          AND (f.status = 'open' OR (f.status = 'cleared' AND f.cleared_at > ?))
+          AND f.visible_from <= ?
     """
 
-    curr_rows = query_db(
+    curr_rows = query_facts(
         "SELECT ct.category_name AS trade, COUNT(*) AS cnt " + open_at_cutoff +
         " GROUP BY ct.category_name",
         [tenant_id, snap_str, snap_str, snap_str]
     )
     curr = {r['trade']: r['cnt'] for r in curr_rows}
 
-    prev_rows = query_db(
+    prev_rows = query_facts(
         "SELECT ct.category_name AS trade, COUNT(*) AS cnt " + open_at_cutoff +
         " GROUP BY ct.category_name",
         [tenant_id, prev_cutoff_str, prev_cutoff_str, snap_str]
     )
     prev = {r['trade']: r['cnt'] for r in prev_rows}
 
-    top_rows = query_db(
+    top_rows = query_facts(
         "SELECT ct.category_name AS trade, d.original_comment AS comment, COUNT(*) AS cnt " +
         open_at_cutoff +
         " AND d.original_comment IS NOT NULL "
@@ -6912,7 +6247,7 @@ def _build_brief_by_trade(tenant_id, snap_str, prev_cutoff_str):
         if not _top['comment']:
             items_by_trade[_trade] = []
             continue
-        _rs = query_db(item_sql, [tenant_id, snap_str, snap_str, snap_str, _trade, _top['comment']])
+        _rs = query_facts(item_sql, [tenant_id, snap_str, snap_str, snap_str, _trade, _top['comment']])
         items_by_trade[_trade] = [(r['item'], r['cnt']) for r in _rs]
 
     def _fmt_items(items, cap=5):
@@ -6957,38 +6292,31 @@ def _build_dashboard_by_trade(tenant_id, snap_str, prev_cutoff_str):
     snapshot modes.
     """
     open_at_cutoff = """
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
+        FROM {facts} f
+        JOIN defect d ON d.id = f.defect_id
         JOIN item_template it ON d.item_template_id = it.id
         JOIN category_template ct ON it.category_id = ct.id
-        WHERE d.tenant_id = ?
-          AND d.created_at <= ?
-          AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-          AND d.raised_cycle_id NOT LIKE 'test-%%'
-          AND EXISTS (
-            SELECT 1 FROM inspection i2
-            WHERE i2.unit_id = d.unit_id
-              AND i2.cycle_id = d.raised_cycle_id
-              AND i2.status IN ('reviewed','approved','certified','pending_followup')
-              AND i2.review_submitted_at <= ?
-          )
+        WHERE f.tenant_id = ?
+          AND f.created_at <= ?
+          AND (f.status = 'open' OR (f.status = 'cleared' AND f.cleared_at > ?))
+          AND f.visible_from <= ?
     """
 
-    curr_rows = query_db(
+    curr_rows = query_facts(
         "SELECT ct.category_name AS trade, COUNT(*) AS cnt " + open_at_cutoff +
         " GROUP BY ct.category_name",
         [tenant_id, snap_str, snap_str, snap_str]
     )
     curr = {r['trade']: r['cnt'] for r in curr_rows}
 
-    prev_rows = query_db(
+    prev_rows = query_facts(
         "SELECT ct.category_name AS trade, COUNT(*) AS cnt " + open_at_cutoff +
         " GROUP BY ct.category_name",
         [tenant_id, prev_cutoff_str, prev_cutoff_str, snap_str]
     )
     prev = {r['trade']: r['cnt'] for r in prev_rows}
 
-    top_rows = query_db(
+    top_rows = query_facts(
         "SELECT ct.category_name AS trade, d.original_comment AS comment, COUNT(*) AS cnt " +
         open_at_cutoff +
         " AND d.original_comment IS NOT NULL "
@@ -7016,7 +6344,7 @@ def _build_dashboard_by_trade(tenant_id, snap_str, prev_cutoff_str):
         if not _top['comment']:
             items_by_trade[_trade] = []
             continue
-        _rs = query_db(item_sql, [tenant_id, snap_str, snap_str, snap_str, _trade, _top['comment']])
+        _rs = query_facts(item_sql, [tenant_id, snap_str, snap_str, snap_str, _trade, _top['comment']])
         items_by_trade[_trade] = [(r['item'], r['cnt']) for r in _rs]
 
     def _fmt_items(items, cap=5):
@@ -7123,17 +6451,7 @@ def _build_brief_prev_desnag(tenant_id, cutoff_str):
     prev_completed_ids = set(r['unit_id'] for r in prev_completed)
     prev_units_inspected = len(prev_completed_ids)
 
-    prev_open = query_db("""
-        SELECT d.unit_id, COUNT(*) as cnt
-        FROM defect d
-        JOIN unit_real u ON d.unit_id = u.id
-        WHERE d.tenant_id = ? AND d.created_at <= ?
-        AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))
-        AND d.raised_cycle_id NOT LIKE 'test-%%'
-        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ('reviewed','approved','certified','pending_followup') AND i2.review_submitted_at <= ?)
-        GROUP BY d.unit_id
-    """, [tenant_id, cutoff_str, cutoff_str, cutoff_str])
-    prev_unit_open = {r['unit_id']: r['cnt'] for r in prev_open}
+    prev_unit_open = count_open(tenant_id, cutoff_str, cutoff_str, by='unit_id')
     prev_handover_ready = sum(1 for uid in prev_completed_ids if prev_unit_open.get(uid, 0) == 0)
     unit_rate = round(prev_handover_ready / prev_units_inspected * 100, 1) if prev_units_inspected > 0 else 0
 
@@ -7143,12 +6461,9 @@ def _build_brief_prev_desnag(tenant_id, cutoff_str):
     }
 
 
-@analytics_bp.route('/site-meeting-brief')
-@require_team_lead
-def site_meeting_brief_view():
-    """Site Meeting Brief - HTML preview."""
-    import datetime, base64, os as _os
-    from flask import current_app
+def _build_site_meeting_brief_data():
+    """Site Meeting Brief context: snapshot pipeline data + the brief-only sections."""
+    import datetime
     data = _build_pipeline_report_data(live=False)
     _tenant = session.get('tenant_id', 'MONOGRAPH')
     _snap_dt = datetime.datetime.strptime(data['snapshot_str'], '%Y-%m-%d %H:%M:%S')
@@ -7159,6 +6474,23 @@ def site_meeting_brief_view():
     if data.get('kpi') and data['kpi'].get('est_complete'):
         data['kpi']['est_complete'] = _strip_leading_zero(data['kpi']['est_complete'])
     data['snapshot_date_short'] = _snap_dt.strftime('%d %b %Y').upper()
+    return data
+
+
+def _cached_site_meeting_brief_data():
+    """_build_site_meeting_brief_data via the on-disk report cache."""
+    tenant_id = session.get('tenant_id', 'MONOGRAPH')
+    return cached_report('site_meeting_brief', tenant_id, _snapshot_cutoff_str(),
+                         _build_site_meeting_brief_data)
+
+
+@analytics_bp.route('/site-meeting-brief')
+@require_team_lead
+def site_meeting_brief_view():
+    """Site Meeting Brief - HTML preview."""
+    import datetime, base64, os as _os
+    from flask import current_app
+    data = _cached_site_meeting_brief_data()
     data['is_pdf'] = False
     data['report_date'] = datetime.datetime.now().strftime('%d %B %Y')
     logo_path = _os.path.join(current_app.static_folder, 'monograph_logo.jpg')
@@ -7177,16 +6509,7 @@ def site_meeting_brief_pdf():
     from app.services.pdf_playwright import html_to_pdf
     import datetime, base64, os as _os
     from flask import current_app
-    data = _build_pipeline_report_data(live=False)
-    _tenant = session.get('tenant_id', 'MONOGRAPH')
-    _snap_dt = datetime.datetime.strptime(data['snapshot_str'], '%Y-%m-%d %H:%M:%S')
-    _prev_cutoff = (_snap_dt - datetime.timedelta(days=14)).strftime('%Y-%m-%d %H:%M:%S')
-    data.update(_build_brief_prev_desnag(_tenant, _prev_cutoff))
-    data.update(_build_brief_by_trade(_tenant, data['snapshot_str'], _prev_cutoff))
-    data.update(_build_brief_latent(_tenant, data['snapshot_str'], _prev_cutoff))
-    if data.get('kpi') and data['kpi'].get('est_complete'):
-        data['kpi']['est_complete'] = _strip_leading_zero(data['kpi']['est_complete'])
-    data['snapshot_date_short'] = _snap_dt.strftime('%d %b %Y').upper()
+    data = _cached_site_meeting_brief_data()
     data['is_pdf'] = True
     data['report_date'] = datetime.datetime.now().strftime('%d %B %Y')
     logo_path = _os.path.join(current_app.static_folder, 'monograph_logo.jpg')
@@ -7365,7 +6688,7 @@ def top_50_view():
     """C1 Defects Brief (Top 50 most-frequent defects) - HTML preview."""
     import datetime, base64, os as _os
     from flask import current_app
-    data = _build_top_50_data()
+    data = cached_report('top_50', session.get('tenant_id', 'MONOGRAPH'), None, _build_top_50_data)
     data['is_pdf'] = False
     data['report_date'] = datetime.datetime.now().strftime('%d %B %Y')
     data['report_date_short'] = datetime.datetime.now().strftime('%d %b %Y').upper()
@@ -7385,7 +6708,7 @@ def top_50_pdf():
     from app.services.pdf_playwright import html_to_pdf
     import datetime, base64, os as _os
     from flask import current_app
-    data = _build_top_50_data()
+    data = cached_report('top_50', session.get('tenant_id', 'MONOGRAPH'), None, _build_top_50_data)
     data['is_pdf'] = True
     data['report_date'] = datetime.datetime.now().strftime('%d %B %Y')
     data['report_date_short'] = datetime.datetime.now().strftime('%d %b %Y').upper()
@@ -7429,9 +6752,8 @@ def pipeline_dashboard():
     #   snapshot  -> Δ vs previous cycle (mirrors SMB's fortnight delta)
     import datetime as _dt280
     if is_live:
-        # Reuse SMB cadence anchor via canonical snapshot-mode build
-        _prev_data = _build_pipeline_report_data(live=False)
-        _prev_cutoff = _prev_data['snapshot_str']
+        # Reuse SMB cadence anchor (snapshot-mode snapshot_str, no full build)
+        _prev_cutoff = _snapshot_cutoff_str()
     else:
         _snap_dt = _dt280.datetime.strptime(data['snapshot_str'], '%Y-%m-%d %H:%M:%S')
         _prev_cutoff = (_snap_dt - _dt280.timedelta(days=14)).strftime('%Y-%m-%d %H:%M:%S')
@@ -7470,207 +6792,46 @@ def batch_reports_picker():
 # Outstanding Items List (Site Punch List for Ralph + site teams)
 # ============================================================================
 
-def _build_outstanding_items_data(tenant_id):
+def _build_outstanding_items_data(tenant_id, block=None, floor=None):
     """All open defects + outstanding latent, grouped Block -> Floor -> Unit -> Area.
 
     Live data (no snapshot freeze). For Ralph Rhoda's site teams to plan
     rectification sweeps. Latent notes are exploded into individual bullet
-    items so each actionable line gets its own row.
+    items so each actionable line gets its own row. block / floor narrow the
+    list to one block or floor (app/services/outstanding_items.py).
     """
-    import sqlite3, re
     from datetime import datetime, timezone, timedelta
 
-    _FL_LABELS = {0: 'Ground', 1: '1st Floor', 2: '2nd Floor', 3: '3rd Floor'}
-
-    conn = sqlite3.connect('/var/data/inspections.db')
-    conn.row_factory = sqlite3.Row
-
     now = datetime.now(timezone.utc)
     sast = now.astimezone(timezone(timedelta(hours=2)))
     snapshot_label = sast.strftime('%d %b %Y %H:%M SAST')
 
-    try:
-        defect_rows = conn.execute("""
-            SELECT u.block, u.floor, u.unit_number,
-                   at.area_name, at.area_order,
-                   ct.category_name AS trade, ct.category_order,
-                   it.item_description, it.item_order, it.depth,
-                   pit.item_description AS parent_item_description,
-                   COALESCE(pit.item_order, it.item_order) AS sort_parent,
-                   COALESCE(NULLIF(d.reviewed_comment,''), NULLIF(d.raw_comment,''), d.original_comment) AS description,
-                   d.raised_cycle_number, d.created_at
-            FROM defect d
-            JOIN item_template it ON d.item_template_id = it.id AND it.tenant_id = d.tenant_id
-            LEFT JOIN item_template pit ON it.parent_item_id = pit.id AND pit.tenant_id = it.tenant_id
-            JOIN category_template ct ON it.category_id = ct.id AND ct.tenant_id = d.tenant_id
-            JOIN area_template at ON ct.area_id = at.id AND at.tenant_id = d.tenant_id
-            JOIN unit_real u ON d.unit_id = u.id AND u.tenant_id = d.tenant_id
-            WHERE d.tenant_id = ? AND d.status = 'open'
-              AND EXISTS (
-                  SELECT 1 FROM inspection i
-                  WHERE i.unit_id = d.unit_id
-                    AND i.tenant_id = d.tenant_id
-                    AND i.cycle_number >= 2
-              )
-            ORDER BY u.block, u.floor, CAST(u.unit_number AS INTEGER),
-                     at.area_order, ct.category_order,
-                     sort_parent, it.depth, it.item_order
-        """, (tenant_id,)).fetchall()
-
-        latent_rows = conn.execute("""
-            SELECT u.block, u.floor, u.unit_number,
-                   at.area_name, at.area_order,
-                   lan.note_html, lan.cycle_number, lan.created_at
-            FROM latent_area_note lan
-            JOIN area_template at ON lan.area_template_id = at.id AND at.tenant_id = lan.tenant_id
-            JOIN unit_real u ON lan.unit_id = u.id AND u.tenant_id = lan.tenant_id
-            WHERE lan.tenant_id = ? AND lan.rectified_at IS NULL
-              AND EXISTS (
-                  SELECT 1 FROM inspection i
-                  WHERE i.unit_id = lan.unit_id
-                    AND i.tenant_id = lan.tenant_id
-                    AND i.cycle_number >= 2
-              )
-            ORDER BY u.block, u.floor, CAST(u.unit_number AS INTEGER), at.area_order
-        """, (tenant_id,)).fetchall()
-    finally:
-        conn.close()
-
-    def _parse_created_at(s):
-        if not s:
-            return None
-        s = s.replace('T', ' ').split('+')[0].split('.')[0]
-        try:
-            return datetime.strptime(s, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-        except Exception:
-            return None
-
-    units_dict = {}
-    trade_counts = {}
-
-    def _get_unit(block, floor, unit_number):
-        key = (block, floor, unit_number)
-        if key not in units_dict:
-            units_dict[key] = {
-                'block': block,
-                'floor': floor,
-                'floor_label': _FL_LABELS.get(floor, 'Floor {}'.format(floor)),
-                'unit_number': unit_number,
-                'open_count': 0,
-                'latent_count': 0,
-                'oldest_age_days': 0,
-                '_areas': {},
-            }
-        return units_dict[key]
-
-    def _get_area(unit, name, order):
-        if name not in unit['_areas']:
-            unit['_areas'][name] = {'name': name, 'area_order': order or 99, 'defects': []}
-        return unit['_areas'][name]
-
-    # Defects
-    for r in defect_rows:
-        u = _get_unit(r['block'], r['floor'], r['unit_number'])
-        a = _get_area(u, r['area_name'], r['area_order'])
-        ca = _parse_created_at(r['created_at'])
-        age_days = (now - ca).days if ca else 0
-        cyc = r['raised_cycle_number']
-        item_desc = (r['item_description'] or '').strip()
-        parent_desc = (r['parent_item_description'] or '').strip() if r['depth'] else ''
-        if parent_desc:
-            item_path = '{} > {}'.format(parent_desc, item_desc)
-        else:
-            item_path = item_desc
-        a['defects'].append({
-            'trade': r['trade'] or '',
-            'item_path': item_path,
-            'description': (r['description'] or '').strip(),
-            'cycle': 'C{}'.format(cyc) if cyc else '',
-            'is_latent': False,
-            'age_days': age_days,
-        })
-        u['open_count'] += 1
-        if age_days > u['oldest_age_days']:
-            u['oldest_age_days'] = age_days
-        t = r['trade'] or 'OTHER'
-        trade_counts[t] = trade_counts.get(t, 0) + 1
-
-    # Latent (explode bullets)
-    _BULLET_RE = re.compile(r'<li[^>]*>(.*?)</li>', re.DOTALL | re.IGNORECASE)
-    _TAG_RE = re.compile(r'<[^>]+>')
-    for r in latent_rows:
-        u = _get_unit(r['block'], r['floor'], r['unit_number'])
-        a = _get_area(u, r['area_name'], r['area_order'])
-        html = r['note_html'] or ''
-        bullets = _BULLET_RE.findall(html)
-        if not bullets:
-            txt = _TAG_RE.sub(' ', html).strip()
-            if txt:
-                bullets = [txt]
-        ca = _parse_created_at(r['created_at'])
-        age_days = (now - ca).days if ca else 0
-        cyc = r['cycle_number']
-        for b in bullets:
-            txt = _TAG_RE.sub(' ', b).strip()
-            txt = re.sub(r'\s+', ' ', txt)
-            if not txt:
-                continue
-            a['defects'].append({
-                'trade': 'LATENT',
-                'item_path': '',
-                'description': txt,
-                'cycle': 'C{}'.format(cyc) if cyc else '',
-                'is_latent': True,
-                'age_days': age_days,
-            })
-            u['latent_count'] += 1
-            if age_days > u['oldest_age_days']:
-                u['oldest_age_days'] = age_days
-
-    # Finalise: sort units, expand areas
-    def _unit_key(k):
-        try:
-            return (k[0], k[1], int(k[2]))
-        except (ValueError, TypeError):
-            return (k[0], k[1], 0)
-
-    units_list = []
-    for key in sorted(units_dict.keys(), key=_unit_key):
-        u = units_dict[key]
-        u['areas'] = sorted(u['_areas'].values(), key=lambda x: x['area_order'])
-        u['oldest_age_weeks'] = u['oldest_age_days'] // 7
-        del u['_areas']
-        units_list.append(u)
-
-    by_trade = sorted(
-        [{'name': t, 'count': c} for t, c in trade_counts.items()],
-        key=lambda x: -x['count']
-    )
-
-    total_open = sum(u['open_count'] for u in units_list)
-    total_latent = sum(u['latent_count'] for u in units_list)
+    totals = OutstandingTotals()
+    units_list = list(iter_outstanding_units(tenant_id, block, floor, totals, now))
 
     return {
         'snapshot_label': snapshot_label,
-        'totals': {
-            'open_defects': total_open,
-            'latent_outstanding': total_latent,
-            'units_affected': len(units_list),
-            'by_trade': by_trade,
-        },
+        'totals': totals.as_dict(),
         'units': units_list,
     }
 
 
-@analytics_bp.route('/outstanding-items')
-@require_team_lead
-def outstanding_items_view():
-    """Outstanding Items List - HTML view (Site Punch List)."""
+def _outstanding_scope():
+    """(block, floor, label) from ?block=&floor= on the outstanding-items routes."""
+    block = request.args.get('block') or None
+    floor = request.args.get('floor', type=int)
+    parts = []
+    if block:
+        parts.append('Block {}'.format(block))
+    if floor is not None:
+        parts.append(OUTSTANDING_FLOOR_LABELS.get(floor, 'Floor {}'.format(floor)))
+    return block, floor, ' / '.join(parts)
+
+
+def _outstanding_context(data, is_pdf):
     import datetime as _dt, base64 as _b64, os as _os
     from flask import current_app as _ca
-    _tenant = session.get('tenant_id', 'MONOGRAPH')
-    data = _build_outstanding_items_data(_tenant)
-    data['is_pdf'] = False
+    data['is_pdf'] = is_pdf
     data['report_date'] = _dt.datetime.now().strftime('%d %B %Y')
     logo_path = _os.path.join(_ca.static_folder, 'monograph_logo.jpg')
     if _os.path.exists(logo_path):
@@ -7678,7 +6839,17 @@ def outstanding_items_view():
             data['logo_b64'] = _b64.b64encode(f.read()).decode()
     else:
         data['logo_b64'] = ''
-    return render_template('analytics/outstanding_items.html', **data)
+    return data
+
+
+@analytics_bp.route('/outstanding-items')
+@require_team_lead
+def outstanding_items_view():
+    """Outstanding Items List - HTML view (Site Punch List)."""
+    _tenant = session.get('tenant_id', 'MONOGRAPH')
+    block, floor, scope_label = _outstanding_scope()
+    data = _outstanding_context(_build_outstanding_items_data(_tenant, block, floor), False)
+    return render_template('analytics/outstanding_items.html', scope_label=scope_label, **data)
 
 
 @analytics_bp.route('/outstanding-items/pdf')
@@ -7686,19 +6857,10 @@ def outstanding_items_view():
 def outstanding_items_pdf():
     """Outstanding Items List - PDF download."""
     from app.services.pdf_playwright import html_to_pdf
-    import datetime as _dt, base64 as _b64, os as _os
-    from flask import current_app as _ca
     _tenant = session.get('tenant_id', 'MONOGRAPH')
-    data = _build_outstanding_items_data(_tenant)
-    data['is_pdf'] = True
-    data['report_date'] = _dt.datetime.now().strftime('%d %B %Y')
-    logo_path = _os.path.join(_ca.static_folder, 'monograph_logo.jpg')
-    if _os.path.exists(logo_path):
-        with open(logo_path, 'rb') as f:
-            data['logo_b64'] = _b64.b64encode(f.read()).decode()
-    else:
-        data['logo_b64'] = ''
-    html_str = render_template('analytics/outstanding_items.html', **data)
+    block, floor, scope_label = _outstanding_scope()
+    data = _outstanding_context(_build_outstanding_items_data(_tenant, block, floor), True)
+    html_str = render_template('analytics/outstanding_items.html', scope_label=scope_label, **data)
     footer = '''<div style="width: 100%; font-size: 8px; font-family: 'DM Sans', Helvetica, Arial, sans-serif; padding: 0 16mm; display: flex; justify-content: space-between; color: #9A9A9A;">
         <span>Confidential &mdash; Monograph Architects</span>
         <span>Power Park Student Housing &ndash; Phase 3</span>
@@ -7707,11 +6869,100 @@ def outstanding_items_pdf():
     pdf_bytes = html_to_pdf(html_str, footer_template=footer)
     resp = make_response(pdf_bytes)
     resp.headers['Content-Type'] = 'application/pdf'
-    today_iso = _dt.datetime.now().strftime('%Y-%m-%d')
-    resp.headers['Content-Disposition'] = 'attachment; filename=Outstanding_Items_{}.pdf'.format(today_iso)
+    resp.headers['Content-Disposition'] = 'attachment; filename={}'.format(
+        _outstanding_filename(block, floor, 'pdf'))
     return resp
 
 
+def _outstanding_filename(block, floor, fmt):
+    import datetime as _dt, re
+    name = 'Outstanding_Items_{}'.format(_dt.datetime.now().strftime('%Y-%m-%d'))
+    if block:
+        name += '_Block_{}'.format(re.sub(r'[^A-Za-z0-9-]+', '', block))
+    if floor is not None:
+        name += '_Floor_{}'.format(floor)
+    return '{}.{}'.format(name, fmt)
+
+
+@analytics_bp.route('/outstanding-items/export.<fmt>')
+@require_team_lead
+def outstanding_items_export(fmt):
+    """Outstanding Items - streaming export (html / csv / xlsx), built block by block.
+
+    ?block= / ?floor= pull one block or floor without computing the rest. The
+    HTML export streams the punch list template as blocks are built, with the
+    totals after the unit list (they are only known at the end).
+    """
+    import csv, io, tempfile
+    from flask import Response, abort, send_file, stream_template, stream_with_context
+    from datetime import datetime, timezone, timedelta
+    _tenant = session.get('tenant_id', 'MONOGRAPH')
+    block, floor, scope_label = _outstanding_scope()
+    filename = _outstanding_filename(block, floor, fmt)
+
+    if fmt == 'html':
+        now = datetime.now(timezone.utc)
+        totals = OutstandingTotals()
+        data = _outstanding_context({
+            'snapshot_label': now.astimezone(timezone(timedelta(hours=2))).strftime('%d %b %Y %H:%M SAST'),
+            'totals': totals,
+            'units': iter_outstanding_units(_tenant, block, floor, totals, now),
+        }, False)
+        parts = stream_template('analytics/outstanding_items.html', streaming=True,
+                                scope_label=scope_label, **data)
+
+        def generate():
+            # Jinja yields per template statement; send ~16KB chunks instead
+            buf, size = [], 0
+            for part in parts:
+                buf.append(part)
+                size += len(part)
+                if size >= 16384:
+                    yield ''.join(buf)
+                    buf, size = [], 0
+            if buf:
+                yield ''.join(buf)
+
+        return Response(generate(), mimetype='text/html')
+
+    if fmt == 'csv':
+        def generate():
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(OUTSTANDING_EXPORT_COLUMNS)
+            yield buf.getvalue()
+            for _, units in iter_outstanding_blocks(_tenant, block, floor):
+                buf.seek(0)
+                buf.truncate()
+                writer.writerows(outstanding_export_rows(units))
+                yield buf.getvalue()
+
+        response = Response(stream_with_context(generate()), mimetype='text/csv')
+        response.headers['Content-Disposition'] = 'attachment; filename={}'.format(filename)
+        return response
+
+    if fmt == 'xlsx':
+        from openpyxl import Workbook
+        # write_only streams rows to a temp file instead of building cells in memory
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Outstanding Items')
+        ws.append(OUTSTANDING_EXPORT_COLUMNS)
+        for _, units in iter_outstanding_blocks(_tenant, block, floor):
+            for row in outstanding_export_rows(units):
+                ws.append(row)
+        out = tempfile.TemporaryFile()
+        wb.save(out)
+        out.seek(0)
+        return send_file(
+            out,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=filename
+        )
+
+    abort(404)
+
+
 def _build_batch_desnag_data(tenant_id, batch_id):
     """De-snag Report data - per-batch live snapshot of outstanding work.
 
@@ -7720,94 +6971,79 @@ def _build_batch_desnag_data(tenant_id, batch_id):
     Refreshes on every render - never frozen. Returns None if the batch does
     not exist for this tenant.
     """
-    import sqlite3, re
+    import re
     from datetime import datetime, timezone, timedelta
 
     _FL_LABELS = {0: 'Ground', 1: '1st Floor', 2: '2nd Floor', 3: '3rd Floor'}
 
-    conn = sqlite3.connect('/var/data/inspections.db')
-    conn.row_factory = sqlite3.Row
-
     now = datetime.now(timezone.utc)
     sast = now.astimezone(timezone(timedelta(hours=2)))
     snapshot_label = sast.strftime('%d %b %Y %H:%M SAST')
 
-    try:
-        batch_row = conn.execute("""
-            SELECT name, created_at
-            FROM inspection_batch
-            WHERE id = ? AND tenant_id = ?
-        """, (batch_id, tenant_id)).fetchone()
+    batch_row = query_db("""
+        SELECT name, created_at
+        FROM inspection_batch
+        WHERE id = ? AND tenant_id = ?
+    """, (batch_id, tenant_id), one=True)
 
-        if not batch_row:
-            return None
+    if not batch_row:
+        return None
 
-        defect_rows = conn.execute("""
-            SELECT u.block, u.floor, u.unit_number,
-                   at.area_name, at.area_order,
-                   ct.category_name AS trade, ct.category_order,
-                   it.item_description, it.item_order, it.depth,
-                   pit.item_description AS parent_item_description,
-                   COALESCE(pit.item_order, it.item_order) AS sort_parent,
-                   COALESCE(NULLIF(d.reviewed_comment,''), NULLIF(d.raw_comment,''), d.original_comment) AS description,
-                   d.raised_cycle_number, d.created_at
-            FROM defect d
-            JOIN item_template it ON d.item_template_id = it.id AND it.tenant_id = d.tenant_id
-            LEFT JOIN item_template pit ON it.parent_item_id = pit.id AND pit.tenant_id = it.tenant_id
-            JOIN category_template ct ON it.category_id = ct.id AND ct.tenant_id = d.tenant_id
-            JOIN area_template at ON ct.area_id = at.id AND at.tenant_id = d.tenant_id
-            JOIN unit_real u ON d.unit_id = u.id AND u.tenant_id = d.tenant_id
-            WHERE d.tenant_id = ? AND d.status = 'open'
-              AND EXISTS (
-                  SELECT 1 FROM batch_unit bu
-                  JOIN inspection i ON i.unit_id = bu.unit_id
-                                    AND i.cycle_id = bu.cycle_id
-                                    AND i.tenant_id = bu.tenant_id
-                  WHERE bu.unit_id = d.unit_id
-                    AND bu.tenant_id = d.tenant_id
-                    AND bu.batch_id = ?
-                    AND bu.status != 'removed'
-                    AND i.cycle_number >= 2
-                    AND i.status IN ('submitted','reviewed','pending_followup','approved','certified','closed')
-              )
-            ORDER BY u.block, u.floor, CAST(u.unit_number AS INTEGER),
-                     at.area_order, ct.category_order,
-                     sort_parent, it.depth, it.item_order
-        """, (tenant_id, batch_id)).fetchall()
-
-        latent_rows = conn.execute("""
-            SELECT u.block, u.floor, u.unit_number,
-                   at.area_name, at.area_order,
-                   lan.note_html, lan.cycle_number, lan.created_at
-            FROM latent_area_note lan
-            JOIN area_template at ON lan.area_template_id = at.id AND at.tenant_id = lan.tenant_id
-            JOIN unit_real u ON lan.unit_id = u.id AND u.tenant_id = lan.tenant_id
-            WHERE lan.tenant_id = ? AND lan.rectified_at IS NULL
-              AND EXISTS (
-                  SELECT 1 FROM batch_unit bu
-                  JOIN inspection i ON i.unit_id = bu.unit_id
-                                    AND i.cycle_id = bu.cycle_id
-                                    AND i.tenant_id = bu.tenant_id
-                  WHERE bu.unit_id = lan.unit_id
-                    AND bu.tenant_id = lan.tenant_id
-                    AND bu.batch_id = ?
-                    AND bu.status != 'removed'
-                    AND i.cycle_number >= 2
-                    AND i.status IN ('submitted','reviewed','pending_followup','approved','certified','closed')
-              )
-            ORDER BY u.block, u.floor, CAST(u.unit_number AS INTEGER), at.area_order
-        """, (tenant_id, batch_id)).fetchall()
-    finally:
-        conn.close()
-
-    def _parse_created_at(s):
-        if not s:
-            return None
-        s = s.replace('T', ' ').split('+')[0].split('.')[0]
-        try:
-            return datetime.strptime(s, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-        except Exception:
-            return None
+    defect_rows = query_db("""
+        SELECT u.block, u.floor, u.unit_number,
+               at.area_name, at.area_order,
+               ct.category_name AS trade, ct.category_order,
+               it.item_description, it.item_order, it.depth,
+               pit.item_description AS parent_item_description,
+               COALESCE(pit.item_order, it.item_order) AS sort_parent,
+               COALESCE(NULLIF(d.reviewed_comment,''), NULLIF(d.raw_comment,''), d.original_comment) AS description,
+               d.raised_cycle_number, d.created_at
+        FROM defect d
+        JOIN item_template it ON d.item_template_id = it.id AND it.tenant_id = d.tenant_id
+        LEFT JOIN item_template pit ON it.parent_item_id = pit.id AND pit.tenant_id = it.tenant_id
+        JOIN category_template ct ON it.category_id = ct.id AND ct.tenant_id = d.tenant_id
+        JOIN area_template at ON ct.area_id = at.id AND at.tenant_id = d.tenant_id
+        JOIN unit_real u ON d.unit_id = u.id AND u.tenant_id = d.tenant_id
+        WHERE d.tenant_id = ? AND d.status = 'open'
+          AND EXISTS (
+              SELECT 1 FROM batch_unit bu
+              JOIN inspection i ON i.unit_id = bu.unit_id
+                                AND i.cycle_id = bu.cycle_id
+                                AND i.tenant_id = bu.tenant_id
+              WHERE bu.unit_id = d.unit_id
+                AND bu.tenant_id = d.tenant_id
+                AND bu.batch_id = ?
+                AND bu.status != 'removed'
+                AND i.cycle_number >= 2
+                AND i.status IN ('submitted','reviewed','pending_followup','approved','certified','closed')
+          )
+        ORDER BY u.block, u.floor, CAST(u.unit_number AS INTEGER),
+                 at.area_order, ct.category_order,
+                 sort_parent, it.depth, it.item_order
+    """, (tenant_id, batch_id))
+
+    latent_rows = query_db("""
+        SELECT u.block, u.floor, u.unit_number,
+               at.area_name, at.area_order,
+               lan.note_html, lan.cycle_number, lan.created_at
+        FROM latent_area_note lan
+        JOIN area_template at ON lan.area_template_id = at.id AND at.tenant_id = lan.tenant_id
+        JOIN unit_real u ON lan.unit_id = u.id AND u.tenant_id = lan.tenant_id
+        WHERE lan.tenant_id = ? AND lan.rectified_at IS NULL
+          AND EXISTS (
+              SELECT 1 FROM batch_unit bu
+              JOIN inspection i ON i.unit_id = bu.unit_id
+                                AND i.cycle_id = bu.cycle_id
+                                AND i.tenant_id = bu.tenant_id
+              WHERE bu.unit_id = lan.unit_id
+                AND bu.tenant_id = lan.tenant_id
+                AND bu.batch_id = ?
+                AND bu.status != 'removed'
+                AND i.cycle_number >= 2
+                AND i.status IN ('submitted','reviewed','pending_followup','approved','certified','closed')
+          )
+        ORDER BY u.block, u.floor, CAST(u.unit_number AS INTEGER), at.area_order
+    """, (tenant_id, batch_id))
 
     units_dict = {}
     trade_counts = {}
@@ -7836,7 +7072,7 @@ def _build_batch_desnag_data(tenant_id, batch_id):
     for r in defect_rows:
         u = _get_unit(r['block'], r['floor'], r['unit_number'])
         a = _get_area(u, r['area_name'], r['area_order'])
-        ca = _parse_created_at(r['created_at'])
+        ca = parse_ts(r['created_at'])
         age_days = (now - ca).days if ca else 0
         cyc = r['raised_cycle_number']
         item_desc = (r['item_description'] or '').strip()
@@ -7871,7 +7107,7 @@ def _build_batch_desnag_data(tenant_id, batch_id):
             txt = _TAG_RE.sub(' ', html).strip()
             if txt:
                 bullets = [txt]
-        ca = _parse_created_at(r['created_at'])
+        ca = parse_ts(r['created_at'])
         age_days = (now - ca).days if ca else 0
         cyc = r['cycle_number']
         for b in bullets:
@@ -8247,7 +7483,7 @@ def top10_per_area_view():
     """Top 10 Defects per Area - C1 build-quality brief (HTML preview)."""
     import datetime, base64, os as _os
     from flask import current_app
-    data = _build_top10_per_area_data()
+    data = cached_report('top10_per_area', session.get('tenant_id', 'MONOGRAPH'), None, _build_top10_per_area_data)
     data['is_pdf'] = False
     data['report_date'] = datetime.datetime.now().strftime('%d %B %Y')
     logo_path = _os.path.join(current_app.static_folder, 'monograph_logo.jpg')
@@ -8266,7 +7502,7 @@ def top10_per_area_pdf():
     from app.services.pdf_playwright import html_to_pdf
     import datetime, base64, os as _os
     from flask import current_app, make_response
-    data = _build_top10_per_area_data()
+    data = cached_report('top10_per_area', session.get('tenant_id', 'MONOGRAPH'), None, _build_top10_per_area_data)
     data['is_pdf'] = True
     data['report_date'] = datetime.datetime.now().strftime('%d %B %Y')
     logo_path = _os.path.join(current_app.static_folder, 'monograph_logo.jpg')
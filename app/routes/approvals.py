@@ -8,10 +8,11 @@ import io
 import zipfile
 import base64
 import json
+import sqlite3
 import urllib.request
 import urllib.error
 import requests
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from difflib import SequenceMatcher
 from collections import OrderedDict
 from flask import (Blueprint, render_template, session, redirect,
@@ -20,6 +21,10 @@ from app.auth import require_manager, require_team_lead, require_team_lead_only
 from app.utils import generate_id
 from app.utils.audit import log_audit
 from app.services.db import get_db, query_db
+from app.services.change_log import batch_version, tenant_version, unit_versions
+from app.services.conditional import conditional
+from app.services.fragment_cache import cached_fragment
+from app.services.stats_cache import invalidate_stats
 from app.utils.sanitize import sanitize_note_html, split_note_html_by_li
 
 approvals_bp = Blueprint('approvals', __name__, url_prefix='/approvals')
@@ -31,129 +36,162 @@ approvals_bp = Blueprint('approvals', __name__, url_prefix='/approvals')
 
 # _get_cycle_pipeline removed (dead code - never called)
 
-
-def _count_needs_attention(tenant_id, cycle_id):
-    """Count defects whose description is not in the library for its category."""
-    defects = query_db("""
-        SELECT d.id,
-               COALESCE(d.reviewed_comment, d.original_comment) AS display_desc,
-               d.item_template_id
+# Normalised description lookups. desc_norm is a generated column added by
+# scripts/migrate_description_norm.py; until that has run the same expressions
+# are computed per row.
+_DESC_NORM = {
+    'd_norm': 'd.desc_norm',
+    'dl_norm': 'dl.desc_norm',
+    'lib_norm': 'desc_norm',
+}
+_DESC_NORM_FALLBACK = {
+    'd_norm': 'LOWER(TRIM(COALESCE(d.reviewed_comment, d.original_comment)))',
+    'dl_norm': 'LOWER(TRIM(dl.description))',
+    'lib_norm': 'LOWER(TRIM(description))',
+}
+
+
+def _query_desc_norm(query, args=(), one=False):
+    """query_db() for SQL using {d_norm} / {dl_norm} / {lib_norm}; falls back to
+    LOWER(TRIM(...)) when desc_norm has not been migrated yet."""
+    try:
+        return query_db(query.format(**_DESC_NORM), args, one=one)
+    except sqlite3.OperationalError as e:
+        if 'desc_norm' not in str(e):
+            raise
+        return query_db(query.format(**_DESC_NORM_FALLBACK), args, one=one)
+
+
+def _needs_attention_by_cycle(tenant_id):
+    """Count unreviewed open defects whose description is not in the library for
+    its category, per raised cycle. One query for the whole tenant; membership
+    is an indexed desc_norm lookup (scripts/migrate_description_norm.py)."""
+    return {r['cycle_id']: r['n'] for r in _query_desc_norm("""
+        SELECT d.raised_cycle_id AS cycle_id, COUNT(*) AS n
         FROM defect d
         JOIN inspection i ON i.unit_id = d.unit_id AND i.cycle_id = d.raised_cycle_id
             AND i.tenant_id = d.tenant_id
-        WHERE d.raised_cycle_id = ? AND d.status = 'open' AND d.tenant_id = ?
+        LEFT JOIN item_template it ON it.id = d.item_template_id
+        LEFT JOIN category_template ct ON it.category_id = ct.id
+        WHERE d.status = 'open' AND d.tenant_id = ?
         AND i.status NOT IN ('reviewed','pending_followup','approved','certified','closed')
-    """, [cycle_id, tenant_id])
-
-    if not defects:
-        return 0
-
-    # All library entries grouped by category (regardless of item_template_id)
-    lib_all = query_db("""
-        SELECT dl.category_name, LOWER(dl.description) AS desc_lower
-        FROM defect_library dl
-        WHERE dl.tenant_id = ?
-    """, [tenant_id])
-
-    lib_by_cat = {}
-    for entry in lib_all:
-        cat = entry['category_name']
-        if cat not in lib_by_cat:
-            lib_by_cat[cat] = set()
-        lib_by_cat[cat].add(entry['desc_lower'])
-
-    # Map template_id -> category_name
-    template_ids = set(d['item_template_id'] for d in defects if d['item_template_id'])
-    cat_by_template = {}
-    if template_ids:
-        placeholders = ','.join('?' for _ in template_ids)
-        cats = query_db("""
-            SELECT it.id AS tid, ct.category_name
-            FROM item_template it
-            JOIN category_template ct ON it.category_id = ct.id
-            WHERE it.id IN ({})
-        """.format(placeholders), list(template_ids))
-        for c in cats:
-            cat_by_template[c['tid']] = c['category_name']
-
-    count = 0
-    for d in defects:
-        desc_lower = (d['display_desc'] or '').lower().strip()
-        tid = d['item_template_id']
-        cat_name = cat_by_template.get(tid)
-        if cat_name and cat_name in lib_by_cat and desc_lower in lib_by_cat[cat_name]:
-            continue
-        count += 1
-
-    return count
-
-
+        AND NOT EXISTS (
+            SELECT 1 FROM defect_library dl
+            WHERE dl.tenant_id = d.tenant_id
+            AND dl.category_name = ct.category_name
+            AND {dl_norm} = {d_norm}
+        )
+        GROUP BY d.raised_cycle_id
+    """, [tenant_id])}
 
 
 def _get_batch_pipeline(tenant_id):
-    """Build pipeline data grouped by batch, with zones (cycles) nested inside."""
+    """Build pipeline data grouped by batch, with zones (cycles) nested inside.
+
+    Fixed number of grouped queries across all batches (see
+    tests/test_pipeline_queries.py) - nothing runs per batch or per zone.
+    """
     batches_raw = query_db("""
         SELECT ib.*
         FROM inspection_batch ib
         WHERE ib.tenant_id = ?
         ORDER BY ib.created_at DESC
     """, [tenant_id])
+    if not batches_raw:
+        return []
+
+    # Zones (distinct cycles per block/floor) for every batch
+    zones_by_batch = {}
+    for z in query_db("""
+        SELECT bu.batch_id, bu.cycle_id,
+               u.block, u.floor,
+               COALESCE(MAX(i.cycle_number), ic.cycle_number) AS cycle_number,
+               COUNT(DISTINCT bu.unit_id) as batch_unit_count
+        FROM batch_unit bu
+        JOIN unit u ON bu.unit_id = u.id
+        LEFT JOIN inspection_cycle ic ON ic.id = bu.cycle_id
+        LEFT JOIN inspection i ON i.unit_id = bu.unit_id
+            AND i.cycle_id = bu.cycle_id AND i.tenant_id = bu.tenant_id
+        WHERE bu.tenant_id = ? AND bu.status != 'removed'
+        GROUP BY bu.batch_id, bu.cycle_id, u.block, u.floor
+        ORDER BY u.block, u.floor, cycle_number
+    """, [tenant_id]):
+        zones_by_batch.setdefault(z['batch_id'], []).append(dict(z))
+
+    # Inspection counts per (batch, cycle) - all units of the cycle in the batch
+    cycle_stats = {}
+    for r in query_db("""
+        SELECT bu.batch_id, i.cycle_id,
+            COUNT(DISTINCT i.id) as total_inspections,
+            COUNT(DISTINCT CASE WHEN i.status = 'submitted' THEN i.id END) as submitted_count,
+            COUNT(DISTINCT CASE WHEN i.status IN ('reviewed','pending_followup') THEN i.id END) as reviewed_count,
+            COUNT(DISTINCT CASE WHEN i.status IN ('pending_followup', 'certified', 'closed') THEN i.id END) as signed_count
+        FROM inspection i
+        JOIN batch_unit bu ON bu.unit_id = i.unit_id AND bu.cycle_id = i.cycle_id
+        WHERE i.tenant_id = ? AND bu.tenant_id = ? AND bu.status != 'removed'
+        GROUP BY bu.batch_id, i.cycle_id
+    """, [tenant_id, tenant_id]):
+        cycle_stats[(r['batch_id'], r['cycle_id'])] = r
+
+    # Open defects raised in a cycle on any live unit of the batch
+    defect_counts = {}
+    for r in query_db("""
+        SELECT bu.batch_id, d.raised_cycle_id AS cycle_id, COUNT(*) AS defect_count
+        FROM defect d
+        JOIN (SELECT DISTINCT batch_id, unit_id FROM batch_unit
+              WHERE tenant_id = ? AND status != 'removed') bu ON bu.unit_id = d.unit_id
+        WHERE d.status = 'open' AND d.tenant_id = ?
+        GROUP BY bu.batch_id, d.raised_cycle_id
+    """, [tenant_id, tenant_id]):
+        defect_counts[(r['batch_id'], r['cycle_id'])] = r['defect_count']
+
+    needs_attention = _needs_attention_by_cycle(tenant_id)
+
+    first_submitted = {r['cycle_id']: r['d'] for r in query_db("""
+        SELECT cycle_id, MIN(submitted_at) as d FROM inspection
+        WHERE tenant_id = ? AND submitted_at IS NOT NULL
+        GROUP BY cycle_id
+    """, [tenant_id])}
+
+    # Milestone dates from inspections in each batch
+    milestones_by_batch = {r['batch_id']: r for r in query_db("""
+        SELECT
+            bu.batch_id,
+            MIN(i.inspection_date) as earliest_inspection,
+            MAX(i.submitted_at) as last_submitted,
+            MAX(CASE WHEN i.status IN ('reviewed','pending_followup','certified','closed')
+                THEN i.updated_at END) as last_reviewed
+        FROM batch_unit bu
+        JOIN inspection i ON i.unit_id = bu.unit_id AND i.cycle_id = bu.cycle_id
+        WHERE bu.tenant_id = ?
+        GROUP BY bu.batch_id
+    """, [tenant_id])}
+
+    floor_map = {0: 'Ground', 1: '1st Floor', 2: '2nd Floor', 3: '3rd Floor'}
+    stage_order = ['received', 'inspected', 'reviewing', 'reviewed', 'signed_off']
 
     result = []
     for b in batches_raw:
         batch = dict(b)
 
-        # Days elapsed - set after milestones query
+        # Days elapsed - set after milestones
         batch['days_elapsed'] = 0
 
-        # Get zones (distinct cycles) in this batch
-        zones_raw = query_db("""
-            SELECT bu.cycle_id,
-                   u.block, u.floor,
-                   COALESCE(MAX(i.cycle_number), (SELECT cycle_number FROM inspection_cycle WHERE id = bu.cycle_id)) AS cycle_number,
-                   COUNT(DISTINCT bu.unit_id) as batch_unit_count
-            FROM batch_unit bu
-            JOIN unit u ON bu.unit_id = u.id
-            LEFT JOIN inspection i ON i.unit_id = bu.unit_id
-                AND i.cycle_id = bu.cycle_id AND i.tenant_id = bu.tenant_id
-            WHERE bu.batch_id = ? AND bu.tenant_id = ? AND bu.status != 'removed'
-            GROUP BY bu.cycle_id, u.block, u.floor
-            ORDER BY u.block, u.floor, cycle_number
-        """, [batch['id'], tenant_id])
-
-        zones = []
+        zones = zones_by_batch.get(batch['id'], [])
         total_units = 0
-        for z in zones_raw:
-            zone = dict(z)
+        for zone in zones:
             total_units += zone['batch_unit_count']
+            key = (batch['id'], zone['cycle_id'])
 
-            # Full cycle stats (all units in cycle)
-            cs = query_db("""
-                SELECT
-                    COUNT(DISTINCT i.id) as total_inspections,
-                    COUNT(DISTINCT CASE WHEN i.status = 'submitted' THEN i.id END) as submitted_count,
-                    COUNT(DISTINCT CASE WHEN i.status IN ('reviewed','pending_followup') THEN i.id END) as reviewed_count,
-                    COUNT(DISTINCT CASE WHEN i.status IN ('pending_followup', 'certified', 'closed') THEN i.id END) as signed_count,
-                    (SELECT COUNT(*) FROM defect d WHERE d.raised_cycle_id = ?
-                     AND d.status = 'open' AND d.tenant_id = ?
-                     AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND status != 'removed')) as defect_count
-                FROM inspection i
-                JOIN batch_unit bu ON bu.unit_id = i.unit_id AND bu.cycle_id = i.cycle_id
-                WHERE i.cycle_id = ? AND i.tenant_id = ?
-                AND bu.batch_id = ? AND bu.status != 'removed'
-            """, [zone['cycle_id'], tenant_id, batch['id'], zone['cycle_id'], tenant_id, batch['id']], one=True)
-
-            if cs:
-                zone.update(dict(cs))
-            else:
-                zone['total_inspections'] = 0
-                zone['submitted_count'] = 0
-                zone['reviewed_count'] = 0
-                zone['signed_count'] = 0
-                zone['defect_count'] = 0
+            cs = cycle_stats.get(key)
+            zone['total_inspections'] = cs['total_inspections'] if cs else 0
+            zone['submitted_count'] = cs['submitted_count'] if cs else 0
+            zone['reviewed_count'] = cs['reviewed_count'] if cs else 0
+            zone['signed_count'] = cs['signed_count'] if cs else 0
+            zone['defect_count'] = defect_counts.get(key, 0)
 
             total = zone['total_inspections']
-            zone['needs_attention'] = _count_needs_attention(tenant_id, zone['cycle_id']) if total > 0 else 0
+            zone['needs_attention'] = needs_attention.get(zone['cycle_id'], 0) if total > 0 else 0
 
             if batch.get('signed_off_at'):
                 zone['stage'] = 'signed_off'
@@ -172,23 +210,17 @@ def _get_batch_pipeline(tenant_id):
                 zone['stage_label'] = 'Received'
 
             # Floor label
-            floor_map = {0: 'Ground', 1: '1st Floor', 2: '2nd Floor', 3: '3rd Floor'}
             zone['floor_label'] = floor_map.get(zone['floor'], 'Floor ' + str(zone['floor']))
 
             # First submitted date
-            sub_date = query_db(
-                "SELECT MIN(submitted_at) as d FROM inspection WHERE cycle_id = ? AND submitted_at IS NOT NULL",
-                [zone['cycle_id']], one=True)
-            zone['first_submitted_date'] = sub_date['d'][:10] if sub_date and sub_date['d'] else None
-
-            zones.append(zone)
+            sub_date = first_submitted.get(zone['cycle_id'])
+            zone['first_submitted_date'] = sub_date[:10] if sub_date else None
 
         batch['zones'] = zones
         batch['total_units'] = total_units
 
         # Batch overall stage = worst zone
         if zones:
-            stage_order = ['received', 'inspected', 'reviewing', 'reviewed', 'signed_off']
             zone_stages = [z['stage'] for z in zones]
             worst = min(zone_stages, key=lambda s: stage_order.index(s) if s in stage_order else 0)
             batch['stage'] = worst
@@ -197,38 +229,21 @@ def _get_batch_pipeline(tenant_id):
             batch['stage'] = 'open'
             batch['stage_label'] = 'Open'
 
-
-
-        # Milestone dates from inspections in this batch
-        milestones = query_db("""
-            SELECT
-                MIN(i.inspection_date) as earliest_inspection,
-                MAX(i.submitted_at) as last_submitted,
-                MAX(CASE WHEN i.status IN ('reviewed','pending_followup','certified','closed')
-                    THEN i.updated_at END) as last_reviewed
-            FROM batch_unit bu
-            JOIN inspection i ON i.unit_id = bu.unit_id AND i.cycle_id = bu.cycle_id
-            WHERE bu.batch_id = ? AND bu.tenant_id = ?
-        """, [batch['id'], tenant_id], one=True)
-
-        if milestones:
-            batch['last_submitted_date'] = milestones['last_submitted'][:10] if milestones['last_submitted'] else None
-            batch['last_reviewed_date'] = milestones['last_reviewed'][:10] if milestones['last_reviewed'] else None
-            # Received = Monday before earliest inspection date
-            ei = milestones['earliest_inspection']
-            if ei:
-                from datetime import timedelta
-                ei_date = datetime.strptime(ei, '%Y-%m-%d')
-                monday = ei_date - timedelta(days=ei_date.weekday())
-                batch['created_date'] = monday.strftime('%Y-%m-%d')
-                elapsed = (datetime.now(timezone.utc) - datetime(monday.year, monday.month, monday.day, tzinfo=timezone.utc)).days
-                batch['days_elapsed'] = elapsed
-            else:
-                batch['created_date'] = batch['created_at'][:10]
+        milestones = milestones_by_batch.get(batch['id'])
+        last_submitted = milestones['last_submitted'] if milestones else None
+        last_reviewed = milestones['last_reviewed'] if milestones else None
+        batch['last_submitted_date'] = last_submitted[:10] if last_submitted else None
+        batch['last_reviewed_date'] = last_reviewed[:10] if last_reviewed else None
+        # Received = Monday before earliest inspection date
+        ei = milestones['earliest_inspection'] if milestones else None
+        if ei:
+            ei_date = datetime.strptime(ei, '%Y-%m-%d')
+            monday = ei_date - timedelta(days=ei_date.weekday())
+            batch['created_date'] = monday.strftime('%Y-%m-%d')
+            elapsed = (datetime.now(timezone.utc) - datetime(monday.year, monday.month, monday.day, tzinfo=timezone.utc)).days
+            batch['days_elapsed'] = elapsed
         else:
             batch['created_date'] = batch['created_at'][:10]
-            batch['last_submitted_date'] = None
-            batch['last_reviewed_date'] = None
 
         # Signed off date from batch record only
         batch['signed_off_date'] = batch['signed_off_at'][:10] if batch.get('signed_off_at') else None
@@ -311,7 +326,7 @@ def _build_review_data(tenant_id, cycle_id):
     cycle['unit_end'] = unit_numbers[-1] if unit_numbers else ''
 
     # All open defects for this cycle with template chain
-    defects = [dict(r) for r in query_db("""
+    defects = [dict(r) for r in _query_desc_norm("""
         SELECT d.id, d.unit_id, d.item_template_id,
                d.original_comment, d.reviewed_comment,
                COALESCE(d.reviewed_comment, d.original_comment) AS display_desc,
@@ -320,7 +335,13 @@ def _build_review_data(tenant_id, cycle_id):
                parent.item_description AS parent_description,
                ct.category_name, ct.id AS category_id,
                at.area_name, at.area_order, ct.category_order, it.item_order,
-               i.status AS insp_status
+               i.status AS insp_status,
+               EXISTS (
+                   SELECT 1 FROM defect_library dl
+                   WHERE dl.tenant_id = d.tenant_id
+                   AND dl.category_name = ct.category_name
+                   AND {dl_norm} = {d_norm}
+               ) AS in_library
         FROM defect d
         JOIN item_template it ON d.item_template_id = it.id
         JOIN category_template ct ON it.category_id = ct.id
@@ -331,29 +352,13 @@ def _build_review_data(tenant_id, cycle_id):
         ORDER BY at.area_order, ct.category_order, it.item_order
     """, [cycle_id, tenant_id])]
 
-    # Build library lookup: ALL entries grouped by category
-    lib_all = query_db("""
-        SELECT category_name, LOWER(description) AS desc_lower
-        FROM defect_library WHERE tenant_id = ?
-    """, [tenant_id])
-
-    lib_by_cat = {}
-    for entry in lib_all:
-        cat = entry['category_name']
-        if cat not in lib_by_cat:
-            lib_by_cat[cat] = set()
-        lib_by_cat[cat].add(entry['desc_lower'])
-
     # Mark each defect as clean or needs attention
     reviewed_statuses = {'reviewed', 'pending_followup', 'approved', 'certified', 'closed'}
     for d in defects:
         if d.get('insp_status') in reviewed_statuses:
             d['is_clean'] = True
         else:
-            desc_lower = (d['display_desc'] or '').lower().strip()
-            cat_name = d['category_name']
-            d['is_clean'] = (cat_name in lib_by_cat
-                             and desc_lower in lib_by_cat[cat_name])
+            d['is_clean'] = bool(d['in_library'])
         # Build full item path
         if d['parent_description']:
             d['item_path'] = '{} > {}'.format(
@@ -585,21 +590,37 @@ def review(cycle_id):
     if not data:
         abort(404)
 
-    # Pre-load suggestions for defects that need attention (not clean)
+    # Unit rows come from the fragment cache, keyed by the unit's change_log
+    # version and the library version (suggestions + clean flags).
+    cycle = data['cycle']
+    versions = unit_versions(tenant_id, [u['unit_id'] for u in data['units']])
+    lib_version = tenant_version(tenant_id, 'defect_library')
     for unit in data['units']:
-        for area_cats in unit['defects_grouped'].values():
-            for defect_list in area_cats.values():
-                for d in defect_list:
-                    if not d['is_clean']:
-                        d['suggestions'] = _get_suggestions(
-                            tenant_id, d['item_template_id'],
-                            d['display_desc'])
-                    else:
-                        d['suggestions'] = []
+        version = None
+        if versions is not None and lib_version is not None:
+            version = (versions.get(unit['unit_id'], 0), lib_version)
+        unit['html'] = cached_fragment(
+            ('review-unit', cycle_id, unit['unit_id'], cycle['approved_at'], cycle['cycle_number']),
+            version,
+            lambda unit=unit: _render_review_unit(tenant_id, cycle, unit))
 
     return render_template('approvals/review.html', **data)
 
 
+def _render_review_unit(tenant_id, cycle, unit):
+    """Render one review row, loading suggestions for defects that need attention."""
+    for area_cats in unit['defects_grouped'].values():
+        for defect_list in area_cats.values():
+            for d in defect_list:
+                if not d['is_clean']:
+                    d['suggestions'] = _get_suggestions(
+                        tenant_id, d['item_template_id'],
+                        d['display_desc'])
+                else:
+                    d['suggestions'] = []
+    return render_template('approvals/_review_unit.html', cycle=cycle, unit=unit)
+
+
 @approvals_bp.route('/<cycle_id>/unit/<unit_id>/latent')
 @require_team_lead_only
 def unit_latent(cycle_id, unit_id):
@@ -1192,6 +1213,7 @@ def mark_reviewed(cycle_id):
               metadata='{{"unit": "{}"}}'.format(insp['unit_number']))
 
     _update_batch_reviewed_milestone(db, tenant_id, cycle_id, now)
+    invalidate_stats(db, tenant_id)
     db.commit()
 
     is_htmx = request.headers.get('HX-Request')
@@ -1247,6 +1269,7 @@ def bulk_reviewed(cycle_id):
         marked += 1
 
     _update_batch_reviewed_milestone(db, tenant_id, cycle_id, now)
+    invalidate_stats(db, tenant_id)
     db.commit()
 
     msg = '{} units marked as reviewed.'.format(marked)
@@ -1593,8 +1616,8 @@ def cleanup():
     """, [tenant_id, tenant_id])]
 
     # Build library lookup
-    lib_all = query_db("""
-        SELECT category_name, LOWER(TRIM(description)) AS desc_lower
+    lib_all = _query_desc_norm("""
+        SELECT category_name, {lib_norm} AS desc_lower
         FROM defect_library WHERE tenant_id = ?
     """, [tenant_id])
     lib_by_cat = {}
@@ -1810,7 +1833,7 @@ def cleanup_apply_all_preview():
 
     # Find all defects with same original_comment + item_template_id
     # on submitted inspections
-    matches = [dict(r) for r in query_db("""
+    matches = [dict(r) for r in _query_desc_norm("""
         SELECT d.id, d.original_comment, d.reviewed_comment,
                COALESCE(d.reviewed_comment, d.original_comment) AS display_desc,
                u.unit_number, at.area_name, ct.category_name,
@@ -1825,7 +1848,7 @@ def cleanup_apply_all_preview():
         WHERE d.tenant_id = ? AND d.status = 'open'
         AND i.status IN ('submitted','reviewed','pending_followup','in_progress')
         AND d.item_template_id = ?
-        AND LOWER(TRIM(COALESCE(d.reviewed_comment, d.original_comment))) = LOWER(TRIM(?))
+        AND {d_norm} = LOWER(TRIM(?))
         ORDER BY u.unit_number
     """, [tenant_id, item_template_id, old_comment])]
 
@@ -1889,7 +1912,7 @@ def cleanup_apply_all_confirm():
         abort(400)
 
     # Find all matching defects on submitted inspections
-    matches = query_db("""
+    matches = _query_desc_norm("""
         SELECT d.id, d.original_comment, d.reviewed_comment, d.defect_type,
                d.item_template_id
         FROM defect d
@@ -1898,7 +1921,7 @@ def cleanup_apply_all_confirm():
         WHERE d.tenant_id = ? AND d.status = 'open'
         AND i.status IN ('submitted','reviewed','pending_followup','in_progress')
         AND d.item_template_id = ?
-        AND LOWER(TRIM(COALESCE(d.reviewed_comment, d.original_comment))) = LOWER(TRIM(?))
+        AND {d_norm} = LOWER(TRIM(?))
     """, [tenant_id, item_template_id, old_comment])
 
     count = 0
@@ -2389,10 +2412,10 @@ def _render_cleanup_row(defect_id, tenant_id):
         d['item_path'] = d['item_description']
 
     # Check if now clean
-    lib_check = query_db("""
+    lib_check = _query_desc_norm("""
         SELECT 1 FROM defect_library
         WHERE tenant_id = ? AND category_name = ?
-        AND LOWER(TRIM(description)) = LOWER(TRIM(?))
+        AND {lib_norm} = LOWER(TRIM(?))
         LIMIT 1
     """, [tenant_id, d['category_name'], d['display_desc']])
 
@@ -2431,7 +2454,7 @@ def _render_cleanup_row(defect_id, tenant_id):
 
 def _get_tracker_defects(batch_id, tenant_id):
     """Get all manually typed defect descriptions not yet fixed, newest first."""
-    return query_db("""
+    return _query_desc_norm("""
         SELECT d.id, d.original_comment, d.reviewed_comment, d.defect_type,
                d.created_at, d.item_template_id,
                u.unit_number,
@@ -2452,9 +2475,9 @@ def _get_tracker_defects(batch_id, tenant_id):
         AND d.original_comment != 'Not installed'
         AND NOT EXISTS (
             SELECT 1 FROM defect_library dl
-            WHERE dl.item_template_id = d.item_template_id
-            AND dl.tenant_id = d.tenant_id
-            AND LOWER(TRIM(dl.description)) = LOWER(TRIM(d.original_comment))
+            WHERE dl.tenant_id = d.tenant_id
+            AND dl.item_template_id = d.item_template_id
+            AND {dl_norm} = {d_norm}
         )
         AND EXISTS (
             SELECT 1 FROM batch_unit bu2
@@ -2487,8 +2510,19 @@ def defects_tracker(batch_id):
     return resp
 
 
+def _tracker_data_token(batch_id):
+    """Change token for the tracker partial: writes to the batch's units plus
+    defect library edits (a new library entry hides matching rows)."""
+    tenant_id = session['tenant_id']
+    version = batch_version(tenant_id, batch_id)
+    if version is None:
+        return None
+    return [version, tenant_version(tenant_id, 'defect_library')]
+
+
 @approvals_bp.route('/defects-tracker/<batch_id>/data')
 @require_team_lead
+@conditional(_tracker_data_token)
 def defects_tracker_data(batch_id):
     """HTMX polling partial — returns defect rows only."""
     tenant_id = session['tenant_id']
@@ -3,12 +3,18 @@ Batch routes - Operational batch management.
 Create batches with unit numbers, auto-route to cycles, assign inspectors.
 Access: Team Lead + Admin.
 """
+import time
 from datetime import datetime, timezone, timedelta
-from flask import Blueprint, render_template, session, redirect, url_for, abort, request, flash, make_response, jsonify
+from flask import Blueprint, render_template, session, redirect, url_for, abort, request, flash, make_response, jsonify, g
 from app.auth import require_team_lead
 from app.utils import generate_id
 from app.utils.audit import log_audit
 from app.services.db import get_db, query_db
+from app.services.change_log import current_version, changes_since, batch_version, unit_versions
+from app.services.conditional import conditional
+from app.services.live_rows import reuse_rows, store_rows
+from app.services.stats_cache import cached_stat
+from app.services.inspection_metrics import parse_ts
 import bleach
 
 ALLOWED_TAGS = ['p', 'br', 'strong', 'em', 'b', 'i', 'u', 'ol', 'ul', 'li']
@@ -302,29 +308,43 @@ def create_batch():
     return render_template('batches/create.html', name=today, notes='', excl_lists=excl_lists)
 
 
-@batches_bp.route('/<batch_id>')
-@require_team_lead
-def detail(batch_id):
-    """Batch detail - units with inspector assignment."""
-    tenant_id = session['tenant_id']
-
-    batch = query_db(
-        "SELECT * FROM inspection_batch WHERE id = ? AND tenant_id = ?",
-        [batch_id, tenant_id], one=True)
-    if not batch:
-        abort(404)
-    batch = dict(batch)
-
+# Checkpoint constants: total items + ground_only count (excluded on upper floors).
+# Queried from item_template so the math always tracks real data; held per
+# worker for a few minutes because templates only change via console scripts.
+_TEMPLATE_CONSTANTS_TTL_S = 300
+_template_constants = {'value': None, 'at': 0.0}
+
+
+def _item_template_constants():
+    """(ground_only_count, items_per_unit) for active item templates, process-cached."""
+    now = time.monotonic()
+    if _template_constants['value'] is None or now - _template_constants['at'] > _TEMPLATE_CONSTANTS_TTL_S:
+        go_row = query_db(
+            "SELECT COUNT(*) AS cnt FROM item_template WHERE floor_condition = 'ground_only' AND active = 1",
+            [], one=True)
+        total_row = query_db(
+            "SELECT COUNT(*) AS cnt FROM item_template WHERE active = 1",
+            [], one=True)
+        _template_constants['value'] = (go_row['cnt'] if go_row else 0,
+                                        total_row['cnt'] if total_row else 509)
+        _template_constants['at'] = now
+    return _template_constants['value']
+
+
+def _build_batch_roster(batch_id, tenant_id):
+    """Active units of a batch with checkpoint, defect, latent and progress columns.
+    Shared by the batch detail page and its HTMX refresh. Returns (units, total_checkpoints)."""
     units_raw = query_db("""
         SELECT bu.id AS bu_id, COALESCE(i.status, 'not_started') AS bu_status, COALESCE(bu.inspector_id, i.inspector_id) AS inspector_id,
             bu.cycle_id, u.id AS unit_id, u.unit_number, u.block, u.floor,
-            (SELECT cycle_number FROM inspection_cycle WHERE id = bu.cycle_id) AS cycle_number,
+            ic.cycle_number,
             i.id AS inspection_id, i.status AS inspection_status, i.started_at, i.submitted_at,
             i.paused_at, i.total_paused_seconds,
             COALESCE(insp.name, i.inspector_name) AS inspector_name,
             bu.exclusion_list_id
         FROM batch_unit bu
         JOIN unit u ON bu.unit_id = u.id
+        LEFT JOIN inspection_cycle ic ON ic.id = bu.cycle_id
         LEFT JOIN inspection i ON i.unit_id = u.id AND i.cycle_id = bu.cycle_id
         LEFT JOIN inspector insp ON bu.inspector_id = insp.id
         WHERE bu.batch_id = ? AND bu.tenant_id = ?
@@ -347,16 +367,7 @@ def detail(batch_id):
             """, el_ids)
             excl_count_map = {r['exclusion_list_id']: r['cnt'] for r in el_rows}
 
-    # Checkpoint constants: total items + ground_only count (excluded on upper floors).
-    # Queried from item_template so the math always tracks real data.
-    go_row = query_db(
-        "SELECT COUNT(*) AS cnt FROM item_template WHERE floor_condition = 'ground_only' AND active = 1",
-        [], one=True)
-    ground_only_count = go_row['cnt'] if go_row else 0
-    total_row = query_db(
-        "SELECT COUNT(*) AS cnt FROM item_template WHERE active = 1",
-        [], one=True)
-    items_per_unit = total_row['cnt'] if total_row else 509
+    ground_only_count, items_per_unit = _item_template_constants()
 
     for u in units:
         el_count = excl_count_map.get(u.get('exclusion_list_id'), 0)
@@ -496,6 +507,55 @@ def detail(batch_id):
             u['unit_checkpoints'] = u['checkpoints']
     total_checkpoints = sum(u.get('unit_checkpoints', 0) for u in units)
 
+    return units, total_checkpoints
+
+
+def _detail_lookups(batch_id, tenant_id):
+    """(batch, inspectors, exclusion lists) rendered by the batch detail page and
+    partial. Read once per request: _detail_data_token and detail_data share it."""
+    cache = g.setdefault('batch_detail_lookups', {})
+    if batch_id not in cache:
+        batch = query_db(
+            "SELECT * FROM inspection_batch WHERE id = ? AND tenant_id = ?",
+            [batch_id, tenant_id], one=True)
+        inspectors = query_db("""
+            SELECT id, name FROM inspector
+            WHERE tenant_id = ? AND role IN ('inspector', 'team_lead', 'office_admin') AND active = 1
+            ORDER BY name
+        """, [tenant_id])
+        excl_lists = query_db(
+            "SELECT id, name, item_count FROM exclusion_list WHERE tenant_id = ? AND is_active = 1 ORDER BY created_at DESC",
+            [tenant_id])
+        cache[batch_id] = (dict(batch) if batch else None,
+                           [dict(r) for r in inspectors], [dict(r) for r in excl_lists])
+    return cache[batch_id]
+
+
+def _detail_data_token(batch_id):
+    """Change token for detail_data: batch row + change_log version of its units +
+    the dropdown lists and template constants it renders."""
+    tenant_id = session['tenant_id']
+    version = batch_version(tenant_id, batch_id)
+    if version is None:
+        return None
+    batch, inspectors, excl_lists = _detail_lookups(batch_id, tenant_id)
+    if not batch:
+        return None
+    return [batch, version, _item_template_constants(), inspectors, excl_lists]
+
+
+@batches_bp.route('/<batch_id>')
+@require_team_lead
+def detail(batch_id):
+    """Batch detail - units with inspector assignment."""
+    tenant_id = session['tenant_id']
+
+    batch, inspectors, excl_lists = _detail_lookups(batch_id, tenant_id)
+    if not batch:
+        abort(404)
+
+    units, total_checkpoints = _build_batch_roster(batch_id, tenant_id)
+
     # Removed units (separate section)
     removed_raw = query_db("""
         SELECT bu.id AS bu_id, bu.removed_at, bu.removed_by, bu.removed_reason,
@@ -511,21 +571,9 @@ def detail(batch_id):
     """, [batch_id, tenant_id])
     removed_units = [dict(r) for r in removed_raw]
 
-    inspectors_raw = query_db("""
-        SELECT id, name FROM inspector
-        WHERE tenant_id = ? AND role IN ('inspector', 'team_lead', 'office_admin') AND active = 1
-        ORDER BY name
-    """, [tenant_id])
-    inspectors = [dict(r) for r in inspectors_raw]
-
     # Distinct cycle IDs for exclusion management links
     cycle_ids = list(set(u['cycle_id'] for u in units))
 
-    excl_lists = query_db(
-        "SELECT id, name, item_count FROM exclusion_list WHERE tenant_id = ? AND is_active = 1 ORDER BY created_at DESC",
-        [tenant_id])
-    excl_lists = [dict(r) for r in excl_lists]
-
     refreshed_at = datetime.now().strftime('%H:%M:%S')
 
     # Transfer-pending cohort count (units eligible to move to another batch).
@@ -550,202 +598,17 @@ def detail(batch_id):
 
 @batches_bp.route('/<batch_id>/data')
 @require_team_lead
+@conditional(_detail_data_token)
 def detail_data(batch_id):
     """HTMX partial: refreshable tbody + timestamp for batch detail."""
     tenant_id = session['tenant_id']
 
-    batch_row = query_db(
-        "SELECT * FROM inspection_batch WHERE id = ? AND tenant_id = ?",
-        [batch_id, tenant_id], one=True)
-    if not batch_row:
+    # Already read by _detail_data_token on this request.
+    batch, inspectors, excl_lists = _detail_lookups(batch_id, tenant_id)
+    if not batch:
         abort(404)
-    batch = dict(batch_row)
-
-    units_raw = query_db("""
-        SELECT bu.id AS bu_id, COALESCE(i.status, 'not_started') AS bu_status,
-            COALESCE(bu.inspector_id, i.inspector_id) AS inspector_id,
-            bu.cycle_id, u.id AS unit_id, u.unit_number, u.block, u.floor,
-            (SELECT cycle_number FROM inspection_cycle WHERE id = bu.cycle_id) AS cycle_number,
-            i.id AS inspection_id, i.status AS inspection_status, i.started_at, i.submitted_at,
-            i.paused_at, i.total_paused_seconds,
-            COALESCE(insp.name, i.inspector_name) AS inspector_name,
-            bu.exclusion_list_id
-        FROM batch_unit bu
-        JOIN unit u ON bu.unit_id = u.id
-        LEFT JOIN inspection i ON i.unit_id = u.id AND i.cycle_id = bu.cycle_id
-        LEFT JOIN inspector insp ON bu.inspector_id = insp.id
-        WHERE bu.batch_id = ? AND bu.tenant_id = ?
-        AND bu.removed_at IS NULL
-        ORDER BY u.block, u.floor, u.unit_number
-    """, [batch_id, tenant_id])
-    units = [dict(r) for r in units_raw]
-
-    excl_count_map = {}
-    if units:
-        el_ids = list(set(u['exclusion_list_id'] for u in units if u.get('exclusion_list_id')))
-        if el_ids:
-            el_ph = ','.join(['?'] * len(el_ids))
-            el_rows = query_db(f"""
-                SELECT exclusion_list_id, COUNT(*) as cnt
-                FROM exclusion_list_item
-                WHERE exclusion_list_id IN ({el_ph})
-                GROUP BY exclusion_list_id
-            """, el_ids)
-            excl_count_map = {r['exclusion_list_id']: r['cnt'] for r in el_rows}
-
-    # Checkpoint constants: total items + ground_only count (excluded on upper floors).
-    # Queried from item_template so the math always tracks real data.
-    go_row = query_db(
-        "SELECT COUNT(*) AS cnt FROM item_template WHERE floor_condition = 'ground_only' AND active = 1",
-        [], one=True)
-    ground_only_count = go_row['cnt'] if go_row else 0
-    total_row = query_db(
-        "SELECT COUNT(*) AS cnt FROM item_template WHERE active = 1",
-        [], one=True)
-    items_per_unit = total_row['cnt'] if total_row else 509
-
-    for u in units:
-        el_count = excl_count_map.get(u.get('exclusion_list_id'), 0)
-        ground_only_skips = ground_only_count if (u.get('floor') or 0) > 0 else 0
-        u['excl_count'] = el_count + ground_only_skips
-        u['checkpoints_c1'] = items_per_unit - u['excl_count']
-        u['started_iso'] = u.get('started_at')
-        u['is_paused'] = (u.get('inspection_status') == 'paused')
-        u['paused_at_iso'] = u.get('paused_at') if u['is_paused'] else None
-        u['duration_minutes'] = _minutes_between(
-            u.get('started_at'), u.get('submitted_at'),
-            total_paused_seconds=u.get('total_paused_seconds') or 0,
-            paused_at_iso=u['paused_at_iso'])
-
-    if units:
-        d_unit_ids = list(set(u['unit_id'] for u in units))
-        d_ph = ','.join(['?'] * len(d_unit_ids))
-        d_rows = query_db(f"""
-            SELECT unit_id, raised_cycle_number, cleared_cycle_number, addressed_cycle_number, status, COUNT(*) as cnt
-            FROM defect
-            WHERE tenant_id = ? AND unit_id IN ({d_ph})
-            GROUP BY unit_id, raised_cycle_number, cleared_cycle_number, addressed_cycle_number, status
-        """, [tenant_id] + d_unit_ids)
-        d_cn_map = {u['unit_id']: (u.get('cycle_number') or 1) for u in units}
-        d_map = {}
-        for dr in d_rows:
-            d_uid = dr['unit_id']
-            d_cn = d_cn_map.get(d_uid, 1)
-            if d_uid not in d_map:
-                d_map[d_uid] = {'defect_bfwd': 0, 'defect_cleared': 0, 'defect_new': 0, 'defect_open': 0, 'defect_addressed': 0, 'defect_bfwd_action': 0, 'defect_bfwd_addressed': 0}
-            d_rcn = dr['raised_cycle_number'] or 1
-            d_ccn = dr['cleared_cycle_number']
-            if d_rcn < d_cn:
-                d_map[d_uid]['defect_bfwd'] += dr['cnt']
-            if d_rcn == d_cn:
-                d_map[d_uid]['defect_new'] += dr['cnt']
-            if d_ccn == d_cn:
-                d_map[d_uid]['defect_cleared'] += dr['cnt']
-            if dr['status'] == 'open':
-                d_map[d_uid]['defect_open'] += dr['cnt']
-            if dr['addressed_cycle_number'] == d_cn:
-                d_map[d_uid]['defect_addressed'] += dr['cnt']
-            # v314: b/fwd defect needing action this cycle (open OR cleared this cycle)
-            # v371: only priors actionable THIS cycle -- exclude priors already
-            # addressed in an earlier cycle (acn < d_cn). acn IS NULL = never
-            # actioned (count); acn == d_cn = actioned now (count).
-            if (d_rcn < d_cn and (dr['status'] == 'open' or d_ccn == d_cn)
-                    and (dr['addressed_cycle_number'] is None or dr['addressed_cycle_number'] == d_cn)):
-                d_map[d_uid]['defect_bfwd_action'] += dr['cnt']
-            # v314b: b/fwd defect addressed this cycle (any status, addressed_cycle_number matches)
-            if d_rcn < d_cn and dr['addressed_cycle_number'] == d_cn:
-                d_map[d_uid]['defect_bfwd_addressed'] += dr['cnt']
-        for u in units:
-            u.update(d_map.get(u['unit_id'], {'defect_bfwd': 0, 'defect_cleared': 0, 'defect_new': 0, 'defect_open': 0, 'defect_addressed': 0, 'defect_bfwd_action': 0, 'defect_bfwd_addressed': 0}))
-
-    for u in units:
-        cn = u.get('cycle_number') or 1
-        u['checkpoints'] = u['defect_bfwd'] if cn > 1 else u['checkpoints_c1']
-
-    # v314b: latent ledger -- open at start of cycle (denominator) + addressed this cycle (numerator).
-    # Single comprehensive query, dual-purpose aggregation in Python.
-    lan_open_map = {}
-    lan_addressed_map = {}
-    if units:
-        lan_unit_ids = list(set(u['unit_id'] for u in units))
-        lan_ph = ','.join(['?'] * len(lan_unit_ids))
-        lan_rows = query_db(f"""
-            SELECT unit_id, cycle_number, rectified_at_cycle_number, addressed_cycle_number,
-                   CASE WHEN rectified_at IS NULL THEN 1 ELSE 0 END AS is_not_rectified,
-                   COUNT(*) AS cnt
-            FROM latent_area_note
-            WHERE tenant_id = ?
-              AND unit_id IN ({lan_ph})
-            GROUP BY unit_id, cycle_number, rectified_at_cycle_number, addressed_cycle_number, is_not_rectified
-        """, [tenant_id] + lan_unit_ids)
-        u_cycle_map = {u['unit_id']: (u.get('cycle_number') or 1) for u in units}
-        for lr in lan_rows:
-            uid = lr['unit_id']
-            unit_cycle = u_cycle_map.get(uid, 1)
-            # b/fwd only
-            if (lr['cycle_number'] or 0) >= unit_cycle:
-                continue
-            # open at start of current cycle: not rectified OR rectified this cycle
-            if lr['is_not_rectified'] or lr['rectified_at_cycle_number'] == unit_cycle:
-                lan_open_map[uid] = lan_open_map.get(uid, 0) + lr['cnt']
-            # addressed this cycle: rectified this cycle, OR still-open AND addressed this cycle
-            if (lr['rectified_at_cycle_number'] == unit_cycle or
-                    (lr['addressed_cycle_number'] == unit_cycle and lr['is_not_rectified'])):
-                lan_addressed_map[uid] = lan_addressed_map.get(uid, 0) + lr['cnt']
-
-    for u in units:
-        u['open_prior_latents'] = lan_open_map.get(u['unit_id'], 0)
-        u['lan_addressed'] = lan_addressed_map.get(u['unit_id'], 0)
-        u['unit_checkpoints'] = u['checkpoints'] + u['open_prior_latents']
-
-    total_checkpoints = sum(u.get('unit_checkpoints', 0) for u in units)
-
-    inspection_ids = [u.get('inspection_id') for u in units if u.get('inspection_id')]
-    items_map = {}
-    if inspection_ids:
-        ii_ph = ','.join(['?'] * len(inspection_ids))
-        ii_rows = query_db(f"""
-            SELECT inspection_id,
-                   SUM(CASE WHEN status NOT IN ('pending', 'skipped') THEN 1 ELSE 0 END) AS items_marked,
-                   SUM(CASE WHEN status != 'skipped' AND COALESCE(has_prior_defects, 0) = 0
-                              AND (status = 'pending' OR marked_at IS NOT NULL) THEN 1 ELSE 0 END) AS items_action,
-                   SUM(CASE WHEN status NOT IN ('pending', 'skipped') AND COALESCE(has_prior_defects, 0) = 0
-                              AND marked_at IS NOT NULL THEN 1 ELSE 0 END) AS items_action_marked
-            FROM inspection_item
-            WHERE inspection_id IN ({ii_ph})
-              AND NOT EXISTS (SELECT 1 FROM item_template ch WHERE ch.parent_item_id = inspection_item.item_template_id)
-            GROUP BY inspection_id
-        """, inspection_ids)
-        items_map = {r['inspection_id']: {'items_marked': r['items_marked'] or 0, 'items_action': r['items_action'] or 0, 'items_action_marked': r['items_action_marked'] or 0} for r in ii_rows}
-    for u in units:
-        m = items_map.get(u.get('inspection_id'), {})
-        u['items_marked'] = m.get('items_marked', 0)
-        u['items_action'] = m.get('items_action', 0)
-        u['items_action_marked'] = m.get('items_action_marked', 0)
-
-    # v314: canonical 3-cohort checkpoints for C2+ units
-    # cohort = newly-visible items + open b/fwd latents + b/fwd defects needing action
-    # matches the live-monitor union in _build_live_monitor_data (v310)
-    # v314b: also expose checkpoint_marked (canonical numerator) so template
-    # progress fraction is consistent num/den (was defects-only before).
-    for u in units:
-        if (u.get('cycle_number') or 1) > 1:
-            u['checkpoints'] = u['items_action'] + u['open_prior_latents'] + u.get('defect_bfwd_action', 0)
-            u['checkpoint_marked'] = u.get('items_action_marked', 0) + u.get('lan_addressed', 0) + u.get('defect_bfwd_addressed', 0)
-            u['unit_checkpoints'] = u['checkpoints']
-    total_checkpoints = sum(u.get('unit_checkpoints', 0) for u in units)
 
-    inspectors_raw = query_db("""
-        SELECT id, name FROM inspector
-        WHERE tenant_id = ? AND role IN ('inspector', 'team_lead', 'office_admin') AND active = 1
-        ORDER BY name
-    """, [tenant_id])
-    inspectors = [dict(r) for r in inspectors_raw]
-
-    excl_lists = query_db(
-        "SELECT id, name, item_count FROM exclusion_list WHERE tenant_id = ? AND is_active = 1 ORDER BY created_at DESC",
-        [tenant_id])
-    excl_lists = [dict(r) for r in excl_lists]
+    units, total_checkpoints = _build_batch_roster(batch_id, tenant_id)
 
     refreshed_at = datetime.now().strftime('%H:%M:%S')
 
@@ -1070,20 +933,14 @@ def edit_batch(batch_id):
 
     # Compute duration
     batch_duration = None
-    if batch_started and batch.get('submitted_at'):
-        try:
-            from datetime import datetime as dt2
-            s = batch_started.replace('Z', '+00:00')
-            e = batch['submitted_at'].replace('Z', '+00:00')
-            start_dt = dt2.fromisoformat(s)
-            end_dt = dt2.fromisoformat(e)
-            diff_secs = (end_dt - start_dt).total_seconds()
-            if diff_secs > 0:
-                h = int(diff_secs // 3600)
-                m = int((diff_secs % 3600) // 60)
-                batch_duration = '{}h {:02d}m'.format(h, m)
-        except (ValueError, TypeError):
-            pass
+    start_dt = _parse_iso(batch_started)
+    end_dt = _parse_iso(batch.get('submitted_at'))
+    if start_dt and end_dt:
+        diff_secs = (end_dt - start_dt).total_seconds()
+        if diff_secs > 0:
+            h = int(diff_secs // 3600)
+            m = int((diff_secs % 3600) // 60)
+            batch_duration = '{}h {:02d}m'.format(h, m)
 
     milestones = {
         'received': batch.get('received_date'),
@@ -1491,6 +1348,12 @@ SAST_OFFSET = timedelta(hours=2)
 
 
 def _get_defect_thresholds(tenant_id):
+    """Q1/Q3 defect thresholds, cached per tenant (invalidated on review/approval)."""
+    return cached_stat(tenant_id, 'defect_thresholds',
+                       lambda: _compute_defect_thresholds(tenant_id))
+
+
+def _compute_defect_thresholds(tenant_id):
     """Calculate Q1/Q3 defect thresholds from all completed inspections."""
     rows = query_db("""
         SELECT COUNT(d.id) AS defect_count
@@ -1532,16 +1395,7 @@ def _get_severity(defect_count, threshold_low, threshold_high):
 
 def _parse_iso(ts):
     """Parse ISO timestamp string to timezone-aware datetime. Returns None on failure."""
-    if not ts:
-        return None
-    try:
-        s = ts.replace('Z', '+00:00')
-        dt = datetime.fromisoformat(s)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt
-    except (ValueError, AttributeError, TypeError):
-        return None
+    return parse_ts(ts)
 
 
 def _minutes_between(start_iso, end_iso, total_paused_seconds=0, paused_at_iso=None):
@@ -1578,19 +1432,19 @@ def _format_local_hhmm(iso_str):
     return local.strftime('%H:%M')
 
 
-def _build_live_monitor_data(batch_id, tenant_id):
-    """Build all data needed for Live Monitor V2 display."""
-    batch = query_db(
-        "SELECT * FROM inspection_batch WHERE id = ? AND tenant_id = ?",
-        [batch_id, tenant_id], one=True)
-    if not batch:
-        return None
-    batch = dict(batch)
+# Fields _enrich_live_units adds to a roster row; cached per unit version by
+# app.services.live_rows. is_idle and severity move with the clock and the
+# tenant thresholds, so they are set on every build instead.
+_LIVE_ROW_FIELDS = (
+    'areas', 'total_marked', 'total_items', 'total_defects', 'bfwd_defects',
+    'cleared_defects', 'new_defects', 'open_defects', 'pct', 'floor_label',
+    'first_marked_at', 'started_iso', 'ended_iso', 'start_time', 'end_time',
+    'is_paused', 'paused_at_iso', 'duration_minutes', 'last_activity',
+)
 
-    # --- Defect thresholds from historical data ---
-    threshold_low, threshold_high = _get_defect_thresholds(tenant_id)
 
-    # --- Units in batch ---
+def _live_roster(batch_id, tenant_id):
+    """Active batch_unit rows with unit, inspection and inspector columns."""
     units_raw = query_db("""
         SELECT bu.id AS bu_id, bu.inspector_id, bu.unit_id, bu.cycle_id,
                u.unit_number, u.block, u.floor,
@@ -1608,20 +1462,18 @@ def _build_live_monitor_data(batch_id, tenant_id):
         AND bu.removed_at IS NULL
         ORDER BY u.unit_number
     """, [batch_id, tenant_id])
-    units = [dict(r) for r in units_raw]
+    return [dict(r) for r in units_raw]
 
-    total_units = len(units)
-    units_complete = sum(1 for u in units if u['insp_status'] in ('submitted', 'reviewed', 'approved'))
-    units_in_progress = sum(1 for u in units if u['insp_status'] in ('in_progress', 'paused'))
-    units_not_started = sum(1 for u in units if u['insp_status'] == 'not_started')
+
+def _enrich_live_units(units, tenant_id):
+    """Attach _LIVE_ROW_FIELDS to roster rows. Every query is scoped to these
+    units only, so any subset of a batch can be enriched on its own."""
+    if not units:
+        return
 
     # --- Collect all inspection_ids for batch queries ---
     inspection_ids = [u['inspection_id'] for u in units if u['inspection_id']]
 
-    items_marked = 0
-    total_items = 0
-    defects_found = 0
-
     # Lookup dicts built from batch queries
     unit_timing_map = {}      # inspection_id -> {started, ended}
     last_activity_map = {}    # inspection_id -> last_mark ISO string
@@ -1630,30 +1482,6 @@ def _build_live_monitor_data(batch_id, tenant_id):
     if inspection_ids:
         ph = ','.join('?' * len(inspection_ids))
 
-        # --- Items marked / total ---
-        row = query_db("""
-            SELECT COUNT(*) AS total,
-                   SUM(CASE WHEN status NOT IN ('pending','skipped') THEN 1 ELSE 0 END) AS marked
-            FROM inspection_item WHERE inspection_id IN ({})
-            AND NOT (status = 'ok' AND marked_at IS NULL)
-        """.format(ph), inspection_ids, one=True)
-        if row:
-            row = dict(row)
-            total_items = row['total'] or 0
-            items_marked = row['marked'] or 0
-
-        # --- Defects from defect table (batch KPI) ---
-        unit_ids = [u['unit_id'] for u in units]
-        cycle_ids = list(set(u['cycle_id'] for u in units))
-        ph_u = ','.join('?' * len(unit_ids))
-        ph_c = ','.join('?' * len(cycle_ids))
-        d_row = query_db("""
-            SELECT COUNT(*) AS cnt FROM defect
-            WHERE unit_id IN ({}) AND raised_cycle_id IN ({})
-            AND tenant_id = ? AND status = 'open'
-        """.format(ph_u, ph_c), unit_ids + cycle_ids + [tenant_id], one=True)
-        defects_found = dict(d_row)['cnt'] if d_row else 0
-
         # --- Per-unit timing (batch query, no N+1) ---
         timing_raw = query_db("""
             SELECT inspection_id,
@@ -1863,15 +1691,7 @@ def _build_live_monitor_data(batch_id, tenant_id):
                 latent_addressed_map[uid] = latent_addressed_map.get(uid, 0) + 1
                 latent_addressed_area_map[key] = latent_addressed_area_map.get(key, 0) + 1
 
-    # --- Batch started (earliest mark in entire batch) ---
-    batch_started = None
-    if unit_timing_map:
-        all_starts = [v['started'] for v in unit_timing_map.values() if v['started']]
-        if all_starts:
-            batch_started = min(all_starts)
-
     # --- Attach enriched data to each unit ---
-    now_utc = datetime.now(timezone.utc)
     for u in units:
         u['areas'] = area_progress.get(u['unit_id'], [])
         u['total_marked'] = sum(a['marked'] for a in u['areas'])
@@ -1939,9 +1759,46 @@ def _build_live_monitor_data(batch_id, tenant_id):
             u['started_iso'], u['ended_iso'],
             total_paused_seconds=u.get('total_paused_seconds') or 0,
             paused_at_iso=u['paused_at_iso'])
-
-        # Last activity + idle detection
+        u['first_marked_at'] = timing.get('started')
         u['last_activity'] = last_activity_map.get(u['inspection_id'])
+
+
+def _build_live_monitor_data(batch_id, tenant_id, versions=None, reuse=False):
+    """Build all data needed for Live Monitor V2 display.
+
+    versions are the per-unit change_log versions, read before the build; the
+    enriched unit rows are cached under them. With reuse=True (the live/delta
+    card path) rows whose unit version has not moved come from that cache, so
+    only the changed units are queried, and the activity feed is skipped.
+    """
+    batch = query_db(
+        "SELECT * FROM inspection_batch WHERE id = ? AND tenant_id = ?",
+        [batch_id, tenant_id], one=True)
+    if not batch:
+        return None
+    batch = dict(batch)
+
+    # --- Defect thresholds from historical data ---
+    threshold_low, threshold_high = _get_defect_thresholds(tenant_id)
+
+    # --- Units in batch ---
+    units = _live_roster(batch_id, tenant_id)
+
+    total_units = len(units)
+    units_complete = sum(1 for u in units if u['insp_status'] in ('submitted', 'reviewed', 'approved'))
+    units_in_progress = sum(1 for u in units if u['insp_status'] in ('in_progress', 'paused'))
+    units_not_started = sum(1 for u in units if u['insp_status'] == 'not_started')
+
+    stale = reuse_rows(tenant_id, units, versions) if reuse else units
+    _enrich_live_units(stale, tenant_id)
+    store_rows(tenant_id, stale, versions, _LIVE_ROW_FIELDS)
+
+    # --- Batch started (earliest mark in entire batch) ---
+    batch_started = min((u['first_marked_at'] for u in units if u['first_marked_at']), default=None)
+
+    now_utc = datetime.now(timezone.utc)
+    for u in units:
+        # Idle detection
         u['is_idle'] = False
         if u['last_activity'] and u['insp_status'] == 'in_progress':
             last_dt = _parse_iso(u['last_activity'])
@@ -2018,7 +1875,8 @@ def _build_live_monitor_data(batch_id, tenant_id):
 
     # --- Activity feed (last 20) ---
     feed = []
-    if inspection_ids:
+    inspection_ids = [u['inspection_id'] for u in units if u['inspection_id']]
+    if inspection_ids and not reuse:
         ph = ','.join('?' * len(inspection_ids))
         feed_raw = query_db("""
             SELECT ii.marked_at, ii.status AS item_status, ii.comment,
@@ -2105,35 +1963,147 @@ def _build_live_monitor_data(batch_id, tenant_id):
     }
 
 
+def _live_unit_ids(batch_id, tenant_id):
+    """Every unit ever on this batch, removed rows included, so roster edits bump the version."""
+    rows = query_db(
+        "SELECT DISTINCT unit_id FROM batch_unit WHERE batch_id = ? AND tenant_id = ?",
+        [batch_id, tenant_id])
+    return [r['unit_id'] for r in rows]
+
+
+def _set_live_versions(data, versions):
+    """live_version for the page plus per-unit versions that key the card fragments."""
+    data['unit_versions'] = versions
+    data['live_version'] = None if versions is None else max(versions.values(), default=0)
+
+
+def _no_store(resp):
+    resp.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    resp.headers['Pragma'] = 'no-cache'
+    resp.headers['Expires'] = '0'
+    return resp
+
+
 @batches_bp.route('/<batch_id>/live')
 @require_team_lead
 def live_monitor(batch_id):
     """Live Monitor V2 - full standalone page."""
     tenant_id = session['tenant_id']
-    data = _build_live_monitor_data(batch_id, tenant_id)
+    versions = unit_versions(tenant_id, _live_unit_ids(batch_id, tenant_id))
+    data = _build_live_monitor_data(batch_id, tenant_id, versions)
     if not data:
         abort(404)
-    resp = make_response(render_template('batches/live_monitor.html', **data))
-    resp.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    resp.headers['Pragma'] = 'no-cache'
-    resp.headers['Expires'] = '0'
-    return resp
+    _set_live_versions(data, versions)
+    return _no_store(make_response(render_template('batches/live_monitor.html', **data)))
+
+
+def _live_data_token(batch_id):
+    """Change token for live/data. Idle rings and inspector idle minutes move with
+    the clock while anything is in progress, so active batches also key on the
+    current minute; finished or untouched batches key on the version alone."""
+    tenant_id = session['tenant_id']
+    version = batch_version(tenant_id, batch_id)
+    if version is None:
+        return None
+    active = query_db("""
+        SELECT 1 FROM batch_unit bu
+        JOIN inspection i ON i.unit_id = bu.unit_id AND i.cycle_id = bu.cycle_id
+        WHERE bu.batch_id = ? AND bu.tenant_id = ? AND bu.status != 'removed'
+        AND i.status IN ('in_progress', 'paused')
+        LIMIT 1
+    """, [batch_id, tenant_id], one=True)
+    return [version, int(time.time() // 60) if active else None]
 
 
 @batches_bp.route('/<batch_id>/live/data')
 @require_team_lead
+@conditional(_live_data_token)
 def live_monitor_data(batch_id):
     """Live Monitor V2 - HTMX partial refresh."""
     tenant_id = session['tenant_id']
-    data = _build_live_monitor_data(batch_id, tenant_id)
+    versions = unit_versions(tenant_id, _live_unit_ids(batch_id, tenant_id))
+    data = _build_live_monitor_data(batch_id, tenant_id, versions)
     if not data:
         abort(404)
-    resp = make_response(render_template('batches/live_monitor_data.html', **data))
-    resp.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    resp.headers['Pragma'] = 'no-cache'
-    resp.headers['Expires'] = '0'
-    return resp
+    _set_live_versions(data, versions)
+    return _no_store(make_response(render_template('batches/live_monitor_data.html', **data)))
+
 
+# Sources whose changes can move a card between sections (status) or add/remove
+# a card (roster) - these need the full partial, not a card patch.
+_LIVE_STRUCTURAL_SOURCES = {'inspection', 'batch_unit'}
+
+
+@batches_bp.route('/<batch_id>/live/delta')
+@require_team_lead
+def live_monitor_delta(batch_id):
+    """Live Monitor V2 - change-versioned delta feed.
+
+    Client sends ?since=<version>. Unchanged -> 204 (one indexed MAX, no rebuild).
+    Only item/defect/latent writes -> header strips + changed unit cards as OOB swaps;
+    only the changed units' rows are queried, the rest come from live_rows.
+    Status or roster change, unknown version, or change_log not migrated -> full partial.
+    """
+    tenant_id = session['tenant_id']
+    unit_ids = _live_unit_ids(batch_id, tenant_id)
+    version = current_version(tenant_id, unit_ids)
+    since = request.args.get('since', type=int)
+
+    if version is not None and since is not None and since == version:
+        resp = make_response('', 204)
+        resp.headers['X-Live-Version'] = str(version)
+        return _no_store(resp)
+
+    versions = unit_versions(tenant_id, unit_ids)
+    changed = None
+    if version is not None and since is not None and since < version:
+        changed = changes_since(tenant_id, unit_ids, since)
+    full = changed is None or any(src & _LIVE_STRUCTURAL_SOURCES for src in changed.values())
+
+    data = _build_live_monitor_data(batch_id, tenant_id, versions, reuse=not full)
+    if not data:
+        abort(404)
+    data['live_version'] = version
+    data['unit_versions'] = versions
+    data['full'] = full
+    data['changed_units'] = [] if full else [u for u in data['units'] if u['unit_id'] in changed]
+
+    resp = make_response(render_template('batches/live_monitor_delta.html', **data))
+    if version is not None:
+        resp.headers['X-Live-Version'] = str(version)
+    return _no_store(resp)
+
+
+
+@batches_bp.route('/<batch_id>/events')
+@require_team_lead
+def batch_events(batch_id):
+    """Server-sent events for the live monitor and defects tracker.
+
+    Emits `change` (data = new version) within ~1s of any write to a unit in this
+    batch; pages then pull live/delta or the tracker partial. Idle batches only
+    get keep-alive comments. A reconnect resumes from Last-Event-ID; ?since= only
+    seeds the first connection.
+    """
+    from flask import Response
+    from app.services.db import database_path
+    from app.services.events import stream_versions
+    tenant_id = session['tenant_id']
+    batch = query_db("SELECT id FROM inspection_batch WHERE id = ? AND tenant_id = ?",
+                     [batch_id, tenant_id], one=True)
+    if not batch:
+        abort(404)
+    unit_ids = _live_unit_ids(batch_id, tenant_id)
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', type=int)
+    # No stream_with_context: the generator reads on its own connection, so the
+    # request one is closed before streaming starts.
+    resp = Response(stream_versions(database_path(), tenant_id, unit_ids, since),
+                    mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
 
 
 # ============================================================
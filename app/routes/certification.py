@@ -7,6 +7,7 @@ from flask import Blueprint, render_template, session, redirect, url_for, abort,
 from app.auth import require_team_lead, require_team_lead_only, require_manager, get_role_level
 from app.utils.audit import log_audit
 from app.services.db import get_db, query_db
+from app.services.stats_cache import invalidate_stats
 
 certification_bp = Blueprint('certification', __name__, url_prefix='/certification')
 
@@ -104,105 +105,146 @@ def get_unit_workflow_status(unit):
         return 'not_started'
 
 
-@certification_bp.route('/')
-@require_team_lead
-def dashboard():
-    """Approvals Dashboard - units grouped by workflow status."""
-    tenant_id = session['tenant_id']
-    user_role = session.get('role', 'inspector')
-    
-    cycle_filter = request.args.get('cycle')
-    
-    active_cycles = query_db("""
-        SELECT ic.*, ph.phase_name
-        FROM inspection_cycle ic
-        JOIN phase ph ON ic.phase_id = ph.id
-        WHERE ic.tenant_id = ? AND ic.status = 'active'
-        ORDER BY ic.cycle_number
-    """, [tenant_id])
-    
+# Per-unit progress counts, shared by both dashboard queries. Each CTE scans its
+# table once for the whole unit set (grouped by unit or inspection) instead of
+# running a correlated COUNT per unit row. `base` must supply unit_id,
+# inspection_id, count_cycle (the inspection's cycle number) and scope_tenant.
+_DASHBOARD_COUNTS_SQL = """
+    leaf_parents AS (
+        SELECT DISTINCT parent_item_id FROM item_template WHERE parent_item_id IS NOT NULL
+    ),
+    item_counts AS (
+        SELECT ii.inspection_id,
+            SUM(lp.parent_item_id IS NULL
+                AND ii.status != 'skipped'
+                AND COALESCE(ii.has_prior_defects, 0) = 0
+                AND (ii.status = 'pending' OR ii.marked_at IS NOT NULL)) AS own_total,
+            SUM(lp.parent_item_id IS NULL
+                AND ii.status NOT IN ('pending', 'skipped')
+                AND COALESCE(ii.has_prior_defects, 0) = 0
+                AND ii.marked_at IS NOT NULL) AS own_done,
+            SUM(ii.status = 'skipped') AS excluded_items,
+            SUM(ii.status = 'not_to_standard') AS defect_items
+        FROM base b
+        CROSS JOIN inspection_item ii ON ii.inspection_id = b.inspection_id
+        LEFT JOIN leaf_parents lp ON lp.parent_item_id = ii.item_template_id
+        GROUP BY ii.inspection_id
+    ),
+    latent_counts AS (
+        SELECT b.unit_id,
+            SUM(lan.rectified_at IS NULL
+                OR lan.rectified_at_cycle_number = b.count_cycle) AS latent_total,
+            SUM(lan.rectified_at_cycle_number = b.count_cycle
+                OR (lan.addressed_cycle_number = b.count_cycle AND lan.rectified_at IS NULL)) AS latent_done
+        FROM base b
+        JOIN latent_area_note lan ON lan.unit_id = b.unit_id
+            AND lan.tenant_id = b.scope_tenant
+            AND lan.cycle_number < b.count_cycle
+        GROUP BY b.unit_id
+    ),
+    defect_counts AS (
+        SELECT b.unit_id,
+            SUM({open_cond}) AS open_defects,
+            SUM({cleared_cond}) AS cleared_defects,
+            SUM(d.tenant_id = b.scope_tenant
+                AND d.raised_cycle_number < b.count_cycle
+                AND (d.status = 'open' OR d.cleared_cycle_number = b.count_cycle)
+                {prior_cond}) AS prior_total,
+            SUM(d.tenant_id = b.scope_tenant
+                AND d.raised_cycle_number < b.count_cycle
+                AND d.addressed_cycle_number = b.count_cycle) AS prior_done
+        FROM base b
+        CROSS JOIN defect d ON d.unit_id = b.unit_id
+        GROUP BY b.unit_id
+    )
+    SELECT b.*,
+        COALESCE(dc.open_defects, 0) AS open_defects,
+        COALESCE(dc.cleared_defects, 0) AS cleared_defects,
+        COALESCE(ic.own_total, 0) + COALESCE(lc.latent_total, 0)
+            + COALESCE(dc.prior_total, 0) AS total_items,
+        COALESCE(ic.own_done, 0) + COALESCE(lc.latent_done, 0)
+            + COALESCE(dc.prior_done, 0) AS completed_items,
+        COALESCE(ic.excluded_items, 0) AS excluded_items,
+        COALESCE(ic.defect_items, 0) AS defect_items
+    FROM base b
+    LEFT JOIN item_counts ic ON ic.inspection_id = b.inspection_id
+    LEFT JOIN latent_counts lc ON lc.unit_id = b.unit_id
+    LEFT JOIN defect_counts dc ON dc.unit_id = b.unit_id
+    ORDER BY b.block, b.floor, b.unit_number
+"""
+
+
+def _dashboard_units(tenant_id, cycle_filter=None):
+    """Dashboard unit rows with progress counts, for one cycle or each unit's latest."""
     if cycle_filter:
         filter_cycle = query_db("SELECT * FROM inspection_cycle WHERE id = ?", [cycle_filter], one=True)
         filter_cycle_num = filter_cycle['cycle_number'] if filter_cycle else 1
-        
-        units = query_db("""
+
+        counts = _DASHBOARD_COUNTS_SQL.format(
+            open_cond="d.raised_cycle_number <= b.current_cycle "
+                      "AND (d.cleared_cycle_id IS NULL OR d.cleared_cycle_number > b.current_cycle)",
+            cleared_cond="d.cleared_cycle_number = b.current_cycle",
+            # v371: only priors actionable THIS cycle (hide acn < current)
+            prior_cond="AND (d.addressed_cycle_number IS NULL "
+                       "OR d.addressed_cycle_number = b.count_cycle)")
+        # MATERIALIZED: probe this cycle's inspections by unit, not the whole
+        # cycle's index range once per unit.
+        return query_db("""
+            WITH cycle_inspection AS MATERIALIZED (
+                SELECT * FROM inspection WHERE cycle_id = ?
+            ),
+            base AS (
+                SELECT 
+                    u.id,
+                    u.id AS unit_id,
+                    u.unit_number,
+                    u.unit_number AS unit_code,
+                    u.block,
+                    u.floor,
+                    u.status AS unit_status,
+                    ? AS current_cycle,
+                    ? AS cycle_id,
+                    i.id AS inspection_id,
+                    i.status AS inspection_status,
+                    i.inspector_name AS last_inspector,
+                    i.inspection_date AS last_inspection_date,
+                    i.submitted_at,
+                    i.manager_reviewed_at,
+                    i.cycle_number AS count_cycle,
+                    i.tenant_id AS scope_tenant
+                FROM unit u
+                JOIN inspection_cycle ic ON ic.id = ?
+                LEFT JOIN cycle_inspection i ON i.unit_id = u.id
+                WHERE u.tenant_id = ?
+                AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))
+                AND u.id NOT IN (SELECT ceu.unit_id FROM cycle_excluded_unit ceu WHERE ceu.cycle_id = ?)
+            ),
+        """ + counts, [cycle_filter, filter_cycle_num, cycle_filter, cycle_filter, tenant_id, cycle_filter])
+
+    counts = _DASHBOARD_COUNTS_SQL.format(
+        open_cond="d.status = 'open'",
+        cleared_cond="d.status = 'cleared'",
+        prior_cond="")
+    return query_db("""
+        WITH latest AS (
             SELECT 
-                u.id,
-                u.unit_number,
-                u.unit_number AS unit_code,
-                u.block,
-                u.floor,
-                u.status AS unit_status,
-                ? AS current_cycle,
-                ? AS cycle_id,
+                i.unit_id,
                 i.id AS inspection_id,
                 i.status AS inspection_status,
-                i.inspector_name AS last_inspector,
-                i.inspection_date AS last_inspection_date,
+                i.inspector_name,
+                i.inspection_date,
                 i.submitted_at,
                 i.manager_reviewed_at,
-                (SELECT COUNT(*) FROM defect d 
-                 WHERE d.unit_id = u.id 
-                 AND d.raised_cycle_number <= ?
-                 AND (d.cleared_cycle_id IS NULL OR d.cleared_cycle_number > ?)
-                ) AS open_defects,
-                (SELECT COUNT(*) FROM defect d 
-                 WHERE d.unit_id = u.id 
-                 AND d.cleared_cycle_number = ?
-                ) AS cleared_defects,
-                ((SELECT COUNT(*) FROM inspection_item ii
-                  WHERE ii.inspection_id = i.id
-                    AND ii.status != 'skipped'
-                    AND COALESCE(ii.has_prior_defects, 0) = 0
-                    AND (ii.status = 'pending' OR ii.marked_at IS NOT NULL)
-                    AND NOT EXISTS (SELECT 1 FROM item_template ch WHERE ch.parent_item_id = ii.item_template_id))
-                + (SELECT COUNT(*) FROM latent_area_note lan
-                   WHERE lan.unit_id = u.id
-                     AND lan.tenant_id = i.tenant_id
-                     AND lan.cycle_number < i.cycle_number
-                     AND (lan.rectified_at IS NULL OR lan.rectified_at_cycle_number = i.cycle_number))
-                + (SELECT COUNT(*) FROM defect d4
-                   WHERE d4.unit_id = u.id
-                     AND d4.tenant_id = i.tenant_id
-                     AND d4.raised_cycle_number < i.cycle_number
-                     AND (d4.status = 'open' OR d4.cleared_cycle_number = i.cycle_number)
-                     -- v371: only priors actionable THIS cycle (hide acn < current)
-                     AND (d4.addressed_cycle_number IS NULL OR d4.addressed_cycle_number = i.cycle_number))) AS total_items,
-                ((SELECT COUNT(*) FROM inspection_item ii
-                  WHERE ii.inspection_id = i.id
-                    AND ii.status NOT IN ('pending', 'skipped')
-                    AND COALESCE(ii.has_prior_defects, 0) = 0
-                    AND ii.marked_at IS NOT NULL
-                    AND NOT EXISTS (SELECT 1 FROM item_template ch WHERE ch.parent_item_id = ii.item_template_id))
-                + (SELECT COUNT(*) FROM latent_area_note lan2
-                   WHERE lan2.unit_id = u.id
-                     AND lan2.tenant_id = i.tenant_id
-                     AND lan2.cycle_number < i.cycle_number
-                     AND (lan2.rectified_at_cycle_number = i.cycle_number
-                          OR (lan2.addressed_cycle_number = i.cycle_number AND lan2.rectified_at IS NULL)))
-                + (SELECT COUNT(*) FROM defect d5
-                   WHERE d5.unit_id = u.id
-                     AND d5.tenant_id = i.tenant_id
-                     AND d5.raised_cycle_number < i.cycle_number
-                     AND d5.addressed_cycle_number = i.cycle_number)) AS completed_items,
-                (SELECT COUNT(*) FROM inspection_item ii 
-                 WHERE ii.inspection_id = i.id AND ii.status = 'skipped'
-                ) AS excluded_items,
-                (SELECT COUNT(*) FROM inspection_item ii 
-                 WHERE ii.inspection_id = i.id AND ii.status = 'not_to_standard'
-                ) AS defect_items
-            FROM unit u
-            JOIN inspection_cycle ic ON ic.id = ?
-            LEFT JOIN inspection i ON i.unit_id = u.id AND i.cycle_id = ?
-            WHERE u.tenant_id = ? 
-            AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))
-            AND u.id NOT IN (SELECT ceu.unit_id FROM cycle_excluded_unit ceu WHERE ceu.cycle_id = ?)
-            ORDER BY u.block, u.floor, u.unit_number
-        """, [filter_cycle_num, cycle_filter, filter_cycle_num, filter_cycle_num, filter_cycle_num, cycle_filter, cycle_filter, tenant_id, cycle_filter])
-    else:
-        units = query_db("""
+                i.cycle_number,
+                i.cycle_id,
+                ROW_NUMBER() OVER (PARTITION BY i.unit_id ORDER BY i.cycle_number DESC) as rn
+            FROM inspection i
+            WHERE i.tenant_id = ?
+        ),
+        base AS (
             SELECT 
                 u.id,
+                u.id AS unit_id,
                 u.unit_number,
                 u.unit_number AS unit_code,
                 u.block,
@@ -216,70 +258,38 @@ def dashboard():
                 latest.inspection_date AS last_inspection_date,
                 latest.submitted_at,
                 latest.manager_reviewed_at,
-                (SELECT COUNT(*) FROM defect d WHERE d.unit_id = u.id AND d.status = 'open') AS open_defects,
-                (SELECT COUNT(*) FROM defect d WHERE d.unit_id = u.id AND d.status = 'cleared') AS cleared_defects,
-                ((SELECT COUNT(*) FROM inspection_item ii
-                  WHERE ii.inspection_id = latest.inspection_id
-                    AND ii.status != 'skipped'
-                    AND COALESCE(ii.has_prior_defects, 0) = 0
-                    AND (ii.status = 'pending' OR ii.marked_at IS NOT NULL)
-                    AND NOT EXISTS (SELECT 1 FROM item_template ch WHERE ch.parent_item_id = ii.item_template_id))
-                + (SELECT COUNT(*) FROM latent_area_note lan
-                   WHERE lan.unit_id = u.id
-                     AND lan.tenant_id = u.tenant_id
-                     AND lan.cycle_number < latest.cycle_number
-                     AND (lan.rectified_at IS NULL OR lan.rectified_at_cycle_number = latest.cycle_number))
-                + (SELECT COUNT(*) FROM defect d4
-                   WHERE d4.unit_id = u.id
-                     AND d4.tenant_id = u.tenant_id
-                     AND d4.raised_cycle_number < latest.cycle_number
-                     AND (d4.status = 'open' OR d4.cleared_cycle_number = latest.cycle_number))) AS total_items,
-                ((SELECT COUNT(*) FROM inspection_item ii
-                  WHERE ii.inspection_id = latest.inspection_id
-                    AND ii.status NOT IN ('pending', 'skipped')
-                    AND COALESCE(ii.has_prior_defects, 0) = 0
-                    AND ii.marked_at IS NOT NULL
-                    AND NOT EXISTS (SELECT 1 FROM item_template ch WHERE ch.parent_item_id = ii.item_template_id))
-                + (SELECT COUNT(*) FROM latent_area_note lan2
-                   WHERE lan2.unit_id = u.id
-                     AND lan2.tenant_id = u.tenant_id
-                     AND lan2.cycle_number < latest.cycle_number
-                     AND (lan2.rectified_at_cycle_number = latest.cycle_number
-                          OR (lan2.addressed_cycle_number = latest.cycle_number AND lan2.rectified_at IS NULL)))
-                + (SELECT COUNT(*) FROM defect d5
-                   WHERE d5.unit_id = u.id
-                     AND d5.tenant_id = u.tenant_id
-                     AND d5.raised_cycle_number < latest.cycle_number
-                     AND d5.addressed_cycle_number = latest.cycle_number)) AS completed_items,
-                (SELECT COUNT(*) FROM inspection_item ii 
-                 WHERE ii.inspection_id = latest.inspection_id AND ii.status = 'skipped'
-                ) AS excluded_items,
-                (SELECT COUNT(*) FROM inspection_item ii 
-                 WHERE ii.inspection_id = latest.inspection_id AND ii.status = 'not_to_standard'
-                ) AS defect_items
+                latest.cycle_number AS count_cycle,
+                u.tenant_id AS scope_tenant
             FROM unit u
-            LEFT JOIN (
-                SELECT 
-                    i.unit_id,
-                    i.id AS inspection_id,
-                    i.status AS inspection_status,
-                    i.inspector_name,
-                    i.inspection_date,
-                    i.submitted_at,
-                    i.manager_reviewed_at,
-                    i.cycle_number,
-                    i.cycle_id,
-                    ROW_NUMBER() OVER (PARTITION BY i.unit_id ORDER BY i.cycle_number DESC) as rn
-                FROM inspection i
-            ) latest ON latest.unit_id = u.id AND latest.rn = 1
+            LEFT JOIN latest ON latest.unit_id = u.id AND latest.rn = 1
             WHERE u.tenant_id = ?
             AND u.id NOT IN (
                 SELECT ceu.unit_id FROM cycle_excluded_unit ceu
                 JOIN inspection_cycle ic2 ON ceu.cycle_id = ic2.id
                 WHERE ic2.status = 'active'
             )
-            ORDER BY u.block, u.floor, u.unit_number
-        """, [tenant_id])
+        ),
+    """ + counts, [tenant_id, tenant_id])
+
+
+@certification_bp.route('/')
+@require_team_lead
+def dashboard():
+    """Approvals Dashboard - units grouped by workflow status."""
+    tenant_id = session['tenant_id']
+    user_role = session.get('role', 'inspector')
+    
+    cycle_filter = request.args.get('cycle')
+    
+    active_cycles = query_db("""
+        SELECT ic.*, ph.phase_name
+        FROM inspection_cycle ic
+        JOIN phase ph ON ic.phase_id = ph.id
+        WHERE ic.tenant_id = ? AND ic.status = 'active'
+        ORDER BY ic.cycle_number
+    """, [tenant_id])
+    
+    units = _dashboard_units(tenant_id, cycle_filter)
     
     grouped = {
         'certified': [],
@@ -514,6 +524,7 @@ def mark_reviewed(unit_id):
               new_value='reviewed',
               user_id=session['user_id'], user_name=session['user_name'])
 
+    invalidate_stats(db, tenant_id)
     db.commit()
 
     unit_num = query_db('SELECT unit_number FROM unit WHERE id = ?', [unit_id], one=True)['unit_number']
@@ -553,6 +564,7 @@ def approve_unit(unit_id):
               old_value=inspection['status'], new_value='approved',
               user_id=session['user_id'], user_name=session['user_name'])
     
+    invalidate_stats(db, tenant_id)
     db.commit()
     
     unit_num = query_db('SELECT unit_number FROM unit WHERE id = ?', [unit_id], one=True)['unit_number']
@@ -608,6 +620,7 @@ def certify_unit(unit_id):
               new_value='certified',
               user_id=session['user_id'], user_name=session['user_name'])
     
+    invalidate_stats(db, tenant_id)
     db.commit()
     
     signer = session.get('user_name', 'Architect')
@@ -663,6 +676,7 @@ def close_with_defects(unit_id):
               new_value='pending_followup',
               user_id=session['user_id'], user_name=session['user_name'])
     
+    invalidate_stats(db, tenant_id)
     db.commit()
     
     flash(f"Unit {unit['unit_number']} closed with {open_defects} defects - contractor must rectify before next inspection", 'success')
@@ -726,6 +740,7 @@ def approve_and_close(unit_id):
               new_value=new_status,
               user_id=session['user_id'], user_name=session['user_name'])
     
+    invalidate_stats(db, tenant_id)
     db.commit()
 
     flash(msg, 'success')
@@ -776,6 +791,7 @@ def reopen_unit(unit_id):
               user_id=session['user_id'], user_name=session['user_name'],
               metadata='{"action": "reopen"}')
     
+    invalidate_stats(db, tenant_id)
     db.commit()
     
     flash(f"Unit {unit['unit_number']} reopened - moved back to Approved", 'success')
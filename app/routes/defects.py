@@ -2,136 +2,174 @@
 Defects routes - Defects register views.
 Project-level view of all defects across units.
 """
+import csv
+import io
+import tempfile
 from datetime import date
 from collections import OrderedDict
-from flask import Blueprint, render_template, session, request, abort
+from flask import (Blueprint, render_template, session, request, abort, Response,
+                   stream_with_context, send_file)
 from app.auth import require_team_lead
-from app.services.db import query_db
+from app.services.db import get_db, query_db
 
 defects_bp = Blueprint('defects', __name__, url_prefix='/defects')
 
 
-@defects_bp.route('/')
-@require_team_lead
-def register():
-    """Defects register - filterable list of all defects."""
-    tenant_id = session['tenant_id']
+# Unit groups per page; further pages load via HTMX from the last unit's cursor.
+REGISTER_PAGE_UNITS = 40
+
+# Rows fetched per round-trip while streaming an export.
+EXPORT_CHUNK_ROWS = 500
+
+# Unit orderings. Keyset cursors compare these tuples, so NULL block/floor
+# are coalesced (they sort first, as ORDER BY u.block did).
+UNIT_ORDER = {
+    'register': ['u.unit_number', 'u.id'],
+    'phase': ["COALESCE(u.block, '')", 'COALESCE(u.floor, -1)', 'u.unit_number', 'u.id'],
+}
+
+EXPORT_COLUMNS = ['Unit', 'Block', 'Floor', 'Area', 'Category', 'Item', 'Defect',
+                  'Raised Cycle', 'Raised', 'Inspector', 'Status']
+
+
+def _register_scope(tenant_id, phase_id=None):
+    """
+    Unit filter (SQL on u/ph + args), defect filter (SQL on d + args) and the
+    filters dict for the current request. phase_id pins the phase register.
+    """
+    filters = {
+        'project': None if phase_id else request.args.get('project'),
+        'phase': phase_id or request.args.get('phase'),
+        'status': request.args.get('status', 'open'),
+        'block': request.args.get('block'),
+    }
+    unit_sql = "u.tenant_id = ?"
+    unit_args = [tenant_id]
+    if filters['project']:
+        unit_sql += " AND ph.project_id = ?"
+        unit_args.append(filters['project'])
+    if filters['phase']:
+        unit_sql += " AND u.phase_id = ?"
+        unit_args.append(filters['phase'])
+    if filters['block']:
+        unit_sql += " AND u.block = ?"
+        unit_args.append(filters['block'])
     
-    # Get filter parameters
-    project_id = request.args.get('project')
-    phase_id = request.args.get('phase')
-    status_filter = request.args.get('status', 'open')
-    block_filter = request.args.get('block')
+    defect_sql = ""
+    defect_args = []
+    if filters['status'] and filters['status'] != 'all':
+        defect_sql = " AND d.status = ?"
+        defect_args.append(filters['status'])
+    return unit_sql, unit_args, defect_sql, defect_args, filters
+
+
+def _register_unit_page(tenant_id, view, after=None, phase_id=None):
+    """
+    One page of unit groups (unit_id, unit_code, block, floor, defect_count,
+    raised_cycle) for units with matching defects, after the cursor unit.
+    Returns (units, next_after).
+    """
+    unit_sql, unit_args, defect_sql, defect_args, _ = _register_scope(tenant_id, phase_id)
+    order = ', '.join(UNIT_ORDER[view])
+    
+    cursor_sql = ""
+    cursor_args = []
+    if after:
+        cursor_sql = " AND ({0}) > (SELECT {0} FROM unit u WHERE u.id = ?)".format(order)
+        cursor_args = [after]
+    
+    rows = query_db("""
+        WITH page AS (
+            SELECT u.id, u.unit_number, u.block, u.floor
+            FROM unit u
+            JOIN phase ph ON u.phase_id = ph.id
+            WHERE {unit_sql}{cursor_sql}
+            AND EXISTS (SELECT 1 FROM defect d WHERE d.unit_id = u.id{defect_sql})
+            ORDER BY {order}
+            LIMIT ?
+        )
+        SELECT u.id AS unit_id, u.unit_number AS unit_code, u.block, u.floor,
+               COUNT(*) AS defect_count,
+               MIN(d.raised_cycle_number) AS raised_cycle
+        FROM page u
+        JOIN defect d ON d.unit_id = u.id{defect_sql}
+        GROUP BY u.id
+        ORDER BY {order}
+    """.format(unit_sql=unit_sql, cursor_sql=cursor_sql, defect_sql=defect_sql, order=order),
+        unit_args + cursor_args + defect_args + [REGISTER_PAGE_UNITS + 1] + defect_args)
     
-    # Build query
+    units = rows[:REGISTER_PAGE_UNITS]
+    next_after = units[-1]['unit_id'] if len(rows) > REGISTER_PAGE_UNITS else None
+    return units, next_after
+
+
+def _unit_defect_groups(tenant_id, unit_id, status_filter):
+    """Defects for one unit grouped area -> category, with category notes."""
     query = """
-        SELECT d.*, 
-               u.unit_number as unit_code,
-               u.block, u.floor, u.unit_number,
+        SELECT d.*, d.status as defect_status,
                it.item_description, ct.category_name, at.area_name,
                i.inspection_date, i.inspector_name,
-               p.project_name, ph.phase_name,
-               d.raised_cycle_number as raised_cycle,
-               parent.item_description as parent_description,
-               dh.comment as defect_comment
+               parent.item_description as parent_description
         FROM defect d
-        JOIN unit u ON d.unit_id = u.id
-        JOIN phase ph ON u.phase_id = ph.id
-        JOIN project p ON ph.project_id = p.id
         JOIN item_template it ON d.item_template_id = it.id
         JOIN category_template ct ON it.category_id = ct.id
         JOIN area_template at ON ct.area_id = at.id
         LEFT JOIN inspection i ON d.unit_id = i.unit_id AND d.raised_cycle_id = i.cycle_id
         LEFT JOIN item_template parent ON it.parent_item_id = parent.id
-        LEFT JOIN (
-            SELECT defect_id, comment FROM defect_history 
-            WHERE id IN (SELECT MIN(id) FROM defect_history GROUP BY defect_id)
-        ) dh ON dh.defect_id = d.id
-        WHERE d.tenant_id = ?
+        WHERE d.unit_id = ? AND d.tenant_id = ?
     """
-    params = [tenant_id]
-    
-    if project_id:
-        query += " AND p.id = ?"
-        params.append(project_id)
-    
-    if phase_id:
-        query += " AND ph.id = ?"
-        params.append(phase_id)
-    
+    params = [unit_id, tenant_id]
     if status_filter and status_filter != 'all':
         query += " AND d.status = ?"
         params.append(status_filter)
-    
-    if block_filter:
-        query += " AND u.block = ?"
-        params.append(block_filter)
-    
-    query += " ORDER BY u.unit_number, at.area_order, ct.category_order, it.item_order"
-    
+    query += " ORDER BY at.area_order, ct.category_order, it.item_order"
     defects = query_db(query, params)
     
-    # Get category comments for all units with defects
-    unit_ids = list(set(d['unit_id'] for d in defects))
+    # Latest comment per category for this unit
     category_comments = {}
-    if unit_ids:
-        placeholders = ','.join('?' * len(unit_ids))
-        comments = query_db(f"""
-            SELECT cc.unit_id, cc.category_template_id, cch.comment as latest_comment,
-                   ct.category_name, at.area_name
-            FROM category_comment cc
-            LEFT JOIN category_comment_history cch ON cch.category_comment_id = cc.id
-            JOIN category_template ct ON cc.category_template_id = ct.id
-            JOIN area_template at ON ct.area_id = at.id
-            WHERE cc.unit_id IN ({placeholders})
-            ORDER BY cch.created_at DESC
-        """, unit_ids)
-        for c in comments:
-            key = (c['unit_id'], c['area_name'], c['category_name'])
-            if key not in category_comments:
-                category_comments[key] = c['latest_comment']
+    comments = query_db("""
+        SELECT cch.comment as latest_comment, ct.category_name, at.area_name
+        FROM category_comment cc
+        LEFT JOIN category_comment_history cch ON cch.category_comment_id = cc.id
+        JOIN category_template ct ON cc.category_template_id = ct.id
+        JOIN area_template at ON ct.area_id = at.id
+        WHERE cc.unit_id = ?
+        ORDER BY cch.created_at DESC
+    """, [unit_id])
+    for c in comments:
+        key = (c['area_name'], c['category_name'])
+        if key not in category_comments:
+            category_comments[key] = c['latest_comment']
     
-    # Group defects by unit -> area -> category
-    grouped_defects = OrderedDict()
+    areas = OrderedDict()
     for d in defects:
-        unit_key = d['unit_code']
-        area_name = d['area_name']
-        cat_name = d['category_name']
-        
-        if unit_key not in grouped_defects:
-            grouped_defects[unit_key] = {
-                'unit_code': d['unit_code'],
-                'unit_id': d['unit_id'],
-                'raised_cycle': d['raised_cycle'],
-                'areas': OrderedDict()
-            }
-        
-        if area_name not in grouped_defects[unit_key]['areas']:
-            grouped_defects[unit_key]['areas'][area_name] = {
-                'name': area_name,
-                'categories': OrderedDict()
-            }
-        
-        if cat_name not in grouped_defects[unit_key]['areas'][area_name]['categories']:
-            cat_note_key = (d['unit_id'], area_name, cat_name)
-            grouped_defects[unit_key]['areas'][area_name]['categories'][cat_name] = {
-                'name': cat_name,
-                'note': category_comments.get(cat_note_key),
+        area = areas.setdefault(d['area_name'], {
+            'name': d['area_name'],
+            'categories': OrderedDict()
+        })
+        if d['category_name'] not in area['categories']:
+            area['categories'][d['category_name']] = {
+                'name': d['category_name'],
+                'note': category_comments.get((d['area_name'], d['category_name'])),
                 'defects': []
             }
-        
-        grouped_defects[unit_key]['areas'][area_name]['categories'][cat_name]['defects'].append(d)
-    
-    # Count total defects per unit
-    for unit_key, unit_data in grouped_defects.items():
-        total = 0
-        for area in unit_data['areas'].values():
-            for cat in area['categories'].values():
-                total += len(cat['defects'])
-        unit_data['defect_count'] = total
-    
-    # Summary stats
-    stats = query_db("""
+        area['categories'][d['category_name']]['defects'].append(d)
+    return areas
+
+
+def _register_stats(tenant_id, phase_id=None):
+    if phase_id:
+        return query_db("""
+            SELECT 
+                COUNT(*) as total,
+                SUM(CASE WHEN d.status = 'open' THEN 1 ELSE 0 END) as open_count,
+                SUM(CASE WHEN d.status = 'cleared' THEN 1 ELSE 0 END) as cleared_count,
+                COUNT(DISTINCT d.unit_id) as units_with_defects
+            FROM defect d
+            JOIN unit u ON d.unit_id = u.id
+            WHERE u.phase_id = ?
+        """, [phase_id], one=True)
+    return query_db("""
         SELECT 
             COUNT(*) as total,
             SUM(CASE WHEN d.status = 'open' THEN 1 ELSE 0 END) as open_count,
@@ -140,6 +178,16 @@ def register():
         FROM defect d
         WHERE d.tenant_id = ?
     """, [tenant_id], one=True)
+
+
+@defects_bp.route('/')
+@require_team_lead
+def register():
+    """Defects register - filterable list of all defects, grouped by unit."""
+    tenant_id = session['tenant_id']
+    _, _, _, _, filters = _register_scope(tenant_id)
+    
+    units, next_after = _register_unit_page(tenant_id, 'register')
     
     # Filter options
     projects = query_db(
@@ -149,27 +197,23 @@ def register():
     
     phases = []
     blocks = []
-    if project_id:
+    if filters['project']:
         phases = query_db(
             "SELECT * FROM phase WHERE project_id = ? ORDER BY phase_name",
-            [project_id]
+            [filters['project']]
         )
     
-    if phase_id:
+    if filters['phase']:
         blocks = query_db(
             "SELECT DISTINCT block FROM unit WHERE phase_id = ? ORDER BY block",
-            [phase_id]
+            [filters['phase']]
         )
     
     return render_template('defects/register.html',
-                          grouped_defects=grouped_defects, stats=stats,
+                          units=units, next_after=next_after, view='register',
+                          stats=_register_stats(tenant_id),
                           projects=projects, phases=phases, blocks=blocks,
-                          filters={
-                              'project': project_id,
-                              'phase': phase_id,
-                              'status': status_filter,
-                              'block': block_filter
-                          })
+                          filters=filters)
 
 
 @defects_bp.route('/phase/<phase_id>')
@@ -178,9 +222,6 @@ def phase_register(phase_id):
     """Phase-level defects register with grouping by unit."""
     tenant_id = session['tenant_id']
     
-    status_filter = request.args.get('status', 'open')
-    block_filter = request.args.get('block')
-    
     phase = query_db(
         "SELECT * FROM phase WHERE id = ? AND tenant_id = ?",
         [phase_id, tenant_id], one=True
@@ -193,62 +234,8 @@ def phase_register(phase_id):
         [phase['project_id']], one=True
     )
     
-    # Build query with filters
-    query = """
-        SELECT d.*, d.status as defect_status,
-               u.unit_number as unit_code,
-               u.block, u.floor, u.unit_number,
-               it.item_description, ct.category_name, at.area_name,
-               i.inspection_date, i.inspector_name,
-               parent.item_description as parent_description,
-               d.raised_cycle_number as raised_cycle,
-               dh.comment as defect_comment
-        FROM defect d
-        JOIN unit u ON d.unit_id = u.id
-        JOIN item_template it ON d.item_template_id = it.id
-        JOIN category_template ct ON it.category_id = ct.id
-        JOIN area_template at ON ct.area_id = at.id
-        LEFT JOIN inspection i ON d.unit_id = i.unit_id AND d.raised_cycle_id = i.cycle_id
-        LEFT JOIN item_template parent ON it.parent_item_id = parent.id
-        LEFT JOIN (
-            SELECT defect_id, comment FROM defect_history 
-            WHERE id IN (SELECT MIN(id) FROM defect_history GROUP BY defect_id)
-        ) dh ON dh.defect_id = d.id
-        WHERE u.phase_id = ?
-    """
-    params = [phase_id]
-    
-    if status_filter and status_filter != 'all':
-        query += " AND d.status = ?"
-        params.append(status_filter)
-    
-    if block_filter:
-        query += " AND u.block = ?"
-        params.append(block_filter)
-    
-    query += " ORDER BY u.block, u.floor, u.unit_number, at.area_order, ct.category_order"
-    
-    defects = query_db(query, params)
-    
-    # Group by unit
-    grouped_defects = OrderedDict()
-    for d in defects:
-        unit_code = d['unit_code']
-        if unit_code not in grouped_defects:
-            grouped_defects[unit_code] = {'defects': []}
-        grouped_defects[unit_code]['defects'].append(d)
-    
-    # Stats
-    stats = query_db("""
-        SELECT 
-            COUNT(*) as total,
-            SUM(CASE WHEN d.status = 'open' THEN 1 ELSE 0 END) as open_count,
-            SUM(CASE WHEN d.status = 'cleared' THEN 1 ELSE 0 END) as cleared_count,
-            COUNT(DISTINCT d.unit_id) as units_with_defects
-        FROM defect d
-        JOIN unit u ON d.unit_id = u.id
-        WHERE u.phase_id = ?
-    """, [phase_id], one=True)
+    _, _, _, _, filters = _register_scope(tenant_id, phase_id)
+    units, next_after = _register_unit_page(tenant_id, 'phase', phase_id=phase_id)
     
     # Block filter options
     blocks = query_db(
@@ -258,10 +245,119 @@ def phase_register(phase_id):
     
     return render_template('defects/register.html',
                           project=project, phase=phase,
-                          grouped_defects=grouped_defects, stats=stats,
+                          units=units, next_after=next_after, view='phase',
+                          stats=_register_stats(tenant_id, phase_id),
                           blocks=blocks,
                           today=date.today().strftime('%d %B %Y'),
-                          filters={
-                              'status': status_filter,
-                              'block': block_filter
-                          })
+                          filters=filters)
+
+
+@defects_bp.route('/units')
+@require_team_lead
+def register_units():
+    """HTMX: next page of unit groups after the `after` cursor."""
+    tenant_id = session['tenant_id']
+    view = request.args.get('view', 'register')
+    if view not in UNIT_ORDER:
+        abort(400)
+    phase_id = request.args.get('phase') if view == 'phase' else None
+    units, next_after = _register_unit_page(
+        tenant_id, view, after=request.args.get('after'), phase_id=phase_id)
+    _, _, _, _, filters = _register_scope(tenant_id, phase_id)
+    return render_template('defects/_unit_page.html',
+                          units=units, next_after=next_after, view=view, filters=filters)
+
+
+@defects_bp.route('/unit/<unit_id>')
+@require_team_lead
+def unit_defects(unit_id):
+    """HTMX: area/category defect tables for one unit group, loaded on expand."""
+    tenant_id = session['tenant_id']
+    areas = _unit_defect_groups(tenant_id, unit_id, request.args.get('status', 'open'))
+    return render_template('defects/_unit_defects.html', areas=areas)
+
+
+def _export_rows(tenant_id, view, phase_id=None):
+    """Yield export rows for the current filters, EXPORT_CHUNK_ROWS at a time."""
+    unit_sql, unit_args, defect_sql, defect_args, _ = _register_scope(tenant_id, phase_id)
+    cur = get_db().execute("""
+        SELECT u.unit_number, u.block, u.floor, at.area_name, ct.category_name,
+               parent.item_description AS parent_description, it.item_description,
+               d.original_comment, d.raised_cycle_number, d.created_at,
+               i.inspector_name, d.status
+        FROM unit u
+        JOIN phase ph ON u.phase_id = ph.id
+        JOIN defect d ON d.unit_id = u.id
+        JOIN item_template it ON d.item_template_id = it.id
+        JOIN category_template ct ON it.category_id = ct.id
+        JOIN area_template at ON ct.area_id = at.id
+        LEFT JOIN inspection i ON d.unit_id = i.unit_id AND d.raised_cycle_id = i.cycle_id
+        LEFT JOIN item_template parent ON it.parent_item_id = parent.id
+        WHERE {}{}
+        ORDER BY {}, at.area_order, ct.category_order, it.item_order
+    """.format(unit_sql, defect_sql, ', '.join(UNIT_ORDER[view])), unit_args + defect_args)
+    try:
+        while True:
+            chunk = cur.fetchmany(EXPORT_CHUNK_ROWS)
+            if not chunk:
+                break
+            for r in chunk:
+                item = r['item_description']
+                if r['parent_description']:
+                    item = '{} > {}'.format(r['parent_description'], item)
+                yield [r['unit_number'], r['block'], r['floor'], r['area_name'],
+                       r['category_name'], item, r['original_comment'],
+                       r['raised_cycle_number'], (r['created_at'] or '')[:10],
+                       r['inspector_name'], r['status']]
+    finally:
+        cur.close()
+
+
+@defects_bp.route('/export.<fmt>')
+@require_team_lead
+def export(fmt):
+    """Streaming CSV/XLSX export of the register with the current filters."""
+    tenant_id = session['tenant_id']
+    view = 'phase' if request.args.get('view') == 'phase' else 'register'
+    phase_id = request.args.get('phase') if view == 'phase' else None
+    if phase_id and not query_db("SELECT 1 FROM phase WHERE id = ? AND tenant_id = ?",
+                                 [phase_id, tenant_id], one=True):
+        abort(404)
+    filename = 'Defects_Register_{}.{}'.format(date.today().strftime('%Y%m%d'), fmt)
+    
+    if fmt == 'csv':
+        def generate():
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(EXPORT_COLUMNS)
+            for n, row in enumerate(_export_rows(tenant_id, view, phase_id), 1):
+                writer.writerow(row)
+                if n % EXPORT_CHUNK_ROWS == 0:
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+            yield buf.getvalue()
+        
+        response = Response(stream_with_context(generate()), mimetype='text/csv')
+        response.headers['Content-Disposition'] = 'attachment; filename={}'.format(filename)
+        return response
+    
+    if fmt == 'xlsx':
+        from openpyxl import Workbook
+        # write_only streams rows to a temp file instead of building cells in memory
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Defects')
+        ws.append(EXPORT_COLUMNS)
+        for row in _export_rows(tenant_id, view, phase_id):
+            ws.append(row)
+        out = tempfile.TemporaryFile()
+        wb.save(out)
+        out.seek(0)
+        return send_file(
+            out,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=filename
+        )
+    
+    abort(404)
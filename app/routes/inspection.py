@@ -10,7 +10,12 @@ from app.utils import generate_id
 from app.utils.wash import wash_description
 from app.utils.audit import log_audit
 from app.services.db import get_db, query_db
+from app.services.change_log import current_version
+from app.services.conditional import conditional
+from app.services.fragment_cache import cached_fragment
+from app.services.events import publish
 from app.services.template_loader import get_inspection_template
+from app.services.inspection_metrics import parse_ts
 
 # BLOCKED_DESCRIPTIONS = {
 #     'defect noted', 'n/a', 'na', 'not applicable',
@@ -533,6 +538,23 @@ def inspect_area(inspection_id, area_id):
     if not area:
         abort(404)
     
+    area_note = query_db("""
+        SELECT note FROM cycle_area_note
+        WHERE cycle_id = ? AND area_template_id = ?
+    """, [inspection['cycle_id'], area_id], one=True)
+
+    # Whole-area fragment, keyed by the unit's change_log version (items, chips,
+    # defects, category comments, inspection status all log against the unit).
+    return cached_fragment(
+        ('area', inspection_id, area_id, filter_mode, area_note['note'] if area_note else None),
+        current_version(tenant_id, [inspection['unit_id']]),
+        lambda: _render_area(inspection_id, inspection, area, area_id, filter_mode,
+                             is_initial, is_followup, show_filter, area_note, tenant_id))
+
+
+def _render_area(inspection_id, inspection, area, area_id, filter_mode,
+                 is_initial, is_followup, show_filter, area_note, tenant_id):
+    """Build the area checklist (categories, items, prior/current defects) and render it."""
     # Get prior defects for this unit (open + cleared from earlier cycles)
     prior_defects_map = {}
     if is_followup:
@@ -776,12 +798,7 @@ def inspect_area(inspection_id, area_id):
             'all_skipped': all_skipped and len(checklist) > 0,
             'comment': cat_comment,
         })
-    
-    area_note = query_db("""
-        SELECT note FROM cycle_area_note
-        WHERE cycle_id = ? AND area_template_id = ?
-    """, [inspection['cycle_id'], area_id], one=True)
-    
+
     return render_template('inspection/area.html',
                          inspection=inspection,
                          area=area,
@@ -1075,6 +1092,7 @@ def update_item(inspection_id, item_id):
             """, [inspection['unit_id'], inspection_id, tenant_id])
         
         db.commit()
+        publish(tenant_id, inspection['unit_id'])
     
     if area_id:
         tenant_id_for_render = session['tenant_id']
@@ -1207,6 +1225,7 @@ def add_defect(inspection_id, item_id):
         db.execute("INSERT INTO inspection_defect (id, tenant_id, inspection_id, inspection_item_id, item_template_id, description, defect_type, created_at) VALUES (?, ?, ?, ?, ?, ?, 'not_to_standard', ?)", [defect_id, tenant_id, inspection_id, item_id, item['item_template_id'], description, now])
 
     db.commit()
+    publish(tenant_id, inspection['unit_id'])
     if area_id:
         html = _render_single_item(inspection_id, item_id, tenant_id, area_id, force_expanded=True)
         response = make_response(html)
@@ -1732,6 +1751,7 @@ def submit_inspection(inspection_id):
     # No unit status change needed here
     
     db.commit()
+    publish(tenant_id, inspection['unit_id'])
     
     role = session.get('role', 'inspector')
     if role in ('manager', 'admin'):
@@ -1754,15 +1774,13 @@ def _can_pause_resume(inspection):
 
 def _resume_inspection_inline(db, inspection, tenant_id):
     """Resume a paused inspection; accumulates pause time. Caller commits."""
-    from datetime import datetime
+    from datetime import datetime, timezone
     paused_at_str = inspection['paused_at']
     if not paused_at_str:
         return
-    try:
-        paused_at_dt = datetime.strptime(paused_at_str, '%Y-%m-%d %H:%M:%S')
-    except (ValueError, TypeError):
-        paused_at_dt = datetime.utcnow()
-    elapsed = int((datetime.utcnow() - paused_at_dt).total_seconds())
+    now = datetime.now(timezone.utc)
+    paused_at_dt = parse_ts(paused_at_str) or now
+    elapsed = int((now - paused_at_dt).total_seconds())
     if elapsed < 0:
         elapsed = 0
     db.execute("""
@@ -1852,16 +1870,30 @@ def resume_inspection(inspection_id):
     return redirect(url_for('inspection.inspect', inspection_id=inspection_id))
 
 
+def _inspection_unit_token(inspection_id):
+    """Change token for per-inspection partials: change_log version of its unit."""
+    tenant_id = session['tenant_id']
+    row = query_db("SELECT unit_id FROM inspection WHERE id = ? AND tenant_id = ?",
+                   [inspection_id, tenant_id], one=True)
+    if not row:
+        return None
+    version = current_version(tenant_id, [row['unit_id']])
+    return None if version is None else [row['unit_id'], version]
+
+
 @inspection_bp.route('/<inspection_id>/progress')
 @require_auth
+@conditional(_inspection_unit_token)
 def get_progress(inspection_id):
     inspection = query_db("""
         SELECT i.status, i.unit_id, i.cycle_number
         FROM inspection i
-        WHERE i.id = ?
-    """, [inspection_id], one=True)
+        WHERE i.id = ? AND i.tenant_id = ?
+    """, [inspection_id, session['tenant_id']], one=True)
+    if not inspection:
+        abort(404)
     
-    is_followup = inspection['cycle_number'] > 1 if inspection else False
+    is_followup = inspection['cycle_number'] > 1
     
     progress_raw = query_db("""
         SELECT 
@@ -1975,9 +2007,11 @@ def get_defect_count(inspection_id):
 
 @inspection_bp.route('/<inspection_id>/area-badges')
 @require_auth
+@conditional(_inspection_unit_token)
 def get_area_badges(inspection_id):
     """Return updated area defect badges for HTMX OOB swap."""
-    inspection = query_db("SELECT unit_id, cycle_number FROM inspection WHERE id = ?", [inspection_id], one=True)
+    inspection = query_db("SELECT unit_id, cycle_number FROM inspection WHERE id = ? AND tenant_id = ?",
+                          [inspection_id, session['tenant_id']], one=True)
     if not inspection:
         return ''
     is_followup_badge = (inspection['cycle_number'] or 1) > 1
@@ -2653,6 +2687,7 @@ def desnag_address(inspection_id):
             WHERE id=? AND status='open' AND tenant_id=?""",
             [inspection['cycle_number'], now, defect_id, tenant_id])
     db.commit()
+    publish(tenant_id, inspection['unit_id'])
 
     # Return updated defect partial
     defect = query_db("""
@@ -2723,6 +2758,7 @@ def desnag_undo(inspection_id):
         db.execute("""UPDATE defect SET addressed_cycle_number=NULL, clearance_note=NULL, updated_at=?
             WHERE id=? AND tenant_id=?""", [now, defect_id, tenant_id])
     db.commit()
+    publish(tenant_id, inspection['unit_id'])
 
     # Return updated defect partial
     defect_row = query_db("""
@@ -2777,6 +2813,7 @@ def desnag_latent_address(inspection_id):
             WHERE id=? AND rectified_at IS NULL AND tenant_id=?""",
             [cycle_number, now, latent_id, tenant_id])
     db.commit()
+    publish(tenant_id, inspection['unit_id'])
 
     latent = query_db("""
         SELECT lan.id, lan.note_html, lan.cycle_number AS raised_cycle,
@@ -2828,6 +2865,7 @@ def desnag_latent_undo(inspection_id):
             addressed_cycle_number=NULL, last_edited_at=?
             WHERE id=? AND tenant_id=?""", [now, latent_id, tenant_id])
     db.commit()
+    publish(tenant_id, inspection['unit_id'])
 
     latent = query_db("""
         SELECT lan.id, lan.note_html, lan.cycle_number AS raised_cycle,
@@ -2901,6 +2939,7 @@ def desnag_submit(inspection_id):
         WHERE unit_id=? AND cycle_id=? AND tenant_id=?""",
         [inspection['unit_id'], inspection['cycle_id'], tenant_id])
     db.commit()
+    publish(tenant_id, inspection['unit_id'])
 
     return redirect(url_for('home'))
 
@@ -2950,6 +2989,113 @@ def _desnag_progress(unit_id, tenant_id, cycle_number):
     }
 
 
+def _inspector_home_rows(tenant_id, inspector_id):
+    """Open inspections assigned to an inspector, with card counts, in one query.
+
+    C1 rows use the carried_ok cohort (own checklist + prior defects). C2+ rows
+    use the _desnag_progress cohort (defects + latents + newly-visible items) so
+    the card matches batch detail, live view and the desnag screen.
+    """
+    rows = query_db("""
+        WITH mine AS (
+            SELECT i.id AS inspection_id, i.status AS inspection_status,
+                   i.inspection_date, i.started_at, i.submitted_at, i.tenant_id,
+                   u.id AS unit_id, u.unit_number, u.block, u.floor,
+                   ic.cycle_number, ic.id AS cycle_id,
+                   COALESCE(ic.cycle_number, 0) > 1 AS desnag
+            FROM inspection i
+            JOIN unit u ON i.unit_id = u.id
+            JOIN inspection_cycle ic ON i.cycle_id = ic.id
+            WHERE i.inspector_id = ? AND i.tenant_id = ?
+            AND i.status IN ('not_started', 'in_progress', 'paused')
+        ),
+        leaf_parents AS (
+            SELECT DISTINCT parent_item_id FROM item_template WHERE parent_item_id IS NOT NULL
+        ),
+        item_counts AS (
+            SELECT ii.inspection_id,
+                SUM(ii.status != 'skipped'
+                    AND NOT (ii.status = 'ok' AND ii.marked_at IS NULL
+                             AND COALESCE(ii.has_prior_defects, 0) = 0)) AS total_items,
+                SUM(ii.status NOT IN ('skipped', 'pending')
+                    AND NOT (ii.status = 'ok' AND ii.marked_at IS NULL
+                             AND COALESCE(ii.has_prior_defects, 0) = 0)) AS completed_items,
+                SUM(lp.parent_item_id IS NULL
+                    AND ii.status != 'skipped'
+                    AND (ii.status = 'pending' OR ii.marked_at IS NOT NULL)
+                    AND COALESCE(ii.has_prior_defects, 0) = 0) AS desnag_items,
+                SUM(lp.parent_item_id IS NULL
+                    AND ii.status NOT IN ('skipped', 'pending')
+                    AND ii.marked_at IS NOT NULL
+                    AND COALESCE(ii.has_prior_defects, 0) = 0) AS desnag_items_done
+            FROM mine m
+            CROSS JOIN inspection_item ii ON ii.inspection_id = m.inspection_id
+            LEFT JOIN leaf_parents lp ON lp.parent_item_id = ii.item_template_id
+            GROUP BY ii.inspection_id
+        ),
+        chip_counts AS (
+            SELECT idef.inspection_id, COUNT(*) AS defect_count
+            FROM mine m
+            CROSS JOIN inspection_defect idef ON idef.inspection_id = m.inspection_id
+            GROUP BY idef.inspection_id
+        ),
+        defect_counts AS (
+            SELECT m.inspection_id,
+                SUM(ic2.cycle_number < m.cycle_number AND d.status = 'open') AS prior_open_defects,
+                SUM(ic2.cycle_number < m.cycle_number) AS prior_defects_total,
+                SUM(d.raised_cycle_number < m.cycle_number
+                    AND (d.status = 'open'
+                         OR (d.status = 'cleared' AND d.cleared_cycle_number = m.cycle_number))) AS desnag_defects,
+                SUM(d.raised_cycle_number < m.cycle_number
+                    AND (d.status = 'open'
+                         OR (d.status = 'cleared' AND d.cleared_cycle_number = m.cycle_number))
+                    AND d.addressed_cycle_number = m.cycle_number) AS desnag_defects_done,
+                SUM(d.raised_cycle_number < m.cycle_number AND d.status = 'open') AS desnag_defects_open
+            FROM mine m
+            CROSS JOIN defect d ON d.unit_id = m.unit_id AND d.tenant_id = m.tenant_id
+            LEFT JOIN inspection_cycle ic2 ON d.raised_cycle_id = ic2.id
+            GROUP BY m.inspection_id
+        ),
+        latent_counts AS (
+            SELECT m.inspection_id,
+                COUNT(*) AS desnag_latents,
+                SUM(lan.addressed_cycle_number = m.cycle_number) AS desnag_latents_done,
+                SUM(lan.rectified_at IS NULL) AS desnag_latents_open
+            FROM mine m
+            CROSS JOIN latent_area_note lan ON lan.unit_id = m.unit_id AND lan.tenant_id = m.tenant_id
+            WHERE m.desnag
+            AND (lan.rectified_at IS NULL OR lan.rectified_at_cycle_number = m.cycle_number)
+            GROUP BY m.inspection_id
+        )
+        SELECT m.inspection_id, m.inspection_status, m.inspection_date,
+               m.started_at, m.submitted_at,
+               m.unit_id, m.unit_number, m.block, m.floor, m.cycle_number, m.cycle_id,
+               CASE WHEN m.desnag
+                    THEN COALESCE(ic.desnag_items, 0) + COALESCE(dc.desnag_defects, 0)
+                         + COALESCE(lc.desnag_latents, 0)
+                    ELSE COALESCE(ic.total_items, 0) END AS total_items,
+               CASE WHEN m.desnag
+                    THEN COALESCE(ic.desnag_items_done, 0) + COALESCE(dc.desnag_defects_done, 0)
+                         + COALESCE(lc.desnag_latents_done, 0)
+                    ELSE COALESCE(ic.completed_items, 0) END AS completed_items,
+               CASE WHEN m.desnag
+                    THEN COALESCE(dc.desnag_defects_open, 0) + COALESCE(lc.desnag_latents_open, 0)
+                    ELSE COALESCE(cc.defect_count, 0) END AS defect_count,
+               CASE WHEN m.desnag THEN 0
+                    ELSE COALESCE(dc.prior_open_defects, 0) END AS prior_open_defects,
+               COALESCE(dc.prior_defects_total, 0) AS prior_defects_total
+        FROM mine m
+        LEFT JOIN item_counts ic ON ic.inspection_id = m.inspection_id
+        LEFT JOIN chip_counts cc ON cc.inspection_id = m.inspection_id
+        LEFT JOIN defect_counts dc ON dc.inspection_id = m.inspection_id
+        LEFT JOIN latent_counts lc ON lc.inspection_id = m.inspection_id
+        ORDER BY
+            CASE m.inspection_status WHEN 'in_progress' THEN 0 WHEN 'paused' THEN 1 ELSE 2 END,
+            m.unit_number
+    """, [inspector_id, tenant_id])
+    return [dict(r) for r in rows]
+
+
 def _desnag_area_progress(unit_id, tenant_id, cycle_number, area_name):
     """Calculate de-snag progress for a specific area (defects + latents + items)."""
     d_row = query_db("""
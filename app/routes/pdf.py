@@ -2,7 +2,7 @@
 PDF routes - Generate and download PDF reports.
 """
 from flask import Blueprint, session, abort, Response
-from app.auth import require_team_lead
+from app.auth import require_team_lead, require_admin
 from app.services.db import query_db
 from app.services.pdf_generator import generate_defects_pdf, generate_pdf_filename
 
@@ -166,3 +166,18 @@ p { color: #6B6B6B; }
         )
     except Exception as e:
         return 'Playwright error: {}'.format(str(e)), 500
+
+
+@pdf_bp.route('/stats')
+@require_admin
+def pdf_stats():
+    """Render counters, browser recycles and latency histogram (PDF worker if running)."""
+    from flask import jsonify
+    from app.services import pdf_worker
+    from app.services.pdf_playwright import get_pdf_stats
+    if pdf_worker.worker_available():
+        try:
+            return jsonify({'source': 'pdf_worker', **pdf_worker.worker_stats()})
+        except Exception as e:
+            return jsonify({'source': 'pdf_worker', 'error': str(e)}), 503
+    return jsonify({'source': 'in_process', **get_pdf_stats()})
@@ -7,6 +7,13 @@ from app.services.db import query_db
 
 projects_bp = Blueprint('projects', __name__, url_prefix='/projects')
 
+# Phases with more units than this render block/floor headers only; each
+# floor's rows are fetched by phase_floor when scrolled into view.
+PHASE_INLINE_UNITS = 300
+
+# Inspection statuses an inspector can no longer open from the phase grid.
+INSPECTOR_LOCKED_STATUSES = ('submitted', 'reviewed', 'approved', 'certified', 'pending_followup')
+
 
 @projects_bp.route('/')
 @require_role('team_lead')
@@ -78,109 +85,209 @@ def view_phase(phase_id):
     # Get active cycles for filter dropdown with stats
     active_cycles = query_db("""
         SELECT ic.*,
-            (SELECT COUNT(DISTINCT i.unit_id) FROM inspection i 
-             WHERE i.cycle_id = ic.id AND i.status = 'submitted') as submitted_count,
-            (SELECT COUNT(*) FROM unit u 
-             WHERE u.phase_id = ic.phase_id 
-             AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))) as total_units
+            COALESCE(sc.submitted_count, 0) as submitted_count,
+            COUNT(u.id) as total_units
         FROM inspection_cycle ic
+        LEFT JOIN (
+            SELECT i.cycle_id, COUNT(DISTINCT i.unit_id) AS submitted_count
+            FROM inspection i
+            JOIN inspection_cycle ic2 ON ic2.id = i.cycle_id
+            WHERE ic2.phase_id = ? AND ic2.status = 'active' AND i.status = 'submitted'
+            GROUP BY i.cycle_id
+        ) sc ON sc.cycle_id = ic.id
+        LEFT JOIN unit u ON u.phase_id = ic.phase_id
+            AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))
         WHERE ic.phase_id = ? AND ic.status = 'active'
+        GROUP BY ic.id
         ORDER BY ic.cycle_number
-    """, [phase_id])
+    """, [phase_id, phase_id])
     
     # Get cycle filter from query param
     cycle_filter = request.args.get('cycle')
-    
-    # Build units query based on active cycles
+    cycle = None
     if cycle_filter:
-        # Filter to specific cycle
         cycle = query_db("SELECT * FROM inspection_cycle WHERE id = ?", [cycle_filter], one=True)
-        if cycle and cycle['unit_start'] and cycle['unit_end']:
-            units = query_db("""
-                SELECT u.*,
-                    u.unit_number,
-                    ? as cycle_number,
-                    ? as cycle_id,
-                    (SELECT i.status FROM inspection i WHERE i.unit_id = u.id AND i.cycle_id = ?) as inspection_status,
-                    (SELECT i.id FROM inspection i WHERE i.unit_id = u.id AND i.cycle_id = ?) as inspection_id,
-                    (SELECT COUNT(*) FROM defect d WHERE d.unit_id = u.id AND d.status = 'open') as open_defects
+        if not cycle:
+            abort(404)
+    
+    units_sql, units_args = _phase_units_query(phase_id, tenant_id, cycle, bool(active_cycles))
+    
+    # One row per block/floor: header counts, stats and the lazy-load decision
+    floors = _phase_floor_counts(units_sql, units_args)
+    
+    # Stats
+    stats = {
+        'total': sum(f['unit_count'] for f in floors),
+        'certified': sum(f['certified'] for f in floors),
+        'cleared': sum(f['cleared'] for f in floors),
+        'open_defects': sum(f['open_defects'] or 0 for f in floors)
+    }
+    
+    # Small phases render every unit inline; larger ones render block/floor
+    # headers and each floor's units load via HTMX when scrolled into view.
+    units_by_floor = None
+    if stats['total'] <= PHASE_INLINE_UNITS:
+        units_by_floor = {}
+        for unit in query_db(units_sql + " ORDER BY u.block, u.floor, u.unit_number", units_args):
+            units_by_floor.setdefault((unit['block'], unit['floor']), []).append(unit)
+    
+    blocks = []
+    for f in floors:
+        if not blocks or blocks[-1]['name'] != f['block']:
+            blocks.append({'name': f['block'], 'unit_count': 0, 'floors': []})
+        blocks[-1]['unit_count'] += f['unit_count']
+        blocks[-1]['floors'].append({
+            'floor': f['floor'],
+            'unit_count': f['unit_count'],
+            'units': units_by_floor.get((f['block'], f['floor']), []) if units_by_floor is not None else None,
+        })
+    
+    visible_count = stats['total']
+    if session.get('role') == 'inspector':
+        visible_count = sum(f['unlocked_count'] for f in floors)
+    
+    return render_template('projects/phase.html', project=project, phase=phase, blocks=blocks,
+                          active_cycles=active_cycles, cycle_filter=cycle_filter, stats=stats,
+                          visible_count=visible_count)
+
+
+@projects_bp.route('/phase/<phase_id>/floor')
+@require_role('team_lead')
+def phase_floor(phase_id):
+    """HTMX partial: unit rows for one block/floor of a large phase grid."""
+    from flask import session, request
+    tenant_id = session['tenant_id']
+    
+    phase = query_db(
+        "SELECT id FROM phase WHERE id = ? AND tenant_id = ?",
+        [phase_id, tenant_id], one=True
+    )
+    if not phase:
+        abort(404)
+    
+    cycle = None
+    if request.args.get('cycle'):
+        cycle = query_db("SELECT * FROM inspection_cycle WHERE id = ? AND phase_id = ?",
+                         [request.args['cycle'], phase_id], one=True)
+        if not cycle:
+            abort(404)
+    has_active = query_db(
+        "SELECT 1 FROM inspection_cycle WHERE phase_id = ? AND status = 'active' LIMIT 1",
+        [phase_id], one=True) is not None
+    
+    units_sql, units_args = _phase_units_query(
+        phase_id, tenant_id, cycle, has_active,
+        block_floor=(request.args.get('block'), request.args.get('floor', type=int)))
+    units = query_db(units_sql + " ORDER BY u.unit_number", units_args)
+    return render_template('projects/_phase_units.html', floor_units=units)
+
+
+def _phase_floor_counts(units_sql, units_args):
+    """
+    Per block/floor rows over _phase_units_query: unit_count, unlocked_count
+    (units an inspector can still open), certified, cleared and open_defects.
+    """
+    return query_db("""
+        SELECT block, floor,
+            COUNT(*) AS unit_count,
+            SUM(inspection_status IS NULL OR inspection_status NOT IN ({})) AS unlocked_count,
+            SUM(status = 'certified') AS certified,
+            SUM(status = 'cleared') AS cleared,
+            SUM(open_defects) AS open_defects
+        FROM ({}) GROUP BY block, floor ORDER BY block, floor
+    """.format(','.join('?' * len(INSPECTOR_LOCKED_STATUSES)), units_sql),
+        list(INSPECTOR_LOCKED_STATUSES) + units_args)
+
+
+def _phase_units_query(phase_id, tenant_id, cycle, has_active_cycles, block_floor=None):
+    """
+    SQL and args for the phase grid unit rows: u.* plus cycle_number, cycle_id,
+    inspection_status, inspection_id and open_defects. Unordered - callers add
+    ORDER BY (or aggregate over it).
+    
+    cycle: a filtered inspection_cycle row, or None for all active cycles.
+    block_floor: optional (block, floor) restricting the rows to one floor.
+    """
+    # Unit scope, repeated inside each aggregate so a floor request only
+    # touches that floor's units.
+    scope = "u.phase_id = ? AND u.tenant_id = ?"
+    scope_args = [phase_id, tenant_id]
+    if block_floor is not None:
+        scope += " AND u.block IS ? AND u.floor IS ?"
+        scope_args += list(block_floor)
+    
+    open_defects_sql = """
+        LEFT JOIN (
+            SELECT d.unit_id, COUNT(*) AS open_defects
+            FROM unit u
+            CROSS JOIN defect d ON d.unit_id = u.id
+            WHERE {} AND d.status = 'open'
+            GROUP BY d.unit_id
+        ) od ON od.unit_id = u.id
+        WHERE {}
+    """.format(scope, scope)
+    
+    if cycle:
+        sql = """
+            SELECT u.*,
+                ? as cycle_number,
+                ? as cycle_id,
+                i.status as inspection_status,
+                i.id as inspection_id,
+                COALESCE(od.open_defects, 0) as open_defects
+            FROM unit u
+            LEFT JOIN inspection i ON i.unit_id = u.id AND i.cycle_id = ?
+        """ + open_defects_sql
+        args = [cycle['cycle_number'], cycle['id'], cycle['id']] + scope_args + scope_args
+        if cycle['unit_start'] and cycle['unit_end']:
+            sql += " AND u.unit_number >= ? AND u.unit_number <= ?"
+            args += [cycle['unit_start'], cycle['unit_end']]
+        return sql, args
+    
+    if has_active_cycles:
+        # Units in any active cycle, with the latest covering cycle and the
+        # inspection from the latest active cycle the unit was inspected in.
+        # Bare columns next to MAX() come from the max row (SQLite guarantee).
+        sql = """
+            WITH unit_cycle AS (
+                SELECT u.id AS unit_id, ic.id AS cycle_id, MAX(ic.cycle_number) AS cycle_number
                 FROM unit u
-                WHERE u.phase_id = ? AND u.tenant_id = ?
-                AND u.unit_number >= ? AND u.unit_number <= ?
-                ORDER BY u.block, u.floor, u.unit_number
-            """, [cycle['cycle_number'], cycle['id'], cycle['id'], cycle['id'], 
-                  phase_id, tenant_id, cycle['unit_start'], cycle['unit_end']])
-        else:
-            # Cycle has no range - show all units
-            units = query_db("""
-                SELECT u.*,
-                    u.unit_number,
-                    ? as cycle_number,
-                    ? as cycle_id,
-                    (SELECT i.status FROM inspection i WHERE i.unit_id = u.id AND i.cycle_id = ?) as inspection_status,
-                    (SELECT i.id FROM inspection i WHERE i.unit_id = u.id AND i.cycle_id = ?) as inspection_id,
-                    (SELECT COUNT(*) FROM defect d WHERE d.unit_id = u.id AND d.status = 'open') as open_defects
+                JOIN inspection_cycle ic ON ic.phase_id = u.phase_id AND ic.status = 'active'
+                    AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))
+                WHERE {scope}
+                GROUP BY u.id
+            ),
+            unit_inspection AS (
+                SELECT i.unit_id, i.id, i.status, MAX(ic.cycle_number) AS cycle_number
                 FROM unit u
-                WHERE u.phase_id = ? AND u.tenant_id = ?
-                ORDER BY u.block, u.floor, u.unit_number
-            """, [cycle['cycle_number'], cycle['id'], cycle['id'], cycle['id'], phase_id, tenant_id])
-    elif active_cycles:
-        # No filter - show all units in any active cycle with their cycle info
-        # Build a union of units across all active cycles
-        units = query_db("""
-            SELECT DISTINCT u.*,
-                u.unit_number,
-                (SELECT ic.cycle_number FROM inspection_cycle ic 
-                 WHERE ic.phase_id = u.phase_id AND ic.status = 'active'
-                 AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))
-                 ORDER BY ic.cycle_number DESC LIMIT 1) as cycle_number,
-                (SELECT ic.id FROM inspection_cycle ic 
-                 WHERE ic.phase_id = u.phase_id AND ic.status = 'active'
-                 AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))
-                 ORDER BY ic.cycle_number DESC LIMIT 1) as cycle_id,
-                (SELECT i.status FROM inspection i 
-                 JOIN inspection_cycle ic ON i.cycle_id = ic.id
-                 WHERE i.unit_id = u.id AND ic.status = 'active'
-                 ORDER BY ic.cycle_number DESC LIMIT 1) as inspection_status,
-                (SELECT i.id FROM inspection i 
-                 JOIN inspection_cycle ic ON i.cycle_id = ic.id
-                 WHERE i.unit_id = u.id AND ic.status = 'active'
-                 ORDER BY ic.cycle_number DESC LIMIT 1) as inspection_id,
-                (SELECT COUNT(*) FROM defect d WHERE d.unit_id = u.id AND d.status = 'open') as open_defects
-            FROM unit u
-            WHERE u.phase_id = ? AND u.tenant_id = ?
-            AND EXISTS (
-                SELECT 1 FROM inspection_cycle ic 
-                WHERE ic.phase_id = u.phase_id AND ic.status = 'active'
-                AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))
+                CROSS JOIN inspection i ON i.unit_id = u.id
+                JOIN inspection_cycle ic ON ic.id = i.cycle_id AND ic.status = 'active'
+                WHERE {scope}
+                GROUP BY i.unit_id
             )
-            ORDER BY u.block, u.floor, u.unit_number
-        """, [phase_id, tenant_id])
-    else:
-        # No active cycles - show all units
-        units = query_db("""
             SELECT u.*,
-                u.unit_number,
-                NULL as cycle_number,
-                NULL as cycle_id,
-                NULL as inspection_status,
-                NULL as inspection_id,
-                (SELECT COUNT(*) FROM defect d WHERE d.unit_id = u.id AND d.status = 'open') as open_defects
+                uc.cycle_number,
+                uc.cycle_id,
+                ui.status as inspection_status,
+                ui.id as inspection_id,
+                COALESCE(od.open_defects, 0) as open_defects
             FROM unit u
-            WHERE u.phase_id = ? AND u.tenant_id = ?
-            ORDER BY u.block, u.floor, u.unit_number
-        """, [phase_id, tenant_id])
+            JOIN unit_cycle uc ON uc.unit_id = u.id
+            LEFT JOIN unit_inspection ui ON ui.unit_id = u.id
+        """.format(scope=scope) + open_defects_sql
+        return sql, scope_args * 4
     
-    # Stats
-    stats = {
-        'total': len(units),
-        'certified': sum(1 for u in units if u['status'] == 'certified'),
-        'cleared': sum(1 for u in units if u['status'] == 'cleared'),
-        'open_defects': sum(u['open_defects'] or 0 for u in units)
-    }
-    
-    return render_template('projects/phase.html', project=project, phase=phase, units=units, 
-                          active_cycles=active_cycles, cycle_filter=cycle_filter, stats=stats)
+    # No active cycles - show all units
+    sql = """
+        SELECT u.*,
+            NULL as cycle_number,
+            NULL as cycle_id,
+            NULL as inspection_status,
+            NULL as inspection_id,
+            COALESCE(od.open_defects, 0) as open_defects
+        FROM unit u
+    """ + open_defects_sql
+    return sql, scope_args * 2
 
 
 @projects_bp.route('/unit/<unit_id>')
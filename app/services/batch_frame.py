@@ -0,0 +1,212 @@
+"""
+Batch frame - one extract of a batch, grouped in memory for the batch report and site briefing.
+
+_build_batch_report_data and _build_briefing_data used to issue one grouped
+query per section, per zone and per unit (area, trade, deep dive, recurring,
+rectification, unit splits...), each re-joining defect to the templates and
+re-checking the batch roster. BatchFrame loads the batch twice instead:
+
+    roster   one row per (unit, cycle) on the batch: zone (inspection_cycle),
+             previous-round cycle, real unit fields, inspection status
+    defects  every defect of the tenant on the batch's units, with its unit,
+             area / trade / item template fields and the status of the
+             inspection that raised it
+
+and each section is a filter + count over those columns. count_by() orders
+groups like GROUP BY ... ORDER BY count DESC, keys - ties in ascending key
+order - so the builders return exactly what the per-section queries returned.
+
+Per-section build times are kept in-process (get_batch_frame_stats()).
+
+Usage:
+    from app.services.batch_frame import BatchFrame, timed
+
+    with timed('batch_report', 'extract'):
+        frame = BatchFrame(tenant_id, batch_id)
+    d = frame.defects
+    rows = d.select(status='open', raised_cycle_id=cycle_ids, has_area=1)
+    d.count_by(rows, 'area')                      # [('KITCHEN', 41), ('BATHROOM', 17), ...]
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from app.services.db import query_db
+
+ROSTER_SQL = """
+    SELECT DISTINCT bu.unit_id, bu.cycle_id,
+           ic.id IS NOT NULL AS has_cycle, ic.block AS cycle_block, ic.floor AS cycle_floor, ic.cycle_number,
+           (SELECT p.id FROM inspection_cycle p
+            WHERE p.block = ic.block AND p.floor = ic.floor
+            AND p.cycle_number = ic.cycle_number - 1 AND p.tenant_id = ?) AS prev_cycle_id,
+           u.id IS NOT NULL AS real_unit, u.unit_number, u.block, u.floor,
+           i.status AS insp_status
+    FROM batch_unit bu
+    LEFT JOIN inspection_cycle ic ON ic.id = bu.cycle_id
+    LEFT JOIN unit_real u ON u.id = bu.unit_id
+    LEFT JOIN inspection i ON i.unit_id = bu.unit_id AND i.cycle_id = bu.cycle_id
+    WHERE bu.batch_id = ? AND bu.removed_at IS NULL AND bu.tenant_id = ?
+"""
+ROSTER_COLUMNS = ('unit_id', 'cycle_id', 'has_cycle', 'cycle_block', 'cycle_floor', 'cycle_number',
+                  'prev_cycle_id', 'real_unit', 'unit_number', 'block', 'floor', 'insp_status')
+
+DEFECTS_SQL = """
+    SELECT d.unit_id, d.raised_cycle_id, d.raised_cycle_number, d.cleared_cycle_id, d.status,
+           d.original_comment,
+           u.id IS NOT NULL AS real_unit, u.unit_number, u.block, u.floor,
+           ct.id IS NOT NULL AS has_trade, ct.category_name AS trade, ct.category_order,
+           at2.id IS NOT NULL AS has_area, at2.area_name AS area, at2.area_order,
+           it.item_description AS item,
+           i2.status AS raised_status
+    FROM defect d
+    LEFT JOIN unit_real u ON u.id = d.unit_id
+    LEFT JOIN item_template it ON it.id = d.item_template_id
+    LEFT JOIN category_template ct ON ct.id = it.category_id
+    LEFT JOIN area_template at2 ON at2.id = ct.area_id
+    LEFT JOIN inspection i2 ON i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id
+    WHERE d.tenant_id = ?
+    AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?)
+"""
+DEFECT_COLUMNS = ('unit_id', 'raised_cycle_id', 'raised_cycle_number', 'cleared_cycle_id', 'status',
+                  'original_comment', 'real_unit', 'unit_number', 'block', 'floor',
+                  'has_trade', 'trade', 'category_order', 'has_area', 'area', 'area_order',
+                  'item', 'raised_status')
+
+
+def sql_order(value):
+    """Sort key matching SQLite's ascending order for NULL / numbers / text (NULL first)."""
+    if isinstance(value, tuple):
+        return tuple(sql_order(v) for v in value)
+    return (value is not None, value)
+
+
+def by_count_desc(items, count):
+    """Re-order items (in ascending group key order) like ORDER BY count DESC, keys.
+
+    The sort is stable, so ties keep ascending key order (NULL first) - an
+    explicit tie-break, not whatever order SQLite emitted its groups in.
+    """
+    return sorted(items, key=count, reverse=True)
+
+
+class Frame:
+    """Rows held column-wise; select() returns row indexes, count_by() groups them."""
+
+    def __init__(self, rows, columns):
+        self.columns = {c: [r[c] for r in rows] for c in columns}
+        self.size = len(rows)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def select(self, rows=None, **conditions):
+        """Indexes of rows matching every condition: a value, a collection (IN) or a predicate."""
+        idx = range(self.size) if rows is None else rows
+        for column, want in conditions.items():
+            col = self.columns[column]
+            if callable(want):
+                idx = [i for i in idx if want(col[i])]
+            elif isinstance(want, (set, frozenset, list, tuple)):
+                allowed = set(want)
+                idx = [i for i in idx if col[i] in allowed]
+            else:
+                idx = [i for i in idx if col[i] == want]
+        return list(idx)
+
+    def values(self, rows, column):
+        col = self.columns[column]
+        return [col[i] for i in rows]
+
+    def groups(self, rows, *keys):
+        """{key: [row indexes]} in ascending key order (key is a tuple when several columns)."""
+        cols = [self.columns[k] for k in keys]
+        out = {}
+        for i in rows:
+            key = tuple(c[i] for c in cols) if len(cols) > 1 else cols[0][i]
+            out.setdefault(key, []).append(i)
+        return {k: out[k] for k in sorted(out, key=sql_order)}
+
+    def count_by(self, rows, *keys, distinct=None, limit=None):
+        """[(key, count)] like GROUP BY keys ORDER BY count DESC [LIMIT n].
+
+        distinct counts distinct values of that column instead of rows.
+        """
+        counted = []
+        for key, members in self.groups(rows, *keys).items():
+            if distinct:
+                col = self.columns[distinct]
+                counted.append((key, len({col[i] for i in members if col[i] is not None})))
+            else:
+                counted.append((key, len(members)))
+        counted = by_count_desc(counted, lambda kv: kv[1])
+        return counted[:limit] if limit is not None else counted
+
+
+class BatchFrame:
+    """The roster and defects of one batch (removed units excluded)."""
+
+    def __init__(self, tenant_id, batch_id):
+        self.tenant_id = tenant_id
+        self.batch_id = batch_id
+        self.roster = Frame(query_db(ROSTER_SQL, [tenant_id, batch_id, tenant_id]), ROSTER_COLUMNS)
+        self.defects = Frame(query_db(DEFECTS_SQL, [tenant_id, batch_id, tenant_id]), DEFECT_COLUMNS)
+
+    def zones(self):
+        """[(cycle_block, cycle_floor, cycle_id, cycle_number, prev_cycle_id, units)] per batch cycle."""
+        r = self.roster
+        out = []
+        for (block, floor, cycle_id, number), members in r.groups(
+                r.select(has_cycle=1), 'cycle_block', 'cycle_floor', 'cycle_id', 'cycle_number').items():
+            out.append((block, floor, cycle_id, number, r['prev_cycle_id'][members[0]],
+                        len({r['unit_id'][i] for i in members})))
+        return out
+
+    def open_counts(self, cycle_ids=None, gate=None):
+        """{(unit_id, raised_cycle_id): open defects}, optionally raised in cycle_ids / gated on raise status."""
+        d = self.defects
+        rows = d.select(status='open')
+        if cycle_ids is not None:
+            rows = d.select(rows, raised_cycle_id=cycle_ids)
+        if gate is not None:
+            rows = d.select(rows, raised_status=gate)
+        return dict(d.count_by(rows, 'unit_id', 'raised_cycle_id'))
+
+    def rectification(self, unit_ids, prev_cycle_id, cycle_id):
+        """(raised in the previous round, cleared in this round, raised in this round) over unit_ids."""
+        d = self.defects
+        rows = d.select(unit_id=unit_ids)
+        return (len(d.select(rows, raised_cycle_id=prev_cycle_id)),
+                len(d.select(rows, cleared_cycle_id=cycle_id)),
+                len(d.select(rows, raised_cycle_id=cycle_id)))
+
+
+# --- section timings ------------------------------------------------------
+
+_lock = threading.Lock()
+_stats = {}
+
+
+@contextmanager
+def timed(report, section):
+    """Record the wall time of one report section (ms) in this worker's stats."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        with _lock:
+            s = _stats.setdefault(report, {}).setdefault(
+                section, {'runs': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0})
+            s['runs'] += 1
+            s['total_ms'] += ms
+            s['max_ms'] = max(s['max_ms'], ms)
+            s['last_ms'] = ms
+
+
+def get_batch_frame_stats():
+    """{report: {section: runs, avg/max/last ms}} for this worker."""
+    with _lock:
+        return {report: {section: {'runs': s['runs'], 'avg_ms': round(s['total_ms'] / s['runs'], 2),
+                                   'max_ms': round(s['max_ms'], 2), 'last_ms': round(s['last_ms'], 2)}
+                         for section, s in sections.items()}
+                for report, sections in _stats.items()}
@@ -0,0 +1,144 @@
+"""
+Change log reads - unit-scoped write versions.
+
+change_log rows are appended by SQLite triggers (scripts/migrate_change_log.py)
+on every write that can change a live view of a unit. A "version" is simply
+the highest seq seen for a set of units, so an unchanged set costs one indexed
+MAX() and a changed set can be narrowed to the units that moved.
+
+Writes that are not about one unit (defect library edits) are logged with
+unit_id NULL and read back with tenant_version(tenant_id, source).
+
+All readers return None when the table has not been migrated yet; callers then
+fall back to a full rebuild.
+
+Rows older than CHANGE_LOG_KEEP_DAYS are pruned at startup and hourly from the
+SSE watcher (prune_if_due). The newest row per (tenant, unit, source) is always
+kept, so every version and changes_since() answer is the same after a prune.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from app.services.db import connect, query_db
+
+KEEP_DAYS = int(os.environ.get('CHANGE_LOG_KEEP_DAYS', '14'))
+PRUNE_INTERVAL_S = 3600
+
+_prune_lock = threading.Lock()
+_last_prune = None
+
+
+def _placeholders(values):
+    return ','.join('?' * len(values))
+
+
+def current_version(tenant_id, unit_ids, conn=None):
+    """Highest change_log seq for these units (0 if never written), None if unavailable.
+    conn: read on this connection instead of the request one (SSE streams)."""
+    if not unit_ids:
+        return 0
+    sql = ("SELECT MAX(seq) AS v FROM change_log WHERE tenant_id = ? AND unit_id IN ({})"
+           .format(_placeholders(unit_ids)))
+    args = [tenant_id] + list(unit_ids)
+    try:
+        if conn is not None:
+            row = conn.execute(sql, args).fetchone()
+        else:
+            row = query_db(sql, args, one=True)
+    except sqlite3.OperationalError:
+        return None
+    return (row['v'] or 0) if row else 0
+
+
+def unit_versions(tenant_id, unit_ids):
+    """{unit_id: highest seq} for these units (missing = never written), None if unavailable."""
+    if not unit_ids:
+        return {}
+    try:
+        rows = query_db(
+            "SELECT unit_id, MAX(seq) AS v FROM change_log WHERE tenant_id = ? AND unit_id IN ({}) "
+            "GROUP BY unit_id".format(_placeholders(unit_ids)),
+            [tenant_id] + list(unit_ids))
+    except sqlite3.OperationalError:
+        return None
+    return {r['unit_id']: r['v'] for r in rows}
+
+
+def batch_version(tenant_id, batch_id):
+    """current_version() for every unit ever on a batch (removed rows included)."""
+    try:
+        row = query_db("""
+            SELECT MAX(cl.seq) AS v FROM change_log cl
+            WHERE cl.tenant_id = ? AND cl.unit_id IN (
+                SELECT unit_id FROM batch_unit WHERE batch_id = ? AND tenant_id = ?)
+        """, [tenant_id, batch_id, tenant_id], one=True)
+    except sqlite3.OperationalError:
+        return None
+    return (row['v'] or 0) if row else 0
+
+
+def tenant_version(tenant_id, source=None):
+    """Highest seq of the tenant's unit-less writes (optionally one source table),
+    or of every tenant write when source is None."""
+    try:
+        if source is None:
+            row = query_db("SELECT MAX(seq) AS v FROM change_log WHERE tenant_id = ?",
+                           [tenant_id], one=True)
+        else:
+            row = query_db(
+                "SELECT MAX(seq) AS v FROM change_log "
+                "WHERE unit_id IS NULL AND tenant_id = ? AND source = ?",
+                [tenant_id, source], one=True)
+    except sqlite3.OperationalError:
+        return None
+    return (row['v'] or 0) if row else 0
+
+
+def changes_since(tenant_id, unit_ids, since):
+    """{unit_id: set(source tables)} for units written after seq `since`."""
+    if not unit_ids:
+        return {}
+    rows = query_db(
+        "SELECT DISTINCT unit_id, source FROM change_log "
+        "WHERE tenant_id = ? AND seq > ? AND unit_id IN ({})"
+        .format(_placeholders(unit_ids)),
+        [tenant_id, since] + list(unit_ids))
+    changed = {}
+    for r in rows:
+        changed.setdefault(r['unit_id'], set()).add(r['source'])
+    return changed
+
+
+def prune(conn, days=KEEP_DAYS):
+    """Delete rows older than `days` except the newest per (tenant, unit, source).
+    Commits on conn; returns the number of rows deleted."""
+    cur = conn.execute("""
+        DELETE FROM change_log
+        WHERE created_at < datetime('now', ?)
+          AND seq NOT IN (SELECT MAX(seq) FROM change_log GROUP BY tenant_id, unit_id, source)
+    """, ('-{} days'.format(int(days)),))
+    conn.commit()
+    return cur.rowcount
+
+
+def prune_if_due(db_path=None):
+    """prune() on its own connection, at most once per PRUNE_INTERVAL_S in this process.
+    Returns rows deleted, or None when not due / not migrated."""
+    global _last_prune
+    with _prune_lock:
+        now = time.monotonic()
+        if _last_prune is not None and now - _last_prune < PRUNE_INTERVAL_S:
+            return None
+        _last_prune = now
+    try:
+        conn = connect(db_path)
+    except sqlite3.Error:
+        return None
+    try:
+        return prune(conn)
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
@@ -0,0 +1,84 @@
+"""
+Conditional GET for HTMX polling partials.
+
+@conditional(token_fn) wraps a view. token_fn(**view_args) returns a cheap change
+token - change_log versions plus whatever small rows the partial renders - or
+None when no token can be formed (change_log not migrated, unknown entity). The
+ETag is a hash of the endpoint, the token and the viewer; a matching
+If-None-Match is answered with 304 before the view (the expensive builder) runs.
+
+Tracked responses carry Cache-Control: private, no-cache so the browser keeps
+its copy and revalidates on every poll (no-store would make it drop the copy
+and never send If-None-Match).
+
+Hit rates are counted per endpoint, per worker: get_conditional_stats().
+
+Usage:
+    @batches_bp.route('/<batch_id>/data')
+    @require_team_lead
+    @conditional(_detail_data_token)
+    def detail_data(batch_id): ...
+"""
+import hashlib
+import json
+import threading
+from functools import wraps
+
+from flask import request, session, make_response
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def _count(endpoint, outcome):
+    with _lock:
+        s = _stats.setdefault(endpoint, {'not_modified': 0, 'sent': 0, 'untracked': 0})
+        s[outcome] += 1
+
+
+def _etag(endpoint, token):
+    payload = json.dumps([endpoint, token, session.get('user_id'), session.get('role')],
+                         sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _revalidate(resp, etag):
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    resp.headers.pop('Pragma', None)
+    resp.headers.pop('Expires', None)
+    return resp
+
+
+def conditional(token_fn):
+    """Answer If-None-Match with 304 when token_fn(**view_args) is unchanged."""
+    def decorator(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            endpoint = request.endpoint
+            token = token_fn(**kwargs)
+            if token is None:
+                _count(endpoint, 'untracked')
+                return f(*args, **kwargs)
+            etag = _etag(endpoint, token)
+            if etag in request.if_none_match:
+                _count(endpoint, 'not_modified')
+                return _revalidate(make_response('', 304), etag)
+            resp = make_response(f(*args, **kwargs))
+            if resp.status_code != 200:
+                _count(endpoint, 'untracked')
+                return resp
+            _count(endpoint, 'sent')
+            return _revalidate(resp, etag)
+        return wrapped
+    return decorator
+
+
+def get_conditional_stats():
+    """Per-endpoint counters for this worker, with 304 hit rate of tracked requests."""
+    with _lock:
+        out = {}
+        for endpoint, s in _stats.items():
+            tracked = s['not_modified'] + s['sent']
+            out[endpoint] = dict(s, hit_rate=round(s['not_modified'] / tracked, 3) if tracked else None)
+        return out
@@ -1,20 +1,54 @@
 """
 Database connection manager for Inspections PWA.
 SQLite with connection pooling per request.
+
+The database location is resolved in one place, database_path(): the app's
+DATABASE_PATH config inside Flask, else the DATABASE_PATH environment variable,
+else DEFAULT_DATABASE_PATH - the same relative data/inspections.db create_app()
+falls back to, so a local run needs no environment. Deploys set DATABASE_PATH
+(render.yaml: /var/data/inspections.db). Route code uses get_db() / query_db(); CLI scripts,
+diagnostics and background threads use connect(), which opens a connection
+configured the same way (sqlite3.Row rows, foreign keys on).
+
+Usage (scripts):
+    from app.services.db import connect
+
+    conn = connect()                  # $DATABASE_PATH or data/inspections.db
+    conn = connect(readonly=True)     # mode=ro: diagnostics cannot write
 """
 import sqlite3
 import os
-from flask import g, current_app
+from urllib.request import pathname2url
+
+from flask import g, current_app, has_app_context
+
+DEFAULT_DATABASE_PATH = 'data/inspections.db'  # create_app()'s default: keep the two in step
+
+
+def database_path():
+    """Path of the inspections database for the current context (app config, env, default)."""
+    if has_app_context():
+        return current_app.config['DATABASE_PATH']
+    return os.environ.get('DATABASE_PATH', DEFAULT_DATABASE_PATH)
+
+
+def connect(db_path=None, readonly=False):
+    """Open a new connection configured like the request one. Caller closes it."""
+    db_path = db_path or database_path()
+    if readonly:
+        conn = sqlite3.connect('file:{}?mode=ro'.format(pathname2url(os.path.abspath(db_path))), uri=True)
+    else:
+        conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    # Enable foreign keys
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
 
 
 def get_db():
     """Get database connection for current request."""
     if 'db' not in g:
-        db_path = current_app.config['DATABASE_PATH']
-        g.db = sqlite3.connect(db_path)
-        g.db.row_factory = sqlite3.Row
-        # Enable foreign keys
-        g.db.execute("PRAGMA foreign_keys = ON")
+        g.db = connect(current_app.config['DATABASE_PATH'])
     return g.db
 
 
@@ -0,0 +1,363 @@
+"""
+Defect cohorts - the shared predicates, dimensions and measures of the
+current-state analytics pages, compiled to one query per page.
+
+Reports used to hand-copy the same fragments (real units, test cycles, the
+reviewed-inspection gate, the template join chain, the batch label) into every
+breakdown query. Here they are named once:
+
+    cohort      which defects count: open on a real unit, raised by a
+                reviewed inspection (GATE_STATUSES, no time bound - the as-of
+                counts live in defect_facts)
+    filters     block / floor / unit / area / trade / round / batch
+    dimensions  what a breakdown groups by (DIMENSIONS)
+    measures    what it counts (MEASURES)
+
+breakdowns() builds one `scope` CTE of the filtered defect rows with only the
+joins the requested dimensions need, then answers every grouping from it in a
+single UNION ALL, so a page with a summary, a location list and a defect list
+costs one query instead of three and all three agree by construction.
+
+Explore-shaped requests (real units, full template chain, dimensions and
+filters within block / floor / unit / area / trade / round) read the
+defect_rollup cube instead: open defect counts per unit x area x trade x round,
+a few rows per unit. Triggers on defect, inspection and unit re-aggregate the
+touched units on every write (install); rebuild() repopulates it after template
+moves. Without the table the scope query runs as before.
+
+Install/rebuild:  python3 scripts/rebuild_defect_rollup.py
+
+Usage:
+    from app.services.defect_cohorts import breakdown, breakdowns
+
+    out = breakdowns(tenant_id, {
+        'summary': breakdown(measures=('defects', 'units')),
+        'areas': breakdown('area', measures=('defects', 'units')),
+        'top': breakdown('comment', limit=10),
+    }, filters={'block': 'Block 5'})
+    out['summary'][0]['defects'], out['areas'][0]['area'], ...
+"""
+import sqlite3
+
+from app.services.db import query_db
+from app.services.defect_facts import GATE_STATUSES
+
+GATE_SQL = ', '.join("'{}'".format(s) for s in GATE_STATUSES)
+
+# Named predicates for hand-written queries (alias d = defect, u = unit/unit_real).
+REAL_UNIT = "u.unit_number NOT LIKE 'TEST%'"
+REAL_CYCLE = "d.raised_cycle_id NOT LIKE 'test-%'"
+REVIEWED_GATE = ("EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+                 "AND i2.cycle_id = d.raised_cycle_id AND i2.status IN ({}))".format(GATE_SQL))
+
+# SQL fragment for batch label (used in GROUP BY queries; alias ic = inspection_cycle)
+BATCH_LABEL_SQL = ("(ic.block || ' ' || CASE ic.floor "
+                   "WHEN 0 THEN 'Ground' WHEN 1 THEN '1st Floor' "
+                   "WHEN 2 THEN '2nd Floor' WHEN 3 THEN '3rd Floor' "
+                   "ELSE 'Floor ' || ic.floor END)")
+
+# Joins in dependency order; a dimension pulls in its join and everything it names.
+JOINS = {
+    'unit': "JOIN unit_real u ON d.unit_id = u.id",
+    'trade': ("LEFT JOIN item_template it ON d.item_template_id = it.id "
+              "LEFT JOIN category_template ct ON it.category_id = ct.id"),
+    'area': "LEFT JOIN area_template at2 ON ct.area_id = at2.id",
+    'cycle': "LEFT JOIN inspection_cycle ic ON ic.id = d.raised_cycle_id",
+    'inspector': ("LEFT JOIN inspection ri ON ri.unit_id = d.unit_id "
+                  "AND ri.cycle_id = d.raised_cycle_id AND ri.tenant_id = d.tenant_id"),
+}
+JOIN_DEPENDS = {'area': ('trade',)}
+
+# name -> (scope expression, join or None). Template dims are LEFT joined and
+# a breakdown on them skips NULLs, so defects off the template tree still count
+# everywhere else.
+DIMENSIONS = {
+    'block': ('u.block', 'unit'),
+    'floor': ('u.floor', 'unit'),
+    'unit': ('u.unit_number', 'unit'),
+    'unit_id': ('d.unit_id', None),
+    'area': ('at2.area_name', 'area'),
+    'trade': ('ct.category_name', 'trade'),
+    'comment': ('d.original_comment', None),
+    'round': ('d.raised_cycle_number', None),
+    'cycle': ('d.raised_cycle_id', None),
+    'batch': (BATCH_LABEL_SQL, 'cycle'),
+    'inspector': ('ri.inspector_name', 'inspector'),
+}
+NULLABLE = ('area', 'trade', 'batch', 'inspector')
+
+# name -> aggregate over scope (needs the named dimension in scope, if any).
+MEASURES = {
+    'defects': ('COUNT(DISTINCT s.defect_id)', None),
+    'units': ('COUNT(DISTINCT s.unit_id)', None),
+    'blocks': ('COUNT(DISTINCT s.block)', 'block'),
+    'floors': ('COUNT(DISTINCT s.block || \'/\' || s.floor)', 'floor'),
+}
+
+# filter name -> (dimension, SQL template with one ?)
+FILTERS = {
+    'block': ('block', 'u.block = ?'),
+    'floor': ('floor', 'u.floor = ?'),
+    'unit': ('unit', 'u.unit_number = ?'),
+    'area': ('area', 'at2.area_name = ?'),
+    'trade': ('trade', 'ct.category_name = ?'),
+    'round': ('round', 'd.raised_cycle_number = ?'),
+    # Units on the batch roster, defects raised in the batch's cycles.
+    'batch': (None, "d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? "
+                    "AND removed_at IS NULL AND tenant_id = d.tenant_id) "
+                    "AND d.raised_cycle_id IN (SELECT bu.cycle_id FROM batch_unit bu "
+                    "JOIN inspection_cycle bic ON bic.id = bu.cycle_id "
+                    "WHERE bu.batch_id = ? AND bu.removed_at IS NULL AND bu.tenant_id = d.tenant_id)"),
+}
+
+
+def breakdown(*by, measures=('defects',), where=None, min_units=None, limit=None):
+    """One grouping for breakdowns(): group by dimension names, count measures.
+
+    Rows come back ordered by the first measure descending (then the keys).
+    where={dim: value} narrows this grouping only; min_units keeps groups seen
+    on at least that many units.
+    """
+    return {'by': tuple(by), 'measures': tuple(measures), 'where': dict(where or {}),
+            'min_units': min_units, 'limit': limit}
+
+
+# --- defect_rollup ---------------------------------------------------------
+
+# cohort dimension -> rollup column
+ROLLUP_COLUMNS = {
+    'unit_id': 'unit_id',
+    'block': 'block',
+    'floor': 'floor',
+    'unit': 'unit_number',
+    'area': 'area_name',
+    'trade': 'category_name',
+    'round': 'raised_cycle_number',
+}
+ROLLUP_MEASURES = dict(MEASURES, defects=('COALESCE(SUM(s.defects), 0)', None))
+
+# Open defect counts of the explore cohort per unit x area x trade x round.
+# {where} narrows it to the units a trigger refreshes.
+ROLLUP_SELECT = """
+    SELECT d.tenant_id, d.unit_id, u.block, u.floor, u.unit_number, at2.area_name,
+           ct.category_name, d.raised_cycle_number, COUNT(*) AS defects
+    FROM defect d
+    JOIN unit_real u ON d.unit_id = u.id
+    JOIN item_template it ON d.item_template_id = it.id
+    JOIN category_template ct ON it.category_id = ct.id
+    JOIN area_template at2 ON ct.area_id = at2.id
+    WHERE d.status = 'open' AND {real_unit} AND {gate} AND {{where}}
+    GROUP BY d.tenant_id, d.unit_id, u.block, u.floor, u.unit_number, at2.area_name,
+             ct.category_name, d.raised_cycle_number
+""".format(real_unit=REAL_UNIT, gate=REVIEWED_GATE)
+ROLLUP_INSERT = ("INSERT INTO defect_rollup (tenant_id, unit_id, block, floor, unit_number, area_name, "
+                 "category_name, raised_cycle_number, defects) ")
+
+# (trigger name, table, event, WHEN clause or None, units to refresh)
+_ROLLUP_TRIGGERS = [
+    ('trg_dr_defect_ins', 'defect', 'INSERT', None, ('NEW.unit_id',)),
+    ('trg_dr_defect_upd', 'defect', 'UPDATE',
+     'OLD.status IS NOT NEW.status OR OLD.unit_id IS NOT NEW.unit_id '
+     'OR OLD.item_template_id IS NOT NEW.item_template_id OR OLD.raised_cycle_id IS NOT NEW.raised_cycle_id '
+     'OR OLD.raised_cycle_number IS NOT NEW.raised_cycle_number OR OLD.tenant_id IS NOT NEW.tenant_id',
+     ('OLD.unit_id', 'NEW.unit_id')),
+    ('trg_dr_defect_del', 'defect', 'DELETE', None, ('OLD.unit_id',)),
+    ('trg_dr_inspection_ins', 'inspection', 'INSERT', None, ('NEW.unit_id',)),
+    ('trg_dr_inspection_upd', 'inspection', 'UPDATE',
+     'OLD.status IS NOT NEW.status OR OLD.unit_id IS NOT NEW.unit_id OR OLD.cycle_id IS NOT NEW.cycle_id',
+     ('OLD.unit_id', 'NEW.unit_id')),
+    ('trg_dr_inspection_del', 'inspection', 'DELETE', None, ('OLD.unit_id',)),
+    ('trg_dr_unit_upd', 'unit', 'UPDATE',
+     'OLD.block IS NOT NEW.block OR OLD.floor IS NOT NEW.floor '
+     'OR OLD.unit_number IS NOT NEW.unit_number OR OLD.id IS NOT NEW.id',
+     ('OLD.id', 'NEW.id')),
+    ('trg_dr_unit_del', 'unit', 'DELETE', None, ('OLD.id',)),
+]
+
+
+def install(conn):
+    """Create defect_rollup, its indexes and maintenance triggers. Idempotent; caller commits."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS defect_rollup (
+            tenant_id TEXT NOT NULL,
+            unit_id TEXT NOT NULL,
+            block TEXT,
+            floor INTEGER,
+            unit_number TEXT,
+            area_name TEXT,
+            category_name TEXT,
+            raised_cycle_number INTEGER,
+            defects INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_defect_rollup_zone
+                    ON defect_rollup(tenant_id, block, floor)""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_defect_rollup_unit ON defect_rollup(unit_id)")
+    for name, table, event, when, units in _ROLLUP_TRIGGERS:
+        unit_list = ', '.join(units)
+        conn.execute('DROP TRIGGER IF EXISTS {}'.format(name))
+        conn.execute("""
+            CREATE TRIGGER {name} AFTER {event} ON {table}
+            {when}
+            BEGIN
+                DELETE FROM defect_rollup WHERE unit_id IN ({units});
+                {insert} {select};
+            END
+        """.format(name=name, event=event, table=table, units=unit_list, insert=ROLLUP_INSERT,
+                   select=ROLLUP_SELECT.format(where='d.unit_id IN ({})'.format(unit_list)),
+                   when='FOR EACH ROW WHEN ' + when if when else ''))
+
+
+def rebuild(conn, tenant_id=None):
+    """Repopulate defect_rollup (one tenant or all). Returns rows written; caller commits."""
+    if tenant_id:
+        conn.execute("DELETE FROM defect_rollup WHERE tenant_id = ?", [tenant_id])
+        cur = conn.execute(ROLLUP_INSERT + ROLLUP_SELECT.format(where='d.tenant_id = ?'), [tenant_id])
+    else:
+        conn.execute("DELETE FROM defect_rollup")
+        cur = conn.execute(ROLLUP_INSERT + ROLLUP_SELECT.format(where='1'))
+    return cur.rowcount
+
+
+# --- compiler ---------------------------------------------------------------
+
+def _needed_joins(dims):
+    joins = set()
+    for dim in dims:
+        join = DIMENSIONS[dim][1]
+        if join:
+            joins.add(join)
+            joins.update(JOIN_DEPENDS.get(join, ()))
+    return [name for name in JOINS if name in joins]
+
+
+def _clean_filters(filters):
+    filters = {k: v for k, v in (filters or {}).items() if v is not None and v != ''}
+    unknown = set(filters) - set(FILTERS)
+    if unknown:
+        raise ValueError('unknown defect cohort filter: {}'.format(sorted(unknown)))
+    return filters
+
+
+def _grouping_dims(groupings):
+    dims = set()
+    for spec in groupings.values():
+        dims.update(spec['by'])
+        dims.update(spec['where'])
+        dims.update(MEASURES[m][1] for m in spec['measures'] if MEASURES[m][1])
+        if spec['min_units']:
+            dims.add('unit_id')
+    return dims
+
+
+def _union(scope, groupings, measures, params):
+    """'WITH scope AS (...)' plus one UNION ALL branch per grouping (g, k0.., m0..)."""
+    width_k = max([len(s['by']) for s in groupings.values()] + [1])
+    width_m = max(len(s['measures']) for s in groupings.values())
+    branches = []
+    for g, spec in enumerate(groupings.values()):
+        keys = ['s.' + d for d in spec['by']] + ['NULL'] * (width_k - len(spec['by']))
+        aggs = [measures[m][0] for m in spec['measures']] + ['NULL'] * (width_m - len(spec['measures']))
+        conds = ['s.{} IS NOT NULL'.format(d) for d in spec['by'] if d in NULLABLE]
+        for dim, value in spec['where'].items():
+            conds.append('s.{} = ?'.format(dim))
+            params.append(value)
+        sql = "SELECT {} AS g, {}, {} FROM scope s{}".format(
+            g, ', '.join('{} AS k{}'.format(k, i) for i, k in enumerate(keys)),
+            ', '.join('{} AS m{}'.format(a, i) for i, a in enumerate(aggs)),
+            ' WHERE ' + ' AND '.join(conds) if conds else '')
+        if spec['by']:
+            sql += ' GROUP BY ' + ', '.join('s.' + d for d in spec['by'])
+        if spec['min_units']:
+            sql += ' HAVING COUNT(DISTINCT s.unit_id) >= {:d}'.format(spec['min_units'])
+        branches.append(sql)
+    return 'WITH scope AS ({}) {}'.format(scope, ' UNION ALL '.join(branches)), params
+
+
+def compile_breakdowns(tenant_id, groupings, filters=None, real_units=True, require=()):
+    """(sql, params) answering every grouping from one scope CTE over defect.
+
+    real_units joins unit_real (and REAL_UNIT) into the cohort; batch pages
+    count every rostered unit. require=('area',) keeps only defects that
+    resolve to that dimension (an inner join in the old queries).
+    """
+    filters = _clean_filters(filters)
+    dims = set(require) | _grouping_dims(groupings)
+    dims.update(FILTERS[f][0] for f in filters if FILTERS[f][0])
+    if real_units:
+        dims.add('unit')
+    unknown = dims - set(DIMENSIONS)
+    if unknown:
+        raise ValueError('unknown defect cohort dimension: {}'.format(sorted(unknown)))
+
+    where = ["d.tenant_id = ?", "d.status = 'open'", REVIEWED_GATE]
+    params = [tenant_id]
+    if real_units:
+        where.append(REAL_UNIT)
+    for dim in require:
+        where.append('{} IS NOT NULL'.format(DIMENSIONS[dim][0]))
+    for name, value in filters.items():
+        clause = FILTERS[name][1]
+        where.append(clause)
+        params.extend([value] * clause.count('?'))
+
+    scope_dims = sorted(d for d in dims if d != 'unit_id')
+    scope = "SELECT d.id AS defect_id, d.unit_id{} FROM defect d {} WHERE {}".format(
+        ''.join(', {} AS {}'.format(DIMENSIONS[d][0], d) for d in scope_dims),
+        ' '.join(JOINS[j] for j in _needed_joins(dims)),
+        ' AND '.join(where))
+    return _union(scope, groupings, MEASURES, params)
+
+
+def compile_rollup(tenant_id, groupings, filters=None, real_units=True, require=()):
+    """(sql, params) for the same groupings over defect_rollup, or None if the cube can't answer.
+
+    The cube holds the explore cohort only: real units, full template chain.
+    """
+    filters = _clean_filters(filters)
+    dims = _grouping_dims(groupings) | set(filters)
+    if not real_units or set(require) - {'area', 'trade'} or 'area' not in require \
+            or dims - set(ROLLUP_COLUMNS):
+        return None
+    where = ['tenant_id = ?']
+    params = [tenant_id]
+    for name, value in filters.items():
+        where.append('{} = ?'.format(ROLLUP_COLUMNS[name]))
+        params.append(value)
+    scope = "SELECT {}, defects FROM defect_rollup WHERE {}".format(
+        ', '.join('{} AS {}'.format(col, dim) for dim, col in ROLLUP_COLUMNS.items()),
+        ' AND '.join(where))
+    return _union(scope, groupings, ROLLUP_MEASURES, params)
+
+
+def breakdowns(tenant_id, groupings, filters=None, real_units=True, require=()):
+    """{name: [row dict, ...]} for every grouping, from one query (see compile_breakdowns).
+
+    Reads defect_rollup when it can answer (compile_rollup), else the defect rows.
+    """
+    rows = None
+    compiled = compile_rollup(tenant_id, groupings, filters, real_units, require)
+    if compiled:
+        try:
+            rows = query_db(*compiled)
+        except sqlite3.OperationalError as e:
+            if 'defect_rollup' not in str(e):
+                raise
+    if rows is None:
+        rows = query_db(*compile_breakdowns(tenant_id, groupings, filters, real_units, require))
+    names = list(groupings)
+    out = {name: [] for name in names}
+    for r in rows:
+        spec = groupings[names[r['g']]]
+        row = {d: r['k{}'.format(i)] for i, d in enumerate(spec['by'])}
+        row.update((m, r['m{}'.format(i)]) for i, m in enumerate(spec['measures']))
+        out[names[r['g']]].append(row)
+    for name, spec in groupings.items():
+        rows = out[name]
+        if spec['by']:
+            first = spec['measures'][0]
+            rows.sort(key=lambda row: tuple(str(row[d]) for d in spec['by']))
+            rows.sort(key=lambda row: -(row[first] or 0))
+        if spec['limit']:
+            del rows[spec['limit']:]
+    return out
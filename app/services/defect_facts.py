@@ -0,0 +1,211 @@
+"""
+Defect lifecycle fact table.
+
+Reports answer "how many defects were raised / cleared / open as of time T"
+under the review gate: a defect only counts once the inspection that raised it
+has been reviewed (status reviewed or later, review_submitted_at <= gate).
+defect_fact holds one row per countable defect (real unit, non-test cycle) with
+that gate precomputed as visible_from, so every as-of or between-two-dates
+count is one indexed range query:
+
+    visible_from <= gate AND created_at <= T AND (status = 'open' OR cleared_at > T)
+
+Rows carry the unit/block/floor/area/trade dims for grouped counts. Triggers on
+defect, inspection and unit keep the table in step (install); rebuild() repopulates
+it from scratch after template moves or bulk imports. Without the table the same
+rows are derived inline, exactly as before.
+
+Install/rebuild:  python3 scripts/rebuild_defect_facts.py
+
+Usage:
+    from app.services.defect_facts import count_open, count_raised, query_facts
+
+    open_by_zone = count_open(tenant_id, snapshot_str, snapshot_str, by=('block', 'floor'))
+    series = trend_series(tenant_id, snapshot_str, ['2026-01-05 08:00:00', snapshot_str])
+    rows = query_facts("SELECT f.trade, d.original_comment FROM {facts} f "
+                       "JOIN defect d ON d.id = f.defect_id WHERE ...", args)
+"""
+import sqlite3
+from bisect import bisect_right
+
+from app.services.db import query_db
+
+# Inspection statuses that put a raised defect on the record.
+GATE_STATUSES = ('reviewed', 'approved', 'certified', 'pending_followup')
+
+DIMENSIONS = ('unit_id', 'block', 'floor', 'area_name', 'trade')
+
+FACT_COLUMNS = ('defect_id, tenant_id, unit_id, block, floor, area_name, trade, '
+                'raised_cycle_id, raised_cycle_number, status, created_at, cleared_at, visible_from')
+
+# One fact row per countable defect. {where} narrows it for trigger refreshes.
+FACT_SELECT = """
+    SELECT d.id AS defect_id, d.tenant_id, d.unit_id, u.block, u.floor,
+           at2.area_name, ct.category_name AS trade,
+           d.raised_cycle_id, d.raised_cycle_number, d.status, d.created_at, d.cleared_at,
+           (SELECT MIN(i2.review_submitted_at) FROM inspection i2
+            WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id
+            AND i2.status IN ({gate})) AS visible_from
+    FROM defect d
+    JOIN unit_real u ON d.unit_id = u.id
+    LEFT JOIN item_template it ON d.item_template_id = it.id
+    LEFT JOIN category_template ct ON it.category_id = ct.id
+    LEFT JOIN area_template at2 ON ct.area_id = at2.id
+    WHERE d.raised_cycle_id NOT LIKE 'test-%' AND {{where}}
+""".format(gate=', '.join("'{}'".format(s) for s in GATE_STATUSES))
+
+OPEN_AS_OF = "f.created_at <= ? AND (f.status = 'open' OR (f.status = 'cleared' AND f.cleared_at > ?))"
+
+# (trigger name, table, event, WHEN clause or None, fact filter, defect filter)
+_REFRESH_TRIGGERS = [
+    ('trg_df_defect_ins', 'defect', 'INSERT', None,
+     'defect_id = NEW.id', 'd.id = NEW.id'),
+    ('trg_df_defect_upd', 'defect', 'UPDATE', None,
+     'defect_id IN (OLD.id, NEW.id)', 'd.id = NEW.id'),
+    ('trg_df_defect_del', 'defect', 'DELETE', None,
+     'defect_id = OLD.id', None),
+    ('trg_df_inspection_ins', 'inspection', 'INSERT', None,
+     'unit_id = NEW.unit_id AND raised_cycle_id = NEW.cycle_id',
+     'd.unit_id = NEW.unit_id AND d.raised_cycle_id = NEW.cycle_id'),
+    ('trg_df_inspection_upd', 'inspection', 'UPDATE',
+     'OLD.status IS NOT NEW.status OR OLD.review_submitted_at IS NOT NEW.review_submitted_at '
+     'OR OLD.unit_id IS NOT NEW.unit_id OR OLD.cycle_id IS NOT NEW.cycle_id',
+     'unit_id IN (OLD.unit_id, NEW.unit_id) AND raised_cycle_id IN (OLD.cycle_id, NEW.cycle_id)',
+     'd.unit_id IN (OLD.unit_id, NEW.unit_id) AND d.raised_cycle_id IN (OLD.cycle_id, NEW.cycle_id)'),
+    ('trg_df_inspection_del', 'inspection', 'DELETE', None,
+     'unit_id = OLD.unit_id AND raised_cycle_id = OLD.cycle_id',
+     'd.unit_id = OLD.unit_id AND d.raised_cycle_id = OLD.cycle_id'),
+    ('trg_df_unit_upd', 'unit', 'UPDATE',
+     'OLD.block IS NOT NEW.block OR OLD.floor IS NOT NEW.floor '
+     'OR OLD.unit_number IS NOT NEW.unit_number OR OLD.id IS NOT NEW.id',
+     'unit_id IN (OLD.id, NEW.id)', 'd.unit_id = NEW.id'),
+    ('trg_df_unit_del', 'unit', 'DELETE', None,
+     'unit_id = OLD.id', None),
+]
+
+
+def install(conn):
+    """Create defect_fact, its indexes and maintenance triggers. Idempotent; caller commits."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS defect_fact (
+            defect_id TEXT PRIMARY KEY,
+            tenant_id TEXT NOT NULL,
+            unit_id TEXT NOT NULL,
+            block TEXT,
+            floor INTEGER,
+            area_name TEXT,
+            trade TEXT,
+            raised_cycle_id TEXT,
+            raised_cycle_number INTEGER,
+            status TEXT,
+            created_at TIMESTAMP,
+            cleared_at TIMESTAMP,
+            visible_from TIMESTAMP
+        )
+    """)
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_defect_fact_created
+                    ON defect_fact(tenant_id, created_at, visible_from, status, cleared_at)""")
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_defect_fact_cleared
+                    ON defect_fact(tenant_id, cleared_at, visible_from)""")
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_defect_fact_unit
+                    ON defect_fact(unit_id, raised_cycle_id)""")
+    for name, table, event, when, fact_filter, defect_filter in _REFRESH_TRIGGERS:
+        body = 'DELETE FROM defect_fact WHERE {};'.format(fact_filter)
+        if defect_filter:
+            body += '\nINSERT INTO defect_fact ({}) {};'.format(
+                FACT_COLUMNS, FACT_SELECT.format(where=defect_filter))
+        conn.execute('DROP TRIGGER IF EXISTS {}'.format(name))
+        conn.execute("""
+            CREATE TRIGGER {name} AFTER {event} ON {table}
+            {when}
+            BEGIN
+                {body}
+            END
+        """.format(name=name, event=event, table=table, body=body,
+                   when='FOR EACH ROW WHEN ' + when if when else ''))
+
+
+def rebuild(conn, tenant_id=None):
+    """Repopulate defect_fact (one tenant or all). Returns rows written; caller commits."""
+    if tenant_id:
+        conn.execute("DELETE FROM defect_fact WHERE tenant_id = ?", [tenant_id])
+        cur = conn.execute("INSERT INTO defect_fact ({}) {}".format(
+            FACT_COLUMNS, FACT_SELECT.format(where='d.tenant_id = ?')), [tenant_id])
+    else:
+        conn.execute("DELETE FROM defect_fact")
+        cur = conn.execute("INSERT INTO defect_fact ({}) {}".format(
+            FACT_COLUMNS, FACT_SELECT.format(where='1')))
+    return cur.rowcount
+
+
+def query_facts(sql, args=(), one=False):
+    """query_db for SQL reading `{facts} f`; derives the rows inline if the table is missing."""
+    try:
+        return query_db(sql.format(facts='defect_fact'), args, one=one)
+    except sqlite3.OperationalError as e:
+        if 'defect_fact' not in str(e):
+            raise
+    derived = '({})'.format(FACT_SELECT.format(where='1'))
+    return query_db(sql.format(facts=derived), args, one=one)
+
+
+def _count(tenant_id, gate, where, args, by):
+    """COUNT(*) of visible facts matching where, optionally grouped by dims."""
+    if not by:
+        row = query_facts(
+            "SELECT COUNT(*) AS c FROM {facts} f "
+            "WHERE f.tenant_id = ? AND f.visible_from <= ? AND " + where,
+            [tenant_id, gate] + list(args), one=True)
+        return row['c'] if row else 0
+    dims = (by,) if isinstance(by, str) else tuple(by)
+    if any(dim not in DIMENSIONS for dim in dims):
+        raise ValueError('unknown defect_fact dimension: {}'.format(dims))
+    # area/trade mirror the inner template joins of the original reports.
+    not_null = ''.join(' AND f.{} IS NOT NULL'.format(dim) for dim in dims
+                       if dim in ('area_name', 'trade'))
+    cols = ', '.join('f.' + dim for dim in dims)
+    rows = query_facts(
+        "SELECT {cols}, COUNT(*) AS c FROM {{facts}} f "
+        "WHERE f.tenant_id = ? AND f.visible_from <= ? AND {where}{not_null} "
+        "GROUP BY {cols}".format(cols=cols, where=where, not_null=not_null),
+        [tenant_id, gate] + list(args))
+    if len(dims) == 1:
+        return {r[0]: r['c'] for r in rows}
+    return {tuple(r[:len(dims)]): r['c'] for r in rows}
+
+
+def count_raised(tenant_id, gate, upto, since=None, by=None):
+    """Defects created in (since, upto] whose raising inspection was reviewed by gate."""
+    if since is None:
+        return _count(tenant_id, gate, "f.created_at <= ?", [upto], by)
+    return _count(tenant_id, gate, "f.created_at > ? AND f.created_at <= ?", [since, upto], by)
+
+
+def count_cleared(tenant_id, gate, upto, since=None, by=None):
+    """Visible defects (by gate) currently cleared, with cleared_at in (since, upto]."""
+    if since is None:
+        return _count(tenant_id, gate, "f.status = 'cleared' AND f.cleared_at <= ?", [upto], by)
+    return _count(tenant_id, gate, "f.status = 'cleared' AND f.cleared_at > ? AND f.cleared_at <= ?",
+                  [since, upto], by)
+
+
+def count_open(tenant_id, gate, at, by=None):
+    """Visible defects (by gate) that were open at time `at`."""
+    return _count(tenant_id, gate, OPEN_AS_OF, [at, at], by)
+
+
+def trend_series(tenant_id, gate, points):
+    """Cumulative (raised, cleared) at each time in points, from one read of the facts.
+
+    Same numbers as count_raised(tenant_id, gate, p) / count_cleared(tenant_id, gate, p)
+    per point: the visible created/cleared stamps are sorted once and each point
+    is a bisect, so a long series costs one query instead of two per point.
+    """
+    rows = query_facts(
+        "SELECT f.created_at, f.status, f.cleared_at FROM {facts} f "
+        "WHERE f.tenant_id = ? AND f.visible_from <= ?",
+        [tenant_id, gate])
+    created = sorted(r['created_at'] for r in rows if r['created_at'] is not None)
+    cleared = sorted(r['cleared_at'] for r in rows
+                     if r['status'] == 'cleared' and r['cleared_at'] is not None)
+    return [(bisect_right(created, p), bisect_right(cleared, p)) for p in points]
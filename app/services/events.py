@@ -0,0 +1,182 @@
+"""
+Live change notifications for SSE watchers (live monitor, defects tracker).
+
+Two wake-up paths feed one per-worker Condition:
+- publish(tenant_id, unit_id): called by write routes after commit - wakes
+  watchers in THIS worker immediately.
+- a daemon watcher thread polls change_log once per second (one query per
+  worker, however many screens are open) and publishes the units written by
+  OTHER gunicorn workers, console scripts and imports.
+
+A woken stream only re-reads the version for its own units
+(change_log.current_version) when a published change touches them, and only
+emits an event when that moved, so idle screens receive nothing but the
+periodic keep-alive comment.
+
+Streams hold a gunicorn thread each (threaded sync workers), so at most
+MAX_STREAMS run per worker; further clients get a `busy` event and poll until
+they retry. Streams read on their own short-lived read-only connection, never
+the request one. Every event carries `id: <version>`, so an EventSource
+reconnect resumes from the last version it was told about (Last-Event-ID)
+rather than the page-load ?since=.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from app.services.change_log import current_version, prune_if_due
+from app.services.db import connect
+
+POLL_INTERVAL_S = 1.0
+KEEPALIVE_S = 20
+# Streams end after this long; EventSource reconnects on its own. Keeps a
+# forgotten tab from pinning a gunicorn thread forever.
+MAX_STREAM_S = 300
+# Leave most request threads free: default a quarter of GUNICORN_THREADS.
+MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS',
+                                 max(1, int(os.environ.get('GUNICORN_THREADS', '8')) // 4)))
+# Recent publishes a woken stream checks against its units; older = re-read.
+RECENT_CHANGES = 512
+
+_cond = threading.Condition()
+_tick = 0
+_changes = deque(maxlen=RECENT_CHANGES)     # (tick, tenant_id, unit_id)
+_subscribers = 0
+_watcher = None
+_stats = {'streams_started': 0, 'streams_refused': 0, 'version_reads': 0}
+
+
+def publish(tenant_id=None, unit_id=None):
+    """Wake local watchers about a committed write. The change itself is already
+    in change_log (triggers); tenant_id/unit_id narrow which streams re-read -
+    None means any tenant / any unit."""
+    global _tick
+    with _cond:
+        _tick += 1
+        _changes.append((_tick, tenant_id, unit_id))
+        _cond.notify_all()
+
+
+def _touches(seen_tick, tenant_id, unit_ids):
+    """Did anything published after seen_tick concern these units? Caller holds _cond."""
+    if not _changes or _changes[0][0] > seen_tick + 1:
+        return True     # fell out of the window - re-read to be safe
+    for tick, tenant, unit in reversed(_changes):
+        if tick <= seen_tick:
+            break
+        if tenant is None or (tenant == tenant_id and (unit is None or unit in unit_ids)):
+            return True
+    return False
+
+
+def _watch_change_log(db_path):
+    """Per-worker cross-process bridge: publish the units written since the last poll."""
+    last = None
+    conn = None
+    while True:
+        time.sleep(POLL_INTERVAL_S)
+        prune_if_due(db_path)
+        if not _subscribers:
+            continue
+        try:
+            if conn is None:
+                conn = connect(db_path, readonly=True)
+            if last is None:
+                last = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+                continue
+            rows = conn.execute(
+                "SELECT tenant_id, unit_id, MAX(seq) FROM change_log WHERE seq > ? "
+                "GROUP BY tenant_id, unit_id", (last,)).fetchall()
+        except sqlite3.Error:
+            if conn is not None:
+                conn.close()
+            conn = None
+            continue
+        for tenant_id, unit_id, seq in rows:
+            last = max(last, seq)
+            if unit_id is not None:     # tenant-level writes never move a unit version
+                publish(tenant_id, unit_id)
+
+
+def _ensure_watcher(db_path):
+    global _watcher
+    with _cond:
+        if _watcher is not None and _watcher.is_alive():
+            return
+        _watcher = threading.Thread(
+            target=_watch_change_log, args=(db_path,),
+            name='change-log-watcher', daemon=True)
+        _watcher.start()
+
+
+def _read_version(db_path, tenant_id, unit_ids):
+    with _cond:
+        _stats['version_reads'] += 1
+    try:
+        conn = connect(db_path, readonly=True)
+    except sqlite3.Error:
+        return None
+    try:
+        return current_version(tenant_id, unit_ids, conn=conn)
+    finally:
+        conn.close()
+
+
+def stream_versions(db_path, tenant_id, unit_ids, since=None):
+    """SSE generator: yields 'change' events carrying the new version for unit_ids.
+    Needs no request context - return it from the view without stream_with_context
+    so the request DB connection is released before streaming starts."""
+    global _subscribers
+    unit_ids = frozenset(unit_ids)
+    _ensure_watcher(db_path)
+    with _cond:
+        if _subscribers >= MAX_STREAMS:
+            _stats['streams_refused'] += 1
+            refused = True
+        else:
+            _subscribers += 1
+            _stats['streams_started'] += 1
+            refused = False
+        seen_tick = _tick
+    if refused:
+        # Client polls and retries the stream later.
+        yield 'event: busy\ndata: \n\n'
+        return
+    try:
+        version = _read_version(db_path, tenant_id, unit_ids)
+        if version is None:
+            # change_log not migrated - tell the client to keep polling.
+            yield 'event: unavailable\ndata: \n\n'
+            return
+        if since is not None and since != version:
+            yield 'retry: 3000\nid: {0}\nevent: change\ndata: {0}\n\n'.format(version)
+        else:
+            # Sets lastEventId without dispatching, so a reconnect resumes here.
+            yield 'retry: 3000\nid: {}\n\n'.format(version)
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < MAX_STREAM_S:
+            with _cond:
+                _cond.wait_for(lambda: _tick != seen_tick, timeout=KEEPALIVE_S)
+                relevant = _tick != seen_tick and _touches(seen_tick, tenant_id, unit_ids)
+                seen_tick = _tick
+            if relevant:
+                latest = _read_version(db_path, tenant_id, unit_ids)
+                if latest is not None and latest != version:
+                    version = latest
+                    last_sent = time.monotonic()
+                    yield 'id: {0}\nevent: change\ndata: {0}\n\n'.format(version)
+                    continue
+            if time.monotonic() - last_sent >= KEEPALIVE_S:
+                last_sent = time.monotonic()
+                yield ': keep-alive\n\n'
+    finally:
+        with _cond:
+            _subscribers -= 1
+
+
+def get_event_stats():
+    """Open / refused streams and version re-reads (this worker)."""
+    with _cond:
+        return dict(_stats, streams_open=_subscribers, max_streams=MAX_STREAMS)
@@ -0,0 +1,101 @@
+"""
+Per-worker fragment cache for rendered Jinja partials.
+
+An entry is keyed by a tuple naming the fragment plus the version of the
+entities it shows (change_log unit versions, library version, thresholds...),
+so entries never need invalidating: a write bumps the version and the next
+render misses. A version of None means "unknown" (change_log not migrated) and
+the fragment is rendered uncached.
+
+Memory is bounded per worker by an LRU on total cached HTML
+(FRAGMENT_CACHE_MAX_KB, default 16384). Entries also expire after
+FRAGMENT_CACHE_TTL seconds (default 900) to bound staleness from tables
+change_log does not watch (templates, inspector names).
+
+From Python:
+    html = cached_fragment(('area', inspection_id, area_id, filter_mode), version,
+                           lambda: render_template('inspection/area.html', ...))
+
+From templates (Jinja global):
+    {% call cache_fragment(('live-card', u.unit_id, u.is_idle), unit_versions.get(u.unit_id)) %}
+        ...
+    {% endcall %}
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from markupsafe import Markup
+
+MAX_CHARS = int(os.environ.get('FRAGMENT_CACHE_MAX_KB', '16384')) * 1024
+TTL_S = int(os.environ.get('FRAGMENT_CACHE_TTL', '900'))
+
+_lock = threading.Lock()
+_entries = OrderedDict()     # (key, version) -> (html, stored_at)
+_size = 0
+_stats = {'hits': 0, 'misses': 0, 'uncached': 0, 'evictions': 0, 'expired': 0}
+
+
+def _get(full_key):
+    with _lock:
+        entry = _entries.get(full_key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[1] > TTL_S:
+            _drop(full_key)
+            _stats['expired'] += 1
+            return None
+        _entries.move_to_end(full_key)
+        _stats['hits'] += 1
+        return entry[0]
+
+
+def _drop(full_key):
+    global _size
+    html, _ = _entries.pop(full_key)
+    _size -= len(html)
+
+
+def _put(full_key, html):
+    global _size
+    if len(html) > MAX_CHARS:
+        return
+    with _lock:
+        if full_key in _entries:
+            _drop(full_key)
+        _entries[full_key] = (html, time.monotonic())
+        _size += len(html)
+        while _size > MAX_CHARS:
+            _drop(next(iter(_entries)))
+            _stats['evictions'] += 1
+
+
+def cached_fragment(key, version, render):
+    """Return render() for (key, version), rendering at most once per worker."""
+    if version is None:
+        with _lock:
+            _stats['uncached'] += 1
+        return render()
+    full_key = (tuple(key), version)
+    html = _get(full_key)
+    if html is not None:
+        return Markup(html)
+    with _lock:
+        _stats['misses'] += 1
+    html = str(render())
+    _put(full_key, html)
+    return Markup(html)
+
+
+def cache_fragment(key, version, caller):
+    """Jinja {% call %} form of cached_fragment."""
+    return cached_fragment(key, version, caller)
+
+
+def get_fragment_stats():
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return dict(_stats, entries=len(_entries), cached_kb=round(_size / 1024, 1),
+                    max_kb=MAX_CHARS // 1024,
+                    hit_rate=round(_stats['hits'] / lookups, 3) if lookups else None)
@@ -0,0 +1,158 @@
+"""
+Per-inspection metrics stored on the inspection row, plus the one timestamp parser.
+
+The inspector audit trail (analytics._build_audit_data_dict, page and PDF) needs
+two numbers per inspection:
+
+    duration_seconds     net working time: submitted_at (or paused_at while
+                         paused) minus started_at, less total_paused_seconds,
+                         floored at 0; NULL when either end is missing
+    attributed_defects   defects credited to the inspection: C1 defects it
+                         raised (raised_cycle_id), C2+ defects it addressed
+                         (addressed_cycle_number)
+
+Both are computed in SQL (julianday parses every stored timestamp shape: 'T' or
+space, fractional seconds, Z / +HH:MM) and kept on the row by triggers: the
+inspection's own timing/status writes (start, pause, submit, review) and every
+defect raise, clearance or delete on its unit. scripts/migrate_inspection_metrics.py
+adds the columns, triggers and the (tenant_id, inspection_date) index used by
+the audit date-range filter, and backfills. Without the columns the same
+expressions run inline (query_with_metrics).
+
+parse_ts() is the single Python parser for those timestamps.
+
+Usage:
+    from app.services.inspection_metrics import duration_label, parse_ts, query_with_metrics
+
+    rows = query_with_metrics("SELECT i.id, {duration} AS secs, {defects} AS n "
+                              "FROM inspection i WHERE i.tenant_id = ?", [tenant_id])
+    duration_label(rows[0]['secs'])          # '1h 5m' / '45m' / 'N/A'
+"""
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+from app.services.db import query_db
+
+METRIC_COLUMNS = ('duration_seconds', 'attributed_defects')
+
+_FRACTION = re.compile(r'(\.\d+)')
+
+
+def parse_ts(value):
+    """Stored timestamp -> aware UTC datetime, None if empty or unparseable.
+
+    Accepts 'YYYY-MM-DD HH:MM:SS', ISO 'T' forms, any number of fractional
+    digits and Z / +HH:MM offsets (naive values are UTC).
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        s = str(value).strip().replace('Z', '+00:00')
+        s = _FRACTION.sub(lambda m: (m.group(1) + '000000')[:7], s, count=1)
+        try:
+            dt = datetime.fromisoformat(s)
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def duration_label(seconds):
+    """Audit-trail label for a net duration: 'N/A' under 2 minutes or unknown."""
+    if seconds is None:
+        return 'N/A'
+    total_mins = int(seconds // 60)
+    if total_mins < 2:
+        return 'N/A'
+    if total_mins < 60:
+        return f'{total_mins}m'
+    return f'{total_mins // 60}h {total_mins % 60}m'
+
+
+def duration_sql(a):
+    """Net duration in whole seconds for inspection alias a (NULL if an end is missing)."""
+    end = 'COALESCE({a}.paused_at, {a}.submitted_at)'.format(a=a)
+    return ("(CASE WHEN julianday({a}.started_at) IS NULL OR julianday({end}) IS NULL THEN NULL "
+            "ELSE MAX(0, CAST(ROUND((julianday({end}) - julianday({a}.started_at)) * 86400, 3) AS INTEGER) "
+            "- COALESCE({a}.total_paused_seconds, 0)) END)").format(a=a, end=end)
+
+
+def attributed_sql(a):
+    """Defects credited to inspection alias a: raised in its C1 cycle, addressed in its C2+ round."""
+    return ("(CASE WHEN {a}.cycle_number = 1 THEN (SELECT COUNT(*) FROM defect d "
+            "WHERE d.unit_id = {a}.unit_id AND d.tenant_id = {a}.tenant_id AND d.raised_cycle_id = {a}.cycle_id) "
+            "WHEN {a}.cycle_number > 1 THEN (SELECT COUNT(*) FROM defect d "
+            "WHERE d.unit_id = {a}.unit_id AND d.tenant_id = {a}.tenant_id "
+            "AND d.addressed_cycle_number = {a}.cycle_number) "
+            "ELSE 0 END)").format(a=a)
+
+
+# Rows whose stored value already matches are not rewritten, so unchanged
+# inspections fire no UPDATE triggers (change_log, report_change, zone_summary).
+_RECOMPUTE = ("UPDATE inspection SET duration_seconds = {duration}, attributed_defects = {defects} "
+              "WHERE id = NEW.id AND (duration_seconds IS NOT {duration} "
+              "OR attributed_defects IS NOT {defects});").format(duration=duration_sql('inspection'),
+                                                                 defects=attributed_sql('inspection'))
+_REATTRIBUTE = ("UPDATE inspection SET attributed_defects = {defects} "
+                "WHERE unit_id IN ({{units}}) AND attributed_defects IS NOT {defects};").format(
+    defects=attributed_sql('inspection'))
+
+# (trigger name, event clause, body)
+TRIGGERS = [
+    ('trg_im_inspection_ins', 'AFTER INSERT ON inspection', _RECOMPUTE),
+    ('trg_im_inspection_upd',
+     'AFTER UPDATE OF started_at, submitted_at, paused_at, total_paused_seconds, status, '
+     'unit_id, tenant_id, cycle_id, cycle_number ON inspection', _RECOMPUTE),
+    ('trg_im_defect_ins', 'AFTER INSERT ON defect', _REATTRIBUTE.format(units='NEW.unit_id')),
+    ('trg_im_defect_upd',
+     'AFTER UPDATE OF unit_id, tenant_id, raised_cycle_id, addressed_cycle_number ON defect',
+     _REATTRIBUTE.format(units='OLD.unit_id, NEW.unit_id')),
+    ('trg_im_defect_del', 'AFTER DELETE ON defect', _REATTRIBUTE.format(units='OLD.unit_id')),
+]
+
+
+def install(conn):
+    """Add the metric columns, date index and triggers. Idempotent; caller commits.
+
+    Returns the columns added.
+    """
+    existing = {r[1] for r in conn.execute("PRAGMA table_info(inspection)")}
+    added = [c for c in METRIC_COLUMNS if c not in existing]
+    for column in added:
+        conn.execute("ALTER TABLE inspection ADD COLUMN {} INTEGER".format(column))
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_inspection_tenant_date ON inspection(tenant_id, inspection_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_defect_unit_addressed ON defect(unit_id, addressed_cycle_number)")
+    for name, event, body in TRIGGERS:
+        conn.execute('DROP TRIGGER IF EXISTS {}'.format(name))
+        conn.execute("""
+            CREATE TRIGGER {name} {event}
+            FOR EACH ROW BEGIN
+                {body}
+            END
+        """.format(name=name, event=event, body=body))
+    return added
+
+
+def backfill(conn, tenant_id=None):
+    """Recompute both metrics on every inspection (one tenant or all). Returns rows; caller commits."""
+    cur = conn.execute(
+        "UPDATE inspection SET duration_seconds = {}, attributed_defects = {}{}".format(
+            duration_sql('inspection'), attributed_sql('inspection'),
+            ' WHERE tenant_id = ?' if tenant_id else ''),
+        [tenant_id] if tenant_id else [])
+    return cur.rowcount
+
+
+def query_with_metrics(sql, args=(), one=False, alias='i'):
+    """query_db for SQL using {duration} / {defects} for inspection alias; inline if the columns are missing."""
+    try:
+        return query_db(sql.format(duration='{}.duration_seconds'.format(alias),
+                                   defects='{}.attributed_defects'.format(alias)), args, one=one)
+    except sqlite3.OperationalError as e:
+        if not any(c in str(e) for c in METRIC_COLUMNS):
+            raise
+    return query_db(sql.format(duration=duration_sql(alias), defects=attributed_sql(alias)), args, one=one)
@@ -0,0 +1,87 @@
+"""
+Per-worker cache of enriched Live Monitor unit rows.
+
+A live-monitor row (area progress, C2 cohorts, timing) depends only on its own
+unit's inspection, items, defects and latents, and every one of those writes
+bumps the unit's change_log version. Rows are therefore stored under that
+version, like fragment_cache entries, and never need invalidating: the delta
+feed re-queries just the units whose version moved and reuses the rest, so the
+header strips can still aggregate every unit in the batch.
+
+Entries are keyed by (tenant_id, unit_id, cycle_id, inspection_id), so a unit
+re-routed to another cycle or inspection misses. Memory is bounded by an LRU on
+the entry count (LIVE_ROWS_CACHE_MAX, default 20000) and entries expire after
+LIVE_ROWS_CACHE_TTL seconds (default 900) to bound staleness from tables
+change_log does not watch (templates). A version map of None (change_log not
+migrated) disables the cache.
+
+Usage:
+    stale = reuse_rows(tenant_id, units, versions)   # fills cached units in place
+    _enrich(stale)
+    store_rows(tenant_id, stale, versions, FIELDS)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES = int(os.environ.get('LIVE_ROWS_CACHE_MAX', '20000'))
+TTL_S = int(os.environ.get('LIVE_ROWS_CACHE_TTL', '900'))
+
+_lock = threading.Lock()
+_entries = OrderedDict()     # (tenant_id, unit_id, cycle_id, inspection_id) -> (version, fields, stored_at)
+_stats = {'reused': 0, 'built': 0, 'evictions': 0, 'expired': 0}
+
+
+def _key(tenant_id, u):
+    return (tenant_id, u['unit_id'], u['cycle_id'], u['inspection_id'])
+
+
+def reuse_rows(tenant_id, units, versions):
+    """Fill units whose cached row matches their version; return the rest."""
+    if versions is None:
+        return list(units)
+    stale = []
+    now = time.monotonic()
+    with _lock:
+        for u in units:
+            key = _key(tenant_id, u)
+            entry = _entries.get(key)
+            if entry is not None and now - entry[2] > TTL_S:
+                del _entries[key]
+                _stats['expired'] += 1
+                entry = None
+            if entry is None or entry[0] != versions.get(u['unit_id'], 0):
+                stale.append(u)
+                continue
+            _entries.move_to_end(key)
+            u.update(entry[1])
+            _stats['reused'] += 1
+    return stale
+
+
+def store_rows(tenant_id, units, versions, fields):
+    """Cache the given fields of freshly built units under their versions.
+
+    versions must have been read before the rows were queried, so a write
+    racing the build leaves the entry behind the unit's version, never ahead.
+    """
+    now = time.monotonic()
+    with _lock:
+        _stats['built'] += len(units)
+        if versions is None:
+            return
+        for u in units:
+            key = _key(tenant_id, u)
+            _entries[key] = (versions.get(u['unit_id'], 0), {f: u[f] for f in fields}, now)
+            _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _stats['evictions'] += 1
+
+
+def get_live_row_stats():
+    with _lock:
+        rows = _stats['reused'] + _stats['built']
+        return dict(_stats, entries=len(_entries), max_entries=MAX_ENTRIES,
+                    reuse_rate=round(_stats['reused'] / rows, 3) if rows else None)
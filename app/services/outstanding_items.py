@@ -0,0 +1,304 @@
+"""
+Outstanding Items - the site punch list, generated block by block.
+
+The punch list is every open defect and unrectified latent note on real units
+that have reached round 2 (de-snag), grouped Block -> Floor -> Unit -> Area.
+iter_blocks() runs the two scoped queries once per block - or only for the
+block / floor asked for - and yields that block's units, so the HTML, CSV and
+XLSX exports go out a block at a time and a site team pulling one floor never
+computes the rest. Totals accumulate as blocks are yielded.
+
+Latent notes are exploded into one row per <li> bullet. The parse is cached
+per worker keyed by (note id, note version) where the version is
+COALESCE(last_edited_at, created_at); a hit is also checked against the stored
+HTML, so a note edited without a timestamp is still re-parsed.
+
+Usage:
+    from app.services.outstanding_items import Totals, iter_blocks, export_rows
+
+    totals = Totals()
+    for block, units in iter_blocks(tenant_id, block='A', floor=0, totals=totals):
+        for row in export_rows(units):
+            ...
+    totals.as_dict()    # {'open_defects', 'latent_outstanding', 'units_affected', 'by_trade'}
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from app.services.db import query_db
+from app.services.inspection_metrics import parse_ts
+
+FLOOR_LABELS = {0: 'Ground', 1: '1st Floor', 2: '2nd Floor', 3: '3rd Floor'}
+
+EXPORT_COLUMNS = ['Block', 'Floor', 'Unit', 'Area', 'Trade', 'Item', 'Description', 'Cycle', 'Latent',
+                  'Age (days)']
+
+MAX_NOTES = int(os.environ.get('LATENT_BULLET_CACHE_MAX', '50000'))
+
+BLOCKS_SQL = """
+    SELECT DISTINCT u.block FROM unit_real u
+    WHERE u.tenant_id = ?{}
+    ORDER BY u.block
+"""
+
+DEFECTS_SQL = """
+    SELECT u.block, u.floor, u.unit_number,
+           at.area_name, at.area_order,
+           ct.category_name AS trade, ct.category_order,
+           it.item_description, it.item_order, it.depth,
+           pit.item_description AS parent_item_description,
+           COALESCE(pit.item_order, it.item_order) AS sort_parent,
+           COALESCE(NULLIF(d.reviewed_comment,''), NULLIF(d.raw_comment,''), d.original_comment) AS description,
+           d.raised_cycle_number, d.created_at
+    FROM defect d
+    JOIN item_template it ON d.item_template_id = it.id AND it.tenant_id = d.tenant_id
+    LEFT JOIN item_template pit ON it.parent_item_id = pit.id AND pit.tenant_id = it.tenant_id
+    JOIN category_template ct ON it.category_id = ct.id AND ct.tenant_id = d.tenant_id
+    JOIN area_template at ON ct.area_id = at.id AND at.tenant_id = d.tenant_id
+    JOIN unit_real u ON d.unit_id = u.id AND u.tenant_id = d.tenant_id
+    WHERE d.tenant_id = ? AND d.status = 'open'{}
+      AND EXISTS (
+          SELECT 1 FROM inspection i
+          WHERE i.unit_id = d.unit_id
+            AND i.tenant_id = d.tenant_id
+            AND i.cycle_number >= 2
+      )
+    ORDER BY u.block, u.floor, CAST(u.unit_number AS INTEGER),
+             at.area_order, ct.category_order,
+             sort_parent, it.depth, it.item_order
+"""
+
+LATENT_SQL = """
+    SELECT u.block, u.floor, u.unit_number,
+           at.area_name, at.area_order,
+           lan.id, COALESCE(lan.last_edited_at, lan.created_at) AS version,
+           lan.note_html, lan.cycle_number, lan.created_at
+    FROM latent_area_note lan
+    JOIN area_template at ON lan.area_template_id = at.id AND at.tenant_id = lan.tenant_id
+    JOIN unit_real u ON lan.unit_id = u.id AND u.tenant_id = lan.tenant_id
+    WHERE lan.tenant_id = ? AND lan.rectified_at IS NULL{}
+      AND EXISTS (
+          SELECT 1 FROM inspection i
+          WHERE i.unit_id = lan.unit_id
+            AND i.tenant_id = lan.tenant_id
+            AND i.cycle_number >= 2
+      )
+    ORDER BY u.block, u.floor, CAST(u.unit_number AS INTEGER), at.area_order
+"""
+
+_BULLET_RE = re.compile(r'<li[^>]*>(.*?)</li>', re.DOTALL | re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+# --- latent bullets -------------------------------------------------------
+
+_lock = threading.Lock()
+_notes = OrderedDict()      # (note_id, version) -> (note_html, bullets)
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def split_bullets(html):
+    """Plain-text bullets of a latent note: one per <li>, else the whole note's text."""
+    html = html or ''
+    bullets = _BULLET_RE.findall(html)
+    if not bullets:
+        txt = _TAG_RE.sub(' ', html).strip()
+        bullets = [txt] if txt else []
+    out = []
+    for b in bullets:
+        txt = re.sub(r'\s+', ' ', _TAG_RE.sub(' ', b).strip())
+        if txt:
+            out.append(txt)
+    return tuple(out)
+
+
+def latent_bullets(note_id, version, html):
+    """split_bullets(html), parsed at most once per note version in this worker."""
+    key = (note_id, version)
+    with _lock:
+        entry = _notes.get(key)
+        if entry is not None and entry[0] == html:
+            _notes.move_to_end(key)
+            _stats['hits'] += 1
+            return entry[1]
+    bullets = split_bullets(html)
+    with _lock:
+        _stats['misses'] += 1
+        _notes[key] = (html, bullets)
+        _notes.move_to_end(key)
+        while len(_notes) > MAX_NOTES:
+            _notes.popitem(last=False)
+            _stats['evictions'] += 1
+    return bullets
+
+
+def get_latent_bullet_stats():
+    """Bullet cache hit rate and size (this worker)."""
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return dict(_stats, notes=len(_notes),
+                    hit_rate=round(_stats['hits'] / lookups, 3) if lookups else None)
+
+
+# --- punch list -----------------------------------------------------------
+
+class Totals:
+    """Running totals over the units yielded so far."""
+
+    def __init__(self):
+        self.open_defects = 0
+        self.latent_outstanding = 0
+        self.units_affected = 0
+        self.trade_counts = {}
+
+    def add(self, units):
+        for u in units:
+            self.open_defects += u['open_count']
+            self.latent_outstanding += u['latent_count']
+            self.units_affected += 1
+
+    @property
+    def by_trade(self):
+        return sorted([{'name': t, 'count': c} for t, c in self.trade_counts.items()],
+                      key=lambda x: -x['count'])
+
+    def as_dict(self):
+        return {
+            'open_defects': self.open_defects,
+            'latent_outstanding': self.latent_outstanding,
+            'units_affected': self.units_affected,
+            'by_trade': self.by_trade,
+        }
+
+
+def _unit_key(k):
+    try:
+        return (k[0], k[1], int(k[2]))
+    except (ValueError, TypeError):
+        return (k[0], k[1], 0)
+
+
+def _block_units(tenant_id, block, floor, now, totals):
+    """Units of one block (optionally one floor), in report order."""
+    scope, args = " AND u.block IS ?", [block]
+    if floor is not None:
+        scope += " AND u.floor = ?"
+        args.append(floor)
+    defect_rows = query_db(DEFECTS_SQL.format(scope), [tenant_id] + args)
+    latent_rows = query_db(LATENT_SQL.format(scope), [tenant_id] + args)
+
+    units_dict = {}
+
+    def _get_unit(r):
+        key = (r['block'], r['floor'], r['unit_number'])
+        if key not in units_dict:
+            units_dict[key] = {
+                'block': r['block'],
+                'floor': r['floor'],
+                'floor_label': FLOOR_LABELS.get(r['floor'], 'Floor {}'.format(r['floor'])),
+                'unit_number': r['unit_number'],
+                'open_count': 0,
+                'latent_count': 0,
+                'oldest_age_days': 0,
+                '_areas': {},
+            }
+        return units_dict[key]
+
+    def _get_area(unit, r):
+        name = r['area_name']
+        if name not in unit['_areas']:
+            unit['_areas'][name] = {'name': name, 'area_order': r['area_order'] or 99, 'defects': []}
+        return unit['_areas'][name]
+
+    # Defects
+    for r in defect_rows:
+        u = _get_unit(r)
+        a = _get_area(u, r)
+        ca = parse_ts(r['created_at'])
+        age_days = (now - ca).days if ca else 0
+        cyc = r['raised_cycle_number']
+        item_desc = (r['item_description'] or '').strip()
+        parent_desc = (r['parent_item_description'] or '').strip() if r['depth'] else ''
+        if parent_desc:
+            item_path = '{} > {}'.format(parent_desc, item_desc)
+        else:
+            item_path = item_desc
+        a['defects'].append({
+            'trade': r['trade'] or '',
+            'item_path': item_path,
+            'description': (r['description'] or '').strip(),
+            'cycle': 'C{}'.format(cyc) if cyc else '',
+            'is_latent': False,
+            'age_days': age_days,
+        })
+        u['open_count'] += 1
+        if age_days > u['oldest_age_days']:
+            u['oldest_age_days'] = age_days
+        t = r['trade'] or 'OTHER'
+        totals.trade_counts[t] = totals.trade_counts.get(t, 0) + 1
+
+    # Latent (explode bullets)
+    for r in latent_rows:
+        u = _get_unit(r)
+        a = _get_area(u, r)
+        ca = parse_ts(r['created_at'])
+        age_days = (now - ca).days if ca else 0
+        cyc = r['cycle_number']
+        for txt in latent_bullets(r['id'], r['version'], r['note_html']):
+            a['defects'].append({
+                'trade': 'LATENT',
+                'item_path': '',
+                'description': txt,
+                'cycle': 'C{}'.format(cyc) if cyc else '',
+                'is_latent': True,
+                'age_days': age_days,
+            })
+            u['latent_count'] += 1
+            if age_days > u['oldest_age_days']:
+                u['oldest_age_days'] = age_days
+
+    units = []
+    for key in sorted(units_dict.keys(), key=_unit_key):
+        u = units_dict[key]
+        u['areas'] = sorted(u['_areas'].values(), key=lambda x: x['area_order'])
+        u['oldest_age_weeks'] = u['oldest_age_days'] // 7
+        del u['_areas']
+        units.append(u)
+    totals.add(units)
+    return units
+
+
+def iter_blocks(tenant_id, block=None, floor=None, totals=None, now=None):
+    """Yield (block, units) per block with outstanding items, optionally only block / floor."""
+    now = now or datetime.now(timezone.utc)
+    totals = totals if totals is not None else Totals()
+    scope, args = "", []
+    if block is not None:
+        scope += " AND u.block = ?"
+        args.append(block)
+    if floor is not None:
+        scope += " AND u.floor = ?"
+        args.append(floor)
+    for row in query_db(BLOCKS_SQL.format(scope), [tenant_id] + args):
+        units = _block_units(tenant_id, row['block'], floor, now, totals)
+        if units:
+            yield row['block'], units
+
+
+def iter_units(tenant_id, block=None, floor=None, totals=None, now=None):
+    """iter_blocks() flattened to units."""
+    for _, units in iter_blocks(tenant_id, block, floor, totals, now):
+        yield from units
+
+
+def export_rows(units):
+    """One EXPORT_COLUMNS row per defect / latent bullet of units."""
+    for u in units:
+        for a in u['areas']:
+            for d in a['defects']:
+                yield [u['block'], u['floor_label'], u['unit_number'], a['name'], d['trade'],
+                       d['item_path'], d['description'], d['cycle'], 'Y' if d['is_latent'] else '',
+                       d['age_days']]
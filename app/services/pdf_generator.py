@@ -3,11 +3,57 @@ PDF Generator Service - Generates defects list PDFs.
 Uses WeasyPrint for HTML to PDF conversion.
 """
 import os
+import sqlite3
 from datetime import datetime
 from flask import render_template, current_app
 from app.services.db import query_db
 
 
+_DEFECTS_SQL = """
+    SELECT d.*,
+           COALESCE(d.reviewed_comment, d.original_comment) AS display_comment,
+           it.item_description,
+           parent.item_description as parent_description,
+           ct.category_name, ct.category_order,
+           at.area_name, at.area_order,
+           ic_raised.cycle_number as raised_cycle,
+           ic_cleared.cycle_number as cleared_cycle,
+           dh.comment as defect_comment
+    FROM defect d
+    JOIN item_template it ON d.item_template_id = it.id
+    JOIN category_template ct ON it.category_id = ct.id
+    JOIN area_template at ON ct.area_id = at.id
+    JOIN inspection_cycle ic_raised ON d.raised_cycle_id = ic_raised.id
+    LEFT JOIN inspection_cycle ic_cleared ON d.cleared_cycle_id = ic_cleared.id
+    LEFT JOIN item_template parent ON it.parent_item_id = parent.id
+    {comment_join}
+    WHERE d.unit_id = ? AND ic_raised.cycle_number <= ?
+    ORDER BY at.area_order, ct.category_order, it.item_order
+"""
+
+# Snapshot row whose [cycle_number, next_cycle_number) range covers the cycle.
+_SNAPSHOT_JOIN = """
+    LEFT JOIN defect_comment_snapshot dh ON dh.defect_id = d.id
+        AND dh.cycle_number <= ?
+        AND (dh.next_cycle_number IS NULL OR dh.next_cycle_number > ?)
+"""
+
+_HISTORY_JOIN = """
+    LEFT JOIN (
+        SELECT dh1.defect_id, dh1.comment
+        FROM defect_history dh1
+        JOIN inspection_cycle ic ON dh1.cycle_id = ic.id
+        WHERE ic.cycle_number <= ?
+        AND dh1.id = (
+            SELECT dh2.id FROM defect_history dh2
+            JOIN inspection_cycle ic2 ON dh2.cycle_id = ic2.id
+            WHERE dh2.defect_id = dh1.defect_id AND ic2.cycle_number <= ?
+            ORDER BY ic2.cycle_number DESC, dh2.created_at DESC, dh2.rowid DESC LIMIT 1
+        )
+    ) dh ON dh.defect_id = d.id
+"""
+
+
 def plain_text_to_html(text):
     """Convert plain text with line breaks to HTML paragraphs.
     If text already contains HTML tags, return as-is.
@@ -76,41 +122,15 @@ def get_defects_data(tenant_id, unit_id, cycle_id=None):
     inspection_query += " ORDER BY ic.cycle_number DESC LIMIT 1"
     inspection = query_db(inspection_query, params, one=True)
     
-    # Get defects raised up to this cycle
-    # Get comment from defect_history at or before this cycle (not latest!)
-    defect_query = """
-        SELECT d.*, 
-               COALESCE(d.reviewed_comment, d.original_comment) AS display_comment,
-               it.item_description,
-               parent.item_description as parent_description,
-               ct.category_name, ct.category_order,
-               at.area_name, at.area_order,
-               ic_raised.cycle_number as raised_cycle,
-               ic_cleared.cycle_number as cleared_cycle,
-               dh.comment as defect_comment
-        FROM defect d
-        JOIN item_template it ON d.item_template_id = it.id
-        JOIN category_template ct ON it.category_id = ct.id
-        JOIN area_template at ON ct.area_id = at.id
-        JOIN inspection_cycle ic_raised ON d.raised_cycle_id = ic_raised.id
-        LEFT JOIN inspection_cycle ic_cleared ON d.cleared_cycle_id = ic_cleared.id
-        LEFT JOIN item_template parent ON it.parent_item_id = parent.id
-        LEFT JOIN (
-            SELECT dh1.defect_id, dh1.comment 
-            FROM defect_history dh1
-            JOIN inspection_cycle ic ON dh1.cycle_id = ic.id
-            WHERE ic.cycle_number <= ?
-            AND dh1.id = (
-                SELECT dh2.id FROM defect_history dh2
-                JOIN inspection_cycle ic2 ON dh2.cycle_id = ic2.id
-                WHERE dh2.defect_id = dh1.defect_id AND ic2.cycle_number <= ?
-                ORDER BY ic2.cycle_number DESC LIMIT 1
-            )
-        ) dh ON dh.defect_id = d.id
-        WHERE d.unit_id = ? AND ic_raised.cycle_number <= ?
-        ORDER BY at.area_order, ct.category_order, it.item_order
-    """
-    defects = query_db(defect_query, [cycle_number, cycle_number, unit_id, cycle_number])
+    # Get defects raised up to this cycle, with the comment as logged at or
+    # before this cycle (not latest!) - see scripts/migrate_defect_comment_snapshot.py
+    try:
+        defects = query_db(_DEFECTS_SQL.format(comment_join=_SNAPSHOT_JOIN),
+                           [cycle_number, cycle_number, unit_id, cycle_number])
+    except sqlite3.OperationalError:
+        # Snapshot table not migrated yet: rebuild from defect_history.
+        defects = query_db(_DEFECTS_SQL.format(comment_join=_HISTORY_JOIN),
+                           [cycle_number, cycle_number, unit_id, cycle_number])
     
     # Get area notes for this cycle
     area_notes = {}
@@ -2,48 +2,298 @@
 PDF Generator - Playwright (Chromium)
 Replaces WeasyPrint. Screen == PDF. Always.
 Persistent browser instance - launch once per process, reuse for all requests.
+
+Lifecycle (per gunicorn worker):
+- Health check before every render: a disconnected browser is relaunched.
+- Recycle after PDF_BROWSER_MAX_RENDERS renders or when the Chromium process
+  tree exceeds PDF_BROWSER_MAX_RSS_MB (sampled every PDF_BROWSER_RSS_CHECK_EVERY
+  renders, Linux /proc only).
+- Every render is bounded by PDF_RENDER_TIMEOUT_MS. page.pdf() takes no
+  timeout, so a watchdog kills the Chromium tree if it overruns; the browser is
+  recycled under 'timeout'. A render that fails because the browser died is
+  retried once on a fresh browser.
+- Render counts and a latency histogram are kept in-process (get_pdf_stats()).
+
+When PDF_WORKER_SOCKET points at a running pdf_worker, html_to_pdf() hands the
+job to that process instead and this module's browser is never launched here.
 """
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 _playwright = None
 _browser = None
+_lock = threading.Lock()
+# Sync Playwright objects are bound to the thread that started them. With
+# threaded gunicorn workers every render is funnelled through this one thread.
+_render_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf-render')
+
+MAX_RENDERS = int(os.environ.get('PDF_BROWSER_MAX_RENDERS', '200'))
+MAX_RSS_MB = int(os.environ.get('PDF_BROWSER_MAX_RSS_MB', '400'))
+RENDER_TIMEOUT_MS = int(os.environ.get('PDF_RENDER_TIMEOUT_MS', '30000'))
+RSS_CHECK_EVERY = max(1, int(os.environ.get('PDF_BROWSER_RSS_CHECK_EVERY', '10')))
+
+# Upper bounds (seconds) of the latency histogram buckets; last bucket is open-ended.
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 30)
+
+_stats = {
+    'renders_ok': 0,
+    'renders_failed': 0,
+    'renders_retried': 0,
+    'timeouts': 0,
+    'launches': 0,
+    'recycles': {'max_renders': 0, 'rss': 0, 'disconnected': 0, 'crash': 0, 'timeout': 0},
+    'browser_renders': 0,
+    'browser_launched_at': None,
+    'last_rss_mb': None,
+    'latency_buckets': {str(b): 0 for b in LATENCY_BUCKETS + ('inf',)},
+    'latency_total_s': 0.0,
+    'latency_max_s': 0.0,
+}
+
+
+class RenderTimeout(Exception):
+    """page.pdf() overran PDF_RENDER_TIMEOUT_MS and the watchdog killed Chromium."""
+
+
+def _process_tree():
+    """{pid: (ppid, rss_kb)} for every process, or None where /proc is unavailable
+    (local macOS dev)."""
+    if not os.path.isdir('/proc'):
+        return None
+    tree = {}
+    rss = {}
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open('/proc/{}/status'.format(pid)) as f:
+                ppid = None
+                kb = 0
+                for line in f:
+                    if line.startswith('PPid:'):
+                        ppid = int(line.split()[1])
+                    elif line.startswith('VmRSS:'):
+                        kb = int(line.split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        tree[int(pid)] = (ppid, kb)
+    return tree
+
+
+def _descendants(tree, root):
+    """[(pid, depth)] of every process below root (depth 1 = direct child)."""
+    children = {}
+    for pid, (ppid, _) in tree.items():
+        children.setdefault(ppid, []).append(pid)
+    out = []
+    stack = [(pid, 1) for pid in children.get(root, [])]
+    while stack:
+        pid, depth = stack.pop()
+        out.append((pid, depth))
+        stack.extend((c, depth + 1) for c in children.get(pid, []))
+    return out
+
+
+def _descendant_rss_mb():
+    """Sum VmRSS of every process descended from this worker (the Chromium tree).
+    Returns None where /proc is unavailable (local macOS dev)."""
+    tree = _process_tree()
+    if tree is None:
+        return None
+    total_kb = sum(tree[pid][1] for pid, _ in _descendants(tree, os.getpid()))
+    return round(total_kb / 1024.0, 1)
+
+
+def _kill_chromium():
+    """Watchdog: SIGKILL the browser processes below the Playwright driver.
+    The driver (our direct child) survives, so the hung call fails with a
+    closed-target error instead of hanging this thread."""
+    import signal
+    tree = _process_tree()
+    if tree is None:
+        return
+    for pid, depth in _descendants(tree, os.getpid()):
+        if depth > 1:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+def _shutdown_browser():
+    """Close browser + Playwright driver, ignoring errors from an already-dead browser."""
+    global _playwright, _browser
+    if _browser is not None:
+        try:
+            _browser.close()
+        except Exception:
+            pass
+    if _playwright is not None:
+        try:
+            _playwright.stop()
+        except Exception:
+            pass
+    _browser = None
+    _playwright = None
+    _stats['browser_renders'] = 0
+    _stats['browser_launched_at'] = None
+
+
+def _recycle(reason):
+    _stats['recycles'][reason] += 1
+    _shutdown_browser()
 
 
 def _get_browser():
-    """Return persistent browser instance, launching if needed."""
+    """Return persistent browser instance, launching (or relaunching) if needed."""
     global _playwright, _browser
+    if _browser is not None:
+        if not _browser.is_connected():
+            _recycle('disconnected')
+        elif _stats['browser_renders'] >= MAX_RENDERS:
+            _recycle('max_renders')
+        elif _stats['browser_renders'] % RSS_CHECK_EVERY == 0:
+            # A full /proc scan per render is wasted work; RSS grows slowly.
+            rss_mb = _descendant_rss_mb()
+            _stats['last_rss_mb'] = rss_mb
+            if rss_mb is not None and rss_mb > MAX_RSS_MB:
+                _recycle('rss')
     if _browser is not None:
         return _browser
     from playwright.sync_api import sync_playwright
     _playwright = sync_playwright().start()
     _browser = _playwright.chromium.launch()
+    _stats['launches'] += 1
+    _stats['browser_launched_at'] = time.time()
     return _browser
 
 
+def _record_latency(elapsed):
+    for bound in LATENCY_BUCKETS:
+        if elapsed <= bound:
+            _stats['latency_buckets'][str(bound)] += 1
+            break
+    else:
+        _stats['latency_buckets']['inf'] += 1
+    _stats['latency_total_s'] += elapsed
+    _stats['latency_max_s'] = max(_stats['latency_max_s'], elapsed)
+
+
+def _render(html_string, pdf_opts):
+    browser = _get_browser()
+    page = browser.new_page()
+    try:
+        page.set_default_timeout(RENDER_TIMEOUT_MS)
+        page.set_content(html_string, wait_until='load', timeout=RENDER_TIMEOUT_MS)
+        fired = threading.Event()
+
+        def _overrun():
+            fired.set()
+            _kill_chromium()
+
+        watchdog = threading.Timer(RENDER_TIMEOUT_MS / 1000.0, _overrun)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            return page.pdf(**pdf_opts)
+        except Exception:
+            if fired.is_set():
+                raise RenderTimeout('page.pdf() exceeded {} ms'.format(RENDER_TIMEOUT_MS))
+            raise
+        finally:
+            watchdog.cancel()
+    finally:
+        try:
+            page.close()
+        except Exception:
+            pass
+        _stats['browser_renders'] += 1
+
+
 def html_to_pdf(html_string, footer_template=None, header_template=None, margin=None):
     """Convert HTML string to PDF bytes using Playwright/Chromium.
     Optional header_template/footer_template enable Playwright running header/footer.
     Optional margin dict overrides defaults (e.g. when a header needs more top space).
+    Routed to the out-of-process PDF worker when one is running.
     """
-    browser = _get_browser()
-    page = browser.new_page()
-    try:
-        page.set_content(html_string, wait_until='load')
-        pdf_opts = {
-            'format': 'A4',
-            'print_background': True,
-            'margin': margin or {
-                'top': '18mm',
-                'bottom': '20mm',
-                'left': '16mm',
-                'right': '16mm',
-            },
-        }
-        if footer_template or header_template:
-            pdf_opts['display_header_footer'] = True
-            pdf_opts['header_template'] = header_template or '<span></span>'
-            pdf_opts['footer_template'] = footer_template or '<span></span>'
-        pdf_bytes = page.pdf(**pdf_opts)
-    finally:
-        page.close()
+    from app.services import pdf_worker
+    if pdf_worker.worker_available():
+        try:
+            return pdf_worker.render_via_worker(html_string, footer_template=footer_template,
+                                                header_template=header_template, margin=margin)
+        except (pdf_worker.PdfWorkerUnavailable, OSError):
+            # Worker went away between the check and connect, or died mid-render
+            # (ConnectionError / timeout are OSErrors) - render here.
+            pass
+    return render_local(html_string, footer_template=footer_template,
+                        header_template=header_template, margin=margin)
+
+
+def render_local(html_string, footer_template=None, header_template=None, margin=None):
+    """Render in this process with the persistent browser (pdf_worker calls this directly)."""
+    return _render_thread.submit(_render_local, html_string, footer_template,
+                                 header_template, margin).result()
+
+
+def _render_local(html_string, footer_template, header_template, margin):
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+    pdf_opts = {
+        'format': 'A4',
+        'print_background': True,
+        'margin': margin or {
+            'top': '18mm',
+            'bottom': '20mm',
+            'left': '16mm',
+            'right': '16mm',
+        },
+    }
+    if footer_template or header_template:
+        pdf_opts['display_header_footer'] = True
+        pdf_opts['header_template'] = header_template or '<span></span>'
+        pdf_opts['footer_template'] = footer_template or '<span></span>'
+
+    with _lock:
+        started = time.monotonic()
+        try:
+            try:
+                pdf_bytes = _render(html_string, pdf_opts)
+            except (PlaywrightTimeoutError, RenderTimeout):
+                # A hung page can wedge the renderer - start the next render clean.
+                _stats['timeouts'] += 1
+                _recycle('timeout')
+                raise
+            except Exception:
+                # Browser crashed or was killed (OOM) mid-render: relaunch, retry once.
+                if _browser is not None and _browser.is_connected():
+                    raise
+                _recycle('crash')
+                _stats['renders_retried'] += 1
+                pdf_bytes = _render(html_string, pdf_opts)
+        except Exception:
+            _stats['renders_failed'] += 1
+            raise
+        _stats['renders_ok'] += 1
+        _record_latency(time.monotonic() - started)
     return pdf_bytes
+
+
+def get_pdf_stats():
+    """Snapshot of this process's render counters and latency histogram."""
+    with _lock:
+        snap = dict(_stats)
+        snap['recycles'] = dict(_stats['recycles'])
+        snap['latency_buckets'] = dict(_stats['latency_buckets'])
+        snap['browser_running'] = _browser is not None
+    done = snap['renders_ok']
+    snap['latency_avg_s'] = round(snap['latency_total_s'] / done, 3) if done else None
+    snap['pid'] = os.getpid()
+    snap['limits'] = {
+        'max_renders': MAX_RENDERS,
+        'max_rss_mb': MAX_RSS_MB,
+        'render_timeout_ms': RENDER_TIMEOUT_MS,
+        'rss_check_every': RSS_CHECK_EVERY,
+    }
+    return snap
@@ -0,0 +1,190 @@
+"""
+PDF render worker - standalone process that owns the Chromium pool.
+
+Web workers stay small: when PDF_WORKER_SOCKET is set (start.sh does this with
+PDF_WORKER=1 and restarts the worker if it exits), html_to_pdf() sends the job
+over a local Unix socket instead of launching Chromium inside every gunicorn
+worker. PDF concurrency is set separately by
+PDF_WORKER_CONCURRENCY (one renderer process + browser each).
+
+Wire format (both directions): 4-byte big-endian header length, JSON header,
+then an optional raw body whose length is given by header['size'].
+  request:  {'op': 'render', 'size': n, 'footer_template': ..., 'header_template': ..., 'margin': ...} + html bytes
+            {'op': 'stats'}
+  response: {'ok': True, 'size': n} + pdf bytes
+            {'ok': True, 'stats': {...}}
+            {'ok': False, 'error': '...'}
+
+Run:
+    PDF_WORKER_SOCKET=/tmp/pdf_worker.sock python3 -m app.services.pdf_worker
+"""
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+SOCKET_PATH = os.environ.get('PDF_WORKER_SOCKET')
+CONCURRENCY = int(os.environ.get('PDF_WORKER_CONCURRENCY', '1'))
+# Client-side wait for a queued + rendered job; generous because jobs queue
+# behind each other when every renderer is busy.
+CLIENT_TIMEOUT_S = int(os.environ.get('PDF_WORKER_CLIENT_TIMEOUT', '120'))
+
+_HEADER = struct.Struct('>I')
+
+
+class PdfWorkerUnavailable(Exception):
+    """Socket missing or worker not accepting connections - caller renders in-process."""
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(min(n - len(buf), 65536))
+        if not chunk:
+            raise ConnectionError('PDF worker connection closed mid-message')
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _send_msg(sock, header, body=b''):
+    raw = json.dumps(header).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(raw)) + raw + body)
+
+
+def _recv_msg(sock):
+    (n,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(_recv_exact(sock, n).decode('utf-8'))
+    body = _recv_exact(sock, header['size']) if header.get('size') else b''
+    return header, body
+
+
+# ------------------------------------------------------------
+# Client (used by pdf_playwright.html_to_pdf in web workers)
+# ------------------------------------------------------------
+
+def worker_available():
+    return bool(SOCKET_PATH) and os.path.exists(SOCKET_PATH)
+
+
+def _call(header, body=b''):
+    if not worker_available():
+        raise PdfWorkerUnavailable(SOCKET_PATH or 'PDF_WORKER_SOCKET not set')
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CLIENT_TIMEOUT_S)
+    try:
+        try:
+            sock.connect(SOCKET_PATH)
+        except OSError as e:
+            raise PdfWorkerUnavailable(str(e))
+        _send_msg(sock, header, body)
+        resp, resp_body = _recv_msg(sock)
+    finally:
+        sock.close()
+    if not resp.get('ok'):
+        raise RuntimeError('PDF worker error: {}'.format(resp.get('error')))
+    return resp, resp_body
+
+
+def render_via_worker(html_string, footer_template=None, header_template=None, margin=None):
+    body = html_string.encode('utf-8')
+    _, pdf_bytes = _call({
+        'op': 'render',
+        'size': len(body),
+        'footer_template': footer_template,
+        'header_template': header_template,
+        'margin': margin,
+    }, body)
+    return pdf_bytes
+
+
+def worker_stats():
+    resp, _ = _call({'op': 'stats'})
+    return resp['stats']
+
+
+# ------------------------------------------------------------
+# Server
+# ------------------------------------------------------------
+
+def _render_job(html_string, footer_template, header_template, margin):
+    """Runs inside a renderer process; its module-level browser persists across jobs."""
+    from app.services.pdf_playwright import render_local
+    return render_local(html_string, footer_template=footer_template,
+                        header_template=header_template, margin=margin)
+
+
+def _stats_job():
+    from app.services.pdf_playwright import get_pdf_stats
+    return get_pdf_stats()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            header, body = _recv_msg(self.request)
+            op = header.get('op')
+            if op == 'render':
+                pdf_bytes = self.server.run(
+                    _render_job, body.decode('utf-8'), header.get('footer_template'),
+                    header.get('header_template'), header.get('margin'))
+                _send_msg(self.request, {'ok': True, 'size': len(pdf_bytes)}, pdf_bytes)
+            elif op == 'stats':
+                # Only reaches one renderer; with CONCURRENCY > 1 this is a sample.
+                stats = self.server.run(_stats_job)
+                stats['worker_concurrency'] = self.server.concurrency
+                _send_msg(self.request, {'ok': True, 'stats': stats})
+            else:
+                _send_msg(self.request, {'ok': False, 'error': 'unknown op {!r}'.format(op)})
+        except Exception as e:
+            try:
+                _send_msg(self.request, {'ok': False, 'error': str(e)})
+            except OSError:
+                pass
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, concurrency):
+        super().__init__(path, _Handler)
+        self.concurrency = concurrency
+        self.pool = ProcessPoolExecutor(max_workers=concurrency)
+        self._pool_lock = threading.Lock()
+
+    def run(self, fn, *args):
+        pool = self.pool
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A renderer was killed (OOM/segfault) - replace the pool once, retry.
+            with self._pool_lock:
+                if self.pool is pool:
+                    self.pool = ProcessPoolExecutor(max_workers=self.concurrency)
+            return self.pool.submit(fn, *args).result()
+
+
+def serve(path=None, concurrency=None):
+    path = path or SOCKET_PATH
+    if not path:
+        sys.exit('PDF_WORKER_SOCKET is not set')
+    if os.path.exists(path):
+        os.remove(path)
+    concurrency = concurrency or CONCURRENCY
+    server = _Server(path, concurrency)
+    print('PDF worker listening on {} (concurrency={})'.format(path, concurrency), flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.pool.shutdown(wait=False)
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    serve()
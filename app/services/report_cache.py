@@ -0,0 +1,341 @@
+"""
+On-disk cache for report data builders.
+
+Snapshot reports (pipeline report, site-meeting brief) are frozen to a
+fortnight cutoff, so their data only changes when a write lands with a
+timestamp at or before that cutoff (a back-dated review, a late import, an old
+defect re-opened). Entries are keyed by (report, tenant, cutoff, params) and
+stored as gzipped JSON under REPORT_CACHE_DIR (default: report_cache/ next to
+the database, i.e. on the persistent disk), so every gunicorn worker and every
+deploy shares them.
+
+Invalidation: triggers (install(), scripts/migrate_report_cache.py) append a
+report_change row for every write to inspection / defect / unit /
+latent_area_note whose earliest affected timestamp is in the past:
+
+    INSERT / DELETE   earliest timestamp on the row
+    UPDATE            earliest old/new value of the timestamp columns that
+                      changed, and of the row's old timestamps as well when
+                      any other column changed (a status or comment edit on
+                      old data, including a certification or clearance stamped
+                      "now")
+
+An entry computed at report_change seq S for cutoff C stays valid until a row
+with seq > S and event_at <= C appears - day-to-day work stamped "now" never
+touches a past cutoff. Cutoffs in the future (Tuesday morning, before the
+snapshot moment) are never cached.
+
+The snapshot reports also read some columns as they are now, not as of the
+cutoff (unit list, certified flag, batch membership, the last closed batch).
+Inserts, deletes and updates of those (CURRENT_STATE_COLUMNS) are logged with
+event_at ANY_CUTOFF, so they invalidate every cached cutoff of the tenant.
+
+Current-state reports (cutoff None: top-50, top-10 per area) are keyed on the
+change_log tenant version instead and recompute after any tenant write.
+
+Entries older than REPORT_CACHE_MAX_AGE seconds (default 14 days) or written by
+a different version of the builder's module are recomputed, which bounds
+staleness from tables neither log watches (templates) and from deploys. Without report_change / change_log every call simply computes.
+
+Usage:
+    from app.services.report_cache import cached_report
+
+    data = cached_report('pipeline', tenant_id, snapshot_str,
+                         lambda: _build_pipeline_report_data(live=False))
+"""
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+from flask import current_app
+
+from app.services.change_log import tenant_version
+from app.services.db import query_db
+
+MAX_AGE_S = int(os.environ.get('REPORT_CACHE_MAX_AGE', str(14 * 86400)))
+
+# Timestamp columns per watched table (columns missing from a database are skipped).
+TIMESTAMP_COLUMNS = {
+    'inspection': ('inspection_date', 'started_at', 'submitted_at', 'review_started_at',
+                   'review_submitted_at', 'approved_at', 'manager_reviewed_at', 'created_at'),
+    'defect': ('created_at', 'cleared_at'),
+    'unit': ('created_at', 'certified_at'),
+    'latent_area_note': ('created_at', 'rectified_at'),
+}
+# Touch-only and derived columns (inspection_metrics recomputes): an update that
+# changes nothing else is not logged.
+IGNORED_COLUMNS = ('updated_at', 'duration_seconds', 'attributed_defects')
+# Columns the snapshot builders read unbounded by the cutoff. A plain name
+# compares the column; (column, expression) compares the expression ({row}
+# is OLD / NEW), for reads that only care about one value of a busy column.
+CURRENT_STATE_COLUMNS = {
+    'unit': ('unit_number', 'block', 'floor', 'certified_at'),
+    'batch_unit': ('batch_id', 'unit_id', 'cycle_id', 'removed_at',
+                   ('status', "{row}.status = 'removed'")),
+    'inspection_batch': ('name', 'status', 'created_at', 'closed_at'),
+}
+ANY_CUTOFF = '0000-01-01 00:00:00'
+
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'stale': 0, 'uncached': 0, 'unencodable': 0}
+_module_versions = {}
+
+
+# --- invalidation log -------------------------------------------------------
+
+def _min_of(exprs):
+    """SQL for the smallest non-NULL value of exprs (NULL if all are NULL)."""
+    return '(SELECT MIN(v) FROM ({}))'.format(
+        ' UNION ALL '.join('SELECT {} AS v'.format(e) for e in exprs))
+
+
+def install(conn):
+    """Create report_change and its triggers on the watched tables. Idempotent; caller commits."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS report_change (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tenant_id TEXT NOT NULL,
+            source TEXT NOT NULL,
+            event_at TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_report_change_tenant ON report_change(tenant_id, seq)")
+    installed = []
+    for table, wanted in TIMESTAMP_COLUMNS.items():
+        columns = [r[1] for r in conn.execute("PRAGMA table_info({})".format(table))]
+        stamps = [c for c in wanted if c in columns]
+        if not stamps:
+            continue
+        changed = ['CASE WHEN OLD.{0} IS NOT NEW.{0} THEN {1}.{0} END'.format(c, side)
+                   for c in stamps for side in ('OLD', 'NEW')]
+        others = ' OR '.join('OLD.{0} IS NOT NEW.{0}'.format(c) for c in columns
+                             if c not in IGNORED_COLUMNS and c not in stamps)
+        # A status change stamped "now" (certification, clearance) still
+        # rewrites the row's past: the old timestamps count whenever another
+        # column moved.
+        update_at = _min_of(changed)
+        if others:
+            update_at = 'CASE WHEN {} THEN {} ELSE {} END'.format(
+                others, _min_of(changed + ['OLD.' + c for c in stamps]), update_at)
+        events = {
+            'INSERT': ('NEW', _min_of(['NEW.' + c for c in stamps]), None),
+            'DELETE': ('OLD', _min_of(['OLD.' + c for c in stamps]), None),
+            'UPDATE': ('NEW', update_at,
+                       ' OR '.join('OLD.{0} IS NOT NEW.{0}'.format(c) for c in columns
+                                   if c not in IGNORED_COLUMNS)),
+        }
+        for event, (row, event_at, when) in events.items():
+            name = 'trg_rc_{}_{}'.format(table, event.lower()[:3])
+            conn.execute('DROP TRIGGER IF EXISTS {}'.format(name))
+            conn.execute("""
+                CREATE TRIGGER {name} AFTER {event} ON {table}
+                {when}
+                BEGIN
+                    INSERT INTO report_change (tenant_id, source, event_at)
+                    SELECT {row}.tenant_id, '{table}', ev FROM (SELECT {event_at} AS ev)
+                    WHERE ev < strftime('%Y-%m-%d %H:%M:%S', 'now');
+                END
+            """.format(name=name, event=event, table=table, row=row, event_at=event_at,
+                       when='FOR EACH ROW WHEN ' + when if when else ''))
+            installed.append(name)
+    for table, wanted in CURRENT_STATE_COLUMNS.items():
+        columns = [r[1] for r in conn.execute("PRAGMA table_info({})".format(table))]
+        exprs = [w[1] if isinstance(w, tuple) else '{row}.' + w
+                 for w in wanted if (w[0] if isinstance(w, tuple) else w) in columns]
+        if not exprs:
+            continue
+        events = {
+            'INSERT': ('NEW', None),
+            'DELETE': ('OLD', None),
+            'UPDATE': ('NEW', ' OR '.join('({}) IS NOT ({})'.format(e.format(row='OLD'), e.format(row='NEW'))
+                                          for e in exprs)),
+        }
+        for event, (row, when) in events.items():
+            name = 'trg_rc_{}_state_{}'.format(table, event.lower()[:3])
+            conn.execute('DROP TRIGGER IF EXISTS {}'.format(name))
+            conn.execute("""
+                CREATE TRIGGER {name} AFTER {event} ON {table}
+                {when}
+                BEGIN
+                    INSERT INTO report_change (tenant_id, source, event_at)
+                    VALUES ({row}.tenant_id, '{table}', '{any_cutoff}');
+                END
+            """.format(name=name, event=event, table=table, row=row, any_cutoff=ANY_CUTOFF,
+                       when='FOR EACH ROW WHEN ' + when if when else ''))
+            installed.append(name)
+    return installed
+
+
+def _change_head():
+    """Highest report_change seq, None if the table is missing."""
+    try:
+        row = query_db("SELECT MAX(seq) AS v FROM report_change", one=True)
+    except sqlite3.OperationalError:
+        return None
+    return (row['v'] or 0) if row else 0
+
+
+def _changed_since(tenant_id, seq, cutoff):
+    row = query_db(
+        "SELECT 1 FROM report_change WHERE tenant_id = ? AND seq > ? AND event_at <= ? LIMIT 1",
+        [tenant_id, seq, cutoff], one=True)
+    return row is not None
+
+
+# --- storage ----------------------------------------------------------------
+
+def _cache_dir():
+    return os.environ.get('REPORT_CACHE_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(current_app.config['DATABASE_PATH'])), 'report_cache')
+
+
+def _module_version(module_name):
+    """Hash of the builder module's source, so a deploy that changes it misses."""
+    version = _module_versions.get(module_name)
+    if version is None:
+        path = getattr(sys.modules.get(module_name), '__file__', None)
+        version = ''
+        if path:
+            with open(path, 'rb') as f:
+                version = hashlib.sha1(f.read()).hexdigest()[:12]
+        _module_versions[module_name] = version
+    return version
+
+
+def _path(report, tenant_id, cutoff, params):
+    digest = hashlib.sha1(json.dumps([report, tenant_id, cutoff, params], sort_keys=True,
+                                     default=str).encode()).hexdigest()[:16]
+    return os.path.join(_cache_dir(), '{}-{}.json.gz'.format(report, digest))
+
+
+def _encode(value):
+    """JSON-safe form of report data, tagging the types JSON would lose."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value) and '__t' not in value:
+            return {k: _encode(v) for k, v in value.items()}
+        return {'__t': 'map', 'v': [[_encode(k), _encode(v)] for k, v in value.items()]}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, tuple):
+        return {'__t': 'tuple', 'v': [_encode(v) for v in value]}
+    if isinstance(value, datetime):
+        return {'__t': 'datetime', 'v': value.isoformat()}
+    if isinstance(value, date):
+        return {'__t': 'date', 'v': value.isoformat()}
+    if isinstance(value, sqlite3.Row):
+        return _encode(dict(value))
+    raise TypeError('report cache cannot store {}'.format(type(value).__name__))
+
+
+def _decode_hook(obj):
+    tag = obj.get('__t')
+    if tag == 'map':
+        return {k: v for k, v in obj['v']}
+    if tag == 'tuple':
+        return tuple(obj['v'])
+    if tag == 'datetime':
+        return datetime.fromisoformat(obj['v'])
+    if tag == 'date':
+        return date.fromisoformat(obj['v'])
+    return obj
+
+
+def _read(path):
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f, object_hook=_decode_hook)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write(path, entry):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+    with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=6) as f:
+        json.dump(entry, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def _count(stat):
+    with _lock:
+        _stats[stat] += 1
+
+
+# --- public -----------------------------------------------------------------
+
+def cached_report(report, tenant_id, cutoff, compute, params=None):
+    """Return compute() for (report, tenant_id, cutoff, params), from disk while still valid.
+
+    cutoff is the report's 'YYYY-MM-DD HH:MM:SS' UTC snapshot moment, or None
+    for a current-state report. compute must be defined in the builder's module
+    (its source is part of the cache version).
+    """
+    if cutoff is not None:
+        if cutoff >= datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'):
+            _count('uncached')
+            return compute()
+        version = _change_head()
+    else:
+        version = tenant_version(tenant_id)
+    if version is None:
+        _count('uncached')
+        return compute()
+
+    code = _module_version(compute.__module__)
+    path = _path(report, tenant_id, cutoff, params)
+    entry = _read(path)
+    if entry is not None:
+        if (entry.get('code') == code and time.time() - entry.get('stored_at', 0) < MAX_AGE_S
+                and (entry['version'] == version if cutoff is None
+                     else not _changed_since(tenant_id, entry['version'], cutoff))):
+            _count('hits')
+            return entry['data']
+        _count('stale')
+    else:
+        _count('misses')
+
+    started = time.perf_counter()
+    value = compute()
+    try:
+        encoded = _encode(value)
+    except TypeError:
+        _count('unencodable')
+        return value
+    _write(path, {'report': report, 'tenant_id': tenant_id, 'cutoff': cutoff, 'params': params,
+                  'version': version, 'code': code, 'stored_at': time.time(),
+                  'compute_ms': round((time.perf_counter() - started) * 1000, 1),
+                  'data': encoded})
+    return value
+
+
+def clear(report=None):
+    """Delete cached entries (one report or all). Returns files removed."""
+    folder = _cache_dir()
+    if not os.path.isdir(folder):
+        return 0
+    removed = 0
+    for name in os.listdir(folder):
+        if name.endswith('.json.gz') and (report is None or name.startswith(report + '-')):
+            os.remove(os.path.join(folder, name))
+            removed += 1
+    return removed
+
+
+def get_report_cache_stats():
+    folder = _cache_dir()
+    names = [n for n in os.listdir(folder) if n.endswith('.json.gz')] if os.path.isdir(folder) else []
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses'] + _stats['stale']
+        return dict(_stats, entries=len(names),
+                    disk_kb=round(sum(os.path.getsize(os.path.join(folder, n)) for n in names) / 1024, 1),
+                    max_age_s=MAX_AGE_S,
+                    hit_rate=round(_stats['hits'] / lookups, 3) if lookups else None)
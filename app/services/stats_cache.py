@@ -0,0 +1,88 @@
+"""
+Tenant statistics cache.
+
+Small tenant-wide aggregates (defect quartile thresholds, project unit totals)
+that are expensive to scan but only move on review/approval events. Values are
+stored as JSON in the stat_cache table (scripts/migrate_stat_cache.py) so every
+gunicorn worker shares them, with the compute time recorded per entry.
+
+An entry is recomputed when it is missing, older than its TTL, or invalidated
+by a review/approval route (invalidate_stats). Without the table the compute
+function simply runs every time, exactly as before. A recomputed value is
+stored on its own short-lived connection, so a read helper never commits the
+caller's pending writes; if that write cannot get the lock quickly the value
+is simply not cached this time.
+
+Usage:
+    from app.services.stats_cache import cached_stat, invalidate_stats
+
+    q1, q3 = cached_stat(tenant_id, 'defect_thresholds', lambda: _compute(tenant_id))
+    invalidate_stats(db, tenant_id)          # inside the review transaction
+"""
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone, timedelta
+
+from app.services.db import connect, get_db
+
+DEFAULT_TTL_S = int(os.environ.get('STAT_CACHE_TTL', '3600'))
+# A cache write never waits long behind another writer - it is only a cache.
+STORE_BUSY_TIMEOUT_MS = 200
+
+
+def cached_stat(tenant_id, key, compute, ttl=DEFAULT_TTL_S):
+    """Return the cached value for (tenant_id, key), recomputing if missing or stale."""
+    db = get_db()
+    try:
+        row = db.execute(
+            "SELECT value_json, computed_at FROM stat_cache WHERE tenant_id = ? AND stat_key = ?",
+            [tenant_id, key]).fetchone()
+    except sqlite3.OperationalError:
+        return compute()
+
+    if row:
+        computed_at = datetime.strptime(row['computed_at'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) - computed_at < timedelta(seconds=ttl):
+            return json.loads(row['value_json'])
+
+    started = time.perf_counter()
+    value = compute()
+    compute_ms = round((time.perf_counter() - started) * 1000, 1)
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    _store(tenant_id, key, value, now, compute_ms)
+    return value
+
+
+def _store(tenant_id, key, value, computed_at, compute_ms):
+    try:
+        conn = connect()
+    except sqlite3.Error:
+        return
+    try:
+        conn.execute('PRAGMA busy_timeout = {}'.format(STORE_BUSY_TIMEOUT_MS))
+        conn.execute("""
+            INSERT OR REPLACE INTO stat_cache (tenant_id, stat_key, value_json, computed_at, compute_ms)
+            VALUES (?, ?, ?, ?, ?)
+        """, [tenant_id, key, json.dumps(value), computed_at, compute_ms])
+        conn.commit()
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
+
+
+def invalidate_stats(db, tenant_id, *keys):
+    """Drop cached stats for a tenant (all keys if none given). Caller commits."""
+    try:
+        if keys:
+            db.execute(
+                "DELETE FROM stat_cache WHERE tenant_id = ? AND stat_key IN ({})".format(
+                    ','.join('?' * len(keys))),
+                [tenant_id] + list(keys))
+        else:
+            db.execute("DELETE FROM stat_cache WHERE tenant_id = ?", [tenant_id])
+    except sqlite3.OperationalError:
+        pass
+
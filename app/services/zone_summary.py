@@ -0,0 +1,189 @@
+"""
+Zone summary - the analytics dashboard's block+floor cards in one table.
+
+The dashboard used to stitch six grouped queries over unit_real, defect and
+inspection on every load. zone_summary holds one row per (tenant, block, floor)
+of real units with every card number precomputed:
+
+    total_units     real units in the zone
+    open_defects    open round-1 defects raised by a reviewed inspection
+                    (non-test cycles)
+    inspected       units with a reviewed round-1 inspection
+    certified       units with a certified inspection
+    rounds_json     {round: units with a reviewed inspection in that round}
+
+Triggers on defect, inspection and unit re-derive the zones a write touches
+(a review or certification, a defect raised/cleared, a unit moved between
+floors) - one zone per unit, found through idx_unit_zone, so a write costs
+the units of its own zone, not the project; rebuild() repopulates everything. Without the table the same rows are
+derived inline, so the dashboard is one query either way.
+
+Install/rebuild:  python3 scripts/rebuild_zone_summary.py
+Consistency:      python3 scripts/diagnostics/check_zone_summary.py
+
+Usage:
+    from app.services.zone_summary import zone_rows
+
+    for z in zone_rows(tenant_id):
+        z['block'], z['floor'], z['open_defects'], z['rounds']   # rounds: {1: 40, 2: 12}
+"""
+import json
+import sqlite3
+
+from app.services.db import query_db
+from app.services.defect_cohorts import REVIEWED_GATE, GATE_SQL
+
+ZONE_COLUMNS = 'tenant_id, block, floor, total_units, open_defects, inspected, certified, rounds_json'
+
+# Same zone as z: unit_real alias {a}.
+_IN_ZONE = "{a}.tenant_id = z.tenant_id AND {a}.block IS z.block AND {a}.floor IS z.floor"
+
+# One row per zone of real units; {where} narrows the units (alias u) for trigger refreshes.
+ZONE_SELECT = """
+    SELECT z.tenant_id, z.block, z.floor, z.total_units,
+           (SELECT COUNT(*) FROM defect d JOIN unit_real u2 ON d.unit_id = u2.id
+            WHERE {zone2} AND d.tenant_id = z.tenant_id AND d.status = 'open'
+            AND d.raised_cycle_id NOT LIKE 'test-%' AND d.raised_cycle_number = 1
+            AND {gate}) AS open_defects,
+           (SELECT COUNT(DISTINCT i.unit_id) FROM inspection i JOIN unit_real u2 ON i.unit_id = u2.id
+            WHERE {zone2} AND i.tenant_id = z.tenant_id AND i.cycle_id NOT LIKE 'test-%'
+            AND i.status IN ({statuses}) AND i.cycle_number = 1) AS inspected,
+           (SELECT COUNT(DISTINCT i.unit_id) FROM inspection i JOIN unit_real u2 ON i.unit_id = u2.id
+            WHERE {zone2} AND i.tenant_id = z.tenant_id AND i.cycle_id NOT LIKE 'test-%'
+            AND i.status = 'certified') AS certified,
+           (SELECT json_group_object(r.cycle_number, r.n) FROM (
+                SELECT i.cycle_number, COUNT(DISTINCT i.unit_id) AS n
+                FROM inspection i JOIN unit_real u2 ON i.unit_id = u2.id
+                WHERE {zone2} AND i.tenant_id = z.tenant_id AND i.cycle_id NOT LIKE 'test-%'
+                AND i.status IN ({statuses}) AND i.cycle_number IS NOT NULL
+                GROUP BY i.cycle_number ORDER BY i.cycle_number) r) AS rounds_json
+    FROM (SELECT u.tenant_id, u.block, u.floor, COUNT(DISTINCT u.id) AS total_units
+          FROM unit_real u WHERE {{where}}
+          GROUP BY u.tenant_id, u.block, u.floor) z
+""".format(zone2=_IN_ZONE.format(a='u2'), gate=REVIEWED_GATE, statuses=GATE_SQL)
+
+# One zone, given as (tenant, block, floor) SQL expressions, on alias {a}. The
+# zone_summary UNIQUE key and idx_unit_zone make every refresh an index search:
+# only the zone's units, then their defects / inspections by unit_id.
+_ZONE_IS = "{{a}}.tenant_id = {t} AND {{a}}.block IS {b} AND {{a}}.floor IS {f}"
+
+
+def _zone_of_unit(unit_id):
+    """Zone of the unit row unit_id (an OLD./NEW. column) as _ZONE_IS arguments."""
+    return {k: '(SELECT {} FROM unit WHERE id = {})'.format(c, unit_id)
+            for k, c in (('t', 'tenant_id'), ('b', 'block'), ('f', 'floor'))}
+
+
+def _zone_of_row(row):
+    """Zone of a unit trigger's OLD / NEW row as _ZONE_IS arguments."""
+    return {'t': row + '.tenant_id', 'b': row + '.block', 'f': row + '.floor'}
+
+
+_SAME_UNIT_ZONE = 'OLD.tenant_id IS NEW.tenant_id AND OLD.block IS NEW.block AND OLD.floor IS NEW.floor'
+
+# (trigger name, table, event, WHEN clause or None,
+#  [(zone, skip-if condition or None), ...]) - each zone is refreshed in turn;
+# the second zone of an UPDATE is skipped when it is the first one again.
+_REFRESH_TRIGGERS = [
+    ('trg_zs_defect_ins', 'defect', 'INSERT', None, [(_zone_of_unit('NEW.unit_id'), None)]),
+    ('trg_zs_defect_upd', 'defect', 'UPDATE',
+     'OLD.status IS NOT NEW.status OR OLD.unit_id IS NOT NEW.unit_id OR OLD.tenant_id IS NOT NEW.tenant_id '
+     'OR OLD.raised_cycle_id IS NOT NEW.raised_cycle_id '
+     'OR OLD.raised_cycle_number IS NOT NEW.raised_cycle_number',
+     [(_zone_of_unit('OLD.unit_id'), None), (_zone_of_unit('NEW.unit_id'), 'OLD.unit_id IS NEW.unit_id')]),
+    ('trg_zs_defect_del', 'defect', 'DELETE', None, [(_zone_of_unit('OLD.unit_id'), None)]),
+    ('trg_zs_inspection_ins', 'inspection', 'INSERT', None, [(_zone_of_unit('NEW.unit_id'), None)]),
+    ('trg_zs_inspection_upd', 'inspection', 'UPDATE',
+     'OLD.status IS NOT NEW.status OR OLD.unit_id IS NOT NEW.unit_id OR OLD.tenant_id IS NOT NEW.tenant_id '
+     'OR OLD.cycle_id IS NOT NEW.cycle_id OR OLD.cycle_number IS NOT NEW.cycle_number',
+     [(_zone_of_unit('OLD.unit_id'), None), (_zone_of_unit('NEW.unit_id'), 'OLD.unit_id IS NEW.unit_id')]),
+    ('trg_zs_inspection_del', 'inspection', 'DELETE', None, [(_zone_of_unit('OLD.unit_id'), None)]),
+    ('trg_zs_unit_ins', 'unit', 'INSERT', None, [(_zone_of_row('NEW'), None)]),
+    ('trg_zs_unit_upd', 'unit', 'UPDATE',
+     'OLD.block IS NOT NEW.block OR OLD.floor IS NOT NEW.floor OR OLD.unit_number IS NOT NEW.unit_number '
+     'OR OLD.tenant_id IS NOT NEW.tenant_id OR OLD.id IS NOT NEW.id',
+     [(_zone_of_row('OLD'), None), (_zone_of_row('NEW'), _SAME_UNIT_ZONE)]),
+    ('trg_zs_unit_del', 'unit', 'DELETE', None, [(_zone_of_row('OLD'), None)]),
+]
+
+
+def _refresh(zone, skip):
+    """Trigger statements re-deriving one zone's row."""
+    test = ' AND NOT ({})'.format(skip) if skip else ''
+    return """
+                DELETE FROM zone_summary WHERE {old_zone}{test};
+                INSERT INTO zone_summary ({columns}) {select};""".format(
+        old_zone=_ZONE_IS.format(**zone).format(a='zone_summary'), test=test, columns=ZONE_COLUMNS,
+        select=ZONE_SELECT.format(where=_ZONE_IS.format(**zone).format(a='u') + test))
+
+
+def install(conn):
+    """Create zone_summary, idx_unit_zone and the maintenance triggers. Idempotent; caller commits."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS zone_summary (
+            tenant_id TEXT NOT NULL,
+            block TEXT,
+            floor INTEGER,
+            total_units INTEGER NOT NULL,
+            open_defects INTEGER NOT NULL,
+            inspected INTEGER NOT NULL,
+            certified INTEGER NOT NULL,
+            rounds_json TEXT,
+            UNIQUE(tenant_id, block, floor)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_unit_zone ON unit(tenant_id, block, floor)")
+    for name, table, event, when, zones in _REFRESH_TRIGGERS:
+        conn.execute('DROP TRIGGER IF EXISTS {}'.format(name))
+        conn.execute("""
+            CREATE TRIGGER {name} AFTER {event} ON {table}
+            {when}
+            BEGIN{body}
+            END
+        """.format(name=name, event=event, table=table,
+                   body=''.join(_refresh(zone, skip) for zone, skip in zones),
+                   when='FOR EACH ROW WHEN ' + when if when else ''))
+
+
+def rebuild(conn, tenant_id=None):
+    """Repopulate zone_summary (one tenant or all). Returns zones written; caller commits."""
+    if tenant_id:
+        conn.execute("DELETE FROM zone_summary WHERE tenant_id = ?", [tenant_id])
+        cur = conn.execute("INSERT INTO zone_summary ({}) {}".format(
+            ZONE_COLUMNS, ZONE_SELECT.format(where='u.tenant_id = ?')), [tenant_id])
+    else:
+        conn.execute("DELETE FROM zone_summary")
+        cur = conn.execute("INSERT INTO zone_summary ({}) {}".format(
+            ZONE_COLUMNS, ZONE_SELECT.format(where='1')))
+    return cur.rowcount
+
+
+def _decode(row):
+    zone = dict(row)
+    zone['rounds'] = {int(k): v for k, v in json.loads(zone.pop('rounds_json') or '{}').items()}
+    return zone
+
+
+def zone_rows(tenant_id):
+    """Zone cards for a tenant ordered by block, floor; derived inline if the table is missing."""
+    sql = "SELECT {} FROM {{zones}} WHERE tenant_id = ? ORDER BY block, floor".format(ZONE_COLUMNS)
+    try:
+        rows = query_db(sql.format(zones='zone_summary'), [tenant_id])
+    except sqlite3.OperationalError as e:
+        if 'zone_summary' not in str(e):
+            raise
+        rows = query_db(sql.format(zones='({})'.format(ZONE_SELECT.format(where='u.tenant_id = ?'))),
+                        [tenant_id, tenant_id])
+    return [_decode(r) for r in rows]
+
+
+def check(conn, tenant_id=None):
+    """Stored zones vs a fresh derivation: list of (tenant, block, floor, stored, derived) that differ."""
+    where, args = ('u.tenant_id = ?', [tenant_id]) if tenant_id else ('1', [])
+    derived = {tuple(r[:3]): tuple(r[3:]) for r in conn.execute(ZONE_SELECT.format(where=where), args)}
+    stored = {tuple(r[:3]): tuple(r[3:]) for r in conn.execute(
+        "SELECT {} FROM zone_summary{}".format(ZONE_COLUMNS, ' WHERE tenant_id = ?' if tenant_id else ''),
+        args)}
+    return [key + (stored.get(key), derived.get(key))
+            for key in sorted(set(stored) | set(derived), key=repr)
+            if stored.get(key) != derived.get(key)]
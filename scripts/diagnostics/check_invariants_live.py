@@ -8,21 +8,21 @@ post-deploy gate run from the Render console.
 
 The three rule queries now live in scripts/diagnostics/invariant_rules.py so that
 this live runner AND the CI gate (tests/test_invariants.py) share ONE definition.
-This file owns the live DB path and the production baselines; it does not redefine
-rule logic.
+This file owns the production baselines; it does not redefine rule logic. The DB
+comes from app/services/db.py (DATABASE_PATH, else /var/data/inspections.db), so
+the same check runs locally against a copy: DATABASE_PATH=copy.db python3 ...
 
 Source of truth = these rules against the live DB, NOT any handover prose.
 """
 import os
-import sqlite3
 import sys
 
 # Import the shared rule definitions. Works whether run from /app (Render) or repo
 # root: add this file's own directory to the path so the sibling module resolves.
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from invariant_rules import RULES
-
-DB_PATH = "/var/data/inspections.db"
+from app.services.db import connect
 
 # Known-good baselines. A rule PASSES iff its count == baseline.
 # R1: residual CEI pollution after the v421/v426 repairs. Proven 0.
@@ -32,7 +32,7 @@ BASELINES = {"R1": 0, "R2": 1, "R3": 0}
 
 
 def main():
-    c = sqlite3.connect(DB_PATH)
+    c = connect(readonly=True)  # $DATABASE_PATH, else /var/data/inspections.db
     cur = c.cursor()
     any_fail = False
     print("=== INVARIANT CHECK (live, read-only) ===")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+check_zone_summary.py - zone_summary consistency check for the analytics dashboard.
+
+Compares every stored zone_summary row with the same zone derived fresh from
+unit_real / defect / inspection (app/services/zone_summary.py) and lists the
+zones that drifted: a bulk import or raw SQL that bypassed the triggers, or a
+trigger dropped by a migration.
+
+Read-only unless --repair, which rebuilds the drifted tenants and re-checks.
+Exits 0 if every zone matches (or was repaired), 1 otherwise. Suitable as a
+post-deploy gate run from the Render console.
+
+Usage:
+    python3 scripts/diagnostics/check_zone_summary.py [--tenant MONOGRAPH] [--repair]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.services.zone_summary import check, rebuild
+
+DB_PATH = os.environ.get('DATABASE_PATH', '/var/data/inspections.db')
+FIELDS = ('total_units', 'open_defects', 'inspected', 'certified', 'rounds_json')
+
+
+def report(drift):
+    for tenant_id, block, floor, stored, derived in drift[:50]:
+        if stored is None or derived is None:
+            print(f"  [{tenant_id}] {block} / {floor}: {'missing' if stored is None else 'stale zone'}")
+            continue
+        diffs = ', '.join(f"{f} {s} -> {d}" for f, s, d in zip(FIELDS, stored, derived) if s != d)
+        print(f"  [{tenant_id}] {block} / {floor}: {diffs}")
+    if len(drift) > 50:
+        print(f"  ... {len(drift) - 50} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tenant', help='check one tenant')
+    parser.add_argument('--repair', action='store_true', help='rebuild drifted tenants')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    print("=== ZONE SUMMARY CHECK ===")
+    try:
+        drift = check(conn, args.tenant)
+    except sqlite3.OperationalError as e:
+        print(f"ERROR: {e} (run scripts/rebuild_zone_summary.py)")
+        sys.exit(1)
+    print(f"zones drifted: {len(drift)}")
+    report(drift)
+    if drift and args.repair:
+        for tenant_id in sorted({d[0] for d in drift}):
+            print(f"  REBUILT [{tenant_id}]: {rebuild(conn, tenant_id)} zones")
+        conn.commit()
+        drift = check(conn, args.tenant)
+        print(f"zones drifted after repair: {len(drift)}")
+    conn.close()
+    print("=== RESULT:", "CONSISTENT" if not drift else "DRIFT PRESENT", "===")
+    sys.exit(1 if drift else 0)
+
+
+if __name__ == "__main__":
+    main()
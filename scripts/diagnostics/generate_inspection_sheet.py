@@ -38,14 +38,16 @@ Writes /tmp/Unit_<n>_Inspection_Sheet.xlsx per unit (override dir with --out).
 ASCII only. Read-only w.r.t. the DB. No hardcoded per-unit data -- every row is
 sourced live. Nothing about layout is guessed: it mirrors the sample workbooks.
 """
+import os
 import sys
-import sqlite3
 import argparse
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 
-DB = "/var/data/inspections.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from app.services.db import connect as _connect
+
 TENANT = "MONOGRAPH"
 
 # ---- format constants (mirrored verbatim from the sample sheets) -------------
@@ -73,9 +75,7 @@ STATUS_IN = ("pending", "not_to_standard", "not_installed", "skipped")
 
 
 def connect():
-    c = sqlite3.connect(DB)
-    c.row_factory = sqlite3.Row
-    return c
+    return _connect(readonly=True)
 
 
 def resolve_unit(c, unit_number):
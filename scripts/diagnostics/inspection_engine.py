@@ -30,9 +30,13 @@ template, MINUS structural ground-only-above-GF, plus latents as separate lines.
 So: len(line rows) == Items to Mark, and sheet checkpoints == PTV. Identical
 arithmetic to the workbook -- by construction, not by coincidence.
 """
-import sqlite3
+import os
+import sys
 
-DB_DEFAULT = "/var/data/inspections.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from app.services.db import connect as _connect, database_path
+
+DB_DEFAULT = database_path()  # $DATABASE_PATH, else data/inspections.db
 TENANT = "MONOGRAPH"
 
 LINE_STATUSES = ("pending", "not_to_standard", "not_installed", "skipped")
@@ -52,9 +56,7 @@ STATUS_DISPLAY = {
 
 
 def connect(db_path=DB_DEFAULT):
-    c = sqlite3.connect(db_path)
-    c.row_factory = sqlite3.Row
-    return c
+    return _connect(db_path, readonly=True)
 
 
 def all_units(c):
@@ -0,0 +1,169 @@
+"""
+Migration: change_log table + triggers
+Unit-scoped write log used by the live monitor delta feed.
+
+Every write that can change a live monitor card or an inspection area
+(inspection status/timing, item marks, chips, defects, latents, category
+comments, batch roster) appends one row keyed by unit_id. Readers ask "what
+is the max seq for these units" (version) and "which units have seq > N"
+(delta) - both indexed.
+
+Defect library edits are logged with unit_id NULL (tenant-scoped).
+
+Triggers (not route code) so that console scripts and imports are captured too.
+UPDATE triggers without an explicit WHEN fire only when a column other than
+the touch-only / derived ones in UNLOGGED_COLUMNS changed; the column list is
+read from the table when the migration runs, so re-run it after adding columns.
+Safe to run multiple times.
+
+Old rows are pruned automatically (app/services/change_log.py prune_if_due,
+CHANGE_LOG_KEEP_DAYS); --prune does the same on demand.
+
+Run on Render console:
+    python3 /app/scripts/migrate_change_log.py
+    python3 /app/scripts/migrate_change_log.py --prune 7    # drop rows older than 7 days
+"""
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.change_log import prune as prune_change_log
+
+DB_PATH = os.environ.get('DATABASE_PATH', '/var/data/inspections.db')
+
+# Columns whose changes never reach a rendered view: bumping them alone is not logged.
+UNLOGGED_COLUMNS = {
+    '*': ('updated_at',),
+    # Derived by app/services/inspection_metrics.py triggers from columns that
+    # are logged themselves: their recompute is not a change of its own.
+    'inspection': ('duration_seconds', 'attributed_defects'),
+}
+
+# (trigger name, table, event, WHEN clause or None, tenant expr, unit expr)
+TRIGGERS = [
+    ('trg_cl_inspection_ins', 'inspection', 'INSERT', None,
+     'NEW.tenant_id', 'NEW.unit_id'),
+    ('trg_cl_inspection_upd', 'inspection', 'UPDATE', None,
+     'NEW.tenant_id', 'NEW.unit_id'),
+    ('trg_cl_inspection_del', 'inspection', 'DELETE', None,
+     'OLD.tenant_id', 'OLD.unit_id'),
+    # Bulk item creation at inspection start is covered by the inspection INSERT.
+    ('trg_cl_item_upd', 'inspection_item', 'UPDATE',
+     'OLD.status IS NOT NEW.status OR OLD.marked_at IS NOT NEW.marked_at '
+     'OR OLD.comment IS NOT NEW.comment',
+     'NEW.tenant_id', '(SELECT unit_id FROM inspection WHERE id = NEW.inspection_id)'),
+    ('trg_cl_idef_ins', 'inspection_defect', 'INSERT', None,
+     'NEW.tenant_id', '(SELECT unit_id FROM inspection WHERE id = NEW.inspection_id)'),
+    ('trg_cl_idef_upd', 'inspection_defect', 'UPDATE', None,
+     'NEW.tenant_id', '(SELECT unit_id FROM inspection WHERE id = NEW.inspection_id)'),
+    ('trg_cl_idef_del', 'inspection_defect', 'DELETE', None,
+     'OLD.tenant_id', '(SELECT unit_id FROM inspection WHERE id = OLD.inspection_id)'),
+    ('trg_cl_defect_ins', 'defect', 'INSERT', None,
+     'NEW.tenant_id', 'NEW.unit_id'),
+    ('trg_cl_defect_upd', 'defect', 'UPDATE', None,
+     'NEW.tenant_id', 'NEW.unit_id'),
+    ('trg_cl_defect_del', 'defect', 'DELETE', None,
+     'OLD.tenant_id', 'OLD.unit_id'),
+    ('trg_cl_latent_ins', 'latent_area_note', 'INSERT', None,
+     'NEW.tenant_id', 'NEW.unit_id'),
+    ('trg_cl_latent_upd', 'latent_area_note', 'UPDATE', None,
+     'NEW.tenant_id', 'NEW.unit_id'),
+    ('trg_cl_latent_del', 'latent_area_note', 'DELETE', None,
+     'OLD.tenant_id', 'OLD.unit_id'),
+    ('trg_cl_batch_unit_ins', 'batch_unit', 'INSERT', None,
+     'NEW.tenant_id', 'NEW.unit_id'),
+    ('trg_cl_batch_unit_upd', 'batch_unit', 'UPDATE', None,
+     'NEW.tenant_id', 'NEW.unit_id'),
+    ('trg_cl_batch_unit_del', 'batch_unit', 'DELETE', None,
+     'OLD.tenant_id', 'OLD.unit_id'),
+    # Category comments show in the cached area checklist.
+    ('trg_cl_catcomment_ins', 'category_comment', 'INSERT', None,
+     'NEW.tenant_id', 'NEW.unit_id'),
+    ('trg_cl_catcomment_upd', 'category_comment', 'UPDATE', None,
+     'NEW.tenant_id', 'NEW.unit_id'),
+    ('trg_cl_catcomment_hist_ins', 'category_comment_history', 'INSERT', None,
+     'NEW.tenant_id', '(SELECT unit_id FROM category_comment WHERE id = NEW.category_comment_id)'),
+    # Tenant-scoped (unit_id NULL): library edits change the defects tracker.
+    ('trg_cl_library_ins', 'defect_library', 'INSERT', None,
+     'NEW.tenant_id', 'NULL'),
+    ('trg_cl_library_upd', 'defect_library', 'UPDATE',
+     'OLD.description IS NOT NEW.description OR OLD.item_template_id IS NOT NEW.item_template_id '
+     'OR OLD.category_name IS NOT NEW.category_name',
+     'NEW.tenant_id', 'NULL'),
+    ('trg_cl_library_del', 'defect_library', 'DELETE', None,
+     'OLD.tenant_id', 'NULL'),
+]
+
+
+def table_exists(cur, table):
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,))
+    return cur.fetchone() is not None
+
+
+def changed_columns_clause(cur, table):
+    """WHEN clause: some column outside UNLOGGED_COLUMNS changed."""
+    skip = set(UNLOGGED_COLUMNS['*']) | set(UNLOGGED_COLUMNS.get(table, ()))
+    cur.execute('PRAGMA table_info({})'.format(table))
+    columns = [r[1] for r in cur.fetchall() if r[1] not in skip]
+    return ' OR '.join('OLD.{0} IS NOT NEW.{0}'.format(c) for c in columns)
+
+
+def migrate(conn):
+    cur = conn.cursor()
+    print('=== MIGRATION: change_log ===')
+    print('Database: {}'.format(DB_PATH))
+    print()
+
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tenant_id TEXT NOT NULL,
+            unit_id TEXT,
+            source TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_change_log_unit ON change_log(unit_id, seq)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_change_log_tenant ON change_log(tenant_id, seq)')
+    print('  OK: change_log table + indexes')
+
+    for name, table, event, when, tenant_expr, unit_expr in TRIGGERS:
+        if not table_exists(cur, table):
+            print('  SKIP: {} ({} missing)'.format(name, table))
+            continue
+        if event == 'UPDATE' and when is None:
+            when = changed_columns_clause(cur, table)
+        cur.execute('DROP TRIGGER IF EXISTS {}'.format(name))
+        cur.execute('''
+            CREATE TRIGGER {name} AFTER {event} ON {table}
+            {when}
+            BEGIN
+                INSERT INTO change_log (tenant_id, unit_id, source)
+                VALUES ({tenant}, {unit}, '{table}');
+            END
+        '''.format(name=name, event=event, table=table,
+                   when='FOR EACH ROW WHEN ' + when if when else '',
+                   tenant=tenant_expr, unit=unit_expr))
+        print('  OK: {}'.format(name))
+
+    conn.commit()
+
+
+def prune(conn, days):
+    print('  PRUNED: {} rows older than {} days'.format(prune_change_log(conn, days), days))
+
+
+if __name__ == '__main__':
+    if not os.path.exists(DB_PATH):
+        print('ERROR: Database not found at {}'.format(DB_PATH))
+        sys.exit(1)
+    conn = sqlite3.connect(DB_PATH)
+    if len(sys.argv) == 3 and sys.argv[1] == '--prune':
+        prune(conn, sys.argv[2])
+    else:
+        migrate(conn)
+    conn.close()
+    print()
+    print('=== DONE ===')
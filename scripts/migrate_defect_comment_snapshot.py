@@ -0,0 +1,148 @@
+"""
+Migration: defect comment snapshots
+Denormalised defect_history reads, maintained on write.
+
+  defect_comment_snapshot    one row per (defect, cycle the defect was logged in):
+                             the last comment written in that cycle, valid from
+                             cycle_number up to (not including) next_cycle_number
+
+"Comment as of cycle N" is then a plain join:
+    s.defect_id = d.id AND s.cycle_number <= N
+    AND (s.next_cycle_number IS NULL OR s.next_cycle_number > N)
+
+Triggers on defect_history (not route code) keep it in step, so console
+scripts and cleanups are covered too. The backfill rebuilds it from existing
+history. Safe to run multiple times.
+
+Earlier versions also kept a defect.first_comment column that nothing read;
+it is dropped here (and its writes with it, which also fired the defect
+UPDATE triggers on every history insert).
+
+Run on Render console:
+    python3 /app/scripts/migrate_defect_comment_snapshot.py
+    python3 /app/scripts/migrate_defect_comment_snapshot.py --backfill   # rebuild only
+"""
+import os
+import sqlite3
+import sys
+
+DB_PATH = os.environ.get('DATABASE_PATH', '/var/data/inspections.db')
+
+# Latest history row per (defect, cycle number), chained to the next logged cycle.
+# (Subquery, not WITH: CTEs are not allowed inside trigger bodies.)
+SNAPSHOT_SELECT = '''
+    SELECT defect_id, cycle_number,
+           LEAD(cycle_number) OVER (PARTITION BY defect_id ORDER BY cycle_number),
+           cycle_id, comment, tenant_id
+    FROM (
+        SELECT dh.defect_id, dh.tenant_id, dh.cycle_id, dh.comment, ic.cycle_number,
+               ROW_NUMBER() OVER (PARTITION BY dh.defect_id, ic.cycle_number
+                                  ORDER BY dh.created_at DESC, dh.rowid DESC) AS rn
+        FROM defect_history dh
+        JOIN inspection_cycle ic ON ic.id = dh.cycle_id
+        {where}
+    )
+    WHERE rn = 1
+'''
+
+SNAPSHOT_COLUMNS = 'defect_id, cycle_number, next_cycle_number, cycle_id, comment, tenant_id'
+
+CYCLE_NUMBER = '(SELECT cycle_number FROM inspection_cycle WHERE id = NEW.cycle_id)'
+
+TRIGGERS = [
+    # New history row: upsert its cycle's snapshot (unless a later-dated comment
+    # already holds it - same order as SNAPSHOT_SELECT), re-point the previous
+    # cycle at it.
+    ('trg_dcs_history_ins', 'INSERT', '''
+        INSERT OR REPLACE INTO defect_comment_snapshot ({columns})
+        SELECT NEW.defect_id, ic.cycle_number,
+               (SELECT MIN(s.cycle_number) FROM defect_comment_snapshot s
+                WHERE s.defect_id = NEW.defect_id AND s.cycle_number > ic.cycle_number),
+               NEW.cycle_id, NEW.comment, NEW.tenant_id
+        FROM inspection_cycle ic WHERE ic.id = NEW.cycle_id
+        AND NOT EXISTS (
+            SELECT 1 FROM defect_history dh
+            JOIN inspection_cycle ic2 ON ic2.id = dh.cycle_id
+            WHERE dh.defect_id = NEW.defect_id AND ic2.cycle_number = ic.cycle_number
+            AND dh.created_at > NEW.created_at);
+        UPDATE defect_comment_snapshot SET next_cycle_number = {cycle_number}
+        WHERE defect_id = NEW.defect_id AND cycle_number = (
+            SELECT MAX(s.cycle_number) FROM defect_comment_snapshot s
+            WHERE s.defect_id = NEW.defect_id AND s.cycle_number < {cycle_number});
+    '''.format(columns=SNAPSHOT_COLUMNS, cycle_number=CYCLE_NUMBER)),
+    # Removed history (defect deletes, cleanups): rebuild that defect from what is left.
+    ('trg_dcs_history_del', 'DELETE', '''
+        DELETE FROM defect_comment_snapshot WHERE defect_id = OLD.defect_id;
+        INSERT INTO defect_comment_snapshot ({columns})
+        {select};
+    '''.format(columns=SNAPSHOT_COLUMNS,
+               select=SNAPSHOT_SELECT.format(where='WHERE dh.defect_id = OLD.defect_id'))),
+]
+
+
+def column_exists(cur, table, column):
+    cur.execute('PRAGMA table_info({})'.format(table))
+    return any(row[1] == column for row in cur.fetchall())
+
+
+def migrate(conn):
+    cur = conn.cursor()
+    print('=== MIGRATION: defect comment snapshots ===')
+    print('Database: {}'.format(DB_PATH))
+    print()
+
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS defect_comment_snapshot (
+            defect_id TEXT NOT NULL,
+            cycle_number INTEGER NOT NULL,
+            next_cycle_number INTEGER,
+            cycle_id TEXT NOT NULL,
+            comment TEXT,
+            tenant_id TEXT NOT NULL,
+            PRIMARY KEY (defect_id, cycle_number)
+        )
+    ''')
+    print('  OK: defect_comment_snapshot table')
+
+    for name, event, body in TRIGGERS:
+        cur.execute('DROP TRIGGER IF EXISTS {}'.format(name))
+        cur.execute('''
+            CREATE TRIGGER {name} AFTER {event} ON defect_history
+            BEGIN
+                {body}
+            END
+        '''.format(name=name, event=event, body=body))
+        print('  OK: {}'.format(name))
+
+    if column_exists(cur, 'defect', 'first_comment'):
+        try:
+            cur.execute('ALTER TABLE defect DROP COLUMN first_comment')
+            print('  OK: dropped unused defect.first_comment')
+        except sqlite3.OperationalError as e:
+            # SQLite < 3.35, or still named in change_log's defect triggers:
+            # harmless - nothing writes it any more.
+            print('  SKIP: defect.first_comment left in place ({})'.format(e))
+
+    conn.commit()
+
+
+def backfill(conn):
+    cur = conn.cursor()
+    cur.execute('DELETE FROM defect_comment_snapshot')
+    cur.execute('INSERT INTO defect_comment_snapshot ({}) {}'.format(
+        SNAPSHOT_COLUMNS, SNAPSHOT_SELECT.format(where='')))
+    print('  BACKFILL: {} snapshot rows'.format(cur.rowcount))
+    conn.commit()
+
+
+if __name__ == '__main__':
+    if not os.path.exists(DB_PATH):
+        print('ERROR: Database not found at {}'.format(DB_PATH))
+        sys.exit(1)
+    conn = sqlite3.connect(DB_PATH)
+    if sys.argv[1:] != ['--backfill']:
+        migrate(conn)
+    backfill(conn)
+    conn.close()
+    print()
+    print('=== DONE ===')
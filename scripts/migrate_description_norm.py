@@ -0,0 +1,78 @@
+"""
+Migration: normalised description columns + library-membership indexes
+"Is this description in the library" as an indexed equality lookup.
+
+Adds a VIRTUAL generated column desc_norm = LOWER(TRIM(...)) to:
+  defect_library  - of description
+  defect          - of COALESCE(reviewed_comment, original_comment)
+and indexes it, so needs-attention counts, the defects tracker and bulk
+rename lookups compare desc_norm = desc_norm instead of scanning with
+LOWER(TRIM()) per row.
+
+Generated columns are computed by SQLite on every write, so routes, library
+edits and console import scripts all keep them current with no code changes.
+Requires SQLite 3.31+. Safe to run multiple times.
+
+Run on Render console:
+    python3 /app/scripts/migrate_description_norm.py
+"""
+import os
+import sqlite3
+import sys
+
+DB_PATH = os.environ.get('DATABASE_PATH', '/var/data/inspections.db')
+
+# (table, generated expression)
+COLUMNS = [
+    ('defect_library', 'LOWER(TRIM(description))'),
+    ('defect', 'LOWER(TRIM(COALESCE(reviewed_comment, original_comment)))'),
+]
+
+INDEXES = [
+    ('idx_defect_library_cat_norm', 'defect_library', 'tenant_id, category_name, desc_norm'),
+    ('idx_defect_library_item_norm', 'defect_library', 'tenant_id, item_template_id, desc_norm'),
+    ('idx_defect_item_norm', 'defect', 'tenant_id, item_template_id, desc_norm'),
+]
+
+
+def has_column(cur, table, column):
+    # table_xinfo (not table_info) lists generated columns
+    cur.execute('PRAGMA table_xinfo({})'.format(table))
+    return column in [row[1] for row in cur.fetchall()]
+
+
+def migrate(conn):
+    cur = conn.cursor()
+    print('=== MIGRATION: description_norm ===')
+    print('Database: {}'.format(DB_PATH))
+    print('SQLite: {}'.format(sqlite3.sqlite_version))
+    print()
+
+    if sqlite3.sqlite_version_info < (3, 31, 0):
+        print('ERROR: generated columns need SQLite 3.31+')
+        sys.exit(1)
+
+    for table, expr in COLUMNS:
+        if has_column(cur, table, 'desc_norm'):
+            print('  SKIP: {}.desc_norm exists'.format(table))
+            continue
+        cur.execute('ALTER TABLE {} ADD COLUMN desc_norm TEXT GENERATED ALWAYS AS ({}) VIRTUAL'
+                    .format(table, expr))
+        print('  OK: {}.desc_norm'.format(table))
+
+    for name, table, cols in INDEXES:
+        cur.execute('CREATE INDEX IF NOT EXISTS {} ON {}({})'.format(name, table, cols))
+        print('  OK: {}'.format(name))
+
+    conn.commit()
+
+
+if __name__ == '__main__':
+    if not os.path.exists(DB_PATH):
+        print('ERROR: Database not found at {}'.format(DB_PATH))
+        sys.exit(1)
+    conn = sqlite3.connect(DB_PATH)
+    migrate(conn)
+    conn.close()
+    print()
+    print('=== DONE ===')
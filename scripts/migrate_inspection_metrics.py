@@ -0,0 +1,57 @@
+"""
+Migration: inspection duration_seconds + attributed_defects
+Stored per-inspection metrics behind the inspector audit trail
+(app/services/inspection_metrics.py).
+
+Adds the two columns to inspection, the (tenant_id, inspection_date) index the
+audit date-range filter uses, an index for C2+ defect attribution and the
+triggers that keep the columns current on inspection and defect writes, then
+backfills every inspection. Safe to run multiple times.
+
+Run on Render console:
+    python3 /app/scripts/migrate_inspection_metrics.py
+    python3 /app/scripts/migrate_inspection_metrics.py --tenant MONOGRAPH   # backfill one tenant
+"""
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.inspection_metrics import backfill, install
+
+DB_PATH = os.environ.get('DATABASE_PATH', '/var/data/inspections.db')
+
+
+def main(conn, tenant_id=None):
+    print('=== MIGRATION: inspection metrics ===')
+    print('Database: {}'.format(DB_PATH))
+    print()
+
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(inspection)")}
+    missing = {'started_at', 'submitted_at', 'paused_at', 'total_paused_seconds', 'cycle_number'} - columns
+    if missing:
+        print('ERROR: inspection is missing {} - run the earlier migrations first'.format(', '.join(sorted(missing))))
+        sys.exit(1)
+
+    added = install(conn)
+    for column in added:
+        print('  ADDED: inspection.{}'.format(column))
+    print('  OK: indexes + triggers')
+    rows = backfill(conn, tenant_id)
+    conn.commit()
+    timed = conn.execute("SELECT COUNT(*) FROM inspection WHERE duration_seconds IS NOT NULL").fetchone()[0]
+    print('  BACKFILLED: {} inspections ({} with a duration){}'.format(
+        rows, timed, ' for ' + tenant_id if tenant_id else ''))
+
+
+if __name__ == '__main__':
+    if not os.path.exists(DB_PATH):
+        print('ERROR: Database not found at {}'.format(DB_PATH))
+        sys.exit(1)
+    tenant = sys.argv[2] if len(sys.argv) == 3 and sys.argv[1] == '--tenant' else None
+    conn = sqlite3.connect(DB_PATH)
+    main(conn, tenant)
+    conn.close()
+    print()
+    print('=== DONE ===')
@@ -0,0 +1,65 @@
+"""
+Migration: report_change table + triggers
+Invalidation log for the on-disk report data cache (app/services/report_cache.py).
+
+Writes to inspection, defect, unit and latent_area_note that touch data
+stamped in the past append one row (tenant, source table, earliest affected
+timestamp); cached snapshot reports whose cutoff is at or after that timestamp
+recompute on their next view. Changes to the unit / batch_unit /
+inspection_batch columns the reports read as they are now invalidate every
+cutoff. Re-run after adding timestamp columns to those tables or changing
+the triggers (each run makes every cached report recompute once). Safe to run
+multiple times.
+
+Run on Render console:
+    python3 /app/scripts/migrate_report_cache.py
+    python3 /app/scripts/migrate_report_cache.py --prune 60   # drop rows older than 60 days
+"""
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.report_cache import ANY_CUTOFF, install
+
+DB_PATH = os.environ.get('DATABASE_PATH', '/var/data/inspections.db')
+
+
+def migrate(conn):
+    print('=== MIGRATION: report_change ===')
+    print('Database: {}'.format(DB_PATH))
+    print()
+    for name in install(conn):
+        print('  OK: {}'.format(name))
+    # Entries cached under earlier trigger definitions may have missed writes:
+    # recompute every tenant's reports once.
+    cur = conn.execute("""
+        INSERT INTO report_change (tenant_id, source, event_at)
+        SELECT DISTINCT tenant_id, 'migration', ? FROM unit
+    """, (ANY_CUTOFF,))
+    conn.commit()
+    print('  OK: report_change table + index')
+    print('  OK: invalidated cached reports for {} tenant(s)'.format(cur.rowcount))
+
+
+def prune(conn, days):
+    # Entries older than REPORT_CACHE_MAX_AGE recompute anyway; keep a margin above it.
+    cur = conn.execute("DELETE FROM report_change WHERE created_at < datetime('now', ?)",
+                       ('-{} days'.format(int(days)),))
+    conn.commit()
+    print('  PRUNED: {} rows older than {} days'.format(cur.rowcount, days))
+
+
+if __name__ == '__main__':
+    if not os.path.exists(DB_PATH):
+        print('ERROR: Database not found at {}'.format(DB_PATH))
+        sys.exit(1)
+    conn = sqlite3.connect(DB_PATH)
+    if len(sys.argv) == 3 and sys.argv[1] == '--prune':
+        prune(conn, sys.argv[2])
+    else:
+        migrate(conn)
+    conn.close()
+    print()
+    print('=== DONE ===')
@@ -0,0 +1,42 @@
+"""
+Migration: stat_cache table
+Shared cache for tenant-wide statistics (app/services/stats_cache.py):
+defect quartile thresholds for the live monitor, project unit totals.
+Safe to run multiple times.
+
+Run on Render console:
+    python3 /app/scripts/migrate_stat_cache.py
+"""
+import os
+import sqlite3
+import sys
+
+DB_PATH = os.environ.get('DATABASE_PATH', '/var/data/inspections.db')
+
+if not os.path.exists(DB_PATH):
+    print('ERROR: Database not found at {}'.format(DB_PATH))
+    sys.exit(1)
+
+conn = sqlite3.connect(DB_PATH)
+cur = conn.cursor()
+
+print('=== MIGRATION: stat_cache ===')
+print('Database: {}'.format(DB_PATH))
+print()
+
+cur.execute('''
+    CREATE TABLE IF NOT EXISTS stat_cache (
+        tenant_id TEXT NOT NULL,
+        stat_key TEXT NOT NULL,
+        value_json TEXT NOT NULL,
+        computed_at TIMESTAMP NOT NULL,
+        compute_ms REAL,
+        PRIMARY KEY (tenant_id, stat_key)
+    )
+''')
+conn.commit()
+print('  OK: stat_cache')
+
+conn.close()
+print()
+print('=== MIGRATION COMPLETE ===')
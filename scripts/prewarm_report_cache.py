@@ -0,0 +1,77 @@
+"""
+Prewarm the report data cache right after the fortnightly snapshot rollover.
+
+Builds the snapshot-mode pipeline report and site-meeting brief for every
+tenant so the first view / PDF download of a new fortnight is served from
+app/services/report_cache.py instead of recomputing. The snapshot moment is
+Tue 11:59 SAST (see analytics._snapshot_cycle); before it the cutoff is still
+in the future and is not cached, so the loop wakes a few minutes after it.
+
+Run on Render console (one-off):
+    python3 /app/scripts/prewarm_report_cache.py
+    python3 /app/scripts/prewarm_report_cache.py --clear   # drop all entries first
+
+Long-running (start.sh with REPORT_PREWARM=1):
+    python3 /app/scripts/prewarm_report_cache.py --loop
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import session
+
+from app import create_app
+from app.routes.analytics import (_cached_pipeline_report_data, _cached_site_meeting_brief_data,
+                                  _snapshot_cycle)
+from app.services.db import query_db
+from app.services.report_cache import clear
+
+# Minutes after the snapshot moment to wait before building (late reviews settle).
+PREWARM_DELAY_MIN = int(os.environ.get('REPORT_PREWARM_DELAY_MIN', '5'))
+
+
+def prewarm(app):
+    with app.app_context():
+        tenants = [r['tenant_id'] for r in query_db("SELECT DISTINCT tenant_id FROM project")]
+    for tenant_id in tenants:
+        for name, build in (('pipeline', _cached_pipeline_report_data),
+                            ('site_meeting_brief', _cached_site_meeting_brief_data)):
+            started = time.perf_counter()
+            with app.test_request_context():
+                session['tenant_id'] = tenant_id
+                build()
+            print('  WARM: {} {} ({:.1f}s)'.format(tenant_id, name, time.perf_counter() - started))
+
+
+def next_run_utc(now_utc):
+    """UTC time of the next snapshot moment + PREWARM_DELAY_MIN."""
+    now_sast = now_utc + timedelta(hours=2)
+    _, snapshot_sast = _snapshot_cycle(now_sast)
+    run_sast = snapshot_sast + timedelta(minutes=PREWARM_DELAY_MIN)
+    while run_sast <= now_sast:
+        run_sast += timedelta(days=14)
+    return run_sast - timedelta(hours=2)
+
+
+if __name__ == '__main__':
+    app = create_app()
+    if '--clear' in sys.argv:
+        with app.app_context():
+            print('  CLEARED: {} entries'.format(clear()))
+    if '--loop' not in sys.argv:
+        prewarm(app)
+        print()
+        print('=== DONE ===')
+        sys.exit(0)
+    while True:
+        run_at = next_run_utc(datetime.utcnow())
+        print('==> Report prewarm sleeping until {} UTC'.format(run_at.strftime('%Y-%m-%d %H:%M')))
+        time.sleep(max((run_at - datetime.utcnow()).total_seconds(), 0))
+        try:
+            prewarm(app)
+        except Exception as e:
+            print('  ERROR: prewarm failed: {}'.format(e))
+        time.sleep(60)
@@ -0,0 +1,53 @@
+"""
+Migration + rebuild: defect_rollup
+Pre-aggregated open defect counts behind the explore drill-down
+(app/services/defect_cohorts.py).
+
+Creates the table, its indexes and the maintenance triggers on defect,
+inspection and unit, then repopulates it from the defect table. Re-run after
+template moves (area/trade names are not trigger-maintained) or bulk imports
+that bypassed SQLite. Requires the unit_real view. Safe to run multiple times.
+
+Run on Render console:
+    python3 /app/scripts/rebuild_defect_rollup.py
+    python3 /app/scripts/rebuild_defect_rollup.py --tenant MONOGRAPH   # one tenant
+"""
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.defect_cohorts import install, rebuild
+
+DB_PATH = os.environ.get('DATABASE_PATH', '/var/data/inspections.db')
+
+
+def main(conn, tenant_id=None):
+    print('=== MIGRATION: defect_rollup ===')
+    print('Database: {}'.format(DB_PATH))
+    print()
+
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'unit_real'").fetchone():
+        print('ERROR: unit_real view missing')
+        sys.exit(1)
+
+    install(conn)
+    print('  OK: defect_rollup table + indexes + triggers')
+    rows = rebuild(conn, tenant_id)
+    conn.commit()
+    defects = conn.execute("SELECT COALESCE(SUM(defects), 0) FROM defect_rollup").fetchone()[0]
+    print('  REBUILT: {} rows ({} open defects){}'.format(
+        rows, defects, ' for ' + tenant_id if tenant_id else ''))
+
+
+if __name__ == '__main__':
+    if not os.path.exists(DB_PATH):
+        print('ERROR: Database not found at {}'.format(DB_PATH))
+        sys.exit(1)
+    tenant = sys.argv[2] if len(sys.argv) == 3 and sys.argv[1] == '--tenant' else None
+    conn = sqlite3.connect(DB_PATH)
+    main(conn, tenant)
+    conn.close()
+    print()
+    print('=== DONE ===')
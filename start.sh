@@ -1,6 +1,44 @@
 #!/bin/bash
-echo "==> Installing Chromium system dependencies..."
-playwright install-deps chromium
-echo "==> System deps installed"
+# Entrypoint for both the Docker image (Dockerfile CMD) and native deploys.
+# The Playwright base image already ships Chromium's system libs and sets
+# PLAYWRIGHT_DEPS_INSTALLED=1.
+if [ "$PLAYWRIGHT_DEPS_INSTALLED" != "1" ]; then
+    echo "==> Installing Chromium system dependencies..."
+    playwright install-deps chromium
+    echo "==> System deps installed"
+fi
+
+# Optional out-of-process PDF worker: one Chromium pool shared by all gunicorn
+# workers instead of one browser per worker. Enable with PDF_WORKER=1.
+if [ "$PDF_WORKER" = "1" ]; then
+    export PDF_WORKER_SOCKET="${PDF_WORKER_SOCKET:-/tmp/pdf_worker.sock}"
+    echo "==> Starting PDF worker on $PDF_WORKER_SOCKET (concurrency ${PDF_WORKER_CONCURRENCY:-1})..."
+    # Restarted if it dies; web workers render in-process until it is back.
+    ( while true; do
+        python3 -m app.services.pdf_worker
+        echo "==> PDF worker exited ($?), restarting in 2s"
+        sleep 2
+    done ) &
+    for i in $(seq 1 20); do
+        [ -S "$PDF_WORKER_SOCKET" ] && break
+        sleep 0.5
+    done
+    [ -S "$PDF_WORKER_SOCKET" ] || echo "==> PDF worker not up yet; web workers render in-process until it is"
+fi
+
+# Optional report cache prewarm: rebuilds the snapshot reports a few minutes
+# after each fortnightly Tuesday rollover. Enable with REPORT_PREWARM=1.
+if [ "$REPORT_PREWARM" = "1" ]; then
+    echo "==> Starting report cache prewarm loop..."
+    # Restarted if it dies; a missed prewarm only means a slower first view.
+    ( while true; do
+        python3 scripts/prewarm_report_cache.py --loop
+        echo "==> Report prewarm exited ($?), restarting in 60s"
+        sleep 60
+    done ) &
+fi
+
 echo "==> Starting gunicorn..."
-exec gunicorn 'app:create_app()' --bind 0.0.0.0:$PORT
+# Threaded workers: SSE streams (/batches/<id>/events) hold a thread each, capped
+# at SSE_MAX_STREAMS per worker (default GUNICORN_THREADS / 4); the rest poll.
+exec gunicorn 'app:create_app()' --bind 0.0.0.0:$PORT --threads ${GUNICORN_THREADS:-8}
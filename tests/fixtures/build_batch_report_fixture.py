@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+build_batch_report_fixture.py - synthetic batches for the batch report / site briefing parity test.
+
+Produces one SQLite file with two blocks x three floors, a round 1 cycle per
+zone, round 2 cycles on three zones and a round 3 on one, N units per zone (a
+few TEST units) and two batches:
+
+    batch-early   round 1 of A 2nd, B 1st, B 2nd (C1 only)
+    batch-mixed   round 1 of A Ground, A 1st, B Ground + round 2 of A 2nd, B 1st
+                  and round 3 of B 2nd (mixed), with a removed unit and a roster
+                  row from another tenant
+
+Inspections cover every workflow status (and some units are never inspected);
+defects are raised in each round, cleared in the next or left open, on a small
+area/category/item template that also has an item whose category is gone and a
+category whose area is gone. Comments repeat across units and include NULLs,
+blanks and stray whitespace. batch-mixed carries an exclusion list. Seeded random so
+the same N always builds the same file.
+Used by tests/test_batch_frame.py.
+
+Only the tables/columns the two builders read are created, plus the unit_real view.
+
+Run: python3 build_batch_report_fixture.py [path] [units_per_zone]
+"""
+import os
+import random
+import sqlite3
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCHEMA = """
+CREATE TABLE unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_number TEXT NOT NULL,
+    block TEXT,
+    floor INTEGER
+);
+CREATE VIEW unit_real AS SELECT * FROM unit WHERE unit_number NOT LIKE 'TEST%';
+CREATE TABLE inspection_cycle (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    block TEXT,
+    floor INTEGER,
+    cycle_number INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE inspection_batch (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    name TEXT,
+    status TEXT DEFAULT 'open',
+    created_at TEXT
+);
+CREATE TABLE batch_unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    batch_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    removed_at TEXT,
+    exclusion_list_id TEXT
+);
+CREATE TABLE inspection (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    cycle_number INTEGER,
+    status TEXT NOT NULL,
+    UNIQUE(unit_id, cycle_id)
+);
+CREATE TABLE area_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    area_name TEXT NOT NULL,
+    area_order INTEGER
+);
+CREATE TABLE category_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    area_id TEXT NOT NULL,
+    category_name TEXT NOT NULL,
+    category_order INTEGER
+);
+CREATE TABLE item_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    item_description TEXT,
+    item_order INTEGER
+);
+CREATE TABLE defect (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    item_template_id TEXT NOT NULL,
+    raised_cycle_id TEXT NOT NULL,
+    raised_cycle_number INTEGER,
+    cleared_cycle_id TEXT,
+    status TEXT NOT NULL DEFAULT 'open',
+    original_comment TEXT
+);
+CREATE TABLE exclusion_list (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    name TEXT,
+    created_at TEXT
+);
+CREATE TABLE exclusion_list_item (
+    id TEXT PRIMARY KEY,
+    exclusion_list_id TEXT NOT NULL,
+    item_template_id TEXT NOT NULL
+);
+CREATE INDEX idx_defect_unit ON defect(unit_id);
+CREATE INDEX idx_batch_unit_batch ON batch_unit(batch_id);
+"""
+
+T = "tenant-test"
+STATUSES = ['in_progress', 'submitted', 'reviewed', 'approved', 'certified', 'pending_followup']
+AREAS = {'KITCHEN': ['JOINERY', 'WALLS', 'PLUMBING'], 'BATHROOM': ['PLUMBING', 'WALLS'],
+         'BEDROOM': ['DOORS', 'FLOOR', 'WALLS'], 'LOUNGE': ['ELECTRICAL']}
+COMMENTS = ['Paint scuffed', 'Hinge loose', 'Grout missing', 'Sealant gap', 'Chipped edge',
+            'Paint scuffed ', 'Door sticks', '', 'Scratch on surface']
+ZONES = [(b, f) for b in 'AB' for f in range(3)]
+ROUNDS = {('A', 2): 2, ('B', 1): 2, ('B', 2): 3}
+# (batch, [(block, floor, round)])
+BATCHES = [
+    ('batch-early', [('A', 2, 1), ('B', 1, 1), ('B', 2, 1)]),
+    ('batch-mixed', [('A', 0, 1), ('A', 1, 1), ('B', 0, 1), ('A', 2, 2), ('B', 1, 2), ('B', 2, 3)]),
+]
+
+
+def cycle_id(block, floor, number):
+    return 'cyc-{}{}-{}'.format(block, floor, number)
+
+
+def build(path, units_per_zone=12):
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(units_per_zone)
+    c = sqlite3.connect(path)
+    cur = c.cursor()
+    cur.executescript(SCHEMA)
+
+    items = []
+    for a, (area, cats) in enumerate(AREAS.items()):
+        cur.execute("INSERT INTO area_template VALUES (?, ?, ?, ?)", ('at-{}'.format(a), T, area, 4 - a))
+        for k, cat in enumerate(cats):
+            cat_id = 'ct-{}-{}'.format(a, k)
+            cur.execute("INSERT INTO category_template VALUES (?, ?, ?, ?, ?)",
+                        (cat_id, T, 'at-{}'.format(a), cat, k % 2))
+            for n in range(3):
+                items.append('it-{}-{}-{}'.format(a, k, n))
+                cur.execute("INSERT INTO item_template VALUES (?, ?, ?, ?, ?)",
+                            (items[-1], T, cat_id, '{} item {}'.format(cat.title(), n % 2), n))
+    # Broken template chains: drop out of area (and trade) breakdowns only.
+    cur.execute("INSERT INTO category_template VALUES ('ct-lost', ?, 'at-gone', 'SIGNAGE', 9)", (T,))
+    cur.execute("INSERT INTO item_template VALUES ('it-lost', ?, 'ct-lost', 'Sign', 0)", (T,))
+    cur.execute("INSERT INTO item_template VALUES ('it-orphan', ?, 'ct-gone', 'Orphan', 0)", (T,))
+    items += ['it-lost', 'it-orphan']
+
+    for (block, floor) in ZONES:
+        for number in range(1, ROUNDS.get((block, floor), 1) + 1):
+            cur.execute("INSERT INTO inspection_cycle VALUES (?, ?, ?, ?, ?)",
+                        (cycle_id(block, floor, number), T, block, floor, number))
+    cur.execute("INSERT INTO inspection_cycle VALUES ('test-cyc', ?, 'A', 0, 1)", (T,))
+    cur.execute("INSERT INTO exclusion_list VALUES ('excl-1', ?, 'Standard exclusions', '2026-01-10')", (T,))
+    for n, item in enumerate(items[:40:3]):
+        cur.execute("INSERT INTO exclusion_list_item VALUES (?, 'excl-1', ?)", ('eli-{}'.format(n), item))
+
+    units = {}
+    n = 0
+    for (block, floor) in ZONES:
+        for k in range(units_per_zone):
+            n += 1
+            unit_id = 'unit-{:04d}'.format(n)
+            number = 'TEST{:03d}'.format(n) if n % 13 == 0 else '{}{}{:02d}'.format(block, floor, k)
+            cur.execute("INSERT INTO unit VALUES (?, ?, ?, ?, ?)", (unit_id, T, number, block, floor))
+            units.setdefault((block, floor), []).append(unit_id)
+
+    d = 0
+    for batch_id, scope in BATCHES:
+        cur.execute("INSERT INTO inspection_batch VALUES (?, ?, ?, 'open', '2026-02-01 08:00:00')",
+                    (batch_id, T, 'SR-{} {}'.format(batch_id[-5:].upper(), '01 Feb 2026')))
+        for block, floor, number in scope:
+            for k, unit_id in enumerate(units[(block, floor)]):
+                removed = '2026-02-03' if k == 5 and batch_id == 'batch-mixed' else None
+                cur.execute("INSERT INTO batch_unit VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            ('bu-{}-{}'.format(batch_id, unit_id), T, batch_id, unit_id,
+                             cycle_id(block, floor, number), removed,
+                             'excl-1' if batch_id == 'batch-mixed' else None))
+    cur.execute("INSERT INTO batch_unit VALUES ('bu-other', 'other-tenant', 'batch-mixed', 'unit-0001', "
+                "'cyc-A0-1', NULL, NULL)")
+
+    # Inspections and defects per unit and round; later rounds clear earlier defects.
+    for (block, floor), unit_ids in units.items():
+        for unit_id in unit_ids:
+            raised = []
+            for number in range(1, ROUNDS.get((block, floor), 1) + 1):
+                cyc = cycle_id(block, floor, number)
+                if rng.random() < 0.08:
+                    continue  # never inspected
+                status = rng.choice(STATUSES)
+                cur.execute("INSERT INTO inspection VALUES (?, ?, ?, ?, ?, ?)",
+                            ('insp-{}-{}'.format(unit_id, cyc), T, unit_id, cyc, number, status))
+                for prev in raised:
+                    if prev[1] == 'open' and rng.random() < 0.6:
+                        cur.execute("UPDATE defect SET status = 'cleared', cleared_cycle_id = ? WHERE id = ?",
+                                    (cyc, prev[0]))
+                        prev[1] = 'cleared'
+                for _ in range(rng.randint(0, 8 if number == 1 else 3)):
+                    d += 1
+                    defect_id = 'def-{:05d}'.format(d)
+                    cur.execute("INSERT INTO defect VALUES (?, ?, ?, ?, ?, ?, NULL, 'open', ?)",
+                                (defect_id, T, unit_id, rng.choice(items), cyc, number, rng.choice(COMMENTS)))
+                    raised.append([defect_id, 'open'])
+            if rng.random() < 0.1:
+                d += 1
+                cur.execute("INSERT INTO defect VALUES (?, ?, ?, ?, 'test-cyc', 1, NULL, 'open', 'Test run')",
+                            ('def-{:05d}'.format(d), T, unit_id, rng.choice(items)))
+    # Comment-less defects sit on the area-less item: a NULL top comment in the
+    # area deep dive is not handled by either builder.
+    for (block, floor), unit_ids in units.items():
+        for unit_id in unit_ids[:3]:
+            d += 1
+            cur.execute("INSERT INTO defect VALUES (?, ?, ?, 'it-lost', ?, 1, NULL, 'open', NULL)",
+                        ('def-{:05d}'.format(d), T, unit_id, cycle_id(block, floor, 1)))
+    c.commit()
+    c.close()
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else os.path.join(HERE, "test_batch_report.db")
+    nu = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    build(out, nu)
+    print("built:", out)
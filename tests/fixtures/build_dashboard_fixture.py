@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+build_dashboard_fixture.py - synthetic tenant for the certification dashboard load test.
+
+Produces one SQLite file with N units in one block, a closed cycle 1 and an
+active cycle 2. Every unit carries prior defects and a latent area note from
+cycle 1; most have a cycle 2 inspection with a full checklist (parent items,
+prior-defect items, skipped, defect and pending items). Used by
+tests/test_dashboard_queries.py.
+
+Planted per-unit counts for cycle 2 (units with a cycle 2 inspection):
+  open_defects=3  cleared_defects=1  excluded_items=5  defect_items=5
+  total_items=117  completed_items=106 (even units) / 105 (odd units)
+Every 10th unit has no cycle 2 inspection; the last unit is excluded from cycle 2.
+
+Only the tables/columns certification.dashboard reads are created, with the
+indexes from app/services/schema.sql.
+
+Run: python3 build_dashboard_fixture.py [path] [units]
+"""
+import os
+import sqlite3
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCHEMA = """
+CREATE TABLE phase (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    phase_name TEXT NOT NULL
+);
+CREATE TABLE unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_number TEXT NOT NULL,
+    block TEXT,
+    floor INTEGER,
+    status TEXT DEFAULT 'not_started'
+);
+CREATE TABLE inspection_cycle (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    phase_id TEXT NOT NULL,
+    cycle_number INTEGER NOT NULL,
+    status TEXT DEFAULT 'active',
+    block TEXT,
+    floor INTEGER,
+    unit_start TEXT,
+    unit_end TEXT
+);
+CREATE TABLE cycle_excluded_unit (
+    id TEXT PRIMARY KEY,
+    cycle_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL
+);
+CREATE TABLE inspection (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    cycle_number INTEGER,
+    status TEXT NOT NULL DEFAULT 'not_started',
+    inspector_name TEXT,
+    inspection_date TEXT,
+    submitted_at TEXT,
+    manager_reviewed_at TEXT
+);
+CREATE TABLE item_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    parent_item_id TEXT
+);
+CREATE TABLE inspection_item (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    inspection_id TEXT NOT NULL,
+    item_template_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    marked_at TEXT,
+    has_prior_defects INTEGER DEFAULT 0
+);
+CREATE TABLE defect (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'open',
+    raised_cycle_number INTEGER,
+    cleared_cycle_id TEXT,
+    cleared_cycle_number INTEGER,
+    addressed_cycle_number INTEGER
+);
+CREATE TABLE latent_area_note (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_number INTEGER NOT NULL,
+    rectified_at TEXT,
+    rectified_at_cycle_number INTEGER,
+    addressed_cycle_number INTEGER
+);
+CREATE INDEX idx_inspection_unit ON inspection(unit_id);
+CREATE INDEX idx_inspection_cycle ON inspection(cycle_id);
+CREATE INDEX idx_inspection_item_inspection ON inspection_item(inspection_id);
+CREATE INDEX idx_defect_unit ON defect(unit_id);
+"""
+
+T = "tenant-test"
+CYCLE = "cyc-2"
+PARENTS = 10
+CHILDREN = 12
+# Cycle 2 statuses for inspected units; every 10th unit is not started.
+STATUSES = ['in_progress', 'submitted', 'under_review', 'reviewed', 'approved']
+
+
+def _leaf_status(k):
+    """(status, marked) for leaf item k of 0..119 - see the planted counts above."""
+    if k < 100:
+        return 'ok', True
+    if k < 105:
+        return 'not_to_standard', True
+    if k < 110:
+        return 'skipped', False
+    return 'pending', False
+
+
+def build(path, units=500):
+    if os.path.exists(path):
+        os.remove(path)
+    c = sqlite3.connect(path)
+    cur = c.cursor()
+    cur.executescript(SCHEMA)
+
+    cur.execute("INSERT INTO phase VALUES ('ph-1', ?, 'Phase 1')", (T,))
+    cur.execute("INSERT INTO inspection_cycle VALUES ('cyc-1', ?, 'ph-1', 1, 'closed', 'A', NULL, NULL, NULL)", (T,))
+    cur.execute("INSERT INTO inspection_cycle VALUES (?, ?, 'ph-1', 2, 'active', 'A', NULL, NULL, NULL)", (CYCLE, T))
+
+    templates = []
+    for p in range(PARENTS):
+        templates.append(("it-p{}".format(p), None))
+        for k in range(CHILDREN):
+            templates.append(("it-c{}-{}".format(p, k), "it-p{}".format(p)))
+    cur.executemany("INSERT INTO item_template VALUES (?, ?, ?)",
+                    [(tid, T, parent) for tid, parent in templates])
+
+    items, defects, notes = [], [], []
+    for n in range(1, units + 1):
+        unit_id = "unit-{:04d}".format(n)
+        cur.execute("INSERT INTO unit VALUES (?, ?, ?, 'A', ?, 'pending_followup')",
+                    (unit_id, T, "{:04d}".format(n), n // 50))
+        cur.execute("INSERT INTO inspection VALUES (?, ?, ?, 'cyc-1', 1, 'pending_followup', "
+                    "'Inspector One', '2026-01-10', '2026-01-10 15:00:00', '2026-01-11 09:00:00')",
+                    ("insp-1-{}".format(n), T, unit_id))
+
+        # Cycle 1 defects: cleared in 2, addressed open in 2, untouched open; plus one raised in 2.
+        defects += [
+            ("def-{}-a".format(n), T, unit_id, 'cleared', 1, CYCLE, 2, 2),
+            ("def-{}-b".format(n), T, unit_id, 'open', 1, None, None, 2),
+            ("def-{}-c".format(n), T, unit_id, 'open', 1, None, None, None),
+            ("def-{}-d".format(n), T, unit_id, 'open', 2, None, None, None),
+        ]
+        rectified = n % 2 == 0
+        notes.append(("lan-{}".format(n), T, unit_id, 1,
+                      '2026-02-10 10:00:00' if rectified else None, 2 if rectified else None, None))
+
+        if n == units:
+            cur.execute("INSERT INTO cycle_excluded_unit VALUES ('ceu-1', ?, ?)", (CYCLE, unit_id))
+        if n % 10 == 0:
+            continue
+        inspection_id = "insp-2-{}".format(n)
+        cur.execute("INSERT INTO inspection VALUES (?, ?, ?, ?, 2, ?, 'Inspector Two', "
+                    "'2026-02-10', NULL, NULL)",
+                    (inspection_id, T, unit_id, CYCLE, STATUSES[n % len(STATUSES)]))
+        k = 0
+        for tid, parent in templates:
+            if parent is None:
+                status, marked, prior = 'pending', False, 0
+            else:
+                status, marked = _leaf_status(k)
+                prior = 1 if k < 2 else 0
+                k += 1
+            items.append(("ii-{}-{}".format(n, tid), T, inspection_id, tid, status,
+                          '2026-02-10 11:00:00' if marked else None, prior))
+
+    cur.executemany("INSERT INTO inspection_item VALUES (?, ?, ?, ?, ?, ?, ?)", items)
+    cur.executemany("INSERT INTO defect VALUES (?, ?, ?, ?, ?, ?, ?, ?)", defects)
+    cur.executemany("INSERT INTO latent_area_note VALUES (?, ?, ?, ?, ?, ?, ?)", notes)
+    c.commit()
+    c.close()
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else os.path.join(HERE, "test_dashboard.db")
+    nu = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    build(out, nu)
+    print("built:", out)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+build_defect_facts_fixture.py - synthetic defect lifecycle for the fact table parity test.
+
+Produces one SQLite file with N units over three blocks (a few TEST units),
+a round 1 and round 2 cycle plus a test- cycle, inspections in every workflow
+status with review_submitted_at spread over `weeks` (default 20), and defects
+raised, cleared and reopened across that window on a small area/category
+template. Seeded random so the same N always builds the same file.
+Used by tests/test_defect_facts.py and tests/test_trend_series.py.
+
+Only the tables/columns app/services/defect_facts.py reads are created, plus
+the unit_real view (real units: unit_number NOT LIKE 'TEST%').
+
+Run: python3 build_defect_facts_fixture.py [path] [units] [weeks]
+"""
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCHEMA = """
+CREATE TABLE unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_number TEXT NOT NULL,
+    block TEXT,
+    floor INTEGER
+);
+CREATE VIEW unit_real AS SELECT * FROM unit WHERE unit_number NOT LIKE 'TEST%';
+CREATE TABLE area_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    area_name TEXT NOT NULL
+);
+CREATE TABLE category_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    area_id TEXT NOT NULL,
+    category_name TEXT NOT NULL
+);
+CREATE TABLE item_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    item_description TEXT
+);
+CREATE TABLE inspection (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    cycle_number INTEGER,
+    status TEXT NOT NULL,
+    review_submitted_at TEXT,
+    UNIQUE(unit_id, cycle_id)
+);
+CREATE TABLE defect (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    item_template_id TEXT NOT NULL,
+    raised_cycle_id TEXT NOT NULL,
+    raised_cycle_number INTEGER,
+    status TEXT NOT NULL DEFAULT 'open',
+    original_comment TEXT,
+    created_at TEXT,
+    cleared_at TEXT
+);
+CREATE INDEX idx_inspection_unit ON inspection(unit_id);
+CREATE INDEX idx_defect_unit ON defect(unit_id);
+"""
+
+T = "tenant-test"
+START = datetime(2026, 1, 5, 8, 0, 0)
+WEEKS = 20
+STATUSES = ['in_progress', 'submitted', 'reviewed', 'approved', 'certified', 'pending_followup']
+AREAS = {'KITCHEN': ['WALLS', 'JOINERY'], 'BATHROOM': ['PLUMBING', 'WALLS'], 'BEDROOM': ['DOORS', 'FLOOR']}
+COMMENTS = ['Paint scuffed', 'Hinge loose', 'Grout missing', 'Sealant gap', 'Chipped edge']
+
+
+def stamp(dt):
+    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def build(path, units=120, weeks=WEEKS):
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(units)
+    c = sqlite3.connect(path)
+    cur = c.cursor()
+    cur.executescript(SCHEMA)
+
+    items = []
+    for a, (area, cats) in enumerate(AREAS.items()):
+        cur.execute("INSERT INTO area_template VALUES (?, ?, ?)", ('at-{}'.format(a), T, area))
+        for k, cat in enumerate(cats):
+            cat_id = 'ct-{}-{}'.format(a, k)
+            cur.execute("INSERT INTO category_template VALUES (?, ?, ?, ?)", (cat_id, T, 'at-{}'.format(a), cat))
+            for n in range(3):
+                items.append('it-{}-{}-{}'.format(a, k, n))
+                cur.execute("INSERT INTO item_template VALUES (?, ?, ?, ?)",
+                            (items[-1], T, cat_id, '{} item {}'.format(cat.title(), n)))
+    # An item whose category was removed: drops out of area/trade breakdowns only.
+    items.append('it-orphan')
+    cur.execute("INSERT INTO item_template VALUES ('it-orphan', ?, 'ct-gone', 'Orphan')", (T,))
+
+    defects = []
+    for n in range(1, units + 1):
+        unit_id = 'unit-{:04d}'.format(n)
+        number = 'TEST{:03d}'.format(n) if n % 25 == 0 else '{:04d}'.format(n)
+        cur.execute("INSERT INTO unit VALUES (?, ?, ?, ?, ?)",
+                    (unit_id, T, number, 'ABC'[n % 3], n % 4))
+        cycles = [('cyc-1', 1), ('cyc-2', 2)] if n % 2 else [('cyc-1', 1)]
+        if n % 17 == 0:
+            cycles.append(('test-cyc', 1))
+        for cycle_id, number_in_cycle in cycles:
+            inspected = START + timedelta(days=rng.randint(0, weeks * 7 - 1) + 35 * (number_in_cycle - 1))
+            status = rng.choice(STATUSES)
+            reviewed = None
+            if status != 'in_progress' and rng.random() < 0.9:
+                reviewed = stamp(inspected + timedelta(hours=rng.randint(2, 120)))
+            cur.execute("INSERT INTO inspection VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        ('insp-{}-{}'.format(n, cycle_id), T, unit_id, cycle_id, number_in_cycle,
+                         status, reviewed))
+            for k in range(rng.randint(0, 6)):
+                created = inspected + timedelta(minutes=rng.randint(5, 300))
+                roll = rng.random()
+                if roll < 0.45:
+                    state, cleared = 'open', None
+                elif roll < 0.9:
+                    state, cleared = 'cleared', stamp(created + timedelta(days=rng.randint(1, 60)))
+                else:
+                    # Reopened after a clearance: cleared_at left behind.
+                    state, cleared = 'open', stamp(created + timedelta(days=rng.randint(1, 30)))
+                defects.append(('def-{}-{}-{}'.format(n, cycle_id, k), T, unit_id, rng.choice(items),
+                                cycle_id, number_in_cycle, state, rng.choice(COMMENTS),
+                                stamp(created), cleared))
+
+    cur.executemany("INSERT INTO defect VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", defects)
+    c.commit()
+    c.close()
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else os.path.join(HERE, "test_defect_facts.db")
+    nu = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    nw = int(sys.argv[3]) if len(sys.argv) > 3 else WEEKS
+    build(out, nu, nw)
+    print("built:", out)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+build_inspector_home_fixture.py - synthetic inspector for the home page benchmark.
+
+Produces one SQLite file with N open inspections assigned to one inspector
+(INSPECTOR), alternating between a round 1 phase and a round 2 (desnag) phase,
+plus closed and foreign-inspector rows that must not show. Every unit varies its
+checklist marks, defect chips, prior defects (open / addressed / cleared) and
+latent area notes by unit number so the card counts differ row to row.
+Used by tests/test_inspector_home_queries.py.
+
+Only the tables/columns the inspector home page reads are created, with the
+indexes from app/services/schema.sql.
+
+Run: python3 build_inspector_home_fixture.py [path] [inspections]
+"""
+import os
+import sqlite3
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCHEMA = """
+CREATE TABLE unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_number TEXT NOT NULL,
+    block TEXT,
+    floor INTEGER
+);
+CREATE TABLE inspection_cycle (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    cycle_number INTEGER NOT NULL
+);
+CREATE TABLE inspection (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    cycle_number INTEGER,
+    inspector_id TEXT,
+    status TEXT NOT NULL DEFAULT 'not_started',
+    inspection_date TEXT,
+    started_at TEXT,
+    submitted_at TEXT
+);
+CREATE TABLE item_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    parent_item_id TEXT
+);
+CREATE TABLE inspection_item (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    inspection_id TEXT NOT NULL,
+    item_template_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    marked_at TEXT,
+    has_prior_defects INTEGER DEFAULT 0
+);
+CREATE TABLE inspection_defect (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    inspection_id TEXT NOT NULL,
+    inspection_item_id TEXT NOT NULL
+);
+CREATE TABLE defect (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    raised_cycle_id TEXT NOT NULL,
+    raised_cycle_number INTEGER,
+    status TEXT NOT NULL DEFAULT 'open',
+    cleared_cycle_number INTEGER,
+    addressed_cycle_number INTEGER
+);
+CREATE TABLE latent_area_note (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_number INTEGER NOT NULL,
+    rectified_at TEXT,
+    rectified_at_cycle_number INTEGER,
+    addressed_cycle_number INTEGER
+);
+CREATE INDEX idx_inspection_unit ON inspection(unit_id);
+CREATE INDEX idx_inspection_cycle ON inspection(cycle_id);
+CREATE INDEX idx_inspection_item_inspection ON inspection_item(inspection_id);
+CREATE INDEX idx_inspection_defect_inspection ON inspection_defect(inspection_id);
+CREATE INDEX idx_defect_unit ON defect(unit_id);
+"""
+
+T = "tenant-test"
+INSPECTOR = "inspector-1"
+PARENTS = 6
+CHILDREN = 10
+OPEN_STATUSES = ['in_progress', 'paused', 'not_started']
+# Leaf item statuses cycle through these, offset by unit number.
+LEAF_MARKS = [
+    ('ok', True), ('ok', True), ('ok', False), ('not_to_standard', True),
+    ('pending', False), ('skipped', False), ('not_installed', True), ('ok', True),
+]
+
+
+def build(path, inspections=100):
+    if os.path.exists(path):
+        os.remove(path)
+    c = sqlite3.connect(path)
+    cur = c.cursor()
+    cur.executescript(SCHEMA)
+
+    # Phase A runs round 1; phase B is on round 2 (desnag) with a closed round 1.
+    cur.executemany("INSERT INTO inspection_cycle VALUES (?, ?, ?)",
+                    [('cyc-a1', T, 1), ('cyc-b1', T, 1), ('cyc-b2', T, 2)])
+
+    templates = []
+    for p in range(PARENTS):
+        templates.append(("it-p{}".format(p), None))
+        for k in range(CHILDREN):
+            templates.append(("it-c{}-{}".format(p, k), "it-p{}".format(p)))
+    cur.executemany("INSERT INTO item_template VALUES (?, ?, ?)",
+                    [(tid, T, parent) for tid, parent in templates])
+
+    items, chips, defects, notes = [], [], [], []
+    # Extra units: closed inspections and another inspector's work - never listed.
+    for n in range(1, inspections + 11):
+        unit_id = "unit-{:04d}".format(n)
+        desnag = n % 2 == 0
+        cur.execute("INSERT INTO unit VALUES (?, ?, ?, 'A', ?)",
+                    (unit_id, T, "{:04d}".format(n), n % 4))
+        if desnag:
+            cur.execute("INSERT INTO inspection VALUES (?, ?, ?, 'cyc-b1', 1, 'inspector-2', "
+                        "'approved', '2026-01-10', '2026-01-10 08:00:00', '2026-01-10 15:00:00')",
+                        ("insp-1-{}".format(n), T, unit_id))
+            defects += [
+                ("def-{}-a".format(n), T, unit_id, 'cyc-b1', 1, 'open', None, None),
+                ("def-{}-b".format(n), T, unit_id, 'cyc-b1', 1, 'open', None, 2 if n % 3 else None),
+                ("def-{}-c".format(n), T, unit_id, 'cyc-b1', 1, 'cleared', 2, 2),
+                ("def-{}-d".format(n), T, unit_id, 'cyc-b1', 1, 'cleared', 1, 1),
+            ]
+            notes += [
+                ("lan-{}-a".format(n), T, unit_id, 1, None, None, 2 if n % 4 == 0 else None),
+                ("lan-{}-b".format(n), T, unit_id, 1, '2026-02-10 10:00:00', 2, 2),
+            ]
+            cycle_id, cycle_number = 'cyc-b2', 2
+        else:
+            cycle_id, cycle_number = 'cyc-a1', 1
+
+        if n > inspections:
+            inspector, status = ('inspector-2', 'in_progress') if n % 2 else (INSPECTOR, 'submitted')
+        else:
+            inspector, status = INSPECTOR, OPEN_STATUSES[n % len(OPEN_STATUSES)]
+        inspection_id = "insp-{}-{}".format(cycle_number + 1, n)
+        cur.execute("INSERT INTO inspection VALUES (?, ?, ?, ?, ?, ?, ?, '2026-02-10', ?, NULL)",
+                    (inspection_id, T, unit_id, cycle_id, cycle_number, inspector, status,
+                     None if status == 'not_started' else '2026-02-10 08:00:00'))
+        if status == 'not_started':
+            continue
+
+        k = 0
+        for tid, parent in templates:
+            if parent is None:
+                mark, marked, prior = 'ok', False, 0
+            else:
+                mark, marked = LEAF_MARKS[(k + n) % len(LEAF_MARKS)]
+                prior = 1 if desnag and k < 3 else 0
+                k += 1
+            item_id = "ii-{}-{}".format(n, tid)
+            items.append((item_id, T, inspection_id, tid, mark,
+                          '2026-02-10 11:00:00' if marked else None, prior))
+            if mark == 'not_to_standard' and k % 2:
+                chips.append(("chip-{}-{}".format(n, tid), T, inspection_id, item_id))
+
+    cur.executemany("INSERT INTO inspection_item VALUES (?, ?, ?, ?, ?, ?, ?)", items)
+    cur.executemany("INSERT INTO inspection_defect VALUES (?, ?, ?, ?)", chips)
+    cur.executemany("INSERT INTO defect VALUES (?, ?, ?, ?, ?, ?, ?, ?)", defects)
+    cur.executemany("INSERT INTO latent_area_note VALUES (?, ?, ?, ?, ?, ?, ?)", notes)
+    c.commit()
+    c.close()
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else os.path.join(HERE, "test_inspector_home.db")
+    ni = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    build(out, ni)
+    print("built:", out)
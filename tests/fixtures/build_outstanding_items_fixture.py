@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+build_outstanding_items_fixture.py - small hand-checked DB for the Outstanding Items
+and De-snag builders (analytics._build_outstanding_items_data / _build_batch_desnag_data).
+
+Units (tenant-test):
+    u1  A / Ground / 1    round 2 reviewed      2 open defects (+1 cleared), 2 latent notes
+                                                 (one rectified), on batch-1
+    u2  A / Ground / 2    round 2 in progress   1 open defect, on batch-1
+    u3  B / 1st / 10      round 2 reviewed      1 open defect, 1 latent, removed from batch-1
+    u4  A / Ground / TEST1  round 2 reviewed    1 open defect (TEST unit - never listed)
+    u5  A / 1st / 3       round 1 only          1 open defect (no round 2 - not outstanding)
+    u6  other tenant, round 2                   1 open defect
+
+Expected (asserted in tests/test_db_access.py):
+    outstanding items  u1, u2, u3: 4 open defects, 3 latent bullets, JOINERY 2 / PLUMBING 2
+    de-snag batch-1    u1 only:    2 open defects, 2 latent bullets
+
+Also used by tests/test_outstanding_export.py (streamed exports, block / floor scope).
+
+Only the tables/columns the two builders read are created, plus the unit_real view.
+
+Run: python3 build_outstanding_items_fixture.py [path]
+"""
+import os
+import sqlite3
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCHEMA = """
+CREATE TABLE unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_number TEXT NOT NULL,
+    block TEXT,
+    floor INTEGER
+);
+CREATE VIEW unit_real AS SELECT * FROM unit WHERE unit_number NOT LIKE 'TEST%';
+CREATE TABLE area_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    area_name TEXT NOT NULL,
+    area_order INTEGER
+);
+CREATE TABLE category_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    area_id TEXT NOT NULL,
+    category_name TEXT NOT NULL,
+    category_order INTEGER
+);
+CREATE TABLE item_template (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    parent_item_id TEXT,
+    item_description TEXT,
+    item_order INTEGER,
+    depth INTEGER DEFAULT 0
+);
+CREATE TABLE inspection (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    cycle_number INTEGER,
+    status TEXT NOT NULL
+);
+CREATE TABLE defect (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    item_template_id TEXT NOT NULL,
+    raised_cycle_number INTEGER,
+    status TEXT NOT NULL DEFAULT 'open',
+    original_comment TEXT,
+    raw_comment TEXT,
+    reviewed_comment TEXT,
+    created_at TEXT
+);
+CREATE TABLE latent_area_note (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    area_template_id TEXT NOT NULL,
+    cycle_number INTEGER,
+    note_html TEXT,
+    created_at TEXT,
+    last_edited_at TEXT,
+    rectified_at TEXT
+);
+CREATE TABLE inspection_batch (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    name TEXT,
+    created_at TEXT
+);
+CREATE TABLE batch_unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    batch_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'active'
+);
+"""
+
+T = "tenant-test"
+OTHER = "tenant-other"
+CREATED = '2026-03-02T08:00:00+00:00'
+
+UNITS = [
+    ('u1', T, '1', 'A', 0), ('u2', T, '2', 'A', 0), ('u3', T, '10', 'B', 1),
+    ('u4', T, 'TEST1', 'A', 0), ('u5', T, '3', 'A', 1), ('u6', OTHER, '1', 'A', 0),
+]
+# (id, unit, cycle_id, cycle_number, status)
+INSPECTIONS = [
+    ('i1a', 'u1', 'cyc-A0-1', 1, 'certified'), ('i1b', 'u1', 'cyc-A0-2', 2, 'reviewed'),
+    ('i2b', 'u2', 'cyc-A0-2', 2, 'in_progress'), ('i3b', 'u3', 'cyc-B1-2', 2, 'reviewed'),
+    ('i4b', 'u4', 'cyc-A0-2', 2, 'reviewed'), ('i5a', 'u5', 'cyc-A1-1', 1, 'reviewed'),
+]
+# (id, unit, item, round, status, original, raw, reviewed)
+DEFECTS = [
+    ('d1', 'u1', 'it-door', 1, 'open', 'door', '', 'Door sticks'),
+    ('d2', 'u1', 'it-tap', 2, 'open', 'tap', 'Tap drips', ''),
+    ('d3', 'u1', 'it-cab', 1, 'cleared', 'Cleared one', None, None),
+    ('d4', 'u2', 'it-cab', 1, 'open', ' Scratched ', None, None),
+    ('d5', 'u3', 'it-tap', 2, 'open', 'Leak', None, None),
+    ('d6', 'u4', 'it-tap', 2, 'open', 'Test unit', None, None),
+    ('d7', 'u5', 'it-cab', 1, 'open', 'Round one only', None, None),
+]
+# (id, unit, area, round, html, rectified_at)
+LATENT = [
+    ('l1', 'u1', 'at-kitchen', 2, '<ul><li>Paint <b>touch-up</b></li><li>  Clean   grout </li><li> </li></ul>', None),
+    ('l2', 'u1', 'at-bath', 2, '<ul><li>Already fixed</li></ul>', '2026-03-05'),
+    ('l3', 'u3', 'at-bath', 2, '<p>Seal around bath</p>', None),
+]
+
+
+def build(path):
+    if os.path.exists(path):
+        os.remove(path)
+    c = sqlite3.connect(path)
+    cur = c.cursor()
+    cur.executescript(SCHEMA)
+
+    for tenant in (T, OTHER):
+        sfx = '' if tenant == T else '-o'
+        cur.execute("INSERT INTO area_template VALUES (?, ?, 'KITCHEN', 1)", ('at-kitchen' + sfx, tenant))
+        cur.execute("INSERT INTO area_template VALUES (?, ?, 'BATHROOM', 2)", ('at-bath' + sfx, tenant))
+        cur.execute("INSERT INTO category_template VALUES (?, ?, ?, 'JOINERY', 1)",
+                    ('ct-joinery' + sfx, tenant, 'at-kitchen' + sfx))
+        cur.execute("INSERT INTO category_template VALUES (?, ?, ?, 'PLUMBING', 1)",
+                    ('ct-plumbing' + sfx, tenant, 'at-bath' + sfx))
+        cur.execute("INSERT INTO item_template VALUES (?, ?, ?, NULL, 'Cabinet', 1, 0)",
+                    ('it-cab' + sfx, tenant, 'ct-joinery' + sfx))
+        cur.execute("INSERT INTO item_template VALUES (?, ?, ?, ?, 'Door', 1, 1)",
+                    ('it-door' + sfx, tenant, 'ct-joinery' + sfx, 'it-cab' + sfx))
+        cur.execute("INSERT INTO item_template VALUES (?, ?, ?, NULL, 'Tap', 1, 0)",
+                    ('it-tap' + sfx, tenant, 'ct-plumbing' + sfx))
+
+    cur.executemany("INSERT INTO unit VALUES (?, ?, ?, ?, ?)", UNITS)
+    for iid, unit, cyc, number, status in INSPECTIONS:
+        cur.execute("INSERT INTO inspection VALUES (?, ?, ?, ?, ?, ?)", (iid, T, unit, cyc, number, status))
+    cur.execute("INSERT INTO inspection VALUES ('i6b', ?, 'u6', 'cyc-o-2', 2, 'reviewed')", (OTHER,))
+    for did, unit, item, number, status, original, raw, reviewed in DEFECTS:
+        cur.execute("INSERT INTO defect VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (did, T, unit, item, number, status, original, raw, reviewed, CREATED))
+    cur.execute("INSERT INTO defect VALUES ('d8', ?, 'u6', 'it-tap-o', 2, 'open', 'Other tenant', NULL, NULL, ?)",
+                (OTHER, CREATED))
+    for lid, unit, area, number, html, rectified in LATENT:
+        cur.execute("INSERT INTO latent_area_note VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+                    (lid, T, unit, area, number, html, CREATED, rectified))
+
+    cur.execute("INSERT INTO inspection_batch VALUES ('batch-1', ?, 'SR-001', '2026-03-01 07:30:00')", (T,))
+    cur.execute("INSERT INTO batch_unit VALUES ('bu1', ?, 'batch-1', 'u1', 'cyc-A0-2', 'active')", (T,))
+    cur.execute("INSERT INTO batch_unit VALUES ('bu2', ?, 'batch-1', 'u2', 'cyc-A0-2', 'active')", (T,))
+    cur.execute("INSERT INTO batch_unit VALUES ('bu3', ?, 'batch-1', 'u3', 'cyc-B1-2', 'removed')", (T,))
+    c.commit()
+    c.close()
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else os.path.join(HERE, "test_outstanding_items.db")
+    build(out)
+    print("built:", out)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+build_pipeline_fixture.py - synthetic tenant for the approvals pipeline benchmark.
+
+Produces one SQLite file shaped like a busy manager pipeline: N batches, each with
+Z zones (one cycle per block/floor), a few units per zone, inspections in every
+pipeline stage, open defects and a small defect library. Used by
+tests/test_pipeline_queries.py to prove the pipeline query count does not grow
+with the number of batches or zones.
+
+Only the tables/columns approvals._get_batch_pipeline reads are created; desc_norm
+matches scripts/migrate_description_norm.py (desc_norm=False builds the
+pre-migration shape).
+
+Run: python3 build_pipeline_fixture.py [path] [batches] [zones]
+"""
+import os
+import sqlite3
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCHEMA = """
+CREATE TABLE unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_number TEXT NOT NULL,
+    block TEXT,
+    floor INTEGER
+);
+CREATE TABLE inspection_cycle (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    cycle_number INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE inspection_batch (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    name TEXT,
+    status TEXT DEFAULT 'open',
+    created_at TEXT NOT NULL,
+    signed_off_at TEXT
+);
+CREATE TABLE batch_unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    batch_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    removed_at TEXT
+);
+CREATE TABLE inspection (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    cycle_number INTEGER,
+    status TEXT NOT NULL DEFAULT 'not_started',
+    inspection_date TEXT,
+    submitted_at TEXT,
+    updated_at TEXT
+);
+CREATE TABLE category_template (
+    id TEXT PRIMARY KEY,
+    category_name TEXT NOT NULL
+);
+CREATE TABLE item_template (
+    id TEXT PRIMARY KEY,
+    category_id TEXT NOT NULL
+);
+CREATE TABLE defect (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    raised_cycle_id TEXT NOT NULL,
+    item_template_id TEXT,
+    original_comment TEXT,
+    reviewed_comment TEXT,
+    status TEXT NOT NULL DEFAULT 'open'
+);
+CREATE TABLE defect_library (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    category_name TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+"""
+
+# Added the way scripts/migrate_description_norm.py adds them.
+DESC_NORM = [
+    ('defect', 'LOWER(TRIM(COALESCE(reviewed_comment, original_comment)))'),
+    ('defect_library', 'LOWER(TRIM(description))'),
+]
+
+T = "tenant-test"
+UNITS_PER_ZONE = 4
+# Cycles through every pipeline stage so each branch of the stage logic runs.
+STATUSES = ['not_started', 'in_progress', 'submitted', 'reviewed', 'pending_followup']
+
+
+def insert(cur, table, **cols):
+    keys = ",".join(cols.keys())
+    qs = ",".join("?" for _ in cols)
+    cur.execute(f"INSERT INTO {table} ({keys}) VALUES ({qs})", tuple(cols.values()))
+
+
+def build(path, batches=50, zones=6, desc_norm=True):
+    if os.path.exists(path):
+        os.remove(path)
+    c = sqlite3.connect(path)
+    cur = c.cursor()
+    cur.executescript(SCHEMA)
+    if desc_norm:
+        for table, expr in DESC_NORM:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN desc_norm TEXT GENERATED ALWAYS AS ({expr}) VIRTUAL")
+
+    insert(cur, "category_template", id="cat-walls", category_name="Walls")
+    insert(cur, "category_template", id="cat-doors", category_name="Doors")
+    insert(cur, "item_template", id="it-wall", category_id="cat-walls")
+    insert(cur, "item_template", id="it-door", category_id="cat-doors")
+    insert(cur, "defect_library", id="lib-1", tenant_id=T,
+           category_name="Walls", description="Paint chipped")
+    insert(cur, "defect_library", id="lib-2", tenant_id=T,
+           category_name="Doors", description="Handle loose")
+
+    n = 0
+    for b in range(batches):
+        batch_id = "batch-{:03d}".format(b)
+        insert(cur, "inspection_batch", id=batch_id, tenant_id=T,
+               name="Batch {}".format(b), created_at="2026-03-{:02d} 08:00:00".format(b % 28 + 1),
+               signed_off_at="2026-04-01 09:00:00" if b % 10 == 0 else None)
+        for z in range(zones):
+            cycle_id = "cyc-{:03d}-{}".format(b, z)
+            insert(cur, "inspection_cycle", id=cycle_id, tenant_id=T, cycle_number=1)
+            for u in range(UNITS_PER_ZONE):
+                n += 1
+                unit_id = "unit-{:05d}".format(n)
+                status = STATUSES[(b + z + u) % len(STATUSES)]
+                insert(cur, "unit", id=unit_id, tenant_id=T, unit_number=str(n),
+                       block="Block {}".format(chr(65 + z % 3)), floor=z // 3)
+                insert(cur, "batch_unit", id="bu-{}".format(n), tenant_id=T,
+                       batch_id=batch_id, unit_id=unit_id, cycle_id=cycle_id,
+                       status="removed" if u == UNITS_PER_ZONE - 1 and b % 7 == 0 else "pending")
+                if status == 'not_started':
+                    continue
+                submitted = status != 'in_progress'
+                insert(cur, "inspection", id="insp-{}".format(n), tenant_id=T,
+                       unit_id=unit_id, cycle_id=cycle_id, cycle_number=1, status=status,
+                       inspection_date="2026-03-{:02d}".format(b % 28 + 1),
+                       submitted_at="2026-03-{:02d} 15:00:00".format(b % 28 + 1) if submitted else None,
+                       updated_at="2026-03-{:02d} 16:00:00".format(b % 28 + 1))
+                # One library description, one free-text description per unit
+                insert(cur, "defect", id="def-{}-a".format(n), tenant_id=T, unit_id=unit_id,
+                       raised_cycle_id=cycle_id, item_template_id="it-wall",
+                       original_comment="paint chipped ")
+                insert(cur, "defect", id="def-{}-b".format(n), tenant_id=T, unit_id=unit_id,
+                       raised_cycle_id=cycle_id, item_template_id="it-door",
+                       original_comment="door scuffed")
+    c.commit()
+    c.close()
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else os.path.join(HERE, "test_pipeline.db")
+    nb = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    nz = int(sys.argv[3]) if len(sys.argv) > 3 else 6
+    build(out, nb, nz)
+    print("built:", out)
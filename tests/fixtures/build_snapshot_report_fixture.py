@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+build_snapshot_report_fixture.py - the defect lifecycle fixture plus what the snapshot reports read.
+
+Builds tests/fixtures/build_defect_facts_fixture.py and adds the tables/columns
+analytics._build_pipeline_report_data(live=False) and
+_build_site_meeting_brief_data read on top of the defect facts: inspection
+submitted_at / created_at / approved_at, defect clearance cycles, unit certified_at,
+area_order, the inspection_cycle rows, three batches over the two rounds (the
+last one still open) and latent area notes, some rectified. Seeded random so
+the same N always builds the same file.
+Used by tests/test_report_cache.py.
+
+Run: python3 build_snapshot_report_fixture.py [path] [units]
+"""
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import build_defect_facts_fixture
+from build_defect_facts_fixture import T, stamp
+
+SCHEMA = """
+ALTER TABLE unit ADD COLUMN certified_at TEXT;
+ALTER TABLE area_template ADD COLUMN area_order INTEGER;
+ALTER TABLE inspection ADD COLUMN submitted_at TEXT;
+ALTER TABLE inspection ADD COLUMN created_at TEXT;
+ALTER TABLE inspection ADD COLUMN approved_at TEXT;
+ALTER TABLE defect ADD COLUMN cleared_cycle_id TEXT;
+ALTER TABLE defect ADD COLUMN cleared_cycle_number INTEGER;
+CREATE TABLE inspection_cycle (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    cycle_number INTEGER NOT NULL
+);
+CREATE TABLE inspection_batch (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    name TEXT,
+    status TEXT DEFAULT 'open',
+    created_at TEXT,
+    closed_at TEXT
+);
+CREATE TABLE batch_unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    batch_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT,
+    status TEXT DEFAULT 'pending',
+    removed_at TEXT
+);
+CREATE TABLE latent_area_note (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT,
+    cycle_number INTEGER,
+    area_template_id TEXT,
+    area_name_override TEXT,
+    note_html TEXT,
+    created_at TEXT,
+    rectified_at TEXT,
+    rectified_at_cycle_number INTEGER
+);
+"""
+# (id, name, status, created_at, closed_at, cycle, unit filter)
+BATCHES = [
+    ('batch-1', 'SR-001', 'complete', datetime(2026, 1, 5, 7), datetime(2026, 3, 20, 16), 'cyc-1', 0),
+    ('batch-2', 'SR-002', 'complete', datetime(2026, 2, 9, 7), datetime(2026, 5, 4, 16), 'cyc-2', 1),
+    ('batch-3', 'SR-003', 'open', datetime(2026, 5, 11, 7), None, 'cyc-1', 2),
+]
+
+
+def build(path, units=120):
+    build_defect_facts_fixture.build(path, units)
+    rng = random.Random(units)
+    c = sqlite3.connect(path)
+    cur = c.cursor()
+    cur.executescript(SCHEMA)
+    cur.execute("UPDATE area_template SET area_order = CAST(SUBSTR(id, 4) AS INTEGER)")
+    cur.executemany("INSERT INTO inspection_cycle VALUES (?, ?, ?)",
+                    [('cyc-1', T, 1), ('cyc-2', T, 2), ('test-cyc', T, 1)])
+
+    inspections = cur.execute("SELECT id, unit_id, cycle_id, status, review_submitted_at FROM inspection "
+                              "ORDER BY id").fetchall()
+    first_defect = dict(cur.execute("SELECT unit_id || raised_cycle_id, MIN(created_at) FROM defect "
+                                    "GROUP BY unit_id, raised_cycle_id").fetchall())
+    for insp_id, unit_id, cycle_id, status, reviewed in inspections:
+        started = first_defect.get(unit_id + cycle_id) or reviewed or stamp(datetime(2026, 6, 1, 8))
+        started = datetime.strptime(started, '%Y-%m-%d %H:%M:%S')
+        submitted = stamp(started + timedelta(hours=1)) if status != 'in_progress' else None
+        approved = stamp(datetime.strptime(reviewed, '%Y-%m-%d %H:%M:%S') + timedelta(days=1)) \
+            if reviewed and status in ('approved', 'certified') else None
+        cur.execute("UPDATE inspection SET created_at = ?, submitted_at = ?, approved_at = ? WHERE id = ?",
+                    (stamp(started - timedelta(minutes=10)), submitted, approved, insp_id))
+    cur.execute("""
+        UPDATE defect SET cleared_cycle_id = 'cyc-2', cleared_cycle_number = 2
+        WHERE status = 'cleared' AND raised_cycle_id = 'cyc-1'
+    """)
+    cur.execute("""
+        UPDATE unit SET certified_at = (
+            SELECT MAX(review_submitted_at) FROM inspection i WHERE i.unit_id = unit.id)
+        WHERE id IN (SELECT unit_id FROM inspection WHERE status = 'certified')
+    """)
+
+    n = 0
+    for batch_id, name, status, created, closed, cycle_id, rem in BATCHES:
+        cur.execute("INSERT INTO inspection_batch VALUES (?, ?, ?, ?, ?, ?)",
+                    (batch_id, T, name, status, stamp(created), closed and stamp(closed)))
+        for (unit_id,) in cur.execute("SELECT DISTINCT unit_id FROM inspection WHERE cycle_id = ? ORDER BY unit_id",
+                                      (cycle_id,)).fetchall():
+            if int(unit_id[-4:]) % 3 != rem:
+                continue
+            n += 1
+            removed = n % 19 == 0
+            cur.execute("INSERT INTO batch_unit VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        ('bu-{:04d}'.format(n), T, batch_id, unit_id, cycle_id,
+                         'removed' if removed else rng.choice(('pending', 'assigned', 'done')),
+                         stamp(created + timedelta(days=3)) if removed else None))
+
+    areas = [r[0] for r in cur.execute("SELECT id FROM area_template ORDER BY id")]
+    units = [r[0] for r in cur.execute("SELECT id FROM unit ORDER BY id")]
+    for k, unit_id in enumerate(rng.sample(units, len(units) // 5)):
+        created = datetime(2026, 1, 12) + timedelta(days=rng.randint(0, 150))
+        rectified = created + timedelta(days=rng.randint(5, 60)) if k % 3 == 0 else None
+        cur.execute("INSERT INTO latent_area_note VALUES (?, ?, ?, 'cyc-1', 1, ?, ?, ?, ?, ?, ?)",
+                    ('lan-{:03d}'.format(k), T, unit_id, rng.choice(areas + [None]),
+                     'OUTSIDE' if k % 7 == 0 else None,
+                     '<ul><li>Crack above window</li><li>Damp patch</li></ul>' if k % 2 else '<p>Skirting lifted</p>',
+                     stamp(created), rectified and stamp(rectified), 2 if rectified else None))
+    c.commit()
+    c.close()
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else os.path.join(HERE, "test_snapshot_report.db")
+    nu = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    build(out, nu)
+    print("built:", out)
@@ -0,0 +1,1181 @@
+#!/usr/bin/env python3
+"""
+legacy_batch_builders.py - the batch report and site briefing builders as they
+were before app/services/batch_frame.py: one grouped query per section, per zone
+and per unit. Kept as the parity reference for tests/test_batch_frame.py; not
+used by the app. Verbatim except that every ORDER BY count DESC names its group
+keys as a tie-break (ascending), like batch_frame.by_count_desc, instead of
+leaning on the order SQLite happened to emit the groups in.
+"""
+from app.services.db import query_db
+from app.routes.analytics import FLOOR_LABELS, ITEMS_PER_UNIT
+
+
+def _build_batch_report_data(batch_id):
+    """Build data for batch inspection report.
+    Returns dict with all template variables, or None if batch not found.
+    """
+    import base64, os
+    from flask import current_app, session
+
+    tenant_id = session.get('tenant_id', 'MONOGRAPH')
+    reviewed_statuses = ('reviewed', 'approved', 'certified', 'pending_followup')
+
+    # 1. Batch metadata
+    batch_row = query_db("""
+        SELECT ib.id, ib.name, ib.status, ib.created_at,
+               COUNT(DISTINCT bu.id) as total_units
+        FROM inspection_batch ib
+        LEFT JOIN batch_unit bu ON bu.batch_id = ib.id AND bu.removed_at IS NULL
+        WHERE ib.id = ? AND ib.tenant_id = ?
+        GROUP BY ib.id
+    """, [batch_id, tenant_id], one=True)
+    if not batch_row:
+        return None
+    batch = dict(batch_row)
+
+    # 2. Project average benchmark
+    proj_avg_row = query_db("""
+        SELECT AVG(sub.defect_count) as project_avg
+        FROM (
+            SELECT i.unit_id, COUNT(d.id) as defect_count
+            FROM inspection i
+            JOIN unit_real u ON i.unit_id = u.id
+            LEFT JOIN defect d ON d.unit_id = i.unit_id
+                AND d.raised_cycle_id = i.cycle_id
+                AND d.status = 'open'
+                AND d.tenant_id = i.tenant_id
+            WHERE i.tenant_id = ?
+            AND i.status IN ('reviewed','approved','certified','pending_followup')
+            AND u.unit_number NOT LIKE 'TEST%'
+            AND i.cycle_id NOT LIKE 'test-%'
+            GROUP BY i.unit_id
+        ) sub
+    """, [tenant_id], one=True)
+    project_avg_raw = proj_avg_row['project_avg'] or 0 if proj_avg_row and proj_avg_row['project_avg'] else 0
+    project_avg = round(project_avg_raw, 1)
+    proj_defect_rate = round(project_avg_raw / ITEMS_PER_UNIT * 100, 1) if project_avg_raw > 0 else 0
+
+    # 3. Zones in this batch
+    zones_raw = [dict(r) for r in query_db("""
+        SELECT ic.block, ic.floor, ic.id as cycle_id, ic.cycle_number,
+               COUNT(DISTINCT bu.unit_id) as zone_units
+        FROM batch_unit bu
+        JOIN inspection_cycle ic ON bu.cycle_id = ic.id
+        WHERE bu.batch_id = ? AND bu.removed_at IS NULL AND bu.tenant_id = ?
+        GROUP BY ic.block, ic.floor, ic.id, ic.cycle_number
+        ORDER BY ic.block, ic.floor
+    """, [batch_id, tenant_id])]
+    all_cycle_ids = [z['cycle_id'] for z in zones_raw]
+
+    if not all_cycle_ids:
+        return None
+
+    # 4. Build zone data
+    zones = []
+    batch_total_defects = 0
+    batch_total_inspected = 0
+
+    for z in zones_raw:
+        cycle_id = z['cycle_id']
+        block = z['block']
+        floor = z['floor']
+        cycle_number = z['cycle_number']
+
+        unit_rows = [dict(r) for r in query_db("""
+            SELECT u.unit_number, u.id as unit_id,
+                   COUNT(d.id) as defect_count,
+                   i.status as insp_status
+            FROM batch_unit bu
+            JOIN unit_real u ON bu.unit_id = u.id
+            LEFT JOIN defect d ON d.unit_id = u.id
+                AND d.raised_cycle_id = ?
+                AND d.status = 'open'
+                AND d.tenant_id = u.tenant_id
+            LEFT JOIN inspection i ON i.unit_id = u.id AND i.cycle_id = ?
+            WHERE bu.batch_id = ? AND bu.removed_at IS NULL
+            AND bu.cycle_id = ? AND bu.tenant_id = ?
+            GROUP BY u.id, u.unit_number, i.status
+            ORDER BY u.unit_number
+        """, [cycle_id, cycle_id, batch_id, cycle_id, tenant_id])]
+
+        inspected_units = [u for u in unit_rows if u['insp_status'] in reviewed_statuses]
+        zone_inspected = len(inspected_units)
+        zone_defects = sum(u['defect_count'] for u in inspected_units)
+        zone_avg = round(zone_defects / zone_inspected, 1) if zone_inspected > 0 else 0
+
+        rectification = None
+        if cycle_number > 1 and inspected_units:
+            prev_cycle_row = query_db("""
+                SELECT id FROM inspection_cycle
+                WHERE block = ? AND floor = ? AND cycle_number = ? AND tenant_id = ?
+            """, [block, floor, cycle_number - 1, tenant_id], one=True)
+            if prev_cycle_row:
+                prev_cycle_id = prev_cycle_row['id']
+                unit_ids = [u['unit_id'] for u in inspected_units]
+                ph = ','.join('?' * len(unit_ids))
+                r1_row = query_db(
+                    'SELECT COUNT(*) as cnt FROM defect WHERE raised_cycle_id = ? AND unit_id IN (' + ph + ') AND tenant_id = ?',
+                    [prev_cycle_id] + unit_ids + [tenant_id], one=True)
+                cleared_row = query_db(
+                    'SELECT COUNT(*) as cnt FROM defect WHERE cleared_cycle_id = ? AND unit_id IN (' + ph + ') AND tenant_id = ?',
+                    [cycle_id] + unit_ids + [tenant_id], one=True)
+                new_row = query_db(
+                    'SELECT COUNT(*) as cnt FROM defect WHERE raised_cycle_id = ? AND unit_id IN (' + ph + ') AND tenant_id = ?',
+                    [cycle_id] + unit_ids + [tenant_id], one=True)
+                r1_count = r1_row['cnt'] if r1_row else 0
+                cleared_count = cleared_row['cnt'] if cleared_row else 0
+                new_count = new_row['cnt'] if new_row else 0
+                still_open = max(r1_count - cleared_count, 0)
+                clearance_pct = round(cleared_count / r1_count * 100) if r1_count > 0 else 0
+                rectification = {
+                    'r1_raised': r1_count, 'cleared': cleared_count,
+                    'new': new_count, 'still_open': still_open,
+                    'clearance_pct': clearance_pct, 'zone_units': zone_inspected,
+                }
+
+        floor_label = FLOOR_LABELS.get(floor, 'Floor {}'.format(floor))
+        zones.append({
+            'block': block, 'floor': floor, 'floor_label': floor_label,
+            'label': '{} {}'.format(block, floor_label),
+            'cycle_id': cycle_id, 'cycle_number': cycle_number,
+            'total_units': z['zone_units'], 'inspected': zone_inspected,
+            'defects': zone_defects, 'avg': zone_avg,
+            'defect_rate': round(zone_defects / (ITEMS_PER_UNIT * zone_inspected) * 100, 1) if zone_inspected > 0 else 0,
+            'units': unit_rows, 'rectification': rectification,
+        })
+        batch_total_defects += zone_defects
+        batch_total_inspected += zone_inspected
+
+    # 5. Batch KPIs + quartile banding
+    batch_avg = round(batch_total_defects / batch_total_inspected, 1) if batch_total_inspected > 0 else 0
+    batch_items = ITEMS_PER_UNIT * batch_total_inspected
+    batch_defect_rate = round(batch_total_defects / batch_items * 100, 1) if batch_items > 0 else 0
+
+    all_unit_counts = []
+    for z in zones:
+        for u in z['units']:
+            if u['insp_status'] in reviewed_statuses:
+                all_unit_counts.append(u['defect_count'])
+
+    sorted_counts = sorted(all_unit_counts) if all_unit_counts else []
+    if len(sorted_counts) >= 4:
+        n = len(sorted_counts)
+        q1 = sorted_counts[n // 4]
+        q3 = sorted_counts[(n * 3) // 4]
+    elif sorted_counts:
+        q1 = min(sorted_counts)
+        q3 = max(sorted_counts)
+    else:
+        q1 = q3 = 0
+
+    if sorted_counts:
+        n2 = len(sorted_counts)
+        batch_median = sorted_counts[n2 // 2] if n2 % 2 else (sorted_counts[n2 // 2 - 1] + sorted_counts[n2 // 2]) / 2
+        batch_min = sorted_counts[0]
+        batch_max = sorted_counts[-1]
+    else:
+        batch_median = batch_min = batch_max = 0
+
+    kpis = {
+        'total_units': batch['total_units'], 'inspected': batch_total_inspected,
+        'total_defects': batch_total_defects, 'avg_defects': batch_avg,
+        'defect_rate': batch_defect_rate, 'project_avg': project_avg,
+        'proj_defect_rate': proj_defect_rate,
+        'vs_project_ratio': round(batch_avg / project_avg, 1) if project_avg > 0 else 0,
+        'median_defects': round(batch_median, 1),
+        'min_defects': batch_min, 'max_defects': batch_max,
+        'items_inspected': batch_items,
+        'q1': q1, 'q3': q3,
+    }
+
+    # 6. Worst units (top 5 from batch)
+    ph = ','.join('?' * len(all_cycle_ids))
+    worst_units = [dict(r) for r in query_db(
+        "SELECT u.unit_number, u.block, u.floor, COUNT(d.id) as defect_count, d.raised_cycle_number "
+        "FROM defect d JOIN unit_real u ON d.unit_id = u.id "
+        "WHERE d.tenant_id = ? AND d.status = 'open' "
+        "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+        "AND d.raised_cycle_id IN ({}) "
+        "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+        "AND i2.cycle_id = d.raised_cycle_id "
+        "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+        "GROUP BY u.id ORDER BY defect_count DESC, u.id".format(ph),
+        [tenant_id, batch_id, tenant_id] + all_cycle_ids)]
+    worst_sum = sum(u['defect_count'] for u in worst_units)
+    worst_pct = round(worst_sum / batch_total_defects * 100) if batch_total_defects > 0 else 0
+    worst_blocks = {}
+    for u in worst_units:
+        key = u['block'] + ' ' + FLOOR_LABELS.get(u['floor'], 'Floor ' + str(u['floor']))
+        worst_blocks[key] = worst_blocks.get(key, 0) + 1
+    worst_dominant = max(worst_blocks.items(), key=lambda x: x[1]) if worst_blocks else ('', 0)
+
+    # 7. Area breakdown
+    ph = ','.join('?' * len(all_cycle_ids))
+    area_raw = query_db(
+        "SELECT at2.area_name AS area, COUNT(d.id) AS defect_count "
+        "FROM defect d "
+        "JOIN item_template it ON d.item_template_id = it.id "
+        "JOIN category_template ct ON it.category_id = ct.id "
+        "JOIN area_template at2 ON ct.area_id = at2.id "
+        "WHERE d.tenant_id = ? AND d.status = 'open' "
+        "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+        "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+        "AND i2.cycle_id = d.raised_cycle_id "
+        "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+        "AND d.raised_cycle_id IN ({}) "
+        "GROUP BY at2.area_name ORDER BY defect_count DESC, at2.area_name".format(ph),
+        [tenant_id, batch_id, tenant_id] + all_cycle_ids)
+    area_data = [dict(r) for r in area_raw]
+    area_max = area_data[0]['defect_count'] if area_data else 1
+    area_counts_sorted = sorted([a['defect_count'] for a in area_data])
+    if area_counts_sorted:
+        mid = len(area_counts_sorted) // 2
+        area_median = area_counts_sorted[mid] if len(area_counts_sorted) % 2 else (area_counts_sorted[mid - 1] + area_counts_sorted[mid]) / 2
+    else:
+        area_median = 0
+    for a in area_data:
+        a['pct'] = round(a['defect_count'] / batch_total_defects * 100, 1) if batch_total_defects > 0 else 0
+
+    # 8. Area deep dive (top 2 areas)
+    dd_colours = ['#C8963E', '#3D6B8E']
+    area_deep_dive = []
+    ph = ','.join('?' * len(all_cycle_ids))
+    for idx, area_row in enumerate(area_data[:2]):
+        area_name = area_row['area']
+        dd_raw = [dict(r) for r in query_db(
+            "SELECT d.original_comment AS description, COUNT(*) AS count "
+            "FROM defect d "
+            "JOIN item_template it ON d.item_template_id = it.id "
+            "JOIN category_template ct ON it.category_id = ct.id "
+            "JOIN area_template at2 ON ct.area_id = at2.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "AND i2.cycle_id = d.raised_cycle_id "
+            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+            "AND d.raised_cycle_id IN ({}) AND at2.area_name = ? "
+            "GROUP BY d.original_comment ORDER BY count DESC, d.original_comment LIMIT 3".format(ph),
+            [tenant_id, batch_id, tenant_id] + all_cycle_ids + [area_name])]
+        max_dd = dd_raw[0]['count'] if dd_raw else 1
+        for d in dd_raw:
+            d['bar_pct'] = round(d['count'] / max_dd * 100)
+        area_pct = round(area_row['defect_count'] / batch_total_defects * 100, 1) if batch_total_defects > 0 else 0
+        area_deep_dive.append({
+            'area': area_name, 'total': area_row['defect_count'],
+            'pct': area_pct, 'colour': dd_colours[idx], 'defects': dd_raw,
+        })
+    dd_callout = ''
+    if area_deep_dive and area_deep_dive[0]['defects']:
+        a1 = area_deep_dive[0]
+        d1 = a1['defects'][0]
+        dd_callout = 'The most frequent defect in {} is {} ({} occurrences).'.format(
+            a1['area'].title(), d1['description'].lower(), d1['count'])
+        if len(area_deep_dive) >= 2 and area_deep_dive[1]['defects']:
+            a2 = area_deep_dive[1]
+            d2 = a2['defects'][0]
+            dd_callout += ' In {}, {} leads with {} occurrences.'.format(
+                a2['area'].title(), d2['description'].lower(), d2['count'])
+
+    # 9. Recurring defects (2+ units within batch)
+    ph = ','.join('?' * len(all_cycle_ids))
+    recurring_raw = query_db(
+        "SELECT d.original_comment, COUNT(d.id) AS cnt, COUNT(DISTINCT d.unit_id) AS unit_count "
+        "FROM defect d JOIN unit_real u ON d.unit_id = u.id "
+        "WHERE d.tenant_id = ? AND d.status = 'open' "
+        "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+        "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+        "AND i2.cycle_id = d.raised_cycle_id "
+        "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+        "AND d.raised_cycle_id IN ({}) "
+        "GROUP BY d.original_comment HAVING unit_count >= 2 ORDER BY cnt DESC, d.original_comment LIMIT 10".format(ph),
+        [tenant_id, batch_id, tenant_id] + all_cycle_ids)
+    recurring = [dict(r) for r in recurring_raw]
+    if recurring:
+        top_comments = [r['original_comment'] for r in recurring]
+        cat_ph = ','.join('?' * len(top_comments))
+        batch_ph = ','.join('?' * len(all_cycle_ids))
+        cat_raw = query_db(
+            "SELECT d.original_comment, ct.category_name, COUNT(d.id) AS cat_cnt "
+            "FROM defect d "
+            "JOIN item_template it ON d.item_template_id = it.id "
+            "JOIN category_template ct ON it.category_id = ct.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND d.raised_cycle_id IN ({}) "
+            "AND d.original_comment IN ({}) "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "AND i2.cycle_id = d.raised_cycle_id "
+            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+            "GROUP BY d.original_comment, ct.category_name "
+            "ORDER BY d.original_comment, cat_cnt DESC, ct.category_name".format(batch_ph, cat_ph),
+            [tenant_id, batch_id, tenant_id] + all_cycle_ids + top_comments)
+        from collections import defaultdict as _dd
+        cat_map = _dd(list)
+        for row in cat_raw:
+            cat_map[row['original_comment']].append({'cat': row['category_name'], 'cnt': row['cat_cnt']})
+        for r in recurring:
+            r['cat_breakdown'] = cat_map.get(r['original_comment'], [])
+
+    # 10. Category (trade) breakdown
+    ph = ','.join('?' * len(all_cycle_ids))
+    category_data = [dict(r) for r in query_db(
+        "SELECT ct.category_name AS category, COUNT(d.id) AS count "
+        "FROM defect d "
+        "JOIN item_template it ON d.item_template_id = it.id "
+        "JOIN category_template ct ON it.category_id = ct.id "
+        "WHERE d.tenant_id = ? AND d.status = 'open' "
+        "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+        "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+        "AND i2.cycle_id = d.raised_cycle_id "
+        "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+        "AND d.raised_cycle_id IN ({}) "
+        "GROUP BY ct.category_name ORDER BY count DESC, ct.category_name".format(ph),
+        [tenant_id, batch_id, tenant_id] + all_cycle_ids)]
+    cat_max = category_data[0]['count'] if category_data else 1
+    cat_counts = sorted([c['count'] for c in category_data])
+    if cat_counts:
+        mid = len(cat_counts) // 2
+        cat_median = cat_counts[mid] if len(cat_counts) % 2 else (cat_counts[mid - 1] + cat_counts[mid]) / 2
+    else:
+        cat_median = 0
+
+    # 11. Batch rectification aggregate
+    batch_rectification = None
+    rect_zones = [z for z in zones if z['rectification']]
+    if rect_zones:
+        agg = {'r1_raised': 0, 'cleared': 0, 'new': 0, 'still_open': 0, 'zone_units': 0}
+        for z in rect_zones:
+            r = z['rectification']
+            agg['r1_raised'] += r['r1_raised']
+            agg['cleared'] += r['cleared']
+            agg['new'] += r['new']
+            agg['still_open'] += r['still_open']
+            agg['zone_units'] += r['zone_units']
+        agg['clearance_pct'] = round(agg['cleared'] / agg['r1_raised'] * 100) if agg['r1_raised'] > 0 else 0
+        batch_rectification = agg
+
+    # 12. Logo + signature
+    logo_b64 = ''
+    sig_b64 = ''
+    try:
+        img_dir = os.path.join(current_app.static_folder, 'images')
+        logo_path = os.path.join(img_dir, 'monograph_logo.jpg')
+        sig_path = os.path.join(img_dir, 'kc_signature.png')
+        if os.path.exists(logo_path):
+            with open(logo_path, 'rb') as f:
+                logo_b64 = base64.b64encode(f.read()).decode()
+        if os.path.exists(sig_path):
+            with open(sig_path, 'rb') as f:
+                sig_b64 = base64.b64encode(f.read()).decode()
+    except Exception:
+        pass
+
+    area_colours = ['#C8963E', '#3D6B8E', '#4A7C59', '#C44D3F', '#7B6B8D', '#5A8A7A', '#B07D4B']
+    report_date = __import__('datetime').datetime.utcnow().strftime('%d %B %Y')
+    report_date_slug = __import__('datetime').datetime.utcnow().strftime('%Y%m%d')
+
+    # === MIXED BATCH SPLIT (C1/C2) ===
+    c1_zones = [z for z in zones if z['cycle_number'] == 1]
+    c2_zones = [z for z in zones if z['cycle_number'] > 1]
+    is_mixed = bool(c1_zones) and bool(c2_zones)
+
+    # Sort zones worst-first by defect_rate (applies to both C1 and C2)
+    c1_zones.sort(key=lambda z: z['defect_rate'], reverse=True)
+    c2_zones.sort(key=lambda z: z['defect_rate'], reverse=True)
+    zones.sort(key=lambda z: z['defect_rate'], reverse=True)
+
+    # C1-scoped KPIs
+    c1_inspected = sum(z['inspected'] for z in c1_zones)
+    c1_defects = sum(z['defects'] for z in c1_zones)
+    c1_avg = round(c1_defects / c1_inspected, 1) if c1_inspected > 0 else 0
+    c1_items = ITEMS_PER_UNIT * c1_inspected
+    c1_defect_rate = round(c1_defects / c1_items * 100, 1) if c1_items > 0 else 0
+    c1_kpis = {
+        'inspected': c1_inspected,
+        'total_units': sum(z['total_units'] for z in c1_zones),
+        'total_defects': c1_defects,
+        'avg_defects': c1_avg,
+        'defect_rate': c1_defect_rate,
+        'items_inspected': c1_items,
+        'project_avg': project_avg,
+        'proj_defect_rate': proj_defect_rate,
+        'vs_project_ratio': round(c1_avg / project_avg, 1) if project_avg > 0 else 0,
+    }
+
+    # C1-scoped area/trade/worst — defaults to combined; re-scoped when mixed
+    c1_area_data = area_data
+    c1_category_data = category_data
+    c1_worst_units = worst_units
+    c1_area_deep_dive = area_deep_dive
+    c1_dd_callout = dd_callout
+    c1_recurring = recurring
+    c1_area_max = area_max
+    c1_area_median = area_median
+    c1_cat_max = cat_max
+    c1_cat_median = cat_median
+    c1_worst_pct = worst_pct
+
+    if is_mixed:
+        c1_cids = [z['cycle_id'] for z in c1_zones]
+        c1ph = ','.join('?' * len(c1_cids))
+
+        c1_area_data = [dict(r) for r in query_db(
+            "SELECT at2.area_name AS area, COUNT(d.id) AS defect_count "
+            "FROM defect d "
+            "JOIN item_template it ON d.item_template_id = it.id "
+            "JOIN category_template ct ON it.category_id = ct.id "
+            "JOIN area_template at2 ON ct.area_id = at2.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "AND i2.cycle_id = d.raised_cycle_id "
+            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+            "AND d.raised_cycle_id IN ({}) "
+            "GROUP BY at2.area_name ORDER BY defect_count DESC, at2.area_name".format(c1ph),
+            [tenant_id, batch_id, tenant_id] + c1_cids)]
+        c1_area_max = c1_area_data[0]['defect_count'] if c1_area_data else 1
+        c1_ac = sorted([a['defect_count'] for a in c1_area_data])
+        if c1_ac:
+            mid = len(c1_ac) // 2
+            c1_area_median = c1_ac[mid] if len(c1_ac) % 2 else (c1_ac[mid-1] + c1_ac[mid]) / 2
+        else:
+            c1_area_median = 0
+        for a in c1_area_data:
+            a['pct'] = round(a['defect_count'] / c1_defects * 100, 1) if c1_defects > 0 else 0
+
+        c1_category_data = [dict(r) for r in query_db(
+            "SELECT ct.category_name AS category, COUNT(d.id) AS count "
+            "FROM defect d "
+            "JOIN item_template it ON d.item_template_id = it.id "
+            "JOIN category_template ct ON it.category_id = ct.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "AND i2.cycle_id = d.raised_cycle_id "
+            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+            "AND d.raised_cycle_id IN ({}) "
+            "GROUP BY ct.category_name ORDER BY count DESC, ct.category_name".format(c1ph),
+            [tenant_id, batch_id, tenant_id] + c1_cids)]
+        c1_cat_max = c1_category_data[0]['count'] if c1_category_data else 1
+        c1_cc = sorted([c['count'] for c in c1_category_data])
+        if c1_cc:
+            mid = len(c1_cc) // 2
+            c1_cat_median = c1_cc[mid] if len(c1_cc) % 2 else (c1_cc[mid-1] + c1_cc[mid]) / 2
+        else:
+            c1_cat_median = 0
+
+        c1_worst_units = [dict(r) for r in query_db(
+            "SELECT u.unit_number, u.block, u.floor, COUNT(d.id) as defect_count "
+            "FROM defect d JOIN unit_real u ON d.unit_id = u.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND d.raised_cycle_id IN ({}) "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "AND i2.cycle_id = d.raised_cycle_id "
+            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+            "GROUP BY u.id ORDER BY defect_count DESC, u.id".format(c1ph),
+            [tenant_id, batch_id, tenant_id] + c1_cids)]
+        c1_ws = sum(u['defect_count'] for u in c1_worst_units)
+        c1_worst_pct = round(c1_ws / c1_defects * 100) if c1_defects > 0 else 0
+
+        c1_area_deep_dive = []
+        for idx2, ar2 in enumerate(c1_area_data[:2]):
+            aname = ar2['area']
+            dd2 = [dict(r) for r in query_db(
+                "SELECT d.original_comment AS description, COUNT(*) AS count "
+                "FROM defect d "
+                "JOIN item_template it ON d.item_template_id = it.id "
+                "JOIN category_template ct ON it.category_id = ct.id "
+                "JOIN area_template at2 ON ct.area_id = at2.id "
+                "WHERE d.tenant_id = ? AND d.status = 'open' "
+                "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+                "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+                "AND i2.cycle_id = d.raised_cycle_id "
+                "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+                "AND d.raised_cycle_id IN ({}) AND at2.area_name = ? "
+                "GROUP BY d.original_comment ORDER BY count DESC, d.original_comment LIMIT 3".format(c1ph),
+                [tenant_id, batch_id, tenant_id] + c1_cids + [aname])]
+            mx = dd2[0]['count'] if dd2 else 1
+            for d in dd2:
+                d['bar_pct'] = round(d['count'] / mx * 100)
+            apct = round(ar2['defect_count'] / c1_defects * 100, 1) if c1_defects > 0 else 0
+            c1_area_deep_dive.append({
+                'area': aname, 'total': ar2['defect_count'],
+                'pct': apct, 'colour': dd_colours[idx2], 'defects': dd2,
+            })
+        c1_dd_callout = ''
+        if c1_area_deep_dive and c1_area_deep_dive[0]['defects']:
+            a1c = c1_area_deep_dive[0]
+            d1c = a1c['defects'][0]
+            c1_dd_callout = 'The most frequent defect in {} is {} ({} occurrences).'.format(
+                a1c['area'].title(), d1c['description'].lower(), d1c['count'])
+
+        c1_recurring = [dict(r) for r in query_db(
+            "SELECT d.original_comment, COUNT(d.id) AS cnt, COUNT(DISTINCT d.unit_id) AS unit_count "
+            "FROM defect d JOIN unit_real u ON d.unit_id = u.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "AND i2.cycle_id = d.raised_cycle_id "
+            "AND i2.status IN ('reviewed','approved','certified','pending_followup')) "
+            "AND d.raised_cycle_id IN ({}) "
+            "GROUP BY d.original_comment HAVING unit_count >= 2 ORDER BY cnt DESC, d.original_comment LIMIT 10".format(c1ph),
+            [tenant_id, batch_id, tenant_id] + c1_cids)]
+
+    # C2 unit rectification table
+    c2_unit_table = []
+    c2_total_r1 = 0
+    c2_total_cleared = 0
+    c2_total_new = 0
+    c2_total_still_open = 0
+    for z in c2_zones:
+        cyc_id = z['cycle_id']
+        prev_row = query_db(
+            "SELECT id FROM inspection_cycle WHERE block=? AND floor=? AND cycle_number=? AND tenant_id=?",
+            [z['block'], z['floor'], z['cycle_number'] - 1, tenant_id], one=True)
+        if not prev_row:
+            continue
+        prev_id = prev_row['id']
+        for u in z['units']:
+            if u['insp_status'] not in reviewed_statuses:
+                continue
+            uid = u['unit_id']
+            r1r = query_db('SELECT COUNT(*) as cnt FROM defect WHERE raised_cycle_id=? AND unit_id=? AND tenant_id=?',
+                           [prev_id, uid, tenant_id], one=True)
+            clr = query_db('SELECT COUNT(*) as cnt FROM defect WHERE cleared_cycle_id=? AND unit_id=? AND tenant_id=?',
+                           [cyc_id, uid, tenant_id], one=True)
+            nwr = query_db('SELECT COUNT(*) as cnt FROM defect WHERE raised_cycle_id=? AND unit_id=? AND tenant_id=?',
+                           [cyc_id, uid, tenant_id], one=True)
+            r1c = r1r['cnt'] if r1r else 0
+            clc = clr['cnt'] if clr else 0
+            nwc = nwr['cnt'] if nwr else 0
+            so = max(r1c - clc, 0)
+            cpct = round(clc / r1c * 100) if r1c > 0 else 0
+            c2_unit_table.append({
+                'unit_number': u['unit_number'],
+                'zone': '{} {}'.format(z['block'], z['floor_label']),
+                'cycle_number': z['cycle_number'],
+                'r1_defects': r1c, 'cleared': clc,
+                'still_open': so, 'new': nwc, 'clearance_pct': cpct,
+            })
+            c2_total_r1 += r1c
+            c2_total_cleared += clc
+            c2_total_new += nwc
+            c2_total_still_open += so
+    c2_unit_table.sort(key=lambda x: (-x['cycle_number'], x['clearance_pct'], -x['still_open']))
+    c2_summary = {
+        'total_r1': c2_total_r1, 'total_cleared': c2_total_cleared,
+        'total_new': c2_total_new, 'total_still_open': c2_total_still_open,
+        'clearance_pct': round(c2_total_cleared / c2_total_r1 * 100) if c2_total_r1 > 0 else 0,
+        'units_inspected': len(c2_unit_table),
+    }
+
+    # C2 area/trade (remaining open defects for C2 units)
+    c2_area_data = []
+    c2_trade_data = []
+    c2_area_max = 1
+    c2_trade_max = 1
+    if c2_zones:
+        c2_uids = []
+        for z in c2_zones:
+            for u in z['units']:
+                if u['insp_status'] in reviewed_statuses:
+                    c2_uids.append(u['unit_id'])
+        if c2_uids:
+            uph2 = ','.join('?' * len(c2_uids))
+            c2_area_data = [dict(r) for r in query_db(
+                "SELECT at2.area_name AS area, COUNT(d.id) AS defect_count "
+                "FROM defect d "
+                "JOIN item_template it ON d.item_template_id = it.id "
+                "JOIN category_template ct ON it.category_id = ct.id "
+                "JOIN area_template at2 ON ct.area_id = at2.id "
+                "WHERE d.tenant_id = ? AND d.status = 'open' AND d.unit_id IN ({}) "
+                "GROUP BY at2.area_name ORDER BY defect_count DESC, at2.area_name".format(uph2),
+                [tenant_id] + c2_uids)]
+            c2_area_max = c2_area_data[0]['defect_count'] if c2_area_data else 1
+            c2_trade_data = [dict(r) for r in query_db(
+                "SELECT ct.category_name AS category, COUNT(d.id) AS count "
+                "FROM defect d "
+                "JOIN item_template it ON d.item_template_id = it.id "
+                "JOIN category_template ct ON it.category_id = ct.id "
+                "WHERE d.tenant_id = ? AND d.status = 'open' AND d.unit_id IN ({}) "
+                "GROUP BY ct.category_name ORDER BY count DESC, ct.category_name".format(uph2),
+                [tenant_id] + c2_uids)]
+            c2_trade_max = c2_trade_data[0]['count'] if c2_trade_data else 1
+
+    # --- Priority Actions (cover-page callout) ---
+    # Only meaningful on mixed batches with remaining open defects.
+    priority_actions = []
+    if is_mixed and c2_summary.get('total_still_open', 0) > 0:
+        total_open = c2_summary['total_still_open']
+        units_with_open = sum(1 for u in c2_unit_table if u['still_open'] > 0)
+        # Bullet 1 — close-out total (always shown in this branch)
+        priority_actions.append({
+            'kind': 'total',
+            'text': 'Close out {} defects across {} unit{}.'.format(
+                total_open, units_with_open, 's' if units_with_open != 1 else ''),
+        })
+        # Bullet 2 — dominant remaining area (if >= 25% concentration)
+        if c2_area_data:
+            top_area = c2_area_data[0]
+            area_pct = round(top_area['defect_count'] / total_open * 100)
+            if area_pct >= 25:
+                priority_actions.append({
+                    'kind': 'area',
+                    'text': '{} holds {}% of what\'s left \u2014 one subcontractor brief closes most of it.'.format(
+                        top_area['area'], area_pct),
+                })
+        # Bullet 3 — top remaining zone (if >= 3 units still open)
+        zone_counts = {}
+        for u in c2_unit_table:
+            if u['still_open'] > 0:
+                zone_counts[u['zone']] = zone_counts.get(u['zone'], 0) + 1
+        if zone_counts:
+            top_zone, top_zone_n = max(zone_counts.items(), key=lambda kv: kv[1])
+            if top_zone_n >= 3:
+                priority_actions.append({
+                    'kind': 'zone',
+                    'text': '{} is where the concentration is \u2014 {} units still open.'.format(
+                        top_zone, top_zone_n),
+                })
+
+    return {
+        'batch': batch,
+        'zones': zones,
+        'kpis': kpis,
+        'area_data': area_data,
+        'area_max': area_max,
+        'area_median': area_median,
+        'area_colours': area_colours,
+        'area_deep_dive': area_deep_dive,
+        'dd_callout': dd_callout,
+        'recurring': recurring,
+        'category_data': category_data,
+        'cat_max': cat_max,
+        'cat_median': cat_median,
+        'worst_units': worst_units,
+        'worst_pct': worst_pct,
+        'worst_dominant_zone': worst_dominant[0],
+        'worst_dominant_count': worst_dominant[1],
+        'batch_rectification': batch_rectification,
+        'priority_actions': priority_actions,
+        'logo_b64': logo_b64,
+        'sig_b64': sig_b64,
+        'report_date': report_date,
+        'report_date_slug': report_date_slug,
+        'floor_labels': FLOOR_LABELS,
+        'batch_id': batch_id,
+        'is_mixed': is_mixed,
+        'c1_zones': c1_zones,
+        'c2_zones': c2_zones,
+        'c1_kpis': c1_kpis,
+        'c1_area_data': c1_area_data,
+        'c1_category_data': c1_category_data,
+        'c1_worst_units': c1_worst_units,
+        'c1_worst_pct': c1_worst_pct,
+        'c1_area_deep_dive': c1_area_deep_dive,
+        'c1_dd_callout': c1_dd_callout,
+        'c1_recurring': c1_recurring,
+        'c1_area_max': c1_area_max,
+        'c1_area_median': c1_area_median,
+        'c1_cat_max': c1_cat_max,
+        'c1_cat_median': c1_cat_median,
+        'c2_unit_table': c2_unit_table,
+        'c2_summary': c2_summary,
+        'c2_area_data': c2_area_data,
+        'c2_trade_data': c2_trade_data,
+        'c2_area_max': c2_area_max,
+        'c2_trade_max': c2_trade_max,
+    }
+
+
+def _build_briefing_data(batch_id):
+    """Build data for the SR-013-style site briefing.
+
+    Separate from _build_batch_report_data. Produces facts-only data for
+    Raubex site briefing: zones (C1 + C2), hot spots, by area, by trade,
+    snag unit ranking, de-snag unit results, exclusion list.
+
+    Returns dict with all template variables, or None if batch not found.
+    """
+    from flask import session
+
+    tenant_id = session.get('tenant_id', 'MONOGRAPH')
+    reviewed_statuses = ('submitted', 'reviewed', 'approved', 'certified', 'pending_followup')
+    FLOOR_LABELS_LOCAL = {0: 'Ground', 1: '1st Floor', 2: '2nd Floor'}
+
+    # ---- 1. Batch metadata ----
+    batch_row = query_db("""
+        SELECT ib.id, ib.name, ib.status, ib.created_at,
+               COUNT(DISTINCT bu.id) as total_units
+        FROM inspection_batch ib
+        LEFT JOIN batch_unit bu ON bu.batch_id = ib.id AND bu.removed_at IS NULL
+        WHERE ib.id = ? AND ib.tenant_id = ?
+        GROUP BY ib.id
+    """, [batch_id, tenant_id], one=True)
+    if not batch_row:
+        return None
+    batch = dict(batch_row)
+
+    # ---- 2. Cycles in this batch, split by cycle_number ----
+    cycles = [dict(r) for r in query_db("""
+        SELECT ic.id as cycle_id, ic.block, ic.floor, ic.cycle_number,
+               COUNT(DISTINCT bu.unit_id) as zone_units
+        FROM batch_unit bu
+        JOIN inspection_cycle ic ON bu.cycle_id = ic.id
+        WHERE bu.batch_id = ? AND bu.removed_at IS NULL AND bu.tenant_id = ?
+        GROUP BY ic.id, ic.block, ic.floor, ic.cycle_number
+        ORDER BY ic.cycle_number, ic.block, ic.floor
+    """, [batch_id, tenant_id])]
+    if not cycles:
+        return None
+
+    c1_cycle_ids = [c['cycle_id'] for c in cycles if c['cycle_number'] == 1]
+    c2_cycle_ids = [c['cycle_id'] for c in cycles if c['cycle_number'] >= 2]
+
+    # ---- 3. C1 per-unit totals (defects raised in C1, status=open, reviewed) ----
+    c1_units = []
+    c1_total_defects = 0
+    if c1_cycle_ids:
+        ph = ','.join('?' * len(c1_cycle_ids))
+        c1_units_rows = query_db(
+            "SELECT u.id as unit_id, u.unit_number, u.block, u.floor, "
+            "i.cycle_id, ic.cycle_number, i.status AS inspection_status, "
+            "COUNT(d.id) as defect_count "
+            "FROM batch_unit bu "
+            "JOIN unit_real u ON bu.unit_id = u.id "
+            "JOIN inspection i ON i.unit_id = u.id AND i.cycle_id = bu.cycle_id "
+            "JOIN inspection_cycle ic ON i.cycle_id = ic.id "
+            "LEFT JOIN defect d ON d.unit_id = u.id AND d.raised_cycle_id = bu.cycle_id "
+            "  AND d.status = 'open' AND d.tenant_id = u.tenant_id "
+            "WHERE bu.batch_id = ? AND bu.removed_at IS NULL AND bu.tenant_id = ? "
+            "AND bu.cycle_id IN (" + ph + ") "
+            "AND i.status IN ('submitted','reviewed','approved','certified','pending_followup') "
+            "GROUP BY u.id, u.unit_number, u.block, u.floor, i.cycle_id, ic.cycle_number, i.status "
+            "ORDER BY defect_count DESC, u.unit_number, u.id, i.cycle_id, ic.cycle_number, i.status",
+            [batch_id, tenant_id] + c1_cycle_ids)
+        c1_units = [dict(r) for r in c1_units_rows]
+        c1_total_defects = sum(u['defect_count'] for u in c1_units)
+
+    # ---- 4. C2 per-unit rectification (brought forward / cleared / open) ----
+    c2_units = []
+    c2_brought_forward = 0
+    c2_cleared = 0
+    c2_still_open = 0
+    c2_open_details = []
+    if c2_cycle_ids:
+        ph = ','.join('?' * len(c2_cycle_ids))
+        c2_rows = query_db(
+            "SELECT u.id as unit_id, u.unit_number, u.block, u.floor, "
+            "bu.cycle_id, ic.cycle_number, i.status AS inspection_status "
+            "FROM batch_unit bu "
+            "JOIN unit_real u ON bu.unit_id = u.id "
+            "JOIN inspection i ON i.unit_id = u.id AND i.cycle_id = bu.cycle_id "
+            "JOIN inspection_cycle ic ON i.cycle_id = ic.id "
+            "WHERE bu.batch_id = ? AND bu.removed_at IS NULL AND bu.tenant_id = ? "
+            "AND bu.cycle_id IN (" + ph + ") "
+            "AND i.status IN ('submitted','reviewed','approved','certified','pending_followup') "
+            "ORDER BY u.unit_number",
+            [batch_id, tenant_id] + c2_cycle_ids)
+        for r in c2_rows:
+            unit_id = r['unit_id']
+            c2_cycle_id = r['cycle_id']
+            # Find the previous cycle for this unit (same block/floor, cycle_number - 1)
+            prev_cycle = query_db("""
+                SELECT ic.id FROM inspection_cycle ic
+                WHERE ic.tenant_id = ?
+                AND ic.block = (SELECT block FROM inspection_cycle WHERE id = ?)
+                AND ic.floor = (SELECT floor FROM inspection_cycle WHERE id = ?)
+                AND ic.cycle_number = (SELECT cycle_number - 1 FROM inspection_cycle WHERE id = ?)
+            """, [tenant_id, c2_cycle_id, c2_cycle_id, c2_cycle_id], one=True)
+            if not prev_cycle:
+                continue
+            prev_cycle_id = prev_cycle['id']
+            bf_row = query_db(
+                "SELECT COUNT(*) as cnt FROM defect "
+                "WHERE unit_id = ? AND raised_cycle_id = ? AND tenant_id = ?",
+                [unit_id, prev_cycle_id, tenant_id], one=True)
+            cl_row = query_db(
+                "SELECT COUNT(*) as cnt FROM defect "
+                "WHERE unit_id = ? AND raised_cycle_id = ? AND cleared_cycle_id = ? "
+                "AND tenant_id = ?",
+                [unit_id, prev_cycle_id, c2_cycle_id, tenant_id], one=True)
+            bf = bf_row['cnt'] if bf_row else 0
+            cl = cl_row['cnt'] if cl_row else 0
+            op = max(bf - cl, 0)
+            c2_units.append({
+                'unit_id': unit_id,
+                'unit_number': r['unit_number'],
+                'block': r['block'],
+                'floor': r['floor'],
+                'brought_forward': bf,
+                'cleared': cl,
+                'still_open': op,
+                'clearance_pct': round(cl / bf * 100, 1) if bf > 0 else 0,
+                'inspection_status': r['inspection_status'],
+            })
+            c2_brought_forward += bf
+            c2_cleared += cl
+            c2_still_open += op
+            if op > 0:
+                detail_rows_raw = query_db(
+                    "SELECT at2.area_name AS area, ct.category_name AS trade, "
+                    "COUNT(d.id) AS count "
+                    "FROM defect d "
+                    "JOIN item_template it ON d.item_template_id = it.id "
+                    "JOIN category_template ct ON it.category_id = ct.id "
+                    "JOIN area_template at2 ON ct.area_id = at2.id "
+                    "WHERE d.unit_id = ? AND d.raised_cycle_id = ? "
+                    "AND (d.cleared_cycle_id IS NULL OR d.cleared_cycle_id != ?) "
+                    "AND d.tenant_id = ? "
+                    "GROUP BY at2.area_name, ct.category_name "
+                    "ORDER BY at2.area_order, ct.category_order",
+                    [unit_id, prev_cycle_id, c2_cycle_id, tenant_id])
+                detail_list = [dict(dr) for dr in detail_rows_raw]
+                for dr in detail_list:
+                    c2_open_details.append({
+                        'unit_number': r['unit_number'],
+                        'block': r['block'],
+                        'floor': r['floor'],
+                        'floor_label': FLOOR_LABELS_LOCAL.get(
+                            r['floor'], 'Floor {}'.format(r['floor'])),
+                        'area': dr['area'],
+                        'trade': dr['trade'],
+                        'count': dr['count'],
+                    })
+                # v277: top area x trade combos attached to this unit (sorted by count desc, cap 5)
+                sorted_combos = sorted(detail_list, key=lambda x: x['count'], reverse=True)
+                c2_units[-1]['top_combos'] = sorted_combos[:5]
+                c2_units[-1]['top_combos_overflow'] = max(0, len(sorted_combos) - 5)
+
+    # v277: Sort c2_units by clearance % asc (open units worst-first), cleared units last
+    c2_units.sort(key=lambda u: (1 if u['still_open'] == 0 else 0, u['clearance_pct'], u['unit_number']))
+
+    # ---- 5. Zone summary (all cycles, C1 and C2) ----
+    zones = []
+    for c in cycles:
+        cycle_id = c['cycle_id']
+        is_c1 = (c['cycle_number'] == 1)
+        block = c['block']
+        floor = c['floor']
+        floor_label = FLOOR_LABELS_LOCAL.get(floor, 'Floor {}'.format(floor))
+        zone = {
+            'block': block,
+            'floor': floor,
+            'floor_label': floor_label,
+            'label': '{} {}'.format(block, floor_label),
+            'cycle_id': cycle_id,
+            'cycle_number': c['cycle_number'],
+            'cycle_tag': 'C1' if is_c1 else 'C{}'.format(c['cycle_number']),
+            'units': c['zone_units'],
+            'is_c1': is_c1,
+        }
+        if is_c1:
+            zd = sum(u['defect_count'] for u in c1_units if u['cycle_id'] == cycle_id)
+            zu = sum(1 for u in c1_units if u['cycle_id'] == cycle_id)
+            zone['defects_raised'] = zd
+            zone['avg_per_unit'] = round(zd / zu, 1) if zu > 0 else 0
+        else:
+            zbf = sum(u['brought_forward'] for u in c2_units if u['block'] == block and u['floor'] == floor)
+            zcl = sum(u['cleared'] for u in c2_units if u['block'] == block and u['floor'] == floor)
+            zop = sum(u['still_open'] for u in c2_units if u['block'] == block and u['floor'] == floor)
+            zone['brought_forward'] = zbf
+            zone['cleared'] = zcl
+            zone['still_open'] = zop
+        zones.append(zone)
+
+    # Sort zones: C1 by avg_per_unit desc (per-unit intensity); C2 by brought_forward desc (workload)
+    c1_zones = sorted([z for z in zones if z['is_c1']],
+                     key=lambda z: z['avg_per_unit'], reverse=True)
+    c2_zones = sorted([z for z in zones if not z['is_c1']],
+                     key=lambda z: z['brought_forward'], reverse=True)
+    zones_sorted = c1_zones + c2_zones
+    # Page 6 rectification order: zone with open defects first, then by workload
+    c2_zones_by_open = sorted([z for z in zones if not z['is_c1']],
+                              key=lambda z: (z['still_open'], z['brought_forward']), reverse=True)
+
+    # ---- 6. By area (C1 only) ----
+    area_data = []
+    area_max = 1
+    if c1_cycle_ids and c1_total_defects > 0:
+        ph = ','.join('?' * len(c1_cycle_ids))
+        area_rows = query_db(
+            "SELECT at2.area_name AS area, COUNT(d.id) AS count "
+            "FROM defect d "
+            "JOIN item_template it ON d.item_template_id = it.id "
+            "JOIN category_template ct ON it.category_id = ct.id "
+            "JOIN area_template at2 ON ct.area_id = at2.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit "
+            "   WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND d.raised_cycle_id IN (" + ph + ") "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "   AND i2.cycle_id = d.raised_cycle_id "
+            "   AND i2.status IN ('submitted','reviewed','approved','certified','pending_followup')) "
+            "GROUP BY at2.area_name ORDER BY count DESC, at2.area_name",
+            [tenant_id, batch_id, tenant_id] + c1_cycle_ids)
+        area_data = [dict(r) for r in area_rows]
+        area_max = area_data[0]['count'] if area_data else 1
+        for a in area_data:
+            a['pct'] = round(a['count'] / c1_total_defects * 100, 1) if c1_total_defects > 0 else 0
+            a['bar_pct'] = round(a['count'] / area_max * 100) if area_max > 0 else 0
+
+    # ---- 7. By trade (C1 only) — trade = category_name ----
+    trade_data = []
+    trade_max = 1
+    if c1_cycle_ids and c1_total_defects > 0:
+        ph = ','.join('?' * len(c1_cycle_ids))
+        trade_rows = query_db(
+            "SELECT ct.category_name AS trade, COUNT(d.id) AS count "
+            "FROM defect d "
+            "JOIN item_template it ON d.item_template_id = it.id "
+            "JOIN category_template ct ON it.category_id = ct.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit "
+            "   WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND d.raised_cycle_id IN (" + ph + ") "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "   AND i2.cycle_id = d.raised_cycle_id "
+            "   AND i2.status IN ('submitted','reviewed','approved','certified','pending_followup')) "
+            "GROUP BY ct.category_name ORDER BY count DESC, ct.category_name",
+            [tenant_id, batch_id, tenant_id] + c1_cycle_ids)
+        trade_data = [dict(r) for r in trade_rows]
+        trade_max = trade_data[0]['count'] if trade_data else 1
+        for t in trade_data:
+            t['pct'] = round(t['count'] / c1_total_defects * 100, 1) if c1_total_defects > 0 else 0
+            t['bar_pct'] = round(t['count'] / trade_max * 100) if trade_max > 0 else 0
+
+        # v275: per-trade top defect comment + item-level breakdown
+        top_comment_rows = query_db(
+            "SELECT ct.category_name AS trade, d.original_comment AS comment, COUNT(*) AS cnt "
+            "FROM defect d "
+            "JOIN item_template it ON d.item_template_id = it.id "
+            "JOIN category_template ct ON it.category_id = ct.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit "
+            "   WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND d.raised_cycle_id IN (" + ph + ") "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "   AND i2.cycle_id = d.raised_cycle_id "
+            "   AND i2.status IN ('submitted','reviewed','approved','certified','pending_followup')) "
+            "AND d.original_comment IS NOT NULL "
+            "AND LENGTH(TRIM(d.original_comment)) > 0 "
+            "GROUP BY ct.category_name, d.original_comment "
+            "ORDER BY ct.category_name, cnt DESC, d.original_comment",
+            [tenant_id, batch_id, tenant_id] + c1_cycle_ids)
+        top_per_trade = {}
+        for r in top_comment_rows:
+            if r['trade'] not in top_per_trade:
+                top_per_trade[r['trade']] = {
+                    'comment': (r['comment'] or '').strip(),
+                    'cnt': r['cnt'],
+                }
+        item_sql_v275 = (
+            "SELECT it.item_description AS item, COUNT(*) AS cnt "
+            "FROM defect d "
+            "JOIN item_template it ON d.item_template_id = it.id "
+            "JOIN category_template ct ON it.category_id = ct.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit "
+            "   WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND d.raised_cycle_id IN (" + ph + ") "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "   AND i2.cycle_id = d.raised_cycle_id "
+            "   AND i2.status IN ('submitted','reviewed','approved','certified','pending_followup')) "
+            "AND ct.category_name = ? AND d.original_comment = ? "
+            "GROUP BY it.item_description ORDER BY cnt DESC, it.item_description"
+        )
+        items_by_trade = {}
+        for _trade, _top in top_per_trade.items():
+            if not _top['comment']:
+                items_by_trade[_trade] = []
+                continue
+            _rs = query_db(item_sql_v275,
+                [tenant_id, batch_id, tenant_id] + c1_cycle_ids + [_trade, _top['comment']])
+            items_by_trade[_trade] = [(r['item'], r['cnt']) for r in _rs]
+
+        def _fmt_items_v275(items, cap=5):
+            if not items:
+                return ''
+            shown = items[:cap]
+            rem = len(items) - cap
+            s = ' · '.join(f"{itm} {cnt}" for itm, cnt in shown)
+            if rem > 0:
+                s += f' · …+{rem} more'
+            return s
+
+        for t in trade_data:
+            top = top_per_trade.get(t['trade'], {'comment': '', 'cnt': 0})
+            t['top_defect'] = top['comment']
+            t['top_defect_cnt'] = top['cnt']
+            t['top_defect_items'] = _fmt_items_v275(items_by_trade.get(t['trade'], []))
+
+    # ---- 8. Top area x trade combinations (C1 only, top 8) ----
+    combo_data = []
+    combo_max = 1
+    combo_top_sum = 0
+    if c1_cycle_ids and c1_total_defects > 0:
+        ph = ','.join('?' * len(c1_cycle_ids))
+        combo_rows = query_db(
+            "SELECT at2.area_name AS area, ct.category_name AS trade, "
+            "COUNT(d.id) AS count "
+            "FROM defect d "
+            "JOIN item_template it ON d.item_template_id = it.id "
+            "JOIN category_template ct ON it.category_id = ct.id "
+            "JOIN area_template at2 ON ct.area_id = at2.id "
+            "WHERE d.tenant_id = ? AND d.status = 'open' "
+            "AND d.unit_id IN (SELECT unit_id FROM batch_unit "
+            "   WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) "
+            "AND d.raised_cycle_id IN (" + ph + ") "
+            "AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id "
+            "   AND i2.cycle_id = d.raised_cycle_id "
+            "   AND i2.status IN ('submitted','reviewed','approved','certified','pending_followup')) "
+            "GROUP BY at2.area_name, ct.category_name "
+            "ORDER BY count DESC, at2.area_name, ct.category_name LIMIT 8",
+            [tenant_id, batch_id, tenant_id] + c1_cycle_ids)
+        combo_data = [dict(r) for r in combo_rows]
+        combo_max = combo_data[0]['count'] if combo_data else 1
+        combo_top_sum = sum(c['count'] for c in combo_data)
+        for c in combo_data:
+            c['pct'] = round(c['count'] / c1_total_defects * 100, 1) if c1_total_defects > 0 else 0
+            c['bar_pct'] = round(c['count'] / combo_max * 100) if combo_max > 0 else 0
+
+    # ---- 9. Hot spots (derived) ----
+    worst_zone = max(c1_zones, key=lambda z: z['defects_raised']) if c1_zones else None
+    worst_unit = c1_units[0] if c1_units else None
+    worst_area = area_data[0] if area_data else None
+    worst_trade = trade_data[0] if trade_data else None
+
+    # ---- 10. C1 per-unit area split (for page 5 split bars) ----
+    c1_unit_splits = []
+    if c1_units:
+        for u in c1_units:
+            splits = [dict(r) for r in query_db(
+                "SELECT at2.area_name AS area, COUNT(d.id) AS count "
+                "FROM defect d "
+                "JOIN item_template it ON d.item_template_id = it.id "
+                "JOIN category_template ct ON it.category_id = ct.id "
+                "JOIN area_template at2 ON ct.area_id = at2.id "
+                "WHERE d.tenant_id = ? AND d.status = 'open' "
+                "AND d.unit_id = ? AND d.raised_cycle_id = ? "
+                "GROUP BY at2.area_name ORDER BY count DESC, at2.area_name",
+                [tenant_id, u['unit_id'], u['cycle_id']])]
+            # v276c: per-unit worst area x trade combo
+            worst_spot_row = query_db(
+                "SELECT at2.area_name AS area, ct.category_name AS trade, COUNT(d.id) AS count "
+                "FROM defect d "
+                "JOIN item_template it ON d.item_template_id = it.id "
+                "JOIN category_template ct ON it.category_id = ct.id "
+                "JOIN area_template at2 ON ct.area_id = at2.id "
+                "WHERE d.tenant_id = ? AND d.status = 'open' "
+                "AND d.unit_id = ? AND d.raised_cycle_id = ? "
+                "GROUP BY at2.area_name, ct.category_name "
+                "ORDER BY count DESC, at2.area_name, ct.category_name LIMIT 1",
+                [tenant_id, u['unit_id'], u['cycle_id']], one=True)
+            c1_unit_splits.append({
+                'unit_id': u['unit_id'],
+                'unit_number': u['unit_number'],
+                'block': u['block'],
+                'floor': u['floor'],
+                'floor_label': FLOOR_LABELS_LOCAL.get(u['floor'], 'Floor {}'.format(u['floor'])),
+                'total': u['defect_count'],
+                'splits': splits,
+                'worst_spot': dict(worst_spot_row) if worst_spot_row else None,
+                'inspection_status': u['inspection_status'],
+            })
+
+    # ---- 11. Exclusion list (for page 7) ----
+    # Use the exclusion_list linked to the batch_units.
+    excl_list_row = query_db("""
+        SELECT DISTINCT exclusion_list_id FROM batch_unit
+        WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?
+        AND exclusion_list_id IS NOT NULL
+        LIMIT 1
+    """, [batch_id, tenant_id], one=True)
+    excl_list = None
+    excl_items_grouped = []
+    excl_total = 0
+    if excl_list_row and excl_list_row['exclusion_list_id']:
+        excl_list_id = excl_list_row['exclusion_list_id']
+        excl_list = dict(query_db(
+            "SELECT id, name, created_at FROM exclusion_list WHERE id = ? AND tenant_id = ?",
+            [excl_list_id, tenant_id], one=True) or {})
+        excl_rows = [dict(r) for r in query_db("""
+            SELECT at2.area_name AS area, at2.area_order,
+                   ct.category_name AS trade, ct.category_order,
+                   it.item_description AS item
+            FROM exclusion_list_item eli
+            JOIN item_template it ON eli.item_template_id = it.id
+            JOIN category_template ct ON it.category_id = ct.id
+            JOIN area_template at2 ON ct.area_id = at2.id
+            WHERE eli.exclusion_list_id = ?
+            ORDER BY at2.area_order, ct.category_order, it.item_order
+        """, [excl_list_id])]
+        excl_total = len(excl_rows)
+        # Group by area -> trade
+        area_map = {}
+        for r in excl_rows:
+            a = r['area']
+            t = r['trade']
+            if a not in area_map:
+                area_map[a] = {'name': a, 'order': r['area_order'], 'trades': {}, 'count': 0}
+            if t not in area_map[a]['trades']:
+                area_map[a]['trades'][t] = {'name': t, 'order': r['category_order'], 'item_list': []}
+            area_map[a]['trades'][t]['item_list'].append(r['item'])
+            area_map[a]['count'] += 1
+        for a in sorted(area_map.values(), key=lambda x: x['order']):
+            a['trades'] = sorted(a['trades'].values(), key=lambda x: x['order'])
+            excl_items_grouped.append(a)
+
+    # ---- 12. Report meta ----
+    from datetime import datetime
+    now = datetime.now()
+    report_date = now.strftime('%d %B %Y')
+    report_date_slug = now.strftime('%Y-%m-%d')
+
+    # ---- 13. Assemble ----
+    return {
+        'batch': batch,
+        'report_date': report_date,
+        'report_date_slug': report_date_slug,
+        'tenant_id': tenant_id,
+
+        # Overview
+        'total_units': len(c1_units) + len(c2_units),
+        'c1_unit_count': len(c1_units),
+        'c2_unit_count': len(c2_units),
+        'zone_count': len(cycles),
+        'c1_total_defects': c1_total_defects,
+        'c2_brought_forward': c2_brought_forward,
+        'c2_cleared': c2_cleared,
+        'c2_still_open': c2_still_open,
+        'c2_open_details': c2_open_details,
+        'zones': zones_sorted,
+        'c2_zones_by_open': c2_zones_by_open,
+
+        # Hot spots
+        'worst_zone': worst_zone,
+        'worst_unit': worst_unit,
+        'worst_area': worst_area,
+        'worst_trade': worst_trade,
+        'combo_data': combo_data,
+        'combo_top_sum': combo_top_sum,
+
+        # By area / trade
+        'area_data': area_data,
+        'area_max': area_max,
+        'trade_data': trade_data,
+        'trade_max': trade_max,
+
+        # Unit lists
+        'c1_unit_splits': c1_unit_splits,
+        'c2_units': c2_units,
+        'any_submitted': any(u.get('inspection_status') == 'submitted' for u in c1_unit_splits) or any(u.get('inspection_status') == 'submitted' for u in c2_units),
+        'submitted_unit_count': sum(1 for u in c1_unit_splits if u.get('inspection_status') == 'submitted') + sum(1 for u in c2_units if u.get('inspection_status') == 'submitted'),
+
+        # Exclusions
+        'excl_list': excl_list,
+        'excl_items_grouped': excl_items_grouped,
+        'excl_total': excl_total,
+    }
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+test_batch_frame.py - parity and query-count check for the batch report and site briefing.
+
+Builds the batch report fixture (tests/fixtures/build_batch_report_fixture.py)
+at 12 and 60 units per zone and, for a C1-only and a mixed C1/C2/C3 batch,
+compares analytics._build_batch_report_data and _build_briefing_data with the
+per-section query builders they replaced (tests/fixtures/legacy_batch_builders.py):
+  - every returned value is identical (zones, units, KPIs, area / trade / deep
+    dive / recurring sections, C1 re-scoping, C2 rectification, unit splits)
+  - the new builders issue the same number of statements at both sizes (no
+    per-zone or per-unit queries)
+
+Prints statement counts, wall time per builder and the per-section timings
+recorded by app/services/batch_frame.py. Exits 0 on pass, 1 on fail.
+Stdlib + the app's own requirements - no pytest dependency.
+
+Run locally:  python3 tests/test_batch_frame.py   (from repo root)
+"""
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask, session
+from build_batch_report_fixture import build, T
+from app.services.db import close_db, get_db
+from app.services.batch_frame import get_batch_frame_stats
+from app.routes.analytics import _build_batch_report_data, _build_briefing_data
+import legacy_batch_builders as legacy
+
+BATCHES = ('batch-early', 'batch-mixed')
+BUILDERS = [('batch report', _build_batch_report_data, legacy._build_batch_report_data),
+            ('briefing', _build_briefing_data, legacy._build_briefing_data)]
+
+
+def run(app, builder, batch_id):
+    """(data, statements, ms) for one builder call."""
+    statements = []
+    with app.test_request_context('/'):
+        session['tenant_id'] = T
+        get_db().set_trace_callback(statements.append)
+        started = time.perf_counter()
+        data = builder(batch_id)
+        ms = (time.perf_counter() - started) * 1000
+        close_db()
+    return data, len([s for s in statements if not s.startswith("PRAGMA")]), ms
+
+
+def diff(a, b, path=''):
+    """First differing path between two nested values, or None."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        for k in sorted(set(a) | set(b), key=str):
+            if k not in a or k not in b:
+                return '{}.{} missing on {}'.format(path, k, 'new' if k not in a else 'legacy')
+            d = diff(a[k], b[k], '{}.{}'.format(path, k))
+            if d:
+                return d
+        return None
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        if len(a) != len(b):
+            return '{}: {} items vs {}'.format(path, len(a), len(b))
+        for n, (x, y) in enumerate(zip(a, b)):
+            d = diff(x, y, '{}[{}]'.format(path, n))
+            if d:
+                return d
+        return None
+    return None if a == b else '{}: {!r} vs {!r}'.format(path, a, b)
+
+
+def main():
+    failures = []
+    counts = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (12, 60):
+            db_path = os.path.join(tmp, "batch_{}.db".format(size))
+            build(db_path, size)
+            app = Flask(__name__)
+            app.secret_key = 'test'
+            app.config['DATABASE_PATH'] = db_path
+            for label, new, old in BUILDERS:
+                for batch_id in BATCHES:
+                    got, n_new, ms_new = run(app, new, batch_id)
+                    want, n_old, ms_old = run(app, old, batch_id)
+                    if got is None or want is None:
+                        failures.append("{} {} @{}: no data".format(label, batch_id, size))
+                        continue
+                    problem = diff(got, want)
+                    if problem:
+                        failures.append("{} {} @{}: {}".format(label, batch_id, size, problem))
+                    counts.setdefault((label, batch_id), []).append(n_new)
+                    print("{:12s} {:11s} {:3d}/zone: {:3d} statements {:7.1f}ms (was {:4d} / {:7.1f}ms)".format(
+                        label, batch_id, size, n_new, ms_new, n_old, ms_old))
+            for _, new, _ in BUILDERS:
+                if run(app, new, 'no-such-batch')[0] is not None:
+                    failures.append("unknown batch returned data")
+
+    for key, ns in counts.items():
+        if len(set(ns)) != 1:
+            failures.append("{} {}: statements grow with size {}".format(key[0], key[1], ns))
+    for report, sections in get_batch_frame_stats().items():
+        print(report + ': ' + ', '.join('{} {}ms'.format(s, v['avg_ms']) for s, v in sections.items()))
+
+    if failures:
+        print("=== BATCH FRAME: FAIL ===")
+        for f in failures[:20]:
+            print("  -", f)
+        sys.exit(1)
+    print("=== BATCH FRAME: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
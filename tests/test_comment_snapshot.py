@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+test_comment_snapshot.py - parity check for the defect comment snapshots.
+
+Builds a small defect_history over four inspection cycles (several comments
+per defect and cycle, some sharing a created_at second, some logged for an
+earlier cycle after a later one), runs scripts/migrate_defect_comment_snapshot.py
+and compares pdf_generator's _SNAPSHOT_JOIN with the _HISTORY_JOIN fallback at
+every cycle number:
+  - after the backfill
+  - after writes that only reach the snapshot through its triggers (new
+    comments, same-second comments, back-filled earlier cycles, single-row
+    and whole-defect history deletes)
+and asserts that within one cycle both return the last comment written, and
+that the migration drops the unused defect.first_comment column.
+
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_comment_snapshot.py   (from repo root)
+"""
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from app.services.pdf_generator import _HISTORY_JOIN, _SNAPSHOT_JOIN
+
+MIGRATION = os.path.join(REPO_ROOT, "scripts", "migrate_defect_comment_snapshot.py")
+
+SCHEMA = """
+CREATE TABLE inspection_cycle (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    cycle_number INTEGER NOT NULL
+);
+CREATE TABLE defect (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    first_comment TEXT
+);
+CREATE TABLE defect_history (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    defect_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    comment TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+T = "tenant-test"
+CYCLES = 4
+DEFECTS = 60
+START = datetime(2026, 1, 5, 8, 0, 0)
+COMPARE = "SELECT d.id, dh.comment FROM defect d {} ORDER BY d.id"
+
+
+class History:
+    """Writes defect_history rows with unique ids and seeded timestamps."""
+
+    def __init__(self, conn, rng):
+        self.conn, self.rng, self.n = conn, rng, 0
+
+    def add(self, defect_id, cycle, comment=None, created=None):
+        self.n += 1
+        if created is None:
+            created = START + timedelta(days=35 * (cycle - 1) + self.rng.randint(0, 20),
+                                        seconds=self.rng.randint(0, 3))
+        self.conn.execute(
+            "INSERT INTO defect_history (id, tenant_id, defect_id, cycle_id, comment, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, 'open', ?)",
+            ('dh-{:05d}'.format(self.n), T, defect_id, 'cyc-{}'.format(cycle),
+             comment or 'comment {}'.format(self.n), created.strftime('%Y-%m-%d %H:%M:%S')))
+
+
+def build(path, rng):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO inspection_cycle VALUES (?, ?, ?)",
+                     [('cyc-{}'.format(n), T, n) for n in range(1, CYCLES + 1)])
+    history = History(conn, rng)
+    for d in range(DEFECTS):
+        defect_id = 'def-{:03d}'.format(d)
+        conn.execute("INSERT INTO defect (id, tenant_id) VALUES (?, ?)", (defect_id, T))
+        for cycle in sorted(rng.sample(range(1, CYCLES + 1), rng.randint(0, CYCLES))):
+            for _ in range(rng.randint(1, 3)):
+                history.add(defect_id, cycle)
+    conn.commit()
+    return conn, history
+
+
+def edit(conn, history, rng):
+    """Writes that only reach defect_comment_snapshot through its triggers."""
+    defects = ['def-{:03d}'.format(d) for d in range(DEFECTS)]
+    for defect_id in rng.sample(defects, 25):
+        history.add(defect_id, rng.randint(1, CYCLES))
+    # Same cycle, same created_at second: the later row must win.
+    for defect_id in rng.sample(defects, 10):
+        created = START + timedelta(days=200)
+        history.add(defect_id, 4, 'first of pair', created)
+        history.add(defect_id, 4, 'second of pair', created)
+    for (hid,) in conn.execute("SELECT id FROM defect_history ORDER BY id").fetchall()[::9]:
+        conn.execute("DELETE FROM defect_history WHERE id = ?", (hid,))
+    # Approvals delete a defect's whole history.
+    for defect_id in rng.sample(defects, 5):
+        conn.execute("DELETE FROM defect_history WHERE defect_id = ?", (defect_id,))
+    conn.commit()
+
+
+def compare(conn, label, failures):
+    for number in range(0, CYCLES + 2):
+        got = conn.execute(COMPARE.format(_SNAPSHOT_JOIN), (number, number)).fetchall()
+        want = conn.execute(COMPARE.format(_HISTORY_JOIN), (number, number)).fetchall()
+        if got != want:
+            diff = [(g, w) for g, w in zip(got, want) if g != w][:3]
+            failures.append("{} cycle {}: snapshot != history, e.g. {}".format(label, number, diff))
+
+
+def main():
+    failures = []
+    rng = random.Random(39)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "snapshot.db")
+        conn, history = build(db_path, rng)
+        tie = 'def-000'
+        history.add(tie, 1, 'logged first', START)
+        history.add(tie, 1, 'logged second', START)
+        conn.commit()
+
+        result = subprocess.run([sys.executable, MIGRATION], env=dict(os.environ, DATABASE_PATH=db_path),
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            failures.append("migration failed: {}".format(result.stdout + result.stderr))
+        else:
+            columns = [r[1] for r in conn.execute("PRAGMA table_info(defect)")]
+            if 'first_comment' in columns:
+                failures.append("defect.first_comment not dropped")
+            snapshots = conn.execute("SELECT COUNT(*) FROM defect_comment_snapshot").fetchone()[0]
+            print("backfill   snapshot rows={}".format(snapshots))
+            compare(conn, "backfill", failures)
+            for join in (_SNAPSHOT_JOIN, _HISTORY_JOIN):
+                row = dict(conn.execute(COMPARE.format(join), (1, 1)).fetchall())
+                if row[tie] != 'logged second':
+                    failures.append("same-second comments: got {!r}, want the last written".format(row[tie]))
+
+            edit(conn, history, rng)
+            print("triggers   snapshot rows={}".format(
+                conn.execute("SELECT COUNT(*) FROM defect_comment_snapshot").fetchone()[0]))
+            compare(conn, "triggers", failures)
+        conn.close()
+
+    if failures:
+        print("=== COMMENT SNAPSHOT: FAIL ===")
+        for f in failures:
+            print("  -", f)
+        sys.exit(1)
+    print("=== COMMENT SNAPSHOT: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+test_dashboard_queries.py - load test for the certification dashboard.
+
+Builds the synthetic dashboard fixture (tests/fixtures/build_dashboard_fixture.py)
+at 50 and 500 units in one cycle, and asserts:
+  - certification._dashboard_units issues the same number of SQL statements at
+    both sizes (no per-unit subqueries)
+  - progress counts match the planted rows (cycle view and latest-cycle view)
+  - the full dashboard page issues the same number of SQL statements for the
+    50- and 500-unit cycles (after one warm-up request)
+
+Prints statement counts and the 500-unit render time (best of 3, for
+information only - wall-clock time is not asserted). Exits 0 on pass, 1 on fail.
+Stdlib + the app's own requirements - no pytest dependency.
+
+Run locally:  python3 tests/test_dashboard_queries.py   (from repo root)
+"""
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask
+from build_dashboard_fixture import build, T, CYCLE
+from app.services.db import get_db, close_db
+from app.routes.certification import _dashboard_units
+
+PLANTED = {
+    'open_defects': 3,
+    'cleared_defects': 1,
+    'excluded_items': 5,
+    'defect_items': 5,
+    'total_items': 117,
+}
+
+
+def run_units(db_path, cycle_id):
+    """Return (units by id, statement count) for one dashboard unit query."""
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = db_path
+    statements = []
+    with app.app_context():
+        get_db().set_trace_callback(statements.append)
+        units = {u['id']: dict(u) for u in _dashboard_units(T, cycle_id)}
+        close_db()
+    statements = [s for s in statements if not s.startswith("PRAGMA")]
+    return units, len(statements)
+
+
+def time_render(db_path):
+    """GET /certification/?cycle=... through the full app.
+    Returns (status, statements in a warm request, best-of-3 wall time in ms)."""
+    os.environ['DATABASE_PATH'] = db_path
+    from app import create_app
+    app = create_app()
+    statements = []
+
+    @app.before_request
+    def trace_statements():
+        get_db().set_trace_callback(statements.append)
+
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s.update(user_id='mgr', role='manager', tenant_id=T, user_name='Manager')
+    url = '/certification/?cycle={}'.format(CYCLE)
+    client.get(url)
+    del statements[:]
+    status = client.get(url).status_code
+    count = len([s for s in statements if not s.startswith("PRAGMA")])
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+    return status, count, min(timings)
+
+
+def check_unit(failures, label, unit, completed):
+    want = dict(PLANTED, completed_items=completed)
+    for key, value in want.items():
+        if unit[key] != value:
+            failures.append(f"{label} {unit['id']} {key}: expected {value} got {unit[key]}")
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        small_path = os.path.join(tmp, "dashboard_small.db")
+        large_path = os.path.join(tmp, "dashboard_large.db")
+        build(small_path, units=50)
+        build(large_path, units=500)
+
+        _, small_q = run_units(small_path, CYCLE)
+        cycle_units, large_q = run_units(large_path, CYCLE)
+        latest_units, latest_q = run_units(large_path, None)
+        _, small_page_q, _ = time_render(small_path)
+        status, large_page_q, render_ms = time_render(large_path)
+
+    print(f"50 units   queries={small_q}")
+    print(f"500 units  queries={large_q} (latest view {latest_q})")
+    print(f"page       queries={small_page_q} (50 units) {large_page_q} (500 units)")
+    print(f"500 units  render={render_ms:.1f}ms status={status}")
+
+    if small_q != large_q:
+        failures.append(f"query count grows with units: {small_q} -> {large_q}")
+    if len(cycle_units) != 499 or 'unit-0500' in cycle_units:
+        failures.append(f"expected 499 units (unit-0500 excluded) got {len(cycle_units)}")
+
+    for label, units in (("cycle", cycle_units), ("latest", latest_units)):
+        check_unit(failures, label, units['unit-0002'], completed=106)   # latent note rectified
+        check_unit(failures, label, units['unit-0003'], completed=105)
+    # No cycle 2 inspection: defects still count, checklist does not.
+    idle = cycle_units['unit-0010']
+    if (idle['inspection_id'], idle['open_defects'], idle['total_items']) != (None, 3, 0):
+        failures.append(f"cycle unit-0010 expected (None, 3, 0) got "
+                        f"({idle['inspection_id']}, {idle['open_defects']}, {idle['total_items']})")
+
+    if status != 200:
+        failures.append(f"dashboard returned {status}")
+    elif small_page_q != large_page_q:
+        failures.append(f"dashboard page query count grows with units: {small_page_q} -> {large_page_q}")
+
+    if failures:
+        print("=== DASHBOARD LOAD TEST: FAIL ===")
+        for f in failures:
+            print("  -", f)
+        sys.exit(1)
+    print("=== DASHBOARD LOAD TEST: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
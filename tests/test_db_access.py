@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+test_db_access.py - shared DB access layer (app/services/db.py) from Flask and CLI.
+
+Builds the Outstanding Items fixture (tests/fixtures/build_outstanding_items_fixture.py)
+and checks:
+  - database_path() resolves app config inside Flask, $DATABASE_PATH outside it,
+    else the app's own default (data/inspections.db)
+  - connect() gives sqlite3.Row rows with foreign keys on; readonly=True refuses writes
+  - _build_outstanding_items_data and _build_batch_desnag_data read the configured
+    DB through the request connection (they used to open /var/data directly) and
+    return the hand-checked scope: TEST units, other tenants, round-1-only units,
+    cleared defects, rectified latent notes and removed batch units left out;
+    latent notes exploded into bullets; comment precedence reviewed > raw > original
+  - the diagnostics engine (scripts/diagnostics/inspection_engine.py), run as a CLI
+    with DATABASE_PATH set, reads the same fixture read-only
+
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_db_access.py   (from repo root)
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask, session
+from build_outstanding_items_fixture import build, T
+from app.services.db import DEFAULT_DATABASE_PATH, close_db, connect, database_path, get_db
+from app.routes.analytics import _build_batch_desnag_data, _build_outstanding_items_data
+
+DIAGNOSTICS = os.path.join(REPO_ROOT, "scripts", "diagnostics")
+
+
+def flatten(data):
+    """[(unit_number, area, trade, item_path, description, cycle, is_latent)] in report order."""
+    return [(u['unit_number'], a['name'], d['trade'], d['item_path'], d['description'], d['cycle'], d['is_latent'])
+            for u in data['units'] for a in u['areas'] for d in a['defects']]
+
+
+def main():
+    failures = []
+
+    def expect(label, got, want):
+        if got != want:
+            failures.append("{}: got {!r}, want {!r}".format(label, got, want))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "outstanding.db")
+        build(db_path)
+
+        # --- path resolution -------------------------------------------------
+        saved = os.environ.pop('DATABASE_PATH', None)
+        try:
+            expect("default path", database_path(), DEFAULT_DATABASE_PATH)
+            expect("default matches the app", DEFAULT_DATABASE_PATH, 'data/inspections.db')
+            os.environ['DATABASE_PATH'] = db_path
+            expect("env path", database_path(), db_path)
+            app = Flask(__name__)
+            app.secret_key = 'test'
+            app.config['DATABASE_PATH'] = os.path.join(tmp, "elsewhere.db")
+            with app.app_context():
+                expect("app config path", database_path(), app.config['DATABASE_PATH'])
+            app.config['DATABASE_PATH'] = db_path
+        finally:
+            os.environ.pop('DATABASE_PATH', None)
+            if saved is not None:
+                os.environ['DATABASE_PATH'] = saved
+
+        # --- connect() -------------------------------------------------------
+        conn = connect(db_path)
+        expect("row factory", conn.row_factory, sqlite3.Row)
+        expect("foreign keys", conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+        conn.close()
+        ro = connect(db_path, readonly=True)
+        expect("readonly read", ro.execute("SELECT COUNT(*) FROM unit").fetchone()[0], 6)
+        try:
+            ro.execute("DELETE FROM defect")
+            failures.append("readonly connection accepted a write")
+        except sqlite3.OperationalError:
+            pass
+        ro.close()
+
+        # --- builders through the request connection -------------------------
+        statements = []
+        with app.test_request_context('/'):
+            session['tenant_id'] = T
+            get_db().set_trace_callback(statements.append)
+            oi = _build_outstanding_items_data(T)
+            desnag = _build_batch_desnag_data(T, 'batch-1')
+            missing = _build_batch_desnag_data(T, 'no-such-batch')
+            close_db()
+        # outstanding: block list + 2 per block (A, B); de-snag: 4
+        expect("statements on the request connection", len(statements), 9)
+
+        expect("outstanding totals", {k: v for k, v in oi['totals'].items() if k != 'by_trade'},
+               {'open_defects': 4, 'latent_outstanding': 3, 'units_affected': 3})
+        expect("outstanding by trade", oi['totals']['by_trade'],
+               [{'name': 'JOINERY', 'count': 2}, {'name': 'PLUMBING', 'count': 2}])
+        expect("outstanding rows", flatten(oi), [
+            ('1', 'KITCHEN', 'JOINERY', 'Cabinet > Door', 'Door sticks', 'C1', False),
+            ('1', 'KITCHEN', 'LATENT', '', 'Paint touch-up', 'C2', True),
+            ('1', 'KITCHEN', 'LATENT', '', 'Clean grout', 'C2', True),
+            ('1', 'BATHROOM', 'PLUMBING', 'Tap', 'Tap drips', 'C2', False),
+            ('2', 'KITCHEN', 'JOINERY', 'Cabinet', 'Scratched', 'C1', False),
+            ('10', 'BATHROOM', 'PLUMBING', 'Tap', 'Leak', 'C2', False),
+            ('10', 'BATHROOM', 'LATENT', '', 'Seal around bath', 'C2', True),
+        ])
+        expect("outstanding floor labels", [u['floor_label'] for u in oi['units']],
+               ['Ground', 'Ground', '1st Floor'])
+
+        expect("desnag batch name", desnag['batch_name'], 'SR-001')
+        expect("desnag totals", {k: v for k, v in desnag['totals'].items() if k != 'by_trade'},
+               {'open_defects': 2, 'latent_outstanding': 2, 'units_affected': 1})
+        expect("desnag rows", [r[0] for r in flatten(desnag)], ['1', '1', '1', '1'])
+        expect("desnag unknown batch", missing, None)
+
+        # --- CLI: diagnostics engine from the environment --------------------
+        env = dict(os.environ, DATABASE_PATH=db_path)
+        probe = ("import inspection_engine as eng\n"
+                 "c = eng.connect()\n"
+                 "print(eng.DB_DEFAULT)\n"
+                 "print(c.execute('SELECT COUNT(*) FROM unit_real').fetchone()[0])\n"
+                 "try:\n"
+                 "    c.execute('DELETE FROM defect'); print('wrote')\n"
+                 "except Exception:\n"
+                 "    print('readonly')\n")
+        run = subprocess.run([sys.executable, "-c", probe], cwd=DIAGNOSTICS, env=env,
+                             capture_output=True, text=True)
+        expect("cli engine", run.stdout.split(), [db_path, '5', 'readonly'])
+        if run.returncode != 0:
+            failures.append("cli engine failed: " + run.stderr.strip()[-300:])
+
+    if failures:
+        print("=== DB ACCESS: FAIL ===")
+        for f in failures:
+            print("  -", f)
+        sys.exit(1)
+    print("=== DB ACCESS: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
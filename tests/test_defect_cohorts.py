@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+test_defect_cohorts.py - parity check for the defect cohort query builder.
+
+Builds the defect lifecycle fixture (tests/fixtures/build_defect_facts_fixture.py),
+adds a batch roster (inspection_cycle + batch_unit), and compares
+app/services/defect_cohorts.breakdowns with the per-breakdown SQL that explore,
+block_detail and batch_analytics ran before, kept below as the reference:
+  - explore: summary + location + defect breakdowns for a grid of filters
+  - block_detail: area breakdown + top 10 comments per block
+  - batch_analytics: area, area x comment, top 10 comments, trade
+and asserts every page's breakdowns come back from one statement.
+
+The explore grid runs three times: on the defect rows, on the defect_rollup
+cube after install + rebuild (statement must read the cube unless the grid
+reaches the comment level), and after live edits that only reach the cube
+through its triggers (which must then match a fresh rebuild).
+
+Rankings are compared as {key: count}; limited lists must hold the reference's
+counts in order (ties at the cut may pick different keys).
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_defect_cohorts.py   (from repo root)
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask
+from build_defect_facts_fixture import build, T
+from app.services.db import close_db, get_db, query_db
+from app.services.defect_cohorts import breakdown, breakdowns, install, rebuild
+
+GATE = ("EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id "
+        "AND i2.status IN ('reviewed','approved','certified','pending_followup'))")
+EXPLORE_FROM = ("FROM defect d JOIN unit_real u ON d.unit_id = u.id "
+                "JOIN item_template it ON d.item_template_id = it.id "
+                "JOIN category_template ct ON it.category_id = ct.id "
+                "JOIN area_template at2 ON ct.area_id = at2.id")
+EXPLORE_FILTERS = {'block': 'u.block', 'floor': 'u.floor', 'unit': 'u.unit_number',
+                   'area': 'at2.area_name', 'trade': 'ct.category_name', 'round': 'd.raised_cycle_number'}
+EXPLORE_CASES = [{}, {'block': 'A'}, {'block': 'B', 'floor': 0}, {'block': 'C', 'floor': 2, 'unit': '0002'},
+                 {'area': 'KITCHEN'}, {'area': 'BATHROOM', 'trade': 'WALLS'}, {'round': 2},
+                 {'block': 'A', 'floor': 1, 'area': 'BEDROOM', 'trade': 'DOORS', 'round': 1}]
+BATCH = "batch-1"
+BATCH_WHERE = ("d.tenant_id = ? AND d.status = 'open' AND d.unit_id IN (SELECT unit_id FROM batch_unit "
+               "WHERE batch_id = ? AND removed_at IS NULL AND tenant_id = ?) AND " + GATE +
+               " AND d.raised_cycle_id IN (?, ?)")
+TEMPLATE_JOINS = ("JOIN item_template it ON d.item_template_id = it.id "
+                  "JOIN category_template ct ON it.category_id = ct.id ")
+
+
+def add_batch(conn):
+    """A batch over two cycles; some rostered units removed, one from another tenant."""
+    conn.executescript("""
+        CREATE TABLE inspection_cycle (id TEXT PRIMARY KEY, tenant_id TEXT, block TEXT, floor INTEGER,
+                                       cycle_number INTEGER);
+        CREATE TABLE batch_unit (id INTEGER PRIMARY KEY, tenant_id TEXT, batch_id TEXT, unit_id TEXT,
+                                 cycle_id TEXT, removed_at TEXT);
+        INSERT INTO inspection_cycle VALUES ('cyc-1', 'tenant-test', 'A', 0, 1),
+                                            ('cyc-2', 'tenant-test', 'A', 0, 2);
+        INSERT INTO batch_unit (tenant_id, batch_id, unit_id, cycle_id, removed_at)
+            SELECT 'tenant-test', 'batch-1', id, CASE WHEN CAST(substr(id, 6) AS INTEGER) % 2 THEN 'cyc-2'
+                   ELSE 'cyc-1' END, CASE WHEN CAST(substr(id, 6) AS INTEGER) % 11 = 0 THEN '2026-03-01' END
+            FROM unit WHERE CAST(substr(id, 6) AS INTEGER) % 3 = 0;
+        INSERT INTO batch_unit (tenant_id, batch_id, unit_id, cycle_id)
+            VALUES ('other-tenant', 'batch-1', 'unit-0001', 'cyc-1');
+    """)
+    conn.commit()
+
+
+def as_map(rows, key, value):
+    return {r[key]: r[value] for r in rows}
+
+
+def legacy_explore(f):
+    where = ["d.tenant_id = ?", "d.status = 'open'", "u.unit_number NOT LIKE 'TEST%'", GATE]
+    params = [T]
+    for name, col in EXPLORE_FILTERS.items():
+        if name in f:
+            where.append(col + " = ?")
+            params.append(f[name])
+    base = "{} WHERE {}".format(EXPLORE_FROM, " AND ".join(where))
+    summary = dict(query_db("SELECT COUNT(DISTINCT d.id) AS defects, COUNT(DISTINCT u.id) AS units, "
+                            "COUNT(DISTINCT u.block) AS blocks " + base, params, one=True))
+    loc = 'u.block' if 'block' not in f else 'u.floor' if 'floor' not in f else \
+        'u.unit_number' if 'unit' not in f else None
+    dfc = 'at2.area_name' if 'area' not in f else 'ct.category_name' if 'trade' not in f else 'd.original_comment'
+    out = {'summary': summary}
+    if loc:
+        out['location'] = {r['k']: r['c'] for r in query_db(
+            "SELECT {0} AS k, COUNT(DISTINCT d.id) AS c {1} GROUP BY {0}".format(loc, base), params)}
+    out['defect'] = {r['k']: (r['c'], r['n']) for r in query_db(
+        "SELECT {0} AS k, COUNT(DISTINCT d.id) AS c, COUNT(DISTINCT u.id) AS n {1} GROUP BY {0}".format(dfc, base),
+        params)}
+    return out, loc, dfc
+
+
+def new_explore(f):
+    loc = 'block' if 'block' not in f else 'floor' if 'floor' not in f else 'unit' if 'unit' not in f else None
+    dfc = 'area' if 'area' not in f else 'trade' if 'trade' not in f else 'comment'
+    groupings = {'summary': breakdown(measures=('defects', 'units', 'blocks')),
+                 'defect': breakdown(dfc, measures=('defects', 'units'))}
+    if loc:
+        groupings['location'] = breakdown(loc)
+    cohort = breakdowns(T, groupings, filters=f, require=('area',))
+    out = {'summary': cohort['summary'][0],
+           'defect': {r[dfc]: (r['defects'], r['units']) for r in cohort['defect']}}
+    if loc:
+        out['location'] = as_map(cohort['location'], loc, 'defects')
+    return out
+
+
+def check_explore(app, label, cube, failures):
+    """Every EXPLORE_CASES filter set against legacy_explore; cube: expect defect_rollup reads."""
+    for f in EXPLORE_CASES:
+        statements = []
+        with app.app_context():
+            get_db().set_trace_callback(statements.append)
+            got = new_explore(f)
+            close_db()
+        statements = [s for s in statements if not s.startswith("PRAGMA")]
+        if len(statements) != 1:
+            failures.append("{} explore {}: {} statements".format(label, f, len(statements)))
+        elif cube is not None and ('FROM defect_rollup' in statements[0]) != (cube and 'trade' not in f):
+            failures.append("{} explore {}: unexpected source".format(label, f))
+        with app.app_context():
+            expected, _, _ = legacy_explore(f)
+            close_db()
+        for part in expected:
+            if got[part] != expected[part]:
+                failures.append("{} explore {} {}: expected {} got {}".format(
+                    label, f, part, expected[part], got[part]))
+        if f == {} and not got['summary']['defects']:
+            failures.append("explore: empty fixture")
+
+
+def mutate(conn):
+    """Reviews, clears, reopens, moves and deletes that reach defect_rollup only via triggers."""
+    conn.executescript("""
+        UPDATE inspection SET status = 'reviewed' WHERE status = 'in_progress'
+            AND unit_id IN ('unit-0003', 'unit-0008', 'unit-0011');
+        UPDATE inspection SET status = 'submitted' WHERE unit_id = 'unit-0005';
+        UPDATE defect SET status = 'cleared' WHERE status = 'open' AND unit_id IN ('unit-0001', 'unit-0007');
+        UPDATE defect SET status = 'open' WHERE status = 'cleared' AND unit_id = 'unit-0009';
+        UPDATE defect SET item_template_id = 'it-2-1-0' WHERE unit_id = 'unit-0013';
+        UPDATE defect SET unit_id = 'unit-0014' WHERE unit_id = 'unit-0018';
+        DELETE FROM defect WHERE unit_id = 'unit-0002';
+        INSERT INTO defect (id, tenant_id, unit_id, item_template_id, raised_cycle_id,
+                            raised_cycle_number, status, original_comment, created_at)
+            SELECT 'def-new-' || u.id, u.tenant_id, u.id, 'it-0-0-0', 'cyc-1', 1, 'open',
+                   'Late addition', '2026-02-20 09:00:00'
+            FROM unit u WHERE u.id IN ('unit-0006', 'unit-0012');
+        UPDATE unit SET block = 'D', floor = 9 WHERE id IN ('unit-0015', 'unit-0021');
+        UPDATE unit SET unit_number = 'TEST-0016' WHERE id = 'unit-0016';
+        UPDATE unit SET unit_number = '0025' WHERE id = 'unit-0025';
+        DELETE FROM unit WHERE id = 'unit-0019';
+        DELETE FROM inspection WHERE unit_id = 'unit-0017' AND cycle_id = 'cyc-1';
+    """)
+    conn.commit()
+
+
+def check_ranked(label, rows, measure, failures):
+    counts = [r[measure] for r in rows]
+    if counts != sorted(counts, reverse=True):
+        failures.append("{}: not ranked by {}".format(label, measure))
+
+
+def check_limited(label, got, expected, limit, failures):
+    """got: [(key, count)] ranked + cut; expected: {key: count} uncut."""
+    want = sorted(expected.values(), reverse=True)[:limit]
+    if [c for _, c in got] != want or any(expected.get(k) != c for k, c in got):
+        failures.append("{}: expected counts {} got {}".format(label, want, got))
+
+
+def counted(app, fn, failures, label):
+    statements = []
+    with app.app_context():
+        get_db().set_trace_callback(statements.append)
+        result = fn()
+        close_db()
+    statements = [s for s in statements if not s.startswith("PRAGMA")]
+    if len(statements) != 1:
+        failures.append("{}: {} statements".format(label, len(statements)))
+    return result
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "cohorts.db")
+        build(db_path, 240)
+        conn = sqlite3.connect(db_path)
+        add_batch(conn)
+        conn.close()
+        app = Flask(__name__)
+        app.config['DATABASE_PATH'] = db_path
+
+        check_explore(app, "defect rows", None, failures)
+        for block in 'ABC':
+            groupings = {'areas': breakdown('area'), 'top': breakdown('comment', limit=10)}
+            got = counted(app, lambda: breakdowns(T, groupings, filters={'block': block}),
+                          failures, "block {}".format(block))
+            with app.app_context():
+                base = ("FROM defect d JOIN unit_real u ON d.unit_id = u.id {} WHERE d.status = 'open' "
+                        "AND d.tenant_id = ? AND u.block = ? AND u.unit_number NOT LIKE 'TEST%' AND " + GATE)
+                areas = {r[0]: r[1] for r in query_db(
+                    "SELECT at2.area_name, COUNT(d.id) " + base.format(
+                        TEMPLATE_JOINS + "JOIN area_template at2 ON ct.area_id = at2.id")
+                    + " GROUP BY at2.area_name", [T, block])}
+                top = {r[0]: r[1] for r in query_db(
+                    "SELECT d.original_comment, COUNT(*) " + base.format('') + " GROUP BY d.original_comment",
+                    [T, block])}
+                close_db()
+            if as_map(got['areas'], 'area', 'defects') != areas:
+                failures.append("block {} areas: expected {} got {}".format(block, areas, got['areas']))
+            check_ranked("block {} areas".format(block), got['areas'], 'defects', failures)
+            check_limited("block {} top".format(block), [(r['comment'], r['defects']) for r in got['top']],
+                          top, 10, failures)
+
+        groupings = {'areas': breakdown('area'), 'area_comments': breakdown('area', 'comment'),
+                     'top': breakdown('comment', limit=10), 'trades': breakdown('trade')}
+        got = counted(app, lambda: breakdowns(T, groupings, filters={'batch': BATCH}, real_units=False),
+                      failures, "batch")
+        with app.app_context():
+            params = [T, BATCH, T, 'cyc-1', 'cyc-2']
+            area_join = TEMPLATE_JOINS + "JOIN area_template at2 ON ct.area_id = at2.id "
+            areas = {r[0]: r[1] for r in query_db(
+                "SELECT at2.area_name, COUNT(d.id) FROM defect d " + area_join + "WHERE " + BATCH_WHERE
+                + " GROUP BY at2.area_name", params)}
+            pairs = {(r[0], r[1]): r[2] for r in query_db(
+                "SELECT at2.area_name, d.original_comment, COUNT(*) FROM defect d " + area_join + "WHERE "
+                + BATCH_WHERE + " GROUP BY at2.area_name, d.original_comment", params)}
+            top = {r[0]: r[1] for r in query_db(
+                "SELECT d.original_comment, COUNT(*) FROM defect d WHERE " + BATCH_WHERE
+                + " GROUP BY d.original_comment", params)}
+            trades = {r[0]: r[1] for r in query_db(
+                "SELECT ct.category_name, COUNT(d.id) FROM defect d " + TEMPLATE_JOINS + "WHERE " + BATCH_WHERE
+                + " GROUP BY ct.category_name", params)}
+            close_db()
+        if as_map(got['areas'], 'area', 'defects') != areas or not areas:
+            failures.append("batch areas: expected {} got {}".format(areas, got['areas']))
+        if {(r['area'], r['comment']): r['defects'] for r in got['area_comments']} != pairs:
+            failures.append("batch area x comment differs")
+        if as_map(got['trades'], 'trade', 'defects') != trades:
+            failures.append("batch trades: expected {} got {}".format(trades, got['trades']))
+        check_limited("batch top", [(r['comment'], r['defects']) for r in got['top']], top, 10, failures)
+        for name in groupings:
+            check_ranked("batch " + name, got[name], 'defects', failures)
+
+        conn = sqlite3.connect(db_path)
+        install(conn)
+        install(conn)
+        rows = rebuild(conn)
+        conn.commit()
+        defects = conn.execute("SELECT COUNT(*) FROM defect").fetchone()[0]
+        print(f"{defects} defects -> {rows} defect_rollup rows")
+        check_explore(app, "rollup", True, failures)
+        mutate(conn)
+        check_explore(app, "triggers", True, failures)
+        live = sorted(conn.execute("SELECT * FROM defect_rollup").fetchall(), key=repr)
+        rebuild(conn)
+        conn.commit()
+        if live != sorted(conn.execute("SELECT * FROM defect_rollup").fetchall(), key=repr):
+            failures.append("trigger-maintained defect_rollup differs from a rebuild")
+        conn.close()
+
+    if failures:
+        print("=== DEFECT COHORTS: FAIL ===")
+        for f in failures[:20]:
+            print("  -", f)
+        sys.exit(1)
+    print("=== DEFECT COHORTS: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+test_defect_facts.py - parity check for the defect_fact as-of counts.
+
+Builds the synthetic defect lifecycle fixture (tests/fixtures/build_defect_facts_fixture.py),
+installs + rebuilds defect_fact, and compares count_raised / count_cleared /
+count_open (plain and grouped by unit, zone, area and trade) with the
+correlated-EXISTS SQL the pipeline report and site-meeting brief ran before,
+kept below as the reference, across a grid of (as-of, review gate) pairs:
+  - after the rebuild
+  - after edits that only go through the triggers (review gate moves, clears,
+    reopens, new and deleted defects, unit moves and renames to TEST)
+  - with the table dropped (query_facts derives the rows inline)
+
+Prints wall time for the reference and fact queries.
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_defect_facts.py   (from repo root)
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask
+from build_defect_facts_fixture import build, T
+from app.services.db import close_db, query_db
+from app.services.defect_facts import count_cleared, count_open, count_raised, install, rebuild
+
+VISIBLE = ("d.raised_cycle_id NOT LIKE 'test-%' AND EXISTS (SELECT 1 FROM inspection i2 "
+           "WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id "
+           "AND i2.status IN ('reviewed','approved','certified','pending_followup') "
+           "AND i2.review_submitted_at <= ?)")
+OPEN_AT = "d.created_at <= ? AND (d.status = 'open' OR (d.status = 'cleared' AND d.cleared_at > ?))"
+GROUPS = {
+    'unit_id': ('d.unit_id', ''),
+    ('block', 'floor'): ('u.block, u.floor', ''),
+    'area_name': ('at2.area_name',
+                  'JOIN item_template it ON d.item_template_id = it.id '
+                  'JOIN category_template ct ON it.category_id = ct.id '
+                  'JOIN area_template at2 ON ct.area_id = at2.id'),
+    'trade': ('ct.category_name',
+              'JOIN item_template it ON d.item_template_id = it.id '
+              'JOIN category_template ct ON it.category_id = ct.id'),
+}
+# (as-of, gate) pairs: gate at the as-of date, after it (snapshot), and before it (bfwd).
+POINTS = ['2026-01-04 00:00:00', '2026-01-20 12:00:00', '2026-02-15 09:30:00',
+          '2026-03-10 17:00:00', '2026-04-02 08:00:00', '2026-05-01 00:00:00',
+          '2026-06-30 23:59:59']
+PAIRS = [(p, p) for p in POINTS] + [(p, POINTS[-2]) for p in POINTS[:4]] + [(POINTS[-1], POINTS[2])]
+
+
+def legacy_count(where, args, gate, by=None):
+    """The report's original COUNT(*) over defect JOIN unit_real + EXISTS gate."""
+    cols, joins = GROUPS[by] if by else ('', '')
+    sql = ("SELECT {sel}COUNT(*) AS c FROM defect d JOIN unit_real u ON d.unit_id = u.id {joins} "
+           "WHERE d.tenant_id = ? AND {where} AND {visible}{group}").format(
+        sel=cols + ', ' if cols else '', joins=joins, where=where, visible=VISIBLE,
+        group=' GROUP BY ' + cols if cols else '')
+    rows = query_db(sql, [T] + list(args) + [gate])
+    if not by:
+        return rows[0]['c']
+    if isinstance(by, str):
+        return {r[0]: r['c'] for r in rows}
+    return {(r[0], r[1]): r['c'] for r in rows}
+
+
+def compare(label, failures):
+    """Every count helper against the reference SQL over PAIRS. Returns (legacy s, facts s)."""
+    legacy_s = facts_s = 0.0
+    for at, gate in PAIRS:
+        since = POINTS[max(POINTS.index(at) - 1, 0)] if at in POINTS else None
+        for by in [None] + list(GROUPS):
+            cases = [
+                ('raised', "d.created_at <= ?", [at],
+                 lambda: count_raised(T, gate, at, by=by)),
+                ('raised since', "d.created_at > ? AND d.created_at <= ?", [since, at],
+                 lambda: count_raised(T, gate, at, since=since, by=by)),
+                ('cleared', "d.status = 'cleared' AND d.cleared_at <= ?", [at],
+                 lambda: count_cleared(T, gate, at, by=by)),
+                ('cleared since', "d.status = 'cleared' AND d.cleared_at > ? AND d.cleared_at <= ?",
+                 [since, at], lambda: count_cleared(T, gate, at, since=since, by=by)),
+                ('open', OPEN_AT, [at, at], lambda: count_open(T, gate, at, by=by)),
+            ]
+            for name, where, args, helper in cases:
+                started = time.perf_counter()
+                expected = legacy_count(where, args, gate, by)
+                legacy_s += time.perf_counter() - started
+                started = time.perf_counter()
+                got = helper()
+                facts_s += time.perf_counter() - started
+                if got != expected:
+                    failures.append("{}: {} by={} at={} gate={}: expected {} got {}".format(
+                        label, name, by, at, gate, expected, got))
+    return legacy_s, facts_s
+
+
+def mutate(conn):
+    """Edits a live site makes, none of which touch defect_fact directly."""
+    conn.executescript("""
+        UPDATE inspection SET status = 'reviewed', review_submitted_at = '2026-02-01 10:00:00'
+            WHERE status = 'in_progress' AND unit_id IN ('unit-0003', 'unit-0008', 'unit-0011');
+        UPDATE inspection SET review_submitted_at = '2026-06-01 10:00:00'
+            WHERE unit_id IN ('unit-0004', 'unit-0010') AND cycle_id = 'cyc-1';
+        UPDATE inspection SET status = 'submitted' WHERE unit_id = 'unit-0005';
+        UPDATE defect SET status = 'cleared', cleared_at = '2026-03-15 11:00:00'
+            WHERE status = 'open' AND unit_id IN ('unit-0001', 'unit-0007', 'unit-0013');
+        UPDATE defect SET status = 'open' WHERE status = 'cleared' AND unit_id = 'unit-0009';
+        DELETE FROM defect WHERE unit_id = 'unit-0002';
+        INSERT INTO defect (id, tenant_id, unit_id, item_template_id, raised_cycle_id,
+                            raised_cycle_number, status, original_comment, created_at)
+            SELECT 'def-new-' || u.id, u.tenant_id, u.id, 'it-0-0-0', 'cyc-1', 1, 'open',
+                   'Late addition', '2026-02-20 09:00:00'
+            FROM unit u WHERE u.id IN ('unit-0006', 'unit-0012', 'unit-0014');
+        UPDATE unit SET block = 'D', floor = 9 WHERE id IN ('unit-0015', 'unit-0021');
+        UPDATE unit SET unit_number = 'TEST-0016' WHERE id = 'unit-0016';
+        UPDATE unit SET unit_number = '0025' WHERE id = 'unit-0025';
+        DELETE FROM inspection WHERE unit_id = 'unit-0017' AND cycle_id = 'cyc-1';
+        INSERT INTO inspection VALUES ('insp-new-19', 'tenant-test', 'unit-0019', 'cyc-3', 3,
+                                       'approved', '2026-04-10 09:00:00');
+        INSERT INTO defect (id, tenant_id, unit_id, item_template_id, raised_cycle_id,
+                            raised_cycle_number, status, original_comment, created_at)
+            VALUES ('def-new-c3', 'tenant-test', 'unit-0019', 'it-1-0-0', 'cyc-3', 3, 'open',
+                    'Round 3', '2026-04-09 15:00:00');
+    """)
+    conn.commit()
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "defect_facts.db")
+        build(db_path, 240)
+        conn = sqlite3.connect(db_path)
+        install(conn)
+        install(conn)
+        rows = rebuild(conn)
+        conn.commit()
+
+        app = Flask(__name__)
+        app.config['DATABASE_PATH'] = db_path
+        with app.app_context():
+            legacy_s, facts_s = compare("rebuilt", failures)
+            close_db()
+
+        mutate(conn)
+        with app.app_context():
+            compare("triggers", failures)
+            close_db()
+        live = conn.execute("SELECT COUNT(*) FROM defect_fact").fetchone()[0]
+        rebuilt = rebuild(conn)
+        conn.commit()
+        if live != rebuilt:
+            failures.append("trigger-maintained table has {} rows, rebuild {}".format(live, rebuilt))
+
+        conn.execute("DROP TABLE defect_fact")
+        conn.commit()
+        conn.close()
+        with app.app_context():
+            compare("no table", failures)
+            close_db()
+
+    print(f"{rows} facts  reference={legacy_s * 1000:.1f}ms  defect_fact={facts_s * 1000:.1f}ms")
+
+    if failures:
+        print("=== DEFECT FACT PARITY: FAIL ===")
+        for f in failures[:20]:
+            print("  -", f)
+        sys.exit(1)
+    print("=== DEFECT FACT PARITY: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+test_inspection_metrics.py - parity check for the stored per-inspection audit metrics.
+
+Builds the defect lifecycle fixture (tests/fixtures/build_defect_facts_fixture.py),
+adds the audit-trail columns (inspector, inspection_date, started/submitted/
+paused timestamps in every stored shape, total_paused_seconds, addressed_cycle_number)
+plus inspector / batch tables, and compares analytics._build_audit_data_dict with
+the per-inspection OR-join and calc_duration parsing it used before, kept below
+as the reference:
+  - with no metric columns (expressions inline)
+  - after scripts/migrate_inspection_metrics.py (install + backfill)
+  - after edits that only reach the columns through their triggers (submit,
+    pause, resume, defects raised / addressed / deleted / moved, new inspections)
+  - with a from/to date range
+and asserts both modes return the same page data, a defect write only rewrites
+the inspections whose stored count moves, the date-range audit query uses
+idx_inspection_tenant_date, and parse_ts accepts the stored timestamp shapes.
+
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_inspection_metrics.py   (from repo root)
+"""
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask, session
+from build_defect_facts_fixture import build, T
+from app.services.db import close_db, query_db
+from app.services.inspection_metrics import backfill, parse_ts
+from app.routes.analytics import _build_audit_data_dict
+
+MIGRATION = os.path.join(REPO_ROOT, "scripts", "migrate_inspection_metrics.py")
+
+AUDIT_SCHEMA = """
+ALTER TABLE inspection ADD COLUMN inspector_id TEXT;
+ALTER TABLE inspection ADD COLUMN inspection_date TEXT;
+ALTER TABLE inspection ADD COLUMN started_at TEXT;
+ALTER TABLE inspection ADD COLUMN submitted_at TEXT;
+ALTER TABLE inspection ADD COLUMN paused_at TEXT;
+ALTER TABLE inspection ADD COLUMN total_paused_seconds INTEGER DEFAULT 0;
+ALTER TABLE defect ADD COLUMN addressed_cycle_number INTEGER;
+CREATE TABLE inspector (id TEXT PRIMARY KEY, tenant_id TEXT, name TEXT, role TEXT);
+CREATE TABLE inspection_batch (id TEXT PRIMARY KEY, tenant_id TEXT, name TEXT, status TEXT);
+CREATE TABLE batch_unit (id TEXT PRIMARY KEY, tenant_id TEXT, batch_id TEXT, unit_id TEXT, cycle_id TEXT);
+"""
+INSPECTORS = [('insp-a', 'Alice', 'inspector'), ('insp-b', 'Bongani', 'inspector'),
+              ('insp-c', 'Carla', 'team_lead'), ('insp-m', 'Manager', 'manager')]
+# Stored shapes seen in production: SQLite datetime(), isoformat() with and
+# without micro/milliseconds, browser toISOString() ('Z'), explicit +00:00.
+SHAPES = [
+    lambda dt: dt.strftime('%Y-%m-%d %H:%M:%S'),
+    lambda dt: dt.strftime('%Y-%m-%dT%H:%M:%S'),
+    lambda dt: dt.strftime('%Y-%m-%dT%H:%M:%S.%f'),
+    lambda dt: dt.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z',
+    lambda dt: dt.strftime('%Y-%m-%dT%H:%M:%S') + '+00:00',
+]
+
+
+def extend(path):
+    """Add the audit columns and rows the fixture lacks (seeded, so stable per build)."""
+    rng = random.Random(47)
+    conn = sqlite3.connect(path)
+    conn.executescript(AUDIT_SCHEMA)
+    conn.executemany("INSERT INTO inspector VALUES (?, ?, ?, ?)", [(i, T, n, r) for i, n, r in INSPECTORS])
+    conn.executemany("INSERT INTO inspection_batch VALUES (?, ?, ?, ?)",
+                     [('batch-1', T, 'SR-001 12 Jan 2026', 'complete'),
+                      ('batch-2', T, 'SR-002 09 Feb 2026', 'open')])
+    for n, (iid, unit_id, cycle_id) in enumerate(conn.execute(
+            "SELECT id, unit_id, cycle_id FROM inspection ORDER BY id").fetchall()):
+        started = datetime(2026, 1, 5, 7) + timedelta(days=rng.randint(0, 90), seconds=rng.randint(0, 36000),
+                                                      milliseconds=rng.choice([0, 0, 250, 999]))
+        worked = rng.choice([30, 119, 120, 600, 3599, 3600, 5400, rng.randint(200, 20000)])
+        paused = rng.choice([0, 0, 0, 300, 900, 99999])
+        end = started + timedelta(seconds=worked + paused)
+        fmt = rng.choice(SHAPES)
+        conn.execute("""
+            UPDATE inspection SET inspector_id = ?, inspection_date = ?, started_at = ?, submitted_at = ?,
+                   paused_at = ?, total_paused_seconds = ? WHERE id = ?""",
+                     [rng.choice([i for i, _, _ in INSPECTORS] + ['ghost', None]),
+                      started.strftime('%Y-%m-%d'),
+                      None if n % 19 == 0 else fmt(started),
+                      None if n % 23 == 0 else rng.choice(SHAPES)(end),
+                      rng.choice(SHAPES)(end - timedelta(seconds=60)) if n % 7 == 0 else None,
+                      paused, iid])
+        if n % 3:
+            conn.execute("INSERT INTO batch_unit VALUES (?, ?, ?, ?, ?)",
+                         ('bu-{}'.format(n), T, 'batch-{}'.format(1 + n % 2), unit_id, cycle_id))
+    # Round-2 inspections address a share of the unit's round-1 defects.
+    conn.execute("""
+        UPDATE defect SET addressed_cycle_number = 2
+        WHERE raised_cycle_number = 1 AND rowid % 3 > 0
+          AND unit_id IN (SELECT unit_id FROM inspection WHERE cycle_number = 2)""")
+    conn.commit()
+    conn.close()
+
+
+def calc_duration(started, submitted, total_paused_seconds=0, paused_at=None):
+    """The audit page's original per-row parser (reference)."""
+    if not started:
+        return 'N/A'
+    effective_end = paused_at if paused_at else submitted
+    if not effective_end:
+        return 'N/A'
+    fmts = ('%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S')
+
+    def parse(value):
+        for fmt in fmts:
+            try:
+                return datetime.strptime(value.replace('+00:00', '').replace('Z', ''), fmt)
+            except ValueError:
+                pass
+        return None
+    s, e = parse(started), parse(effective_end)
+    if not s or not e:
+        return 'N/A'
+    total_mins = int(max((e - s).total_seconds() - (total_paused_seconds or 0), 0) / 60)
+    if total_mins < 2:
+        return 'N/A'
+    return f'{total_mins}m' if total_mins < 60 else f'{total_mins // 60}h {total_mins % 60}m'
+
+
+def legacy_entries(from_date='', to_date=''):
+    """{inspection id: (duration label, defect count)} from the original grouped OR-join."""
+    date_filter, params = '', [T]
+    if from_date:
+        date_filter += ' AND i.inspection_date >= ?'
+        params.append(from_date)
+    if to_date:
+        date_filter += ' AND i.inspection_date <= ?'
+        params.append(to_date)
+    rows = query_db("""
+        SELECT i.id, i.started_at, i.submitted_at, i.paused_at, i.total_paused_seconds, COUNT(d.id) AS n
+        FROM inspection i
+        JOIN unit_real u ON i.unit_id = u.id
+        LEFT JOIN inspector insp ON insp.id = i.inspector_id
+        LEFT JOIN defect d ON d.unit_id = u.id AND d.tenant_id = u.tenant_id
+            AND ((i.cycle_number = 1 AND d.raised_cycle_id = i.cycle_id)
+                 OR (i.cycle_number > 1 AND d.addressed_cycle_number = i.cycle_number))
+        WHERE i.tenant_id = ? AND i.status IN ('reviewed','approved','certified','pending_followup')
+          AND i.inspector_id IS NOT NULL AND u.unit_number NOT LIKE 'TEST%'
+          AND (insp.role IN ('inspector','team_lead') OR insp.id IS NULL)
+          {}
+        GROUP BY i.id""".format(date_filter), params)
+    return {r['id']: (calc_duration(r['started_at'], r['submitted_at'], r['total_paused_seconds'], r['paused_at']),
+                      r['n']) for r in rows}
+
+
+def audit(app, query=''):
+    with app.test_request_context('/analytics/inspector-audit' + query):
+        session['tenant_id'] = T
+        data = _build_audit_data_dict()
+        close_db()
+    return data
+
+
+def compare(app, label, failures, query='', from_date='', to_date=''):
+    """Audit entries vs the reference, per inspection. Returns the page data."""
+    data = audit(app, query)
+    with app.app_context():
+        expected = legacy_entries(from_date, to_date)
+        unit_of = {r['id']: (r['unit_id'], r['cycle_number']) for r in query_db("SELECT * FROM inspection")}
+        close_db()
+    want = sorted(unit_of[k] + v for k, v in expected.items())
+    got = sorted((e['unit_id'], e['cycle_number'], e['duration'], e['defect_count'])
+                 for g in data['detail_groups'] for kind in ('snag', 'desnag') for e in g[kind]['units'])
+    if got != want:
+        diff = sorted(set(got) ^ set(want))
+        failures.append("{}: entries differ, e.g. {}".format(label, diff[:4]))
+    if not any(e[2] != 'N/A' for e in got) or not any(e[3] for e in got):
+        failures.append("{}: fixture produced no durations/defects".format(label))
+    return data
+
+
+def strip(data):
+    """Page data without the entries' helper key, for inline vs stored comparison."""
+    for g in data['detail_groups']:
+        for kind in ('snag', 'desnag'):
+            for e in g[kind]['units']:
+                e.pop('duration_mins', None)
+    return data
+
+
+def mutate(conn):
+    """Live edits that reach the stored metrics only through their triggers."""
+    conn.executescript("""
+        UPDATE inspection SET submitted_at = '2026-03-02T10:45:30.5Z', started_at = '2026-03-02 08:00:00',
+                              paused_at = NULL, total_paused_seconds = 0 WHERE id = 'insp-3-cyc-1';
+        UPDATE inspection SET paused_at = NULL WHERE id IN (SELECT id FROM inspection WHERE paused_at IS NOT NULL
+                                                            LIMIT 5);
+        UPDATE inspection SET total_paused_seconds = total_paused_seconds + 600 WHERE unit_id = 'unit-0005';
+        UPDATE inspection SET status = 'reviewed', inspector_id = 'insp-a' WHERE unit_id IN ('unit-0007', 'unit-0011');
+        UPDATE defect SET addressed_cycle_number = 2 WHERE unit_id IN ('unit-0001', 'unit-0009')
+            AND raised_cycle_number = 1;
+        UPDATE defect SET addressed_cycle_number = NULL WHERE unit_id = 'unit-0003';
+        UPDATE defect SET unit_id = 'unit-0013' WHERE unit_id = 'unit-0015';
+        DELETE FROM defect WHERE unit_id = 'unit-0021';
+        INSERT INTO defect (id, tenant_id, unit_id, item_template_id, raised_cycle_id, raised_cycle_number,
+                            status, original_comment, created_at)
+            VALUES ('def-new-1', 'tenant-test', 'unit-0001', 'it-0-0-0', 'cyc-1', 1, 'open', 'Late', '2026-02-20 09:00:00');
+        INSERT INTO inspection (id, tenant_id, unit_id, cycle_id, cycle_number, status, inspector_id,
+                                inspection_date, started_at, submitted_at, total_paused_seconds)
+            VALUES ('insp-new', 'tenant-test', 'unit-0002', 'cyc-3', 3, 'reviewed', 'insp-b', '2026-04-01',
+                    '2026-04-01T09:00:00.123Z', '2026-04-01T11:30:00+00:00', 120);
+        UPDATE defect SET addressed_cycle_number = 3 WHERE unit_id = 'unit-0002';
+    """)
+    conn.commit()
+
+
+def check_parse_ts(failures):
+    want = datetime(2026, 3, 2, 10, 45, 30, 500000, tzinfo=timezone.utc)
+    for value in ('2026-03-02T10:45:30.5Z', '2026-03-02 10:45:30.500', '2026-03-02T10:45:30.500000+00:00',
+                  '2026-03-02T12:45:30.5+02:00', '2026-03-02T10:45:30.5000001'):
+        if parse_ts(value) != want:
+            failures.append("parse_ts({!r}) = {}".format(value, parse_ts(value)))
+    if parse_ts('2026-03-02 10:45:30') != want.replace(microsecond=0):
+        failures.append("parse_ts: naive space form")
+    if parse_ts(None) is not None or parse_ts('') is not None or parse_ts('garbage') is not None:
+        failures.append("parse_ts: empty/garbage not None")
+
+
+def main():
+    failures = []
+    check_parse_ts(failures)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "audit.db")
+        build(db_path, 240)
+        extend(db_path)
+        app = Flask(__name__)
+        app.secret_key = 'test'
+        app.config['DATABASE_PATH'] = db_path
+
+        inline = strip(compare(app, "inline", failures))
+        result = subprocess.run([sys.executable, MIGRATION], env=dict(os.environ, DATABASE_PATH=db_path),
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            failures.append("migration failed: " + result.stderr[-300:])
+        stored = strip(compare(app, "migrated", failures))
+        if stored != inline:
+            failures.append("stored metrics page data differs from inline")
+
+        conn = sqlite3.connect(db_path)
+        mutate(conn)
+        compare(app, "triggers", failures)
+        stored = strip(audit(app))
+        before = conn.execute("SELECT id, duration_seconds, attributed_defects FROM inspection ORDER BY id").fetchall()
+        backfill(conn)
+        if conn.execute("SELECT id, duration_seconds, attributed_defects FROM inspection "
+                        "ORDER BY id").fetchall() != before:
+            failures.append("trigger-maintained metrics differ from a backfill")
+        conn.rollback()
+
+        # unit-0001 has a round 1 and a round 2 inspection: a new round-1 defect moves one count.
+        conn.executescript("""
+            CREATE TEMP TABLE rewrites (id TEXT);
+            CREATE TEMP TRIGGER count_rewrites AFTER UPDATE ON inspection
+            BEGIN INSERT INTO rewrites VALUES (NEW.id); END;
+        """)
+        conn.execute("INSERT INTO defect (id, tenant_id, unit_id, item_template_id, raised_cycle_id, "
+                     "raised_cycle_number, status, created_at) VALUES ('def-new-2', ?, 'unit-0001', "
+                     "'it-0-0-0', 'cyc-1', 1, 'open', '2026-02-21 09:00:00')", [T])
+        conn.execute("UPDATE defect SET original_comment = 'Reworded' WHERE id = 'def-new-2'")
+        rewritten = [r[0] for r in conn.execute("SELECT id FROM rewrites")]
+        if rewritten != ['insp-1-cyc-1']:
+            failures.append("defect insert rewrote {} (want only insp-1-cyc-1)".format(rewritten))
+        conn.rollback()
+        conn.execute("DROP TRIGGER temp.count_rewrites")
+
+        compare(app, "date range", failures, '?from_date=2026-02-01&to_date=2026-03-15',
+                '2026-02-01', '2026-03-15')
+        plan = ' '.join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM inspection i WHERE i.tenant_id = ? "
+            "AND i.inspection_date >= ? AND i.inspection_date <= ?", [T, '2026-02-01', '2026-03-15']))
+        if 'idx_inspection_tenant_date' not in plan:
+            failures.append("date-range filter not indexed: " + plan)
+        conn.close()
+
+    if failures:
+        print("=== INSPECTION METRICS: FAIL ===")
+        for f in failures[:20]:
+            print("  -", f)
+        sys.exit(1)
+    print("{} inspectors, {} snag units".format(len(stored['detail_groups']), stored['snag_totals']['units']))
+    print("=== INSPECTION METRICS: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
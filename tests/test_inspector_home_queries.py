@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+test_inspector_home_queries.py - query-count benchmark for the inspector home page.
+
+Builds the synthetic inspector fixture (tests/fixtures/build_inspector_home_fixture.py)
+with 10 and 100 open inspections, runs inspection._inspector_home_rows against
+each, and asserts:
+  - the number of SQL statements is the same at both sizes (no per-row
+    subqueries or _desnag_progress calls)
+  - every card matches the previous implementation (correlated COUNTs per row,
+    then _desnag_progress per round 2+ row), kept below as the reference
+
+Prints statement counts and wall time for both implementations.
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_inspector_home_queries.py   (from repo root)
+"""
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask
+from build_inspector_home_fixture import build, T, INSPECTOR
+from app.services.db import get_db, close_db, query_db
+from app.routes.inspection import _inspector_home_rows, _desnag_progress
+
+
+def legacy_home_rows(tenant_id, inspector_id):
+    """The home() card query before the single aggregate builder."""
+    rows = [dict(r) for r in query_db("""
+        SELECT i.id AS inspection_id, i.status AS inspection_status,
+               i.inspection_date, i.started_at, i.submitted_at,
+               u.id AS unit_id, u.unit_number, u.block, u.floor,
+               ic.cycle_number, ic.id AS cycle_id,
+               (SELECT COUNT(*) FROM inspection_item ii
+                WHERE ii.inspection_id = i.id
+                AND ii.status != 'skipped' AND NOT (ii.status = 'ok' AND ii.marked_at IS NULL AND COALESCE(ii.has_prior_defects, 0) = 0)) AS total_items,
+               (SELECT COUNT(*) FROM inspection_item ii
+                WHERE ii.inspection_id = i.id
+                AND ii.status NOT IN ('skipped', 'pending') AND NOT (ii.status = 'ok' AND ii.marked_at IS NULL AND COALESCE(ii.has_prior_defects, 0) = 0)) AS completed_items,
+               (SELECT COUNT(*) FROM inspection_defect idef
+                WHERE idef.inspection_id = i.id) AS defect_count,
+               (SELECT COUNT(*) FROM defect d2
+                JOIN inspection_cycle ic2 ON d2.raised_cycle_id = ic2.id
+                WHERE d2.unit_id = u.id AND d2.status = 'open'
+                AND ic2.cycle_number < ic.cycle_number
+                AND d2.tenant_id = i.tenant_id) AS prior_open_defects,
+               (SELECT COUNT(*) FROM defect d3
+                JOIN inspection_cycle ic3 ON d3.raised_cycle_id = ic3.id
+                WHERE d3.unit_id = u.id
+                AND ic3.cycle_number < ic.cycle_number
+                AND d3.tenant_id = i.tenant_id) AS prior_defects_total
+        FROM inspection i
+        JOIN unit u ON i.unit_id = u.id
+        JOIN inspection_cycle ic ON i.cycle_id = ic.id
+        WHERE i.inspector_id = ? AND i.tenant_id = ?
+        AND i.status IN ('not_started', 'in_progress', 'paused')
+        ORDER BY
+            CASE i.status WHEN 'in_progress' THEN 0 WHEN 'paused' THEN 1 ELSE 2 END,
+            u.unit_number
+    """, [inspector_id, tenant_id])]
+    for insp in rows:
+        if (insp.get('cycle_number') or 0) > 1:
+            p = _desnag_progress(insp['unit_id'], tenant_id, insp['cycle_number'])
+            insp['total_items'] = p['total']
+            insp['completed_items'] = p['addressed']
+            insp['defect_count'] = p['still_open']
+            insp['prior_open_defects'] = 0
+    return rows
+
+
+def run(db_path, builder):
+    """Return (rows, statement count, seconds) for one home page build."""
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = db_path
+    statements = []
+    with app.app_context():
+        get_db().set_trace_callback(statements.append)
+        started = time.perf_counter()
+        rows = builder(T, INSPECTOR)
+        elapsed = time.perf_counter() - started
+        close_db()
+    statements = [s for s in statements if not s.startswith("PRAGMA")]
+    return rows, len(statements), elapsed
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        small_path = os.path.join(tmp, "home_small.db")
+        large_path = os.path.join(tmp, "home_large.db")
+        build(small_path, inspections=10)
+        build(large_path, inspections=100)
+
+        _, small_q, small_s = run(small_path, _inspector_home_rows)
+        rows, large_q, large_s = run(large_path, _inspector_home_rows)
+        legacy, legacy_q, legacy_s = run(large_path, legacy_home_rows)
+
+    print(f"10 rows   queries={small_q} time={small_s * 1000:.1f}ms")
+    print(f"100 rows  queries={large_q} time={large_s * 1000:.1f}ms")
+    print(f"100 rows  legacy queries={legacy_q} time={legacy_s * 1000:.1f}ms")
+
+    if small_q != large_q:
+        failures.append(f"query count grows with rows: {small_q} -> {large_q}")
+    if len(rows) != 100:
+        failures.append(f"expected 100 open inspections got {len(rows)}")
+    if [r['inspection_id'] for r in rows] != [r['inspection_id'] for r in legacy]:
+        failures.append("row order differs from the legacy query")
+    for new, old in zip(rows, legacy):
+        if new != old:
+            diff = {k: (old.get(k), new.get(k)) for k in old if old.get(k) != new.get(k)}
+            failures.append(f"{old['inspection_id']} differs (legacy, new): {diff}")
+
+    if failures:
+        print("=== INSPECTOR HOME QUERY BENCHMARK: FAIL ===")
+        for f in failures[:20]:
+            print("  -", f)
+        sys.exit(1)
+    print("=== INSPECTOR HOME QUERY BENCHMARK: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+test_live_monitor.py - parity and query-scope check for the live/delta card path.
+
+Builds a small batch (C1 units in every status, C2 units with brought-forward
+defects, open chips and latents, a removed roster row and another tenant's
+unit), runs scripts/migrate_change_log.py, seeds app/services/live_rows.py with
+a full _build_live_monitor_data, then applies item / defect / chip / latent
+writes and compares the delta build (reuse=True) with an uncached full build:
+  - units, header strip KPIs and inspector race are identical
+  - only the units changes_since() reports are re-queried, the rest are reused
+  - none of the delta statements touch an unchanged unit's inspection
+and repeats that for a second round on top of the delta-built rows.
+
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_live_monitor.py   (from repo root)
+"""
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from flask import Flask, session
+from app.services.db import close_db, get_db
+from app.services.change_log import changes_since, unit_versions
+from app.services.live_rows import get_live_row_stats
+from app.routes.batches import _build_live_monitor_data, _live_unit_ids, _LIVE_STRUCTURAL_SOURCES
+
+MIGRATION = os.path.join(REPO_ROOT, "scripts", "migrate_change_log.py")
+
+SCHEMA = """
+CREATE TABLE unit (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, unit_number TEXT NOT NULL,
+                   block TEXT, floor INTEGER);
+CREATE TABLE inspection_cycle (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, cycle_number INTEGER NOT NULL);
+CREATE TABLE inspector (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, name TEXT);
+CREATE TABLE inspection_batch (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, name TEXT,
+                               status TEXT DEFAULT 'open', created_at TEXT, submitted_at TEXT);
+CREATE TABLE batch_unit (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, batch_id TEXT NOT NULL,
+                         unit_id TEXT NOT NULL, cycle_id TEXT, inspector_id TEXT,
+                         status TEXT DEFAULT 'pending', removed_at TEXT);
+CREATE TABLE inspection (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, unit_id TEXT NOT NULL,
+                         cycle_id TEXT NOT NULL, status TEXT NOT NULL, inspector_id TEXT,
+                         inspector_name TEXT, started_at TEXT, submitted_at TEXT,
+                         paused_at TEXT, total_paused_seconds INTEGER DEFAULT 0);
+CREATE TABLE area_template (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, area_name TEXT NOT NULL);
+CREATE TABLE category_template (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, area_id TEXT NOT NULL,
+                                category_name TEXT NOT NULL);
+CREATE TABLE item_template (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, category_id TEXT NOT NULL,
+                            item_description TEXT NOT NULL);
+CREATE TABLE inspection_item (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, inspection_id TEXT NOT NULL,
+                              item_template_id TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending',
+                              marked_at TEXT, comment TEXT, has_prior_defects INTEGER DEFAULT 0);
+CREATE TABLE defect (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, unit_id TEXT NOT NULL,
+                     item_template_id TEXT NOT NULL, raised_cycle_id TEXT NOT NULL,
+                     cleared_cycle_id TEXT, status TEXT NOT NULL DEFAULT 'open',
+                     addressed_cycle_number INTEGER);
+CREATE TABLE inspection_defect (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, inspection_id TEXT NOT NULL,
+                                item_template_id TEXT NOT NULL);
+CREATE TABLE latent_area_note (id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, unit_id TEXT NOT NULL,
+                               cycle_number INTEGER, area_template_id TEXT, area_name_override TEXT,
+                               rectified_at TEXT, rectified_at_cycle_number INTEGER,
+                               addressed_cycle_number INTEGER);
+"""
+T = "tenant-test"
+BATCH = "batch-1"
+AREAS = ("KITCHEN", "LOUNGE", "BEDROOM 1")
+C1_STATUSES = ("not_started", "in_progress", "paused", "submitted", "reviewed", "approved")
+
+
+def mark_time(rng):
+    return "2026-03-02 {:02d}:{:02d}:{:02d}".format(rng.randint(6, 9), rng.randint(0, 59), rng.randint(0, 59))
+
+
+def build(path, rng):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO inspection_cycle VALUES (?, ?, ?)",
+                     [("cyc-1", T, 1), ("cyc-2", T, 2)])
+    conn.executemany("INSERT INTO inspector VALUES (?, ?, ?)",
+                     [("insp-{}".format(n), T, name) for n, name in
+                      enumerate(("Ann Bell", "Cal Dube", "Eli"))])
+    conn.execute("INSERT INTO inspection_batch (id, tenant_id, name, created_at) VALUES (?, ?, 'B1', '2026-03-02')",
+                 (BATCH, T))
+    items = []
+    for a, area in enumerate(AREAS):
+        conn.execute("INSERT INTO area_template VALUES (?, ?, ?)", ("area-{}".format(a), T, area))
+        for c in range(2):
+            cat = "cat-{}-{}".format(a, c)
+            conn.execute("INSERT INTO category_template VALUES (?, ?, ?, ?)", (cat, T, "area-{}".format(a), cat))
+            for i in range(3):
+                items.append("it-{}-{}-{}".format(a, c, i))
+                conn.execute("INSERT INTO item_template VALUES (?, ?, ?, ?)", (items[-1], T, cat, items[-1]))
+
+    n_item = n_defect = 0
+    for n in range(24):
+        unit_id = "unit-{:02d}".format(n)
+        cycle = "cyc-1" if n < 14 else "cyc-2"
+        status = C1_STATUSES[n % len(C1_STATUSES)] if n < 14 else ("in_progress", "submitted")[n % 2]
+        conn.execute("INSERT INTO unit VALUES (?, ?, ?, ?, ?)",
+                     (unit_id, T, "U{:03d}".format(n), "A" if n % 2 else "B", n % 3))
+        conn.execute("INSERT INTO batch_unit (id, tenant_id, batch_id, unit_id, cycle_id, inspector_id) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", ("bu-{:02d}".format(n), T, BATCH, unit_id, cycle,
+                                                   "insp-{}".format(n % 3)))
+        if cycle == "cyc-2":
+            # Round 1 defects: some still open, some cleared already, some addressed.
+            for item in rng.sample(items, 4):
+                n_defect += 1
+                conn.execute("INSERT INTO defect (id, tenant_id, unit_id, item_template_id, raised_cycle_id, "
+                             "cleared_cycle_id, status, addressed_cycle_number) VALUES (?, ?, ?, ?, 'cyc-1', ?, ?, ?)",
+                             ("def-{:03d}".format(n_defect), T, unit_id, item,
+                              *rng.choice([(None, "open", None), ("cyc-2", "cleared", 2), (None, "open", 2)])))
+            conn.execute("INSERT INTO latent_area_note (id, tenant_id, unit_id, cycle_number, area_template_id) "
+                         "VALUES (?, ?, ?, 1, ?)", ("lat-{:02d}".format(n), T, unit_id, "area-{}".format(n % 3)))
+        if status == "not_started":
+            continue
+        insp = "insp-{}-{}".format(unit_id, cycle)
+        conn.execute("INSERT INTO inspection (id, tenant_id, unit_id, cycle_id, status, inspector_id, started_at, "
+                     "submitted_at, paused_at, total_paused_seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (insp, T, unit_id, cycle, status, "insp-{}".format(n % 3), "2026-03-02 06:00:00",
+                      "2026-03-02 10:00:00" if status in ("submitted", "reviewed", "approved") else None,
+                      "2026-03-02 09:30:00" if status == "paused" else None, 120))
+        for item in items if cycle == "cyc-1" else items[:6]:
+            n_item += 1
+            marked = status != "in_progress" or rng.random() < 0.5
+            conn.execute("INSERT INTO inspection_item (id, tenant_id, inspection_id, item_template_id, status, "
+                         "marked_at) VALUES (?, ?, ?, ?, ?, ?)",
+                         ("ii-{:04d}".format(n_item), T, insp, item,
+                          rng.choice(("ok", "ok", "not_to_standard", "not_installed")) if marked else "pending",
+                          mark_time(rng) if marked else None))
+        if status in ("submitted", "reviewed", "approved"):
+            for item in rng.sample(items, 3):
+                n_defect += 1
+                conn.execute("INSERT INTO defect (id, tenant_id, unit_id, item_template_id, raised_cycle_id) "
+                             "VALUES (?, ?, ?, ?, ?)", ("def-{:03d}".format(n_defect), T, unit_id, item, cycle))
+
+    # Removed roster row and another tenant's unit on the same batch id.
+    conn.execute("INSERT INTO unit VALUES ('unit-gone', ?, 'U900', 'A', 0)", (T,))
+    conn.execute("INSERT INTO batch_unit (id, tenant_id, batch_id, unit_id, cycle_id, removed_at) "
+                 "VALUES ('bu-gone', ?, ?, 'unit-gone', 'cyc-1', '2026-03-01')", (T, BATCH))
+    conn.execute("INSERT INTO unit VALUES ('unit-other', 'tenant-other', 'U901', 'A', 0)")
+    conn.execute("INSERT INTO batch_unit (id, tenant_id, batch_id, unit_id, cycle_id) "
+                 "VALUES ('bu-other', 'tenant-other', ?, 'unit-other', 'cyc-1')", (BATCH,))
+    conn.commit()
+    return conn
+
+
+def edit(conn, rng, round_number):
+    """Item marks, chips, defect clears and latent updates - no status or roster change."""
+    pending = conn.execute("SELECT ii.id FROM inspection_item ii JOIN inspection i ON i.id = ii.inspection_id "
+                           "WHERE ii.status = 'pending' AND i.status = 'in_progress' ORDER BY ii.id").fetchall()
+    for (item_id,) in rng.sample(pending, min(4, len(pending))):
+        conn.execute("UPDATE inspection_item SET status = 'not_to_standard', marked_at = ? WHERE id = ?",
+                     ("2026-03-02 11:{:02d}:00".format(rng.randint(0, 59)), item_id))
+    open_bfwd = conn.execute("SELECT id FROM defect WHERE raised_cycle_id = 'cyc-1' AND status = 'open' "
+                             "AND unit_id IN (SELECT unit_id FROM batch_unit WHERE cycle_id = 'cyc-2') "
+                             "ORDER BY id").fetchall()
+    (defect_id,) = rng.choice(open_bfwd)
+    conn.execute("UPDATE defect SET status = 'cleared', cleared_cycle_id = 'cyc-2', addressed_cycle_number = 2 "
+                 "WHERE id = ?", (defect_id,))
+    (insp,) = conn.execute("SELECT id FROM inspection WHERE cycle_id = 'cyc-2' AND status = 'in_progress' "
+                           "ORDER BY id LIMIT 1 OFFSET ?", (round_number,)).fetchone()
+    conn.execute("INSERT INTO inspection_defect VALUES (?, ?, ?, 'it-0-0-0')", ("idef-{}".format(round_number), T, insp))
+    conn.execute("UPDATE latent_area_note SET addressed_cycle_number = 2 WHERE id = ?",
+                 ("lat-{:02d}".format(15 + 2 * round_number),))
+    conn.commit()
+
+
+def run(app, **kwargs):
+    """(data, statements) for one _build_live_monitor_data call."""
+    statements = []
+    with app.test_request_context('/'):
+        session['tenant_id'] = T
+        get_db().set_trace_callback(statements.append)
+        data = _build_live_monitor_data(BATCH, T, **kwargs)
+        close_db()
+    return data, [s for s in statements if not s.startswith("PRAGMA")]
+
+
+def in_context(app, fn, *args):
+    with app.test_request_context('/'):
+        result = fn(*args)
+        close_db()
+    return result
+
+
+def diff(a, b, path=''):
+    """First differing path between two nested values, or None."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        for k in sorted(set(a) | set(b), key=str):
+            if k not in a or k not in b:
+                return '{}.{} missing on {}'.format(path, k, 'delta' if k not in a else 'full')
+            d = diff(a[k], b[k], '{}.{}'.format(path, k))
+            if d:
+                return d
+        return None
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        if len(a) != len(b):
+            return '{}: {} items vs {}'.format(path, len(a), len(b))
+        for n, (x, y) in enumerate(zip(a, b)):
+            d = diff(x, y, '{}[{}]'.format(path, n))
+            if d:
+                return d
+        return None
+    return None if a == b else '{}: {!r} vs {!r}'.format(path, a, b)
+
+
+def main():
+    failures = []
+    rng = random.Random(28)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "live.db")
+        conn = build(db_path, rng)
+        result = subprocess.run([sys.executable, MIGRATION], env=dict(os.environ, DATABASE_PATH=db_path),
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            failures.append("migration failed: {}".format(result.stdout + result.stderr))
+        app = Flask(__name__)
+        app.secret_key = 'test'
+        app.config['DATABASE_PATH'] = db_path
+        unit_ids = in_context(app, _live_unit_ids, BATCH, T)
+
+        versions = in_context(app, unit_versions, T, unit_ids)
+        seeded, statements = run(app, versions=versions)
+        print("full build   units={} statements={}".format(len(seeded['units']), len(statements)))
+        for round_number in range(2):
+            since = max(versions.values(), default=0)
+            edit(conn, rng, round_number)
+            versions = in_context(app, unit_versions, T, unit_ids)
+            changed = in_context(app, changes_since, T, unit_ids, since)
+            if not changed or any(src & _LIVE_STRUCTURAL_SOURCES for src in changed.values()):
+                failures.append("round {}: edits should be card-only, got {}".format(round_number, changed))
+                continue
+
+            built = get_live_row_stats()['built']
+            delta, statements = run(app, versions=versions, reuse=True)
+            rebuilt = get_live_row_stats()['built'] - built
+            fresh, _ = run(app)
+            fresh['feed'] = []
+            problem = diff(delta, fresh)
+            if problem:
+                failures.append("round {}: delta != full build at {}".format(round_number, problem))
+            if rebuilt != len(changed):
+                failures.append("round {}: re-queried {} rows for {} changed units".format(
+                    round_number, rebuilt, len(changed)))
+            unchanged = [u['inspection_id'] for u in fresh['units']
+                         if u['inspection_id'] and u['unit_id'] not in changed]
+            leaked = [s for s in statements if any("'{}'".format(i) in s for i in unchanged)]
+            if leaked:
+                failures.append("round {}: unchanged units queried: {}".format(round_number, leaked[0][:200]))
+            print("delta round {} changed={} rows re-queried={} statements={}".format(
+                round_number, sorted(changed), rebuilt, len(statements)))
+        conn.close()
+
+    if failures:
+        print("=== LIVE MONITOR: FAIL ===")
+        for f in failures:
+            print("  -", f)
+        sys.exit(1)
+    print("=== LIVE MONITOR: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
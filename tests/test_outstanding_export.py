@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+test_outstanding_export.py - streamed Outstanding Items exports and block / floor scope.
+
+Builds the Outstanding Items fixture (tests/fixtures/build_outstanding_items_fixture.py)
+and checks:
+  - /analytics/outstanding-items/export.csv and .xlsx carry exactly the punch list
+    rows of the HTML report, in report order; ?block= / ?floor= narrow them
+  - export.html is streamed, lists every unit and puts the totals after the
+    units; the regular view still shows the totals first
+  - iter_blocks(block=...) / (floor=...) only queries the blocks asked for
+    (block list + 2 statements per block)
+  - latent bullets are parsed once per note version: a second pass is all cache
+    hits; editing a note re-parses it, with or without a new last_edited_at
+  - ages are whole days to UTC now, with +HH:MM / Z created_at offsets converted
+    to UTC rather than dropped
+
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_outstanding_export.py   (from repo root)
+"""
+import csv
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from openpyxl import load_workbook
+from build_outstanding_items_fixture import build, T
+from app.services.db import close_db, get_db
+from app.services.outstanding_items import EXPORT_COLUMNS, get_latent_bullet_stats, iter_blocks, iter_units
+
+# (Block, Floor, Unit, Area, Trade, Item, Description, Cycle, Latent) - age left out
+ROWS = [
+    ['A', 'Ground', '1', 'KITCHEN', 'JOINERY', 'Cabinet > Door', 'Door sticks', 'C1', ''],
+    ['A', 'Ground', '1', 'KITCHEN', 'LATENT', '', 'Paint touch-up', 'C2', 'Y'],
+    ['A', 'Ground', '1', 'KITCHEN', 'LATENT', '', 'Clean grout', 'C2', 'Y'],
+    ['A', 'Ground', '1', 'BATHROOM', 'PLUMBING', 'Tap', 'Tap drips', 'C2', ''],
+    ['A', 'Ground', '2', 'KITCHEN', 'JOINERY', 'Cabinet', 'Scratched', 'C1', ''],
+    ['B', '1st Floor', '10', 'BATHROOM', 'PLUMBING', 'Tap', 'Leak', 'C2', ''],
+    ['B', '1st Floor', '10', 'BATHROOM', 'LATENT', '', 'Seal around bath', 'C2', 'Y'],
+]
+BASE = '/analytics/outstanding-items'
+
+
+def main():
+    failures = []
+
+    def expect(label, got, want):
+        if got != want:
+            failures.append("{}: got {!r}, want {!r}".format(label, got, want))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "outstanding.db")
+        build(db_path)
+        os.environ['DATABASE_PATH'] = db_path
+        from app import create_app
+        app = create_app()
+        client = app.test_client()
+        with client.session_transaction() as s:
+            s.update(user_id='tl', role='team_lead', tenant_id=T, user_name='Team Lead')
+
+        # --- CSV -------------------------------------------------------------
+        for query, want in [('', ROWS), ('?block=B', ROWS[5:]), ('?block=A&floor=0', ROWS[:5]),
+                            ('?floor=1', ROWS[5:]), ('?block=C', [])]:
+            resp = client.get(BASE + '/export.csv' + query)
+            expect("csv{} status".format(query), resp.status_code, 200)
+            expect("csv{} streamed".format(query), resp.is_streamed, True)
+            rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+            expect("csv{} header".format(query), rows[0], EXPORT_COLUMNS)
+            expect("csv{} rows".format(query), [r[:-1] for r in rows[1:]], want)
+            if not all(r[-1].isdigit() for r in rows[1:]):
+                failures.append("csv{}: age column not in days".format(query))
+        if '_Block_B_Floor_1.csv' not in client.get(BASE + '/export.csv?block=B&floor=1').headers['Content-Disposition']:
+            failures.append("csv filename does not carry the block / floor scope")
+
+        # --- XLSX ------------------------------------------------------------
+        resp = client.get(BASE + '/export.xlsx?block=A')
+        expect("xlsx status", resp.status_code, 200)
+        ws = load_workbook(io.BytesIO(resp.data), read_only=True).active
+        rows = [[c if c is not None else '' for c in r] for r in ws.iter_rows(values_only=True)]
+        expect("xlsx header", rows[0], EXPORT_COLUMNS)
+        expect("xlsx rows", [r[:-1] for r in rows[1:]], ROWS[:5])
+        expect("unknown format", client.get(BASE + '/export.pdf').status_code, 404)
+
+        # --- HTML ------------------------------------------------------------
+        resp = client.get(BASE + '/export.html')
+        expect("html status", resp.status_code, 200)
+        expect("html streamed", resp.is_streamed, True)
+        html = resp.get_data(as_text=True)
+        expect("html units", [u for u in ('UNIT 1<', 'UNIT 2<', 'UNIT 10<') if u in html],
+               ['UNIT 1<', 'UNIT 2<', 'UNIT 10<'])
+        if not html.index('UNIT 10<') < html.index('Open Snag Items'):
+            failures.append("streamed html: totals should follow the unit list")
+        if '<div class="num">4</div>' not in html:
+            failures.append("streamed html: open defect total missing")
+        view = client.get(BASE).get_data(as_text=True)
+        if not view.index('Open Snag Items') < view.index('UNIT 1<'):
+            failures.append("view: totals should precede the unit list")
+        scoped = client.get(BASE + '?block=B').get_data(as_text=True)
+        expect("view ?block=B units", ['UNIT 1<' in scoped, 'UNIT 10<' in scoped], [False, True])
+        if 'Block B' not in scoped or 'export.csv?block=B' not in scoped:
+            failures.append("view ?block=B: scope label or export link missing")
+        empty = client.get(BASE + '/export.html?block=C').get_data(as_text=True)
+        if 'No open items' not in empty:
+            failures.append("streamed html: empty state missing for an empty block")
+
+        # --- block / floor scope queries --------------------------------------
+        for label, kwargs, blocks, count in [('all', {}, ['A', 'B'], 5),
+                                             ('block B', {'block': 'B'}, ['B'], 3),
+                                             ('floor 0', {'floor': 0}, ['A'], 3)]:
+            statements = []
+            with app.test_request_context('/'):
+                get_db().set_trace_callback(statements.append)
+                got = [b for b, _ in iter_blocks(T, **kwargs)]
+                close_db()
+            statements = [s for s in statements if not s.startswith("PRAGMA")]
+            expect("iter_blocks {} blocks".format(label), got, blocks)
+            expect("iter_blocks {} statements".format(label), len(statements), count)
+
+        # --- latent bullet cache ---------------------------------------------
+        def bullets():
+            with app.test_request_context('/'):
+                got = [d['description'] for u in iter_units(T) for a in u['areas']
+                       for d in a['defects'] if d['is_latent']]
+                close_db()
+            return got
+
+        bullets()
+        before = get_latent_bullet_stats()
+        expect("second pass bullets", bullets(), ['Paint touch-up', 'Clean grout', 'Seal around bath'])
+        after = get_latent_bullet_stats()
+        expect("second pass hits", after['hits'] - before['hits'], 2)
+        expect("second pass misses", after['misses'] - before['misses'], 0)
+
+        c = sqlite3.connect(db_path)
+        c.execute("UPDATE latent_area_note SET note_html = '<ul><li>Reseal bath</li></ul>' WHERE id = 'l3'")
+        c.execute("UPDATE latent_area_note SET note_html = '<ul><li>Paint</li></ul>', "
+                  "last_edited_at = '2026-03-09 10:00:00' WHERE id = 'l1'")
+        c.commit()
+        c.close()
+        before = get_latent_bullet_stats()
+        expect("edited bullets", bullets(), ['Paint', 'Reseal bath'])
+        after = get_latent_bullet_stats()
+        expect("edited misses", after['misses'] - before['misses'], 2)
+
+        # --- ages ------------------------------------------------------------
+        c = sqlite3.connect(db_path)
+        c.execute("UPDATE defect SET created_at = '2026-03-01T23:30:00+02:00' WHERE id = 'd1'")
+        c.execute("UPDATE defect SET created_at = '2026-03-02T21:45:00.250Z' WHERE id = 'd2'")
+        c.commit()
+        c.close()
+        now = datetime(2026, 3, 8, 21, 40, tzinfo=timezone.utc)
+        with app.test_request_context('/'):
+            ages = {d['description']: d['age_days'] for u in iter_units(T, now=now)
+                    for a in u['areas'] for d in a['defects']}
+            close_db()
+        expect("age with +02:00 offset", ages.get('Door sticks'), 7)
+        expect("age with Z suffix", ages.get('Tap drips'), 5)
+
+    if failures:
+        print("=== OUTSTANDING EXPORT: FAIL ===")
+        for f in failures:
+            print("  -", f)
+        sys.exit(1)
+    print("=== OUTSTANDING EXPORT: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
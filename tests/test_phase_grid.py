@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+test_phase_grid.py - parity check for the phase unit grid queries.
+
+Builds a phase with units over two blocks plus an unassigned block and floor,
+overlapping active cycle ranges, closed cycles, inspections in several cycles
+per unit, open and closed defects, and another tenant's unit; plus a phase with
+no active cycle. Compares projects._phase_units_query with the correlated-
+subquery grid it replaced in all three modes (one cycle with and without a
+unit range, all active cycles, no active cycle):
+  - every unit row is identical, including the grouped MAX() bare columns
+    (latest covering cycle, inspection from the latest active cycle)
+  - each block/floor scope (u.block IS ? AND u.floor IS ?, NULLs included)
+    returns exactly that floor's rows
+  - _phase_floor_counts matches per-floor counts from the old rows, including
+    unlocked_count (rows the inspector view does not hide)
+
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_phase_grid.py   (from repo root)
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from flask import Flask
+from app.services.db import close_db, query_db
+from app.routes.projects import INSPECTOR_LOCKED_STATUSES, _phase_floor_counts, _phase_units_query
+
+SCHEMA = """
+CREATE TABLE unit (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    phase_id TEXT NOT NULL,
+    block TEXT,
+    floor INTEGER,
+    unit_number TEXT NOT NULL,
+    unit_type TEXT NOT NULL DEFAULT '2BR',
+    status TEXT DEFAULT 'not_started',
+    UNIQUE(phase_id, unit_number)
+);
+CREATE TABLE inspection_cycle (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    phase_id TEXT NOT NULL,
+    cycle_number INTEGER NOT NULL,
+    unit_start TEXT,
+    unit_end TEXT,
+    status TEXT DEFAULT 'active',
+    UNIQUE(phase_id, cycle_number)
+);
+CREATE TABLE inspection (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    cycle_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    UNIQUE(unit_id, cycle_id)
+);
+CREATE TABLE defect (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'open'
+);
+CREATE INDEX idx_unit_phase ON unit(phase_id);
+CREATE INDEX idx_inspection_unit ON inspection(unit_id);
+CREATE INDEX idx_defect_unit ON defect(unit_id);
+"""
+T = "tenant-test"
+UNITS = 240
+# (id, phase, number, unit_start, unit_end, status)
+CYCLES = [
+    ("cyc-1", "ph-1", 1, None, None, "closed"),
+    ("cyc-2", "ph-1", 2, "U040", "U150", "active"),
+    ("cyc-3", "ph-1", 3, "U120", "U199", "active"),
+    ("cyc-4", "ph-1", 4, "U000", "U060", "active"),
+    ("cyc-5", "ph-1", 5, None, None, "closed"),
+    ("cyc-9", "ph-2", 1, None, None, "closed"),
+]
+INSPECTION_STATUSES = ("not_started", "in_progress", "paused") + INSPECTOR_LOCKED_STATUSES
+UNIT_STATUSES = ("not_started", "in_progress", "defects_open", "cleared", "certified")
+
+# The grid before _phase_units_query: one query per mode, three correlated
+# subqueries per unit (two more per unit in the all-active-cycles mode).
+LEGACY_CYCLE = """
+    SELECT u.*,
+        u.unit_number,
+        ? as cycle_number,
+        ? as cycle_id,
+        (SELECT i.status FROM inspection i WHERE i.unit_id = u.id AND i.cycle_id = ?) as inspection_status,
+        (SELECT i.id FROM inspection i WHERE i.unit_id = u.id AND i.cycle_id = ?) as inspection_id,
+        (SELECT COUNT(*) FROM defect d WHERE d.unit_id = u.id AND d.status = 'open') as open_defects
+    FROM unit u
+    WHERE u.phase_id = ? AND u.tenant_id = ?
+    {range}
+    ORDER BY u.block, u.floor, u.unit_number
+"""
+LEGACY_ACTIVE = """
+    SELECT DISTINCT u.*,
+        u.unit_number,
+        (SELECT ic.cycle_number FROM inspection_cycle ic
+         WHERE ic.phase_id = u.phase_id AND ic.status = 'active'
+         AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))
+         ORDER BY ic.cycle_number DESC LIMIT 1) as cycle_number,
+        (SELECT ic.id FROM inspection_cycle ic
+         WHERE ic.phase_id = u.phase_id AND ic.status = 'active'
+         AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))
+         ORDER BY ic.cycle_number DESC LIMIT 1) as cycle_id,
+        (SELECT i.status FROM inspection i
+         JOIN inspection_cycle ic ON i.cycle_id = ic.id
+         WHERE i.unit_id = u.id AND ic.status = 'active'
+         ORDER BY ic.cycle_number DESC LIMIT 1) as inspection_status,
+        (SELECT i.id FROM inspection i
+         JOIN inspection_cycle ic ON i.cycle_id = ic.id
+         WHERE i.unit_id = u.id AND ic.status = 'active'
+         ORDER BY ic.cycle_number DESC LIMIT 1) as inspection_id,
+        (SELECT COUNT(*) FROM defect d WHERE d.unit_id = u.id AND d.status = 'open') as open_defects
+    FROM unit u
+    WHERE u.phase_id = ? AND u.tenant_id = ?
+    AND EXISTS (
+        SELECT 1 FROM inspection_cycle ic
+        WHERE ic.phase_id = u.phase_id AND ic.status = 'active'
+        AND (ic.unit_start IS NULL OR (u.unit_number >= ic.unit_start AND u.unit_number <= ic.unit_end))
+    )
+    ORDER BY u.block, u.floor, u.unit_number
+"""
+LEGACY_NONE = """
+    SELECT u.*,
+        u.unit_number,
+        NULL as cycle_number,
+        NULL as cycle_id,
+        NULL as inspection_status,
+        NULL as inspection_id,
+        (SELECT COUNT(*) FROM defect d WHERE d.unit_id = u.id AND d.status = 'open') as open_defects
+    FROM unit u
+    WHERE u.phase_id = ? AND u.tenant_id = ?
+    ORDER BY u.block, u.floor, u.unit_number
+"""
+
+
+def build(path, rng):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO inspection_cycle VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     [(c[0], T) + c[1:] for c in CYCLES])
+    n_defect = 0
+    for phase, count in (("ph-1", UNITS), ("ph-2", 40)):
+        cycles = [c[0] for c in CYCLES if c[1] == phase]
+        for n in range(count):
+            unit_id = "{}-u{:03d}".format(phase, n)
+            conn.execute("INSERT INTO unit (id, tenant_id, phase_id, block, floor, unit_number, status) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (unit_id, T, phase, rng.choice(("A", "B", "B", None)),
+                          rng.choice((0, 1, 2, 3, None)), "U{:03d}".format(n), rng.choice(UNIT_STATUSES)))
+            for cycle_id in rng.sample(cycles, rng.randint(0, len(cycles))):
+                conn.execute("INSERT INTO inspection VALUES (?, ?, ?, ?, ?)",
+                             ("i-{}-{}".format(unit_id, cycle_id), T, unit_id, cycle_id,
+                              rng.choice(INSPECTION_STATUSES)))
+            for _ in range(rng.choice((0, 0, 1, 3))):
+                n_defect += 1
+                conn.execute("INSERT INTO defect VALUES (?, ?, ?, ?)",
+                             ("d-{:04d}".format(n_defect), T, unit_id, rng.choice(("open", "open", "cleared"))))
+    # Another tenant's unit in the same phase, with an inspection and defects.
+    conn.execute("INSERT INTO unit (id, tenant_id, phase_id, block, floor, unit_number) "
+                 "VALUES ('other-u', 'tenant-other', 'ph-1', 'A', 1, 'U999')")
+    conn.execute("INSERT INTO inspection VALUES ('i-other', 'tenant-other', 'other-u', 'cyc-2', 'in_progress')")
+    conn.execute("INSERT INTO defect VALUES ('d-other', 'tenant-other', 'other-u', 'open')")
+    conn.commit()
+    return conn
+
+
+def legacy_rows(conn, phase_id, cycle, has_active):
+    if cycle:
+        sql, args = LEGACY_CYCLE, [cycle['cycle_number'], cycle['id'], cycle['id'], cycle['id'], phase_id, T]
+        if cycle['unit_start'] and cycle['unit_end']:
+            sql = sql.format(range="AND u.unit_number >= ? AND u.unit_number <= ?")
+            args += [cycle['unit_start'], cycle['unit_end']]
+        else:
+            sql = sql.format(range="")
+    elif has_active:
+        sql, args = LEGACY_ACTIVE, [phase_id, T]
+    else:
+        sql, args = LEGACY_NONE, [phase_id, T]
+    return [dict(r) for r in conn.execute(sql, args)]
+
+
+def floor_counts(rows):
+    """_phase_floor_counts computed from the legacy rows."""
+    counts = {}
+    for r in rows:
+        c = counts.setdefault((r['block'], r['floor']), dict(
+            block=r['block'], floor=r['floor'], unit_count=0, unlocked_count=0,
+            certified=0, cleared=0, open_defects=0))
+        c['unit_count'] += 1
+        c['unlocked_count'] += r['inspection_status'] not in INSPECTOR_LOCKED_STATUSES
+        c['certified'] += r['status'] == 'certified'
+        c['cleared'] += r['status'] == 'cleared'
+        c['open_defects'] += r['open_defects']
+    return [counts[k] for k in sorted(counts, key=lambda k: (k[0] is not None, k[0] or '', k[1] is not None, k[1] or 0))]
+
+
+def check_mode(conn, label, phase_id, cycle, has_active, failures):
+    want = legacy_rows(conn, phase_id, cycle, has_active)
+    sql, args = _phase_units_query(phase_id, T, cycle, has_active)
+    got = [dict(r) for r in query_db(sql + " ORDER BY u.block, u.floor, u.unit_number", args)]
+    if got != want:
+        diff = [(g, w) for g, w in zip(got, want) if g != w][:1]
+        failures.append("{}: {} rows vs {} legacy, e.g. {}".format(label, len(got), len(want), diff))
+
+    floors = sorted({(r['block'], r['floor']) for r in want} | {('B', 9), (None, 9)}, key=str)
+    for block_floor in floors:
+        sql, args = _phase_units_query(phase_id, T, cycle, has_active, block_floor=block_floor)
+        got = [dict(r) for r in query_db(sql + " ORDER BY u.unit_number", args)]
+        floor_want = [r for r in want if (r['block'], r['floor']) == block_floor]
+        if got != floor_want:
+            failures.append("{} floor {}: {} rows vs {} legacy".format(label, block_floor, len(got), len(floor_want)))
+
+    sql, args = _phase_units_query(phase_id, T, cycle, has_active)
+    got = [dict(r) for r in _phase_floor_counts(sql, args)]
+    if got != floor_counts(want):
+        failures.append("{}: floor counts differ, e.g. {}".format(
+            label, [(g, w) for g, w in zip(got, floor_counts(want)) if g != w][:1]))
+    unlocked = sum(f['unlocked_count'] or 0 for f in got)
+    print("{:28s} rows={:3d} floors={:2d} unlocked={:3d}".format(label, len(want), len(floors) - 2, unlocked))
+    return want
+
+
+def main():
+    failures = []
+    rng = random.Random(37)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "phase.db")
+        conn = build(db_path, rng)
+        conn.row_factory = sqlite3.Row
+        cycles = {r['id']: r for r in conn.execute("SELECT * FROM inspection_cycle")}
+        app = Flask(__name__)
+        app.config['DATABASE_PATH'] = db_path
+        with app.app_context():
+            for cycle_id in ("cyc-2", "cyc-3", "cyc-1"):
+                check_mode(conn, "cycle {}".format(cycle_id), "ph-1", cycles[cycle_id], True, failures)
+            rows = check_mode(conn, "all active cycles", "ph-1", None, True, failures)
+            check_mode(conn, "no active cycle", "ph-2", None, False, failures)
+            close_db()
+        # The fixture has to exercise what the grouped MAX() replaced.
+        if not any('U120' <= r['unit_number'] <= 'U150' for r in rows):
+            failures.append("fixture: no unit covered by two active cycles")
+        if not any(r['inspection_id'] and r['cycle_id'] not in r['inspection_id'] for r in rows):
+            failures.append("fixture: no unit whose latest inspection is outside its latest cycle")
+        if not any(r['block'] is None or r['floor'] is None for r in rows):
+            failures.append("fixture: no unassigned block or floor")
+        conn.close()
+
+    if failures:
+        print("=== PHASE GRID: FAIL ===")
+        for f in failures:
+            print("  -", f)
+        sys.exit(1)
+    print("=== PHASE GRID: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+test_pipeline_queries.py - query-count benchmark for the approvals pipeline.
+
+Builds the synthetic pipeline fixture (tests/fixtures/build_pipeline_fixture.py)
+at 5 batches x 6 zones and 50 batches x 6 zones, runs
+approvals._get_batch_pipeline against each, and asserts:
+  - the number of SQL statements is the same at both sizes (no per-batch or
+    per-zone queries)
+  - zone numbers on the large fixture match the planted rows
+  - before scripts/migrate_description_norm.py (no desc_norm columns) the
+    pipeline falls back to LOWER(TRIM(...)) and returns the same batches
+
+Prints the statement count and wall time per size. Exits 0 on pass, 1 on fail.
+Stdlib + the app's own requirements - no pytest dependency.
+
+Run locally:  python3 tests/test_pipeline_queries.py   (from repo root)
+"""
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask
+from build_pipeline_fixture import build, T
+from app.services.db import get_db, close_db
+from app.routes.approvals import _get_batch_pipeline
+
+
+def run_pipeline(db_path):
+    """Return (batches, statement count, seconds) for one pipeline build."""
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = db_path
+    statements = []
+    with app.app_context():
+        get_db().set_trace_callback(statements.append)
+        started = time.perf_counter()
+        batches = _get_batch_pipeline(T)
+        elapsed = time.perf_counter() - started
+        close_db()
+    # The PRAGMA issued by get_db() itself is not part of the pipeline.
+    statements = [s for s in statements if not s.startswith("PRAGMA")]
+    return batches, len(statements), elapsed
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        small_path = os.path.join(tmp, "pipeline_small.db")
+        large_path = os.path.join(tmp, "pipeline_large.db")
+        premigration_path = os.path.join(tmp, "pipeline_no_desc_norm.db")
+        build(small_path, batches=5, zones=6)
+        build(large_path, batches=50, zones=6)
+        build(premigration_path, batches=50, zones=6, desc_norm=False)
+
+        small, small_q, small_s = run_pipeline(small_path)
+        large, large_q, large_s = run_pipeline(large_path)
+        premigration, _, _ = run_pipeline(premigration_path)
+
+    print(f"5 x 6   batches={len(small)} queries={small_q} time={small_s * 1000:.1f}ms")
+    print(f"50 x 6  batches={len(large)} queries={large_q} time={large_s * 1000:.1f}ms")
+
+    if len(large) != 50:
+        failures.append(f"expected 50 batches got {len(large)}")
+    if small_q != large_q:
+        failures.append(f"query count grows with batches: {small_q} -> {large_q}")
+    if premigration != large:
+        failures.append("pipeline differs without desc_norm (LOWER(TRIM()) fallback)")
+
+    # batch-001, zone 0: 4 units, none removed; statuses cycle from index 1.
+    b1 = next(b for b in large if b['id'] == 'batch-001')
+    z0 = next(z for z in b1['zones'] if z['cycle_id'] == 'cyc-001-0')
+    expected = {
+        'batch_unit_count': 4,
+        'total_inspections': 4,       # in_progress, submitted, reviewed, pending_followup
+        'submitted_count': 1,
+        'reviewed_count': 2,
+        'signed_count': 1,
+        'defect_count': 8,            # two open defects per inspected unit
+        'needs_attention': 2,         # free-text defects on the 2 unreviewed units
+        'stage': 'reviewing',
+    }
+    for key, want in expected.items():
+        if z0[key] != want:
+            failures.append(f"batch-001/cyc-001-0 {key}: expected {want} got {z0[key]}")
+    if len(b1['zones']) != 6 or b1['total_units'] != 24:
+        failures.append(f"batch-001 expected 6 zones/24 units got "
+                        f"{len(b1['zones'])}/{b1['total_units']}")
+
+    if failures:
+        print("=== PIPELINE QUERY BENCHMARK: FAIL ===")
+        for f in failures:
+            print("  -", f)
+        sys.exit(1)
+    print("=== PIPELINE QUERY BENCHMARK: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
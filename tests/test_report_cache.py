@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+test_report_cache.py - invalidation and round-trip checks for the report data cache.
+
+Builds the defect lifecycle fixture (tests/fixtures/build_defect_facts_fixture.py),
+installs the report_change triggers, and drives app/services/report_cache.py
+with a snapshot builder (as-of counts from defect_facts) against a temp cache
+dir, asserting:
+  - a second call for the same (report, tenant, cutoff, params) is served from
+    disk and equals the fresh build (tuple keys, int keys, datetimes survive)
+  - writes stamped now keep the entry (a new defect, a clearance of a defect
+    raised after the cutoff, a review of an undated inspection), but a
+    clearance stamped now of a defect raised before the cutoff recomputes it
+    (its status is read as it is now)
+  - back-dated writes at or before the cutoff (review date edit, comment edit
+    on an old defect, deleted defect) recompute it; one after the cutoff does not
+  - changes to the current-state columns the snapshot reports read (new unit,
+    unit renamed, batch unit removed, batch closed) recompute it; a batch
+    unit's workflow status change does not
+  - future cutoffs and databases without report_change are never cached
+  - current-state entries (cutoff None) follow the change_log tenant version
+  - the real snapshot builders (analytics._build_pipeline_report_data(live=False)
+    and _build_site_meeting_brief_data, on tests/fixtures/build_snapshot_report_fixture.py)
+    encode without the unencodable fallback, and after a review, a defect
+    clearance or an inspection certification stamped now their cached data
+    equals an uncached rebuild
+
+Prints build vs cached wall time.
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_report_cache.py   (from repo root)
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask, session
+from build_defect_facts_fixture import build, T
+import build_snapshot_report_fixture
+from app.services.db import close_db
+from app.services.defect_facts import count_cleared, count_open, count_raised, trend_series
+from app.services import report_cache
+from app.services.report_cache import cached_report, install
+from app.routes.analytics import (_build_pipeline_report_data, _build_site_meeting_brief_data,
+                                  _cached_pipeline_report_data, _cached_site_meeting_brief_data)
+
+CUTOFF = '2026-03-10 17:00:00'
+BATCH_SCHEMA = """
+CREATE TABLE inspection_batch (id TEXT PRIMARY KEY, tenant_id TEXT, name TEXT, status TEXT,
+                               created_at TEXT, closed_at TEXT);
+CREATE TABLE batch_unit (id TEXT PRIMARY KEY, tenant_id TEXT, batch_id TEXT, unit_id TEXT,
+                         cycle_id TEXT, status TEXT, removed_at TEXT);
+INSERT INTO inspection_batch VALUES ('batch-1', 'tenant-test', 'SR-001', 'complete', '2026-01-12 08:00:00',
+                                     '2026-01-20 16:00:00');
+INSERT INTO inspection_batch VALUES ('batch-2', 'tenant-test', 'SR-002', 'open', '2026-02-09 08:00:00', NULL);
+INSERT INTO batch_unit VALUES ('bu-1', 'tenant-test', 'batch-2', 'unit-0001', 'cyc-2', 'pending', NULL);
+INSERT INTO batch_unit VALUES ('bu-2', 'tenant-test', 'batch-2', 'unit-0003', 'cyc-2', 'pending', NULL);
+"""
+builds = []
+
+
+def snapshot_report(cutoff=CUTOFF):
+    """A small snapshot builder with the value shapes the real reports return."""
+    builds.append(cutoff)
+    points = [(datetime(2026, 1, 6) + timedelta(days=14 * k)).strftime('%Y-%m-%d %H:%M:%S')
+              for k in range(6)]
+    return {
+        'ledger': {'open': count_open(T, cutoff, cutoff), 'raised': count_raised(T, cutoff, cutoff),
+                   'cleared': count_cleared(T, cutoff, cutoff)},
+        'zone_open': count_open(T, cutoff, cutoff, by=('block', 'floor')),
+        'floor_labels': {0: 'Ground', 1: '1st Floor', 2: '2nd Floor'},
+        'trend': trend_series(T, cutoff, points),
+        'snapshot_dt': datetime.strptime(cutoff, '%Y-%m-%d %H:%M:%S'),
+        'est_complete': datetime(2026, 9, 1).date(),
+        'areas': [{'name': a, 'count': c} for a, c in
+                  sorted(count_open(T, cutoff, cutoff, by='area_name').items())],
+    }
+
+
+def call(app, cutoff=CUTOFF, report='pipeline'):
+    with app.app_context():
+        started = time.perf_counter()
+        data = cached_report(report, T, cutoff, lambda: snapshot_report(cutoff or CUTOFF))
+        elapsed = time.perf_counter() - started
+        close_db()
+    return data, elapsed
+
+
+def real_builders(tmp, failures):
+    """The analytics snapshot builders, cached vs rebuilt, around writes stamped now."""
+    db_path = os.path.join(tmp, "snapshot_report.db")
+    build_snapshot_report_fixture.build(db_path, 240)
+    conn = sqlite3.connect(db_path)
+    install(conn)
+    conn.commit()
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = db_path
+    app.secret_key = 'test'
+    reports = [('pipeline', _cached_pipeline_report_data, lambda: _build_pipeline_report_data(live=False)),
+               ('site meeting brief', _cached_site_meeting_brief_data, _build_site_meeting_brief_data)]
+
+    def check(label):
+        for name, cached, uncached in reports:
+            with app.test_request_context('/'):
+                session['tenant_id'] = T
+                unencodable = report_cache._stats['unencodable']
+                data = cached()
+                if cached() != data:
+                    failures.append("{} {}: second call differs".format(name, label))
+                if report_cache._stats['unencodable'] != unencodable:
+                    failures.append("{} {}: data fell back to unencodable".format(name, label))
+                if data != uncached():
+                    failures.append("{} {}: cached data differs from an uncached rebuild".format(name, label))
+                close_db()
+
+    now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    check("first build")
+    conn.execute("UPDATE inspection SET status = 'reviewed', review_submitted_at = ? WHERE id IN "
+                 "(SELECT id FROM inspection WHERE status = 'submitted' AND review_submitted_at IS NULL)", [now])
+    conn.commit()
+    check("after a review stamped now")
+    conn.execute("UPDATE defect SET status = 'cleared', cleared_at = ? WHERE id IN "
+                 "(SELECT id FROM defect WHERE status = 'open' AND cleared_at IS NULL ORDER BY id LIMIT 25)", [now])
+    conn.commit()
+    check("after a clearance stamped now")
+    # As certification.py writes it: the report's completed set drops these rows.
+    conn.execute("UPDATE inspection SET status = 'certified', approved_at = COALESCE(approved_at, ?) "
+                 "WHERE status = 'reviewed' AND review_submitted_at IS NOT NULL", [now])
+    conn.commit()
+    check("after a certification stamped now")
+    conn.close()
+
+
+def main():
+    failures = []
+
+    def expect(label, rebuilt, before):
+        if (len(builds) > before) != rebuilt:
+            failures.append("{}: expected {}".format(label, 'a rebuild' if rebuilt else 'a cache hit'))
+
+    now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "report_cache.db")
+        os.environ['REPORT_CACHE_DIR'] = os.path.join(tmp, 'cache')
+        build(db_path, 240)
+        app = Flask(__name__)
+        app.config['DATABASE_PATH'] = db_path
+
+        # No report_change yet: computed every time.
+        call(app)
+        call(app)
+        if len(builds) != 2 or os.path.isdir(os.environ['REPORT_CACHE_DIR']):
+            failures.append("cached without report_change")
+
+        conn = sqlite3.connect(db_path)
+        conn.executescript(BATCH_SCHEMA)
+        install(conn)
+        installed = install(conn)
+        conn.commit()
+        # The fixture's unit table has no timestamp columns: inspection + defect only,
+        # plus the current-state triggers on unit, batch_unit and inspection_batch.
+        if len(installed) != 15:
+            failures.append("expected 15 triggers (5 tables x 3 events) got {}".format(installed))
+
+        fresh, build_s = call(app)
+        before = len(builds)
+        cached, hit_s = call(app)
+        expect("second call", False, before)
+        if cached != fresh:
+            failures.append("cached data differs from the fresh build")
+        print(f"build={build_s * 1000:.1f}ms  cached={hit_s * 1000:.1f}ms")
+
+        def write(label, sql, args, rebuilt):
+            before = len(builds)
+            conn.execute(sql, args)
+            conn.commit()
+            data, _ = call(app)
+            expect(label, rebuilt, before)
+            with app.app_context():
+                if data != snapshot_report():
+                    failures.append("{}: served data differs from a fresh build".format(label))
+                builds.pop()
+                close_db()
+
+        write("new defect stamped now",
+              "INSERT INTO defect (id, tenant_id, unit_id, item_template_id, raised_cycle_id, "
+              "raised_cycle_number, status, created_at) VALUES ('def-x', ?, 'unit-0001', 'it-0-0-0', "
+              "'cyc-1', 1, 'open', ?)", [T, now], False)
+        write("clearance stamped now of a defect raised after the cutoff",
+              "UPDATE defect SET status = 'cleared', cleared_at = ? WHERE id IN "
+              "(SELECT id FROM defect WHERE status = 'open' AND cleared_at IS NULL AND created_at > ? LIMIT 5)",
+              [now, CUTOFF], False)
+        write("clearance stamped now of an old defect",
+              "UPDATE defect SET status = 'cleared', cleared_at = ? WHERE id IN "
+              "(SELECT id FROM defect WHERE status = 'open' AND cleared_at IS NULL AND created_at < ? LIMIT 5)",
+              [now, CUTOFF], True)
+        write("review stamped now of an undated inspection",
+              "UPDATE inspection SET status = 'reviewed', review_submitted_at = ? "
+              "WHERE status = 'in_progress'", [now], False)
+        write("back-dated edit after the cutoff",
+              "UPDATE inspection SET review_submitted_at = '2026-05-20 10:00:00' "
+              "WHERE review_submitted_at > '2026-05-01' AND review_submitted_at < '2026-05-10'", [], False)
+        write("back-dated review edit before the cutoff",
+              "UPDATE inspection SET review_submitted_at = '2026-02-01 10:00:00' "
+              "WHERE review_submitted_at > '2026-02-10' AND review_submitted_at < '2026-02-12'", [], True)
+        write("comment edit on an old defect",
+              "UPDATE defect SET original_comment = 'Reworded' WHERE id = "
+              "(SELECT id FROM defect WHERE created_at < '2026-02-01' LIMIT 1)", [], True)
+        write("deleted old defect",
+              "DELETE FROM defect WHERE id = (SELECT id FROM defect WHERE created_at < '2026-02-01' LIMIT 1)",
+              [], True)
+        write("no-op update", "UPDATE defect SET status = status WHERE created_at < '2026-02-01'", [], False)
+        write("batch unit assigned", "UPDATE batch_unit SET status = 'assigned' WHERE id = 'bu-1'", [], False)
+        write("batch unit removed", "UPDATE batch_unit SET status = 'removed', removed_at = ? WHERE id = 'bu-2'",
+              [now], True)
+        write("batch closed", "UPDATE inspection_batch SET status = 'complete', closed_at = ? WHERE id = 'batch-2'",
+              [now], True)
+        write("new unit", "INSERT INTO unit VALUES ('unit-new', ?, '9001', 'A', 1)", [T], True)
+        write("unit renamed to TEST", "UPDATE unit SET unit_number = 'TEST9001' WHERE id = 'unit-new'", [], True)
+
+        # Other cutoffs and reports are separate entries; a future cutoff is never cached.
+        before = len(builds)
+        call(app, '2026-04-02 08:00:00')
+        call(app, '2026-04-02 08:00:00')
+        call(app, report='pipeline_other')
+        expect("new cutoff", True, before)
+        if len(builds) - before != 2:
+            failures.append("expected one build per new key, got {}".format(len(builds) - before))
+        before = len(builds)
+        future = (datetime.utcnow() + timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')
+        call(app, future)
+        call(app, future)
+        if len(builds) - before != 2:
+            failures.append("future cutoff was cached")
+
+        # Current-state entries follow change_log.
+        conn.execute("CREATE TABLE change_log (seq INTEGER PRIMARY KEY AUTOINCREMENT, tenant_id TEXT, "
+                     "unit_id TEXT, source TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.commit()
+        before = len(builds)
+        call(app, None, 'top_50')
+        call(app, None, 'top_50')
+        expect("current-state repeat", True, before)
+        if len(builds) - before != 1:
+            failures.append("current-state entry not reused")
+        conn.execute("INSERT INTO change_log (tenant_id, unit_id, source) VALUES (?, 'unit-0003', 'defect')", [T])
+        conn.commit()
+        before = len(builds)
+        call(app, None, 'top_50')
+        expect("current-state after a write", True, before)
+        conn.close()
+
+        with app.app_context():
+            stats = report_cache.get_report_cache_stats()
+        if not stats['entries'] or not stats['hits']:
+            failures.append("stats show no entries/hits: {}".format(stats))
+
+        real_builders(tmp, failures)
+
+    if failures:
+        print("=== REPORT CACHE: FAIL ===")
+        for f in failures[:20]:
+            print("  -", f)
+        sys.exit(1)
+    print("=== REPORT CACHE: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+test_trend_series.py - 52-fortnight benchmark for the pipeline trend series.
+
+Builds the defect lifecycle fixture (tests/fixtures/build_defect_facts_fixture.py)
+over two years, walks back 52 fortnights from a snapshot the way
+_build_pipeline_report_data does, and asserts:
+  - defect_facts.trend_series issues one statement for the whole series
+  - every (raised, cleared) point matches the per-point count_raised /
+    count_cleared queries the report ran before (two per fortnight)
+  - the same holds with defect_fact dropped (rows derived inline)
+
+Prints statement counts and wall time for both builders.
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_trend_series.py   (from repo root)
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask
+from build_defect_facts_fixture import build, T
+from app.services.db import close_db, get_db
+from app.services.defect_facts import count_cleared, count_raised, install, rebuild, trend_series
+
+FORTNIGHTS = 52
+SNAPSHOT = datetime(2028, 1, 4, 12, 0, 0)
+
+
+def steps():
+    """Snapshot and the 51 fortnights before it, oldest first."""
+    return [(SNAPSHOT - timedelta(days=14 * k)).strftime('%Y-%m-%d %H:%M:%S')
+            for k in range(FORTNIGHTS - 1, -1, -1)]
+
+
+def legacy_series(gate, points):
+    """Two COUNT queries per point, as the trend loop did."""
+    return [(count_raised(T, gate, p), count_cleared(T, gate, p)) for p in points]
+
+
+def run(app, builder, gate, points):
+    """Return (series, statement count, seconds) for one trend build."""
+    statements = []
+    with app.app_context():
+        get_db().set_trace_callback(statements.append)
+        started = time.perf_counter()
+        series = builder(gate, points)
+        elapsed = time.perf_counter() - started
+        close_db()
+    statements = [s for s in statements if not s.startswith("PRAGMA")]
+    return series, len(statements), elapsed
+
+
+def main():
+    failures = []
+    points = steps()
+    # Snapshot gate, a gate mid-series (later reviews hidden) and a live "today" point.
+    gates = [points[-1], points[FORTNIGHTS // 2], '2030-01-01 00:00:00']
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "trend.db")
+        build(db_path, 400, weeks=FORTNIGHTS * 2)
+        conn = sqlite3.connect(db_path)
+        install(conn)
+        rebuild(conn)
+        conn.commit()
+
+        app = Flask(__name__)
+        app.config['DATABASE_PATH'] = db_path
+        for label in ("defect_fact", "no table"):
+            for gate in gates:
+                series, new_q, new_s = run(app, lambda g, p: trend_series(T, g, p), gate, points)
+                legacy, legacy_q, legacy_s = run(app, legacy_series, gate, points)
+                if gate == gates[0]:
+                    print(f"{label:<12} {FORTNIGHTS} points  one-pass queries={new_q} "
+                          f"time={new_s * 1000:.1f}ms  per-point queries={legacy_q} "
+                          f"time={legacy_s * 1000:.1f}ms")
+                if new_q != 1:
+                    failures.append(f"{label}: trend_series ran {new_q} statements")
+                if series != legacy:
+                    bad = [(p, old, new) for p, old, new in zip(points, legacy, series) if old != new]
+                    failures.append(f"{label} gate={gate}: {len(bad)} points differ, first {bad[:1]}")
+                if not any(r for r, _ in series):
+                    failures.append(f"{label} gate={gate}: empty series")
+            conn.execute("DROP TABLE IF EXISTS defect_fact")
+            conn.commit()
+        conn.close()
+
+    if failures:
+        print("=== TREND SERIES BENCHMARK: FAIL ===")
+        for f in failures[:20]:
+            print("  -", f)
+        sys.exit(1)
+    print("=== TREND SERIES BENCHMARK: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+test_zone_summary.py - parity and drift check for the dashboard zone summary.
+
+Builds the defect lifecycle fixture (tests/fixtures/build_defect_facts_fixture.py)
+and compares app/services/zone_summary.zone_rows with the six grouped queries
+analytics.dashboard ran before (unit counts, open round-1 defects, rounds,
+certified, inspected per zone, inspected project-wide), kept below as the
+reference:
+  - with no table (rows derived inline)
+  - after install + rebuild
+  - after edits that only reach zone_summary through its triggers (reviews,
+    certifications, clears, reopens, unit moves, TEST renames, deletes)
+and asserts zone_rows is one statement and a trigger's zone refresh only
+searches indexes (no full scan of unit, defect or inspection). Then bypasses the triggers and checks
+scripts/diagnostics/check_zone_summary.py reports the drift (exit 1) and
+--repair fixes it (exit 0).
+
+Exits 0 on pass, 1 on fail. Stdlib + the app's own requirements - no pytest
+dependency.
+
+Run locally:  python3 tests/test_zone_summary.py   (from repo root)
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "fixtures"))
+
+from flask import Flask
+from build_defect_facts_fixture import build, T
+from app.services.db import close_db, get_db, query_db
+from app.services.zone_summary import ZONE_SELECT, _ZONE_IS, _zone_of_unit, check, install, rebuild, zone_rows
+
+CHECKER = os.path.join(REPO_ROOT, "scripts", "diagnostics", "check_zone_summary.py")
+REVIEWED = "('reviewed','approved','certified','pending_followup')"
+
+
+def legacy_zones():
+    """{(block, floor): card numbers} from the dashboard's original queries, plus project inspected."""
+    zones = {(r['block'], r['floor']): {'total_units': r['n'], 'open_defects': 0, 'inspected': 0,
+                                        'certified': 0, 'rounds': {}}
+             for r in query_db("SELECT u.block, u.floor, COUNT(DISTINCT u.id) AS n FROM unit_real u "
+                               "WHERE u.tenant_id = ? AND u.unit_number NOT LIKE 'TEST%' "
+                               "GROUP BY u.block, u.floor", [T])}
+    for r in query_db("""
+        SELECT u.block, u.floor, COUNT(d.id) AS n FROM defect d JOIN unit_real u ON d.unit_id = u.id
+        WHERE d.tenant_id = ? AND d.status = 'open' AND d.raised_cycle_id NOT LIKE 'test-%'
+        AND EXISTS (SELECT 1 FROM inspection i2 WHERE i2.unit_id = d.unit_id AND i2.cycle_id = d.raised_cycle_id
+                    AND i2.status IN """ + REVIEWED + """)
+        AND d.raised_cycle_number = 1 GROUP BY u.block, u.floor""", [T]):
+        zones[(r['block'], r['floor'])]['open_defects'] = r['n']
+    for r in query_db("""
+        SELECT u.block, u.floor, i.cycle_number, COUNT(DISTINCT i.unit_id) AS n
+        FROM inspection i JOIN unit_real u ON i.unit_id = u.id
+        WHERE i.tenant_id = ? AND i.cycle_id NOT LIKE 'test-%' AND i.status IN """ + REVIEWED + """
+        GROUP BY u.block, u.floor, i.cycle_number""", [T]):
+        zones[(r['block'], r['floor'])]['rounds'][r['cycle_number']] = r['n']
+    for r in query_db("""
+        SELECT u.block, u.floor, COUNT(DISTINCT i.unit_id) AS n FROM inspection i JOIN unit_real u ON i.unit_id = u.id
+        WHERE i.tenant_id = ? AND i.status = 'certified' AND i.cycle_id NOT LIKE 'test-%'
+        GROUP BY u.block, u.floor""", [T]):
+        zones[(r['block'], r['floor'])]['certified'] = r['n']
+    for r in query_db("""
+        SELECT u.block, u.floor, COUNT(DISTINCT i.unit_id) AS n FROM inspection i JOIN unit_real u ON i.unit_id = u.id
+        WHERE i.tenant_id = ? AND i.cycle_id NOT LIKE 'test-%' AND i.status IN """ + REVIEWED + """
+        AND i.cycle_number = 1 GROUP BY u.block, u.floor""", [T]):
+        zones[(r['block'], r['floor'])]['inspected'] = r['n']
+    project = query_db("""
+        SELECT COUNT(DISTINCT i.unit_id) AS n FROM inspection i JOIN unit_real u ON u.id = i.unit_id
+        WHERE i.tenant_id = ? AND i.cycle_id NOT LIKE 'test-%' AND i.status IN """ + REVIEWED + """
+        AND i.cycle_number = 1""", [T], one=True)['n']
+    return zones, project
+
+
+def compare(app, label, failures):
+    statements = []
+    with app.app_context():
+        get_db().set_trace_callback(statements.append)
+        rows = zone_rows(T)
+        get_db().set_trace_callback(None)
+        expected, project = legacy_zones()
+        close_db()
+    statements = [s for s in statements if not s.startswith("PRAGMA")]
+    if len(statements) != 1:
+        failures.append("{}: zone_rows ran {} statements".format(label, len(statements)))
+    if [(r['block'], r['floor']) for r in rows] != sorted(expected):
+        failures.append("{}: zones/order differ: {}".format(label, [(r['block'], r['floor']) for r in rows]))
+    for r in rows:
+        want = expected.get((r['block'], r['floor']))
+        got = {k: r[k] for k in ('total_units', 'open_defects', 'inspected', 'certified', 'rounds')}
+        if got != want:
+            failures.append("{} {}/{}: expected {} got {}".format(label, r['block'], r['floor'], want, got))
+    if sum(r['inspected'] for r in rows) != project:
+        failures.append("{}: project inspected {} != {}".format(
+            label, sum(r['inspected'] for r in rows), project))
+
+
+def mutate(conn):
+    """Live edits that reach zone_summary only through its triggers."""
+    conn.executescript("""
+        UPDATE inspection SET status = 'reviewed' WHERE status = 'in_progress'
+            AND unit_id IN ('unit-0003', 'unit-0008', 'unit-0011');
+        UPDATE inspection SET status = 'certified' WHERE unit_id IN ('unit-0004', 'unit-0010');
+        UPDATE inspection SET status = 'submitted' WHERE unit_id = 'unit-0005';
+        UPDATE defect SET status = 'cleared' WHERE status = 'open' AND unit_id IN ('unit-0001', 'unit-0007');
+        UPDATE defect SET status = 'open' WHERE status = 'cleared' AND unit_id = 'unit-0009';
+        UPDATE defect SET raised_cycle_number = 2 WHERE unit_id = 'unit-0013';
+        UPDATE defect SET unit_id = 'unit-0012' WHERE unit_id = 'unit-0014' AND status = 'open';
+        DELETE FROM defect WHERE unit_id = 'unit-0002';
+        INSERT INTO defect (id, tenant_id, unit_id, item_template_id, raised_cycle_id,
+                            raised_cycle_number, status, original_comment, created_at)
+            VALUES ('def-new-6', 'tenant-test', 'unit-0006', 'it-0-0-0', 'cyc-1', 1, 'open',
+                    'Late addition', '2026-02-20 09:00:00');
+        UPDATE unit SET block = 'D', floor = 9 WHERE id IN ('unit-0015', 'unit-0021');
+        UPDATE unit SET floor = 0 WHERE id = 'unit-0022';
+        UPDATE unit SET unit_number = 'TEST-0016' WHERE id = 'unit-0016';
+        UPDATE unit SET unit_number = '0025' WHERE id = 'unit-0025';
+        INSERT INTO unit VALUES ('unit-new', 'tenant-test', '9001', 'E', 1);
+        DELETE FROM unit WHERE id = 'unit-0019';
+        DELETE FROM inspection WHERE unit_id = 'unit-0017' AND cycle_id = 'cyc-1';
+        INSERT INTO inspection VALUES ('insp-new', 'tenant-test', 'unit-new', 'cyc-1', 1,
+                                       'reviewed', '2026-04-10 09:00:00');
+    """)
+    conn.commit()
+
+
+def run_checker(db_path, *args):
+    env = dict(os.environ, DATABASE_PATH=db_path)
+    return subprocess.run([sys.executable, CHECKER] + list(args), env=env,
+                          capture_output=True, text=True).returncode
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "zones.db")
+        build(db_path, 240)
+        app = Flask(__name__)
+        app.config['DATABASE_PATH'] = db_path
+        compare(app, "no table", failures)
+
+        conn = sqlite3.connect(db_path)
+        install(conn)
+        install(conn)
+        zones = rebuild(conn)
+        conn.commit()
+        compare(app, "rebuilt", failures)
+        refresh = ZONE_SELECT.format(where=_ZONE_IS.format(**_zone_of_unit("'unit-0001'")).format(a='u'))
+        scans = [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + refresh) if r[3].startswith('SCAN')
+                 and r[3].split()[1] in ('unit', 'u', 'u2', 'defect', 'd', 'inspection', 'i')]
+        if scans:
+            failures.append("zone refresh scans tables: {}".format(scans))
+
+        mutate(conn)
+        compare(app, "triggers", failures)
+        if check(conn):
+            failures.append("trigger-maintained zones drifted: {}".format(check(conn)[:3]))
+        if run_checker(db_path) != 0:
+            failures.append("checker failed on a consistent table")
+
+        # Raw writes with the triggers gone: the checker must see it, --repair fix it.
+        conn.execute("DROP TRIGGER trg_zs_defect_upd")
+        conn.execute("UPDATE defect SET status = 'cleared' WHERE unit_id IN "
+                     "(SELECT id FROM unit WHERE block = 'C' AND floor = 1)")
+        conn.execute("UPDATE zone_summary SET certified = certified + 1 WHERE block = 'A' AND floor = 2")
+        conn.commit()
+        if len(check(conn)) != 2:
+            failures.append("check() expected 2 drifted zones, got {}".format(check(conn)))
+        if run_checker(db_path) != 1:
+            failures.append("checker passed a drifted table")
+        if run_checker(db_path, '--repair') != 0 or check(conn):
+            failures.append("checker --repair left drift")
+        conn.close()
+        compare(app, "repaired", failures)
+
+    if failures:
+        print("=== ZONE SUMMARY: FAIL ===")
+        for f in failures[:20]:
+            print("  -", f)
+        sys.exit(1)
+    print(f"{zones} zones")
+    print("=== ZONE SUMMARY: PASS ===")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
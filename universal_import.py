@@ -10,14 +10,15 @@ Usage:
 
 Requires: python-docx (pip install python-docx)
 """
-import sqlite3
 import uuid
 import sys
 import os
 from datetime import datetime, timezone
 from difflib import SequenceMatcher
 
-DB_PATH = '/var/data/inspections.db'
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.services.db import connect
+
 TENANT = 'MONOGRAPH'
 
 # ============================================================
@@ -702,7 +703,7 @@ def main():
     print("TEMPLATE RESOLUTION")
     print("=" * 60)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()  # $DATABASE_PATH, else /var/data/inspections.db
     cur = conn.cursor()
 
     resolved = []